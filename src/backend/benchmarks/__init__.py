@@ -0,0 +1 @@
+# Performance benchmarks (python -m backend.benchmarks.<name>)
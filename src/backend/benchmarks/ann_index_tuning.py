@@ -0,0 +1,148 @@
+"""
+ANN indeks ayarı: bir vektör kümesini geçici bir koleksiyona kopyalar, her indeks tipi için indeksi kurar ve arama
+parametresi taramasında (HNSW: ef, IVF_*: nprobe) sorgu kümesini tekrar oynatır. Her ayar için tam aramaya (numpy
+brute-force) göre recall@k ile p50/p99 gecikmeyi (ms) raporlar; koleksiyon boyutuna göre MILVUS_INDEX_TYPE,
+MILVUS_METRIC, MILVUS_INDEX_PARAMS ve MILVUS_SEARCH_PARAMS seçmek için kullanılır.
+Vektörler mevcut bir koleksiyondan (--source) okunur ya da --synthetic ile rastgele üretilir. Sorgular --queries
+dosyasındaki satırların embedding'leri ya da kümeden örneklenen vektörlerin gürültülü kopyalarıdır.
+Çalışan bir Milvus gerekir; geçici koleksiyon sonda silinir.
+
+Kullanım:
+    python -m backend.benchmarks.ann_index_tuning --source chunks_v3 --limit 100000 --index HNSW,IVF_SQ8,IVF_PQ,FLAT
+    python -m backend.benchmarks.ann_index_tuning --synthetic 200000 --metric COSINE --queries sorgular.txt --top-k 10
+    python -m backend.benchmarks.ann_index_tuning --synthetic 50000 --index HNSW --index-params '{"HNSW": {"M": 32}}'
+"""
+import argparse
+import json
+import time
+import numpy as np
+from pymilvus import Collection, connections, utility
+from backend.services.milvus_service import (
+    EMBEDDING_DIM, RECORD_FIELDS, build_index_params, build_schema, build_search_params, normalize_rows, to_record
+)
+
+# İndeks tipi başına taranan arama parametresi ve değerleri
+SWEEPS = {
+    "FLAT": (None, [None]),
+    "IVF_FLAT": ("nprobe", [1, 4, 16, 64, 128]),
+    "IVF_SQ8": ("nprobe", [1, 4, 16, 64, 128]),
+    "IVF_PQ": ("nprobe", [1, 4, 16, 64, 128]),
+    "HNSW": ("ef", [16, 32, 64, 128, 256]),
+}
+
+def load_source(name: str, limit: int, batch_size: int = 1000) -> np.ndarray:
+    collection = Collection(name)
+    collection.load()
+    iterator = collection.query_iterator(batch_size=batch_size, limit=limit, output_fields=["embedding"])
+    vectors = []
+    while True:
+        batch = iterator.next()
+        if not batch:
+            break
+        vectors.extend(hit["embedding"] for hit in batch)
+    iterator.close()
+    return np.asarray(vectors, dtype=np.float32)
+
+def make_queries(args, data: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    if args.queries:
+        from backend.services.embedding_service import EmbeddingService
+        with open(args.queries, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        return np.asarray(EmbeddingService().embed(texts[:args.num_queries]), dtype=np.float32)
+    picked = data[rng.choice(len(data), size=min(args.num_queries, len(data)), replace=False)]
+    return picked + rng.normal(scale=0.1 * float(data.std()), size=picked.shape).astype(np.float32)
+
+def exact_top_k(data: np.ndarray, queries: np.ndarray, metric: str, top_k: int, chunk: int = 64) -> np.ndarray:
+    """Tam arama: sorgu başına en yakın top_k satır indeksi (sırasız)."""
+    squared = np.einsum("ij,ij->i", data, data) if metric == "L2" else None
+    result = np.empty((len(queries), top_k), dtype=np.int64)
+    for start in range(0, len(queries), chunk):
+        scores = queries[start:start + chunk] @ data.T
+        if metric == "L2":
+            scores = 2 * scores - squared  # -||q - x||^2 + ||q||^2; sıralama için yeterli
+        result[start:start + chunk] = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    return result
+
+def insert(collection: Collection, data: np.ndarray, batch_size: int = 10000) -> np.ndarray:
+    keys = []
+    for start in range(0, len(data), batch_size):
+        vectors = data[start:start + batch_size]
+        records = [to_record({"chunk_id": start + i}) for i in range(len(vectors))]
+        columns = [vectors] + [[r[field] for r in records] for field in RECORD_FIELDS]
+        keys.extend(collection.insert(columns).primary_keys)
+    collection.flush()
+    return np.asarray(keys, dtype=np.int64)
+
+def measure(collection: Collection, queries: np.ndarray, truth: np.ndarray, row_of, params, top_k: int):
+    latencies, found = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        hits = collection.search(data=[query], anns_field="embedding", param=params, limit=top_k)[0]
+        latencies.append((time.perf_counter() - started) * 1000)
+        found += len({row_of[hit.id] for hit in hits} & set(expected.tolist()))
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return found / truth.size, p50, p99
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default="19530")
+    parser.add_argument("--source", default=None, help="Vektörlerin okunacağı koleksiyon")
+    parser.add_argument("--limit", type=int, default=100000, help="--source'tan okunacak en fazla vektör")
+    parser.add_argument("--synthetic", type=int, default=0, help="--source yerine bu kadar rastgele vektör")
+    parser.add_argument("--collection", default="bench_ann_tuning")
+    parser.add_argument("--metric", default="COSINE", choices=["L2", "IP", "COSINE"])
+    parser.add_argument("--index", default="HNSW,IVF_FLAT,IVF_SQ8,IVF_PQ,FLAT")
+    parser.add_argument("--index-params", default="{}", help='İndeks tipi başına build parametreleri (JSON)')
+    parser.add_argument("--queries", default=None, help="Her satırı bir sorgu olan metin dosyası")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    if not args.source and not args.synthetic:
+        parser.error("--source or --synthetic is required")
+
+    rng = np.random.default_rng(7)
+    connections.connect(host=args.host, port=args.port)
+    if args.source:
+        data = load_source(args.source, args.limit)
+    else:
+        data = rng.standard_normal((args.synthetic, EMBEDDING_DIM), dtype=np.float32)
+    queries = make_queries(args, data, rng)
+    if args.metric != "L2":
+        # Servis COSINE/IP koleksiyonlarına normalize vektör yazar ve normalize sorgu ile arar
+        data, queries = normalize_rows(data), normalize_rows(queries)
+    truth = exact_top_k(data, queries, args.metric, args.top_k)
+    overrides = json.loads(args.index_params)
+    print(f"{len(data)} vectors, {len(queries)} queries, metric={args.metric}, top_k={args.top_k}")
+
+    if utility.has_collection(args.collection):
+        utility.drop_collection(args.collection)
+    collection = Collection(args.collection, build_schema(data.shape[1]))
+    try:
+        keys = insert(collection, data)
+        row_of = {int(key): row for row, key in enumerate(keys)}
+        print(f"{'index':<9} {'build params':<34} {'search params':<16} {'build s':>8} {'recall':>7} {'p50 ms':>7} {'p99 ms':>7}")
+        for index_type in args.index.upper().split(","):
+            index_params = build_index_params(index_type, args.metric, overrides.get(index_type))
+            collection.release()
+            for index in collection.indexes:
+                index.drop()
+            started = time.perf_counter()
+            collection.create_index(field_name="embedding", index_params=index_params)
+            utility.wait_for_index_building_complete(args.collection)
+            collection.load()
+            build_s = time.perf_counter() - started
+            name, values = SWEEPS[index_type]
+            for value in values:
+                params = build_search_params(index_type, args.metric, {name: value} if name else None, args.top_k)
+                measure(collection, queries[:10], truth[:10], row_of, params, args.top_k)  # ısınma
+                recall, p50, p99 = measure(collection, queries, truth, row_of, params, args.top_k)
+                print(
+                    f"{index_type:<9} {json.dumps(index_params['params']):<34} {json.dumps(params['params']):<16} "
+                    f"{build_s:>8.1f} {recall:>7.3f} {p50:>7.2f} {p99:>7.2f}"
+                )
+    finally:
+        utility.drop_collection(args.collection)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Çok sorgulu arama verimi: aynı sorgu kümesini önce sorgu başına search ile, sonra batch boyutu B olan search_many
+çağrılarıyla (nq = B) arar ve saniyedeki sorgu sayısını raporlar. --embed ile sorgu metinlerinin encode süresi de
+(sorgu başına encode ve tek batch encode) ölçülür. Geçici koleksiyon sonda silinir; milvus backend'i çalışan bir
+Milvus (MILVUS_HOST/MILVUS_PORT) gerektirir.
+
+Kullanım:
+    python -m backend.benchmarks.batch_search --backend embedded --vectors 100000 --batch-sizes 1,8,32,128,512
+    python -m backend.benchmarks.batch_search --backend milvus --vectors 200000 --queries 1024 --embed
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from backend.services.milvus_service import EMBEDDING_DIM
+from backend.services.vector_store import create_vector_store
+
+def random_vectors(rng: np.random.Generator, count: int) -> np.ndarray:
+    return rng.standard_normal((count, EMBEDDING_DIM), dtype=np.float32)
+
+def throughput(fn, items, batch_size: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(items), batch_size):
+        fn(items[start:start + batch_size])
+    return len(items) / (time.perf_counter() - started)
+
+def bench_embedding(args) -> None:
+    from backend.services.embedding_service import EmbeddingService
+    service = EmbeddingService()
+    service.embed(["ısınma"])
+    print(f"{'encode':<12} {'batch':>6} {'queries/s':>10}")
+    for batch_size in [1] + args.batch_sizes:
+        # Her ölçüm farklı metinler kullanır; embedding önbelleğinden dönmez
+        texts = [f"değerlendirme sorgusu {batch_size}-{i} belge içeriği hakkında" for i in range(args.queries)]
+        print(f"{'embed':<12} {batch_size:>6} {throughput(service.embed, texts, batch_size):>10.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="embedded", help="embedded veya milvus")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=512)
+    parser.add_argument("--batch-sizes", default="8,32,128,512")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--tenant", default=None, help="Aramayı bu tenant'la sınırla (tenant-0 ... tenant-9)")
+    parser.add_argument("--embed", action="store_true", help="Sorgu encode verimini de ölç")
+    parser.add_argument("--dir", default=tempfile.gettempdir(), help="Embedded backend'in geçici dizini")
+    args = parser.parse_args()
+    args.batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    rng = np.random.default_rng(7)
+    collection = f"bench_batch_search_{os.getpid()}"
+    kwargs = {"path": os.path.join(args.dir, collection)} if args.backend == "embedded" else {}
+    store = create_vector_store(args.backend, collection, **kwargs)
+    try:
+        for start in range(0, args.vectors, 5000):
+            size = min(5000, args.vectors - start)
+            store.insert_embeddings(random_vectors(rng, size), [{"tenant_id": f"tenant-{(start + i) % 10}"} for i in range(size)])
+        store.flush()
+        queries = random_vectors(rng, args.queries)
+        store.search_many(queries[:8], top_k=args.top_k)  # ısınma
+
+        def single(batch):
+            for query in batch:
+                store.search(query, top_k=args.top_k, tenant_id=args.tenant)
+
+        def many(batch):
+            store.search_many(batch, top_k=args.top_k, tenant_id=args.tenant)
+
+        print(f"{args.backend}: {args.vectors} vectors x {EMBEDDING_DIM} dims, {args.queries} queries, top_k={args.top_k}")
+        print(f"{'search':<12} {'batch':>6} {'queries/s':>10} {'speedup':>8}")
+        baseline = throughput(single, queries, 1)
+        print(f"{'per-query':<12} {1:>6} {baseline:>10.0f} {1.0:>8.1f}")
+        for batch_size in args.batch_sizes:
+            qps = throughput(many, queries, batch_size)
+            print(f"{'search_many':<12} {batch_size:>6} {qps:>10.0f} {qps / baseline:>8.1f}")
+    finally:
+        store.drop()
+    if args.embed:
+        bench_embedding(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Chunk stream bellek benchmark'ı: iter_pdf_sections'ı bölüm bölüm tüketmek ile tüm chunk'ları
+extract_pdf_document ile listede toplamayı farklı doküman boyutlarında karşılaştırır.
+Her ölçüm ayrı bir process'te yapılır ve peak RSS raporlanır; akış modunda peak bellek
+doküman boyundan bağımsız kalmalıdır.
+
+Kullanım:
+    python -m backend.benchmarks.chunk_stream_memory --pages 250 1000 2000
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from backend.benchmarks.pdf_page_visitor import make_synthetic_pdf
+from backend.services.file import pdf_adapter
+
+def _run(mode: str, file_path: str, queue) -> None:
+    started = time.perf_counter()
+    children = 0
+    if mode == "stream":
+        for _, section_children in pdf_adapter.iter_pdf_sections(file_path):
+            children += len(section_children)
+    else:
+        children = len(pdf_adapter.extract_pdf_document(file_path)[1])
+    # Linux'ta ru_maxrss KB cinsindendir
+    queue.put((time.perf_counter() - started, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, children))
+
+def measure(mode: str, file_path: str):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(mode, file_path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[250, 1000, 2000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            file_path = os.path.join(tmp, f"synthetic_{pages}.pdf")
+            make_synthetic_pdf(file_path, pages)
+            for mode in ("collect", "stream"):
+                elapsed, peak_mb, children = measure(mode, file_path)
+                print(f"pages={pages:<5} {mode:<7}: {elapsed:.2f}s peak RSS {peak_mb:.0f} MB ({children} child chunk)")
+
+if __name__ == "__main__":
+    main()
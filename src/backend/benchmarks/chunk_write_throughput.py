@@ -0,0 +1,111 @@
+"""
+Chunk ingest throughput benchmark: satır bazlı INSERT ... RETURNING yolu ile
+BulkChunkWriter (unnest + COPY) yolunu chunks/sec cinsinden karşılaştırır.
+
+Kullanım (canlı Postgres gerekir, CORE_DATABASE_URL):
+    python -m backend.benchmarks.chunk_write_throughput --parents 200 --children-per-parent 25
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from databases import Database
+from backend.services.core.config import CoreConfig
+from backend.services.file.chunk_writer import BulkChunkWriter
+
+def make_chunks(num_parents: int, children_per_parent: int):
+    parents = [
+        {"id": i, "title": f"Bölüm {i}", "content": "", "order": i, "metadata": {"page": i + 1}}
+        for i in range(num_parents)
+    ]
+    children = [
+        {
+            "parent_id": i,
+            "content": f"Bölüm {i} içindeki {j}. paragraf. " * 8,
+            "type": "Text",
+            "order": j,
+            "metadata": {"page": i + 1, "paragraph_index": j},
+        }
+        for i in range(num_parents)
+        for j in range(children_per_parent)
+    ]
+    return parents, children
+
+async def write_per_row(db: Database, file_id: str, parents, children):
+    """upload pipeline'ının önceki (satır başına bir round trip) yazma yolu"""
+    parent_id_map = {}
+    for parent in parents:
+        row = await db.fetch_one(
+            """
+            INSERT INTO parent_chunks (document_id, title, content, "order", metadata)
+            VALUES (:document_id, :title, :content, :order, :metadata)
+            RETURNING id
+            """,
+            {
+                "document_id": file_id,
+                "title": parent["title"],
+                "content": parent["content"],
+                "order": parent["order"],
+                "metadata": json.dumps(parent["metadata"], ensure_ascii=True),
+            },
+        )
+        parent_id_map[parent["id"]] = row[0]
+    for child in children:
+        await db.fetch_one(
+            """
+            INSERT INTO child_chunks (parent_id, content, type, "order", metadata)
+            VALUES (:parent_id, :content, :type, :order, :metadata)
+            RETURNING id
+            """,
+            {
+                "parent_id": parent_id_map[child["parent_id"]],
+                "content": child["content"],
+                "type": child["type"],
+                "order": child["order"],
+                "metadata": json.dumps(child["metadata"], ensure_ascii=True),
+            },
+        )
+
+async def create_file_row(db: Database) -> str:
+    file_id = str(uuid.uuid4())
+    await db.execute(
+        """
+        INSERT INTO files (file_id, original_filename, content_type, original_size, num_chunks, chunked_total_size, upload_time)
+        VALUES (:file_id, 'benchmark.pdf', 'application/pdf', 0, 0, 0, :upload_time)
+        """,
+        {"file_id": file_id, "upload_time": datetime.now(timezone.utc)},
+    )
+    return file_id
+
+async def run(num_parents: int, children_per_parent: int, repeat: int):
+    db = Database(CoreConfig().database_url)
+    await db.connect()
+    parents, children = make_chunks(num_parents, children_per_parent)
+    total = len(parents) + len(children)
+    try:
+        for name in ("per_row", "bulk"):
+            timings = []
+            for _ in range(repeat):
+                file_id = await create_file_row(db)
+                started = time.perf_counter()
+                if name == "per_row":
+                    await write_per_row(db, file_id, parents, children)
+                else:
+                    await BulkChunkWriter(db).write(file_id, parents, [dict(c) for c in children])
+                timings.append(time.perf_counter() - started)
+                # parent/child satırları ON DELETE CASCADE ile silinir
+                await db.execute("DELETE FROM files WHERE file_id = :file_id", {"file_id": file_id})
+            best = min(timings)
+            print(f"{name:>8}: {total} chunks in {best:.3f}s -> {total / best:,.0f} chunks/sec (best of {repeat})")
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parents", type=int, default=200)
+    parser.add_argument("--children-per-parent", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.parents, args.children_per_parent, args.repeat))
@@ -0,0 +1,65 @@
+"""
+Embedding backend throughput benchmark: SentenceTransformer (PyTorch eager) ile ONNX Runtime
+(fp32 ve int8 dinamik quantization) backend'lerini aynı chunk seti üzerinde karşılaştırır.
+Her backend için chunks/sec, batch gecikmesi ve torch çıktısına göre cosine benzerliği (min/ortalama) raporlanır.
+ONNX grafikleri yoksa --onnx-dir altına bir kez export edilir (süreye dahil değildir).
+
+Kullanım:
+    python -m backend.benchmarks.embedding_backend --chunks 2000 --batch-size 32 --threads 0
+"""
+import argparse
+import random
+import tempfile
+import time
+import numpy as np
+from backend.services.embedding.config import EmbeddingConfig
+from backend.services.embedding.onnx_backend import available_cores, load_onnx_model
+
+WORDS = ("hyperion belge arama platformu yüklenen dokümanları bölümlere ayırır ve vektör "
+         "veritabanına ekler her bölüm paragraflara cümlelere bölünür the ingestion worker "
+         "embeds every child chunk before indexing").split()
+
+def make_chunks(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    # Paragraf chunk'larına benzer uzunluk dağılımı: 10-120 kelime
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 120))) for _ in range(count)]
+
+def measure(model, chunks, batch_size: int):
+    model.encode(chunks[:batch_size], batch_size=batch_size)  # warm-up
+    started = time.perf_counter()
+    vectors = model.encode(chunks, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+    return np.asarray(vectors, dtype=np.float32), time.perf_counter() - started
+
+def cosine(a, b):
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EmbeddingConfig().default_model)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op thread sayısı (0: atanmış çekirdek sayısı)")
+    parser.add_argument("--onnx-dir", default=None, help="Export dizini (varsayılan: geçici dizin)")
+    args = parser.parse_args()
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    chunks = make_chunks(args.chunks)
+    onnx_dir = args.onnx_dir or tempfile.mkdtemp(prefix="onnx-bench-")
+    print(f"{args.chunks} chunks, batch_size={args.batch_size}, cores={available_cores()}, torch threads={torch.get_num_threads()}")
+
+    reference, elapsed = measure(SentenceTransformer(args.model, device="cpu"), chunks, args.batch_size)
+    batches = -(-len(chunks) // args.batch_size)
+    print(f"{'torch':<10}: {len(chunks) / elapsed:8.1f} chunks/s, {elapsed / batches * 1000:7.1f} ms/batch")
+    for name, quantize in (("onnx-fp32", False), ("onnx-int8", True)):
+        config = EmbeddingConfig(onnx_dir=onnx_dir, onnx_quantize=quantize, onnx_intra_op_threads=args.threads)
+        vectors, elapsed = measure(load_onnx_model(args.model, config), chunks, args.batch_size)
+        sims = cosine(vectors, reference)
+        print(
+            f"{name:<10}: {len(chunks) / elapsed:8.1f} chunks/s, {elapsed / batches * 1000:7.1f} ms/batch, "
+            f"cosine min={sims.min():.4f} mean={sims.mean():.4f}"
+        )
+
+if __name__ == "__main__":
+    main()
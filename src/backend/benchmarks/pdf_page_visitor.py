@@ -0,0 +1,130 @@
+"""
+PDF parse benchmark: eski çok geçişli ayrıştırma (bölüm başına get_text("text"), tüm sayfalarda
+pdfplumber, listeler için ayrı get_text("dict") geçişi) ile tek geçişli sayfa ziyaretçisini
+karşılaştırır. Her mod ayrı bir process'te çalışır; duvar saati süresi ve peak RSS raporlanır.
+Sentetik PDF'te çizgili tablolar, madde işaretli listeler ve görseller bulunur.
+
+Kullanım:
+    python -m backend.benchmarks.pdf_page_visitor --pages 300 --table-every 10
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import resource
+import tempfile
+import time
+import fitz  # PyMuPDF
+from backend.services.file import pdf_adapter
+from backend.services.file.page_visitor import BULLET_PATTERNS, clean_page_text
+
+PARAGRAPH = (
+    "Hyperion belge tabanlı arama platformu yüklenen dokümanları bölümlere ayırır. "
+    "Her bölüm paragraflara ve cümlelere bölünerek vektör veritabanına eklenir. "
+)
+
+def make_synthetic_pdf(path: str, pages: int, table_every: int = 10, pages_per_section: int = 10) -> None:
+    doc = fitz.open()
+    toc = []
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 32, 32), False)
+    pixmap.clear_with(200)
+    for page_num in range(pages):
+        page = doc.new_page()
+        if page_num % pages_per_section == 0:
+            toc.append([1, f"Bölüm {page_num // pages_per_section + 1}", page_num + 1])
+        page.insert_textbox(fitz.Rect(40, 40, 555, 300), (PARAGRAPH * 6) + f"Sayfa {page_num + 1}.", fontsize=8)
+        page.insert_textbox(fitz.Rect(40, 310, 555, 400), "- birinci madde\n- ikinci madde\n1. numaralı madde", fontsize=8)
+        if page_num % table_every == 0:
+            # 4x3 çizgili tablo
+            x0, y0, cell_w, cell_h = 40, 420, 120, 20
+            for row in range(5):
+                page.draw_line((x0, y0 + row * cell_h), (x0 + 3 * cell_w, y0 + row * cell_h))
+            for col in range(4):
+                page.draw_line((x0 + col * cell_w, y0), (x0 + col * cell_w, y0 + 4 * cell_h))
+            for row in range(4):
+                for col in range(3):
+                    page.insert_text((x0 + col * cell_w + 4, y0 + row * cell_h + 14), f"h{row}{col}", fontsize=8)
+            page.insert_image(fitz.Rect(400, 600, 464, 664), pixmap=pixmap)
+    doc.set_toc(toc)
+    doc.save(path)
+    doc.close()
+
+def legacy_extract(file_path: str):
+    """Sayfa ziyaretçisi öncesindeki ayrıştırma geçişleri: metin, pdfplumber (tüm sayfalar), listeler."""
+    import pdfplumber
+    doc = fitz.open(file_path)
+    parent_chunks = pdf_adapter.build_toc_hierarchy(doc.get_toc()) or pdf_adapter.page_parents(doc)
+    tasks = []
+    for i, parent in enumerate(parent_chunks):
+        next_idx = i + 1
+        while next_idx < len(parent_chunks) and parent_chunks[next_idx].get("level", 0) > parent.get("level", 0):
+            next_idx += 1
+        end = parent_chunks[next_idx]["metadata"]["page"] - 1 if next_idx < len(parent_chunks) else doc.page_count
+        tasks.append((parent["metadata"]["page"] - 1, end))
+    texts = []
+    for start, end in tasks:
+        joined = "\n".join(t for t in (clean_page_text(doc[n].get_text("text")) for n in range(start, end)) if t)
+        texts.append(re.sub(r'(?<!\n)\n(?!\n)', ' ', joined))
+    tables = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            tables.extend(page.extract_tables())
+            page.images
+    lists = 0
+    for page in doc:
+        for block in page.get_text("dict")["blocks"]:
+            block_text = " ".join(span["text"] for line in block.get("lines", []) for span in line.get("spans", [])).strip()
+            if block_text and any(pat.match(block_text) for pat in BULLET_PATTERNS):
+                lists += 1
+    doc.close()
+    return len(tables), lists
+
+def visit_document(doc):
+    """Tüm sayfaları ziyaret eder; extractor adı -> sayfa sırasıyla birleştirilmiş sonuç listesi."""
+    merged = {name: [] for name in pdf_adapter.PAGE_EXTRACTORS}
+    for _, results in pdf_adapter.iter_page_results(doc):
+        for name, items in results.items():
+            merged[name].extend(items)
+    return merged
+
+def visitor_extract(file_path: str):
+    doc = fitz.open(file_path)
+    pages = visit_document(doc)
+    doc.close()
+    tables = pdf_adapter.extract_ruled_tables(file_path, pages["table_pages"])
+    return len(tables), len(pages["lists"])
+
+def _run(mode: str, file_path: str, queue) -> None:
+    started = time.perf_counter()
+    counts = (legacy_extract if mode == "legacy" else visitor_extract)(file_path)
+    elapsed = time.perf_counter() - started
+    # Linux'ta ru_maxrss KB cinsindendir
+    queue.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, counts))
+
+def measure(mode: str, file_path: str):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(mode, file_path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--table-every", type=int, default=10, help="Her N sayfada bir çizgili tablo ve görsel")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "synthetic.pdf")
+        make_synthetic_pdf(file_path, args.pages, args.table_every)
+        results = {mode: measure(mode, file_path) for mode in ("legacy", "visitor")}
+        for mode, (elapsed, peak_mb, (tables, lists)) in results.items():
+            print(f"{mode:<8}: {elapsed:.2f}s peak RSS {peak_mb:.0f} MB (tablo={tables}, liste bloğu={lists})")
+        legacy_time, legacy_rss = results["legacy"][:2]
+        visitor_time, visitor_rss = results["visitor"][:2]
+        print(f"speedup x{legacy_time / visitor_time:.2f}, peak RSS farkı {legacy_rss - visitor_rss:.0f} MB")
+
+if __name__ == "__main__":
+    main()
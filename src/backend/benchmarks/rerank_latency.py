@@ -0,0 +1,69 @@
+"""
+Cross-encoder rerank gecikmesi: sentetik sorgu ve aday kümesini CrossEncoderReranker ile farklı zaman bütçelerinde
+rerank eder ve p50/p99 gecikmeyi (ms), skorlanan aday oranını ve tekrarlanan sorgularda önbellek etkisini raporlar.
+Model ilk çalıştırmada indirilir (ONNX backend'inde ayrıca dışa aktarılır).
+
+Kullanım:
+    python -m backend.benchmarks.rerank_latency --backend torch --candidates 20 --budgets 0,100,250,1000
+    python -m backend.benchmarks.rerank_latency --backend onnx --batch-size 8 --queries 100
+"""
+import argparse
+import asyncio
+import random
+import time
+import numpy as np
+from backend.services.search.config import SearchConfig
+from backend.services.search.rerank import CrossEncoderReranker
+
+WORDS = (
+    "belge sözleşme fatura ödeme tarih müşteri teslimat ürün garanti iade süre madde taraf yükümlülük bedel "
+    "hizmet rapor analiz sonuç performans kullanıcı sistem kayıt güvenlik erişim yetki veri yedek sunucu"
+).split()
+
+def sentence(rng: random.Random, length: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+async def run(reranker: CrossEncoderReranker, queries, candidates, budget_ms: float):
+    latencies, scored = [], []
+    for query, items in zip(queries, candidates):
+        started = time.perf_counter()
+        results = await reranker.rerank(query, items, top_k=len(items), budget_ms=budget_ms)
+        latencies.append((time.perf_counter() - started) * 1000)
+        scored.append(sum(r['rerank_score'] is not None for r in results) / len(items))
+    return np.percentile(latencies, [50, 99]), float(np.mean(scored))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="torch", help="torch veya onnx")
+    parser.add_argument("--model", default=SearchConfig().rerank_model)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--candidate-words", type=int, default=120)
+    parser.add_argument("--batch-size", type=int, default=SearchConfig().rerank_batch_size)
+    parser.add_argument("--budgets", default="0,100,250,1000", help="Virgülle ayrılmış ms")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    queries = [sentence(rng, 8) for _ in range(args.queries)]
+    candidates = [
+        [{'parent_id': q * 1000 + i, 'content': sentence(rng, args.candidate_words)} for i in range(args.candidates)]
+        for q in range(args.queries)
+    ]
+    budgets = [float(b) for b in args.budgets.split(",")]
+
+    async def bench():
+        warmup = CrossEncoderReranker(model_name=args.model, config=SearchConfig(rerank_backend=args.backend, rerank_batch_size=args.batch_size))
+        await warmup.rerank(queries[0], candidates[0][:2])  # model yükleme
+        print(f"{args.model} ({args.backend}), {args.queries} queries x {args.candidates} candidates, batch={args.batch_size}")
+        print(f"{'budget ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'scored':>7} {'cached p99':>11}")
+        for budget in budgets:
+            # Her bütçe boş önbellekle ölçülür; ikinci tur aynı sorguları önbellekten yanıtlar
+            reranker = CrossEncoderReranker(model=warmup.model, model_name=args.model, config=warmup.config)
+            (p50, p99), scored = await run(reranker, queries, candidates, budget)
+            (_, cached_p99), _ = await run(reranker, queries, candidates, budget)
+            print(f"{budget:>9.0f} {p50:>8.1f} {p99:>8.1f} {scored:>7.0%} {cached_p99:>11.1f}")
+
+    asyncio.run(bench())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Tenant kapsamlı vektör araması benchmark'ı: bir tenant'ın sabit boyuttaki verisi üzerinde, koleksiyona diğer
+tenant'ların verisi eklendikçe tenant_id (partition key) filtreli arama ile filtresiz aramanın gecikmesini
+(p50/p95 ms) ölçer. Filtreli arama yalnızca tenant'ın partition'ını taradığı için gecikmesi yaklaşık sabit
+kalmalıdır. Çalışan bir Milvus gerekir; benchmark kendi geçici koleksiyonunu oluşturur ve sonda siler.
+
+Kullanım:
+    python -m backend.benchmarks.tenant_search_latency --host localhost --tenant-vectors 20000 --growth 0,4,16,64
+"""
+import argparse
+import time
+import numpy as np
+from pymilvus import utility
+from backend.services.milvus_service import EMBEDDING_DIM, MilvusService
+
+def random_vectors(rng: np.random.Generator, count: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, EMBEDDING_DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def insert(service: MilvusService, rng: np.random.Generator, tenant_ids, count: int) -> None:
+    for start in range(0, count, 20000):
+        size = min(20000, count - start)
+        records = [{"tenant_id": tenant_ids[(start + i) % len(tenant_ids)], "chunk_id": start + i} for i in range(size)]
+        service.insert_embeddings(random_vectors(rng, size), records, async_insert=True)
+    service.flush()
+    service.connection.call(utility.wait_for_index_building_complete, service.collection_name, using=service.connection.alias)
+
+def measure(service: MilvusService, queries: np.ndarray, top_k: int, tenant_id=None):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        service.search(query, top_k=top_k, tenant_id=tenant_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return np.percentile(latencies, [50, 95])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", default=None)
+    parser.add_argument("--collection", default="bench_tenant_scope")
+    parser.add_argument("--tenant-vectors", type=int, default=20000, help="Ölçülen tenant'ın vektör sayısı")
+    parser.add_argument("--other-tenants", type=int, default=50)
+    parser.add_argument("--growth", default="0,4,16,64", help="Diğer tenant verisi, ölçülen tenant verisinin katı olarak")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    service = MilvusService(host=args.host, port=args.port, collection_name=args.collection)
+    service._connect_and_init()
+    try:
+        insert(service, rng, ["tenant-0"], args.tenant_vectors)
+        queries = random_vectors(rng, args.queries)
+        others = [f"tenant-{i + 1}" for i in range(args.other_tenants)]
+        inserted = 0
+        print(f"{'other vectors':>14} {'scoped p50':>11} {'scoped p95':>11} {'all p50':>9} {'all p95':>9}")
+        for factor in (int(f) for f in args.growth.split(",")):
+            target = factor * args.tenant_vectors
+            if target > inserted:
+                insert(service, rng, others, target - inserted)
+                inserted = target
+            measure(service, queries[:10], args.top_k, "tenant-0")  # ısınma
+            scoped = measure(service, queries, args.top_k, "tenant-0")
+            unscoped = measure(service, queries, args.top_k)
+            print(f"{inserted:>14} {scoped[0]:>11.2f} {scoped[1]:>11.2f} {unscoped[0]:>9.2f} {unscoped[1]:>9.2f}")
+    finally:
+        service.drop()
+
+if __name__ == "__main__":
+    main()
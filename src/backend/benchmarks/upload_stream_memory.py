@@ -0,0 +1,72 @@
+"""
+Upload bellek benchmark'ı: N eşzamanlı upload'ı eski yolla (await file.read() ile tamamını belleğe alıp
+yazma) ve FileService'in parça parça akıtan yoluyla diske kaydeder. Her mod ayrı bir process'te
+çalışır; duvar saati süresi ve peak RSS raporlanır.
+
+Kullanım:
+    python -m backend.benchmarks.upload_stream_memory --uploads 10 --size-mb 100
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from starlette.datastructures import UploadFile
+from backend.services.file.config import FileConfig
+from backend.services.file.service import FileService
+
+async def _legacy_save(upload: UploadFile, target: str) -> None:
+    contents = await upload.read()
+    with open(target, "wb") as f:
+        f.write(contents)
+
+async def _run_uploads(mode: str, sources, out_dir: str) -> None:
+    service = FileService(FileConfig())
+    tasks = []
+    for idx, source in enumerate(sources):
+        upload = UploadFile(open(source, "rb"), filename=f"upload_{idx}.pdf")
+        target = os.path.join(out_dir, f"{mode}_{idx}")
+        if mode == "legacy":
+            tasks.append(_legacy_save(upload, target))
+        else:
+            tasks.append(service._stream_to_disk(upload, target))
+    await asyncio.gather(*tasks)
+
+def _run(mode: str, sources, out_dir: str, queue) -> None:
+    started = time.perf_counter()
+    asyncio.run(_run_uploads(mode, sources, out_dir))
+    # Linux'ta ru_maxrss KB cinsindendir
+    queue.put((time.perf_counter() - started, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+def measure(mode: str, sources, out_dir: str):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(mode, sources, out_dir, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=10)
+    parser.add_argument("--size-mb", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        block = os.urandom(1024 * 1024)
+        sources = []
+        for idx in range(args.uploads):
+            path = os.path.join(tmp, f"source_{idx}")
+            with open(path, "wb") as f:
+                for _ in range(args.size_mb):
+                    f.write(block)
+            sources.append(path)
+        for mode in ("legacy", "stream"):
+            elapsed, peak_mb = measure(mode, sources, tmp)
+            print(f"{mode:<7}: {elapsed:.2f}s peak RSS {peak_mb:.0f} MB ({args.uploads} x {args.size_mb} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Vektör deposu backend karşılaştırması: aynı iş yükünü VectorStore arayüzü üzerinden her backend'e (embedded, milvus)
+uygular ve insert hızını (vektör/sn), filtresiz ve tenant kapsamlı arama gecikmesini (p50/p95 ms) ve dosya bazlı
+silme süresini raporlar. Her backend kendi geçici koleksiyonunu kullanır ve sonda siler; milvus backend'i çalışan
+bir Milvus (MILVUS_HOST/MILVUS_PORT) gerektirir.
+
+Kullanım:
+    python -m backend.benchmarks.vector_store_backends --backend embedded --vectors 100000 --tenants 20
+    python -m backend.benchmarks.vector_store_backends --backend embedded,milvus --vectors 200000 --queries 500
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from backend.services.milvus_service import EMBEDDING_DIM
+from backend.services.vector_store import create_vector_store
+
+def random_vectors(rng: np.random.Generator, count: int) -> np.ndarray:
+    return rng.standard_normal((count, EMBEDDING_DIM), dtype=np.float32)
+
+def measure(store, queries: np.ndarray, top_k: int, tenant_id=None):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        store.search(query, top_k=top_k, tenant_id=tenant_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return np.percentile(latencies, [50, 95])
+
+def run(backend: str, args) -> None:
+    rng = np.random.default_rng(7)
+    collection = f"bench_vector_store_{os.getpid()}"
+    kwargs = {"path": os.path.join(args.dir, collection)} if backend == "embedded" else {}
+    store = create_vector_store(backend, collection, **kwargs)
+    try:
+        started = time.perf_counter()
+        for start in range(0, args.vectors, args.batch_size):
+            size = min(args.batch_size, args.vectors - start)
+            records = [
+                {"tenant_id": f"tenant-{(start + i) % args.tenants}", "file_id": f"file-{(start + i) // 100}", "chunk_id": start + i}
+                for i in range(size)
+            ]
+            store.insert_embeddings(random_vectors(rng, size), records)
+        store.flush()
+        insert_s = time.perf_counter() - started
+        queries = random_vectors(rng, args.queries)
+        measure(store, queries[:10], args.top_k)  # ısınma
+        unscoped = measure(store, queries, args.top_k)
+        scoped = measure(store, queries, args.top_k, "tenant-0")
+        started = time.perf_counter()
+        store.delete_by_file([f"file-{i}" for i in range(0, args.vectors // 100, 10)])
+        delete_ms = (time.perf_counter() - started) * 1000
+        print(
+            f"{backend:<9} {args.vectors / insert_s:>10.0f} {unscoped[0]:>8.2f} {unscoped[1]:>8.2f} "
+            f"{scoped[0]:>11.2f} {scoped[1]:>11.2f} {delete_ms:>10.1f}"
+        )
+    finally:
+        store.drop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="embedded", help="Virgülle ayrılmış: embedded, milvus")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--dir", default=tempfile.gettempdir(), help="Embedded backend'in geçici dizini")
+    args = parser.parse_args()
+
+    print(f"{args.vectors} vectors x {EMBEDDING_DIM} dims, {args.tenants} tenants, top_k={args.top_k}")
+    print(f"{'backend':<9} {'insert/s':>10} {'all p50':>8} {'all p95':>8} {'tenant p50':>11} {'tenant p95':>11} {'delete ms':>10}")
+    for backend in args.backend.split(","):
+        run(backend.strip(), args)
+
+if __name__ == "__main__":
+    main()
@@ -49,4 +49,12 @@ MODEL_TOKEN_LIMITS = {
     'mistral nemo': 128000,
     'mistral large': 32768,
     'mistral': 32768,
-}
\ No newline at end of file
+}
+
+# tiktoken encoding per model family (keys match MODEL_TOKEN_LIMITS); families without an
+# official tiktoken encoding are approximated with cl100k_base
+MODEL_TOKEN_ENCODINGS = {
+    'gpt-4': 'cl100k_base',
+    'gpt-3.5': 'cl100k_base',
+}
+DEFAULT_TOKEN_ENCODING = 'cl100k_base'
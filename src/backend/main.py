@@ -1,25 +1,35 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import uuid
+import asyncio
 import logging
 from backend.services.chat import ChatServiceManager, ChatConfig
 from backend.services.model import ModelServiceManager, ModelConfig
 from backend.services.file.config import FileConfig
 from backend.services.search.service import SearchService
+from backend.services.health.config import HealthConfig
 from backend.services.health.service import HealthService
 from backend.services.core.config import CoreConfig
 from backend.services.core.init_service import InitService
+from backend.services.embedding.batcher import close_embedding_batchers
+from backend.services.embedding.model_registry import get_model_registry
+from backend.services.search.bm25_index import get_bm25_index, rebuild_bm25_index
+from backend.services.search.config import SearchConfig
+from backend.services.search.rerank import get_cross_encoder_reranker
+from backend.services.ingestion import IngestionConfig, IngestionQueue
 from backend.models import (
     ChatRequest, ChatResponse, 
-    SearchRequest, FileUploadResponse,
+    SearchRequest, FileUploadResponse, IngestionJobStatus,
     ModelCreateRequest, ModelCreateResponse,
     ChatMessage
 )
 from backend.services.auth import router as auth_router
+from backend.services.auth.scope import get_tenant_id
 from backend.routers import embedding as embedding_router
-from backend.services.file.service import FileService
-from backend.services.milvus_service import MilvusService
+from backend.services.file.service import FileService, UploadTooLargeError
+from backend.services.vector_store import get_vector_store, get_vector_store_executor
 from typing import List
 from backend.services.chunker import Chunker
 from backend.routers.file_router import router as file_router
@@ -51,6 +61,7 @@ core_config = CoreConfig()
 file_config = FileConfig()
 model_config = ModelConfig()
 chat_config = ChatConfig()
+search_config = SearchConfig()
 
 # Initialise core *first* so that db / redis handles are ready
 init_service = InitService(core_config)
@@ -60,7 +71,9 @@ init_service = InitService(core_config)
 model_service_manager: ModelServiceManager  # type: ignore [var-annotated]
 chat_service_manager: ChatServiceManager    # type: ignore
 search_service = SearchService(core_config)
-health_service = HealthService(core_config, init_service)
+# Upload'lar Redis kuyruğuna alınır, parse/chunk/embed worker process'lerde yapılır
+ingestion_queue = IngestionQueue(init_service.redis_pool, IngestionConfig())
+health_service = HealthService(HealthConfig(), init_service)
 
 # Create upload directory if not exists
 os.makedirs(core_config.upload_dir, exist_ok=True)
@@ -86,6 +99,32 @@ async def startup():
         # Initialize core services
         await init_service.initialize()
         logger.info("Core services initialized")
+
+        # Embedding modellerini önceden yükle (ilk upload/sorgu gecikmesini önler)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, get_model_registry().warm_up)
+        logger.info(f"Embedding models warmed up: {get_model_registry().memory_report()}")
+        if search_config.rerank_enabled:
+            await loop.run_in_executor(None, lambda: get_cross_encoder_reranker(search_config).model)
+            logger.info(f"Cross-encoder warmed up: {get_cross_encoder_reranker().stats()}")
+
+        await ingestion_queue.start()
+        logger.info("Ingestion queue started")
+
+        # Vektör deposu bağlantısı ve koleksiyonu bir kez açılır. Milvus hazır değilse uygulama yine açılır;
+        # bağlantı arka planda backoff ile yeniden denenir ve /ready hazır olana kadar 503 döner.
+        try:
+            await asyncio.to_thread(get_vector_store().open)
+            logger.info(f"Vector store ready: {get_vector_store().health()}")
+        except Exception as e:
+            logger.warning(f"Vector store not ready at startup: {e}")
+        app.state.vector_store_monitor = asyncio.create_task(health_service.monitor_vector_store())
+        app.state.model_evictor = asyncio.create_task(health_service.evict_idle_models())
+
+        # BM25 indeksi boşsa (ilk kurulum / indeks dizini silinmiş) veya tenant bilgisi olmayan eski segmentler
+        # içeriyorsa child_chunks'tan arka planda yeniden kurulur
+        if search_config.bm25_enabled and get_bm25_index().needs_rebuild():
+            app.state.bm25_rebuild = asyncio.create_task(rebuild_bm25_index(init_service.database, only_if_stale=True))
         
         # Initialize model service manager
         model_service_manager = ModelServiceManager(init_service.database, model_config)
@@ -108,7 +147,14 @@ async def startup():
 
 @app.on_event("shutdown")
 async def shutdown():
+    for task_name in ("vector_store_monitor", "model_evictor"):
+        task = getattr(app.state, task_name, None)
+        if task:
+            task.cancel()
+    await ingestion_queue.stop()
+    await close_embedding_batchers()
     await init_service.cleanup()
+    get_vector_store_executor().shutdown()
     logger.info("Service shutdown completed")
 
 @app.get("/health")
@@ -133,54 +179,58 @@ async def api_health_check():
         logger.error(f"[GET /api/health] Error: {e}")
         raise
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: veritabanı, Redis ve vektör deposu hazırsa 200, değilse 503 (bağlantı ayrıntılarıyla)."""
+    result = await health_service.readiness()
+    return JSONResponse(status_code=200 if result["ready"] else 503, content=result)
+
 @app.post("/upload", response_model=FileUploadResponse)
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), tenant_id: str = Depends(get_tenant_id)):
+    """
+    Purpose:
+        Store an uploaded document and queue it for background ingestion.
+    Usage:
+        POST /upload (multipart/form-data, field: file)
+    Role in the System:
+        Returns immediately with a job_id; parsing, chunking, embedding and vector indexing
+        run in the ingestion worker pool. Progress is available at GET /jobs/{job_id}.
+        Byte-identical re-uploads return status "duplicate" and share the existing chunks and vectors.
+        With a Bearer token the file belongs to that user and is only searchable from their scope.
+    Example Usage (cURL):
+        curl -X POST "http://localhost:8000/upload" -F "file=@manual.pdf"
+    """
     logger.info(f"[POST /upload] File upload requested: filename={file.filename}")
     try:
-        from backend.services.file.service import FileService
-        from backend.services.embedding_service import EmbeddingService
-        from backend.services.milvus_service import MilvusService
-        from backend.services.chunker import Chunker
-        import uuid
-
         file_service = FileService(file_config)
-        embedding_service = EmbeddingService()
-        milvus_service = MilvusService()
-        chunker = Chunker()
-
-        # Dosyayı kaydet ve parse et, metadata DB'ye yazılır
-        result = await file_service.handle_file_upload(file, core_config.upload_dir, init_service.database)
-        file_id = result.file_id
-        file_path = os.path.join(core_config.upload_dir, file_id)
-        # Tüm metni oku
-        with open(file_path, 'r', encoding='utf-8') as f:
-            full_text = f.read()
-
-        # Parent chunk'lara böl
-        parent_chunks = chunker.split_to_parent_chunks(full_text)
-        parent_chunk_ids = []
-        for parent in parent_chunks:
-            # Parent chunk'ı veritabanına kaydet
-            # Varsayalım ki bir insert fonksiyonu var: file_service.save_parent_chunk(...)
-            parent_id = await file_service.save_parent_chunk(init_service.database, file_id, parent['title'], parent['content'], parent['order'])
-            parent_chunk_ids.append(parent_id)
-            # Child chunk'lara böl
-            child_chunks = chunker.split_to_child_chunks(parent)
-            # Her child chunk'ı veritabanına kaydet
-            child_chunk_ids = []
-            for child in child_chunks:
-                child_id = await file_service.save_child_chunk(init_service.database, parent_id, child['content'], child.get('type'), child.get('order'))
-                child_chunk_ids.append(child_id)
-            # Embedding ve Milvus'a ekleme
-            embedding_service.embed_and_store_child_chunks(child_chunks, milvus_service, parent_id)
-        logger.info(f"[POST /upload] File uploaded, chunked, embedded successfully: {result}")
+        # Dosyayı kaydet, metadata DB'ye yazılır; ağır işler kuyruğa bırakılır
+        result = await file_service.save_upload(file, core_config.upload_dir, init_service.database, user_id=tenant_id or None)
+        if result.status == "duplicate":
+            # Aynı içerik zaten işlenmiş; mevcut chunk ve vektörler paylaşılır
+            logger.info(f"[POST /upload] Duplicate content, ingestion skipped: {result}")
+            return result
+        file_path = os.path.join(core_config.upload_dir, result.file_id)
+        result.job_id = await ingestion_queue.submit(result.file_id, file_path, result.filename, user_id=result.user_id)
+        result.status = "queued"
+        logger.info(f"[POST /upload] File stored and queued for ingestion: {result}")
         return result
+    except UploadTooLargeError as e:
+        logger.warning(f"[POST /upload] Rejected oversize upload: filename={file.filename}")
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"[POST /upload] File upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail="File upload failed")
 
+@app.get("/jobs/{job_id}", response_model=IngestionJobStatus)
+async def get_ingestion_job(job_id: str):
+    """Ingestion job'ının durumunu ve aşama bazlı ilerlemesini döner."""
+    job = await ingestion_queue.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job bulunamadı")
+    return IngestionJobStatus(**{**job, "error": job.get("error") or None})
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, tenant_id: str = Depends(get_tenant_id)):
     """
     Purpose:
         Start a new chat session or send a message to the chat engine.
@@ -190,13 +240,15 @@ async def chat_endpoint(request: ChatRequest):
     Role in the System:
         Entry point for chat-based interactions and conversation management.
     Authentication/Authorization:
-        Requires authentication if chat is user-specific.
+        Optional Bearer token; RAG context is then searched only within that user's documents
+        (requests without a token use the shared scope).
     Example Usage (cURL):
         curl -X POST "http://localhost:8000/chat" -H "Content-Type: application/json" -d '{"message": "Hello!"}'
     """
     return await chat_service_manager.service.process_chat_request(
         request,
-        chat_name=request.chat_name
+        chat_name=request.chat_name,
+        tenant_id=tenant_id
     )
 
 @app.get("/chats")
@@ -262,7 +314,7 @@ async def delete_chat(identifier: str):
         raise
 
 @app.post("/chat/{identifier}")
-async def continue_chat(identifier: str, request: ChatRequest):
+async def continue_chat(identifier: str, request: ChatRequest, tenant_id: str = Depends(get_tenant_id)):
     """
     Purpose:
         Continue an existing chat or create a new one with a specific identifier.
@@ -279,9 +331,9 @@ async def continue_chat(identifier: str, request: ChatRequest):
     try:
         from uuid import UUID
         chat_id = UUID(identifier)
-        return await chat_service_manager.service.process_chat_request(request, chat_id=chat_id)
+        return await chat_service_manager.service.process_chat_request(request, chat_id=chat_id, tenant_id=tenant_id)
     except ValueError:
-        return await chat_service_manager.service.process_chat_request(request, chat_name=identifier)
+        return await chat_service_manager.service.process_chat_request(request, chat_name=identifier, tenant_id=tenant_id)
 
 @app.post("/search")
 async def vector_search(request: SearchRequest):
@@ -353,7 +405,7 @@ async def delete_model(model_id: str):
 async def list_files():
     """Tüm dosya metadata'larını files tablosundan döner."""
     try:
-        query = "SELECT file_id, original_filename, content_type, original_size, num_chunks, chunked_total_size, upload_time, user_id FROM files ORDER BY upload_time DESC"
+        query = "SELECT file_id, original_filename, content_type, original_size, num_chunks, chunked_total_size, upload_time, user_id, content_sha256 FROM files ORDER BY upload_time DESC"
         rows = await init_service.database.fetch_all(query)
         files = [
             FileUploadResponse(
@@ -364,7 +416,8 @@ async def list_files():
                 num_chunks=row["num_chunks"],
                 chunked_total_size=row["chunked_total_size"],
                 upload_time=row["upload_time"],
-                user_id=str(row["user_id"]) if row["user_id"] is not None else None
+                user_id=str(row["user_id"]) if row["user_id"] is not None else None,
+                sha256=row["content_sha256"]
             )
             for row in rows
         ]
@@ -373,6 +426,42 @@ async def list_files():
         logger.error(f"[GET /files] Error: {e}")
         raise HTTPException(status_code=500, detail="Dosya listesi alınamadı")
 
+@app.post("/files/{file_id}/replace", response_model=FileUploadResponse)
+async def replace_file(file_id: str, file: UploadFile = File(...), tenant_id: str = Depends(get_tenant_id)):
+    """
+    Purpose:
+        Replace an existing document with a new revision.
+    Usage:
+        POST /files/{file_id}/replace (multipart/form-data, field: file)
+    Role in the System:
+        The revision is queued like an upload, but the worker diffs its chunks by content hash against
+        the document's existing chunks: only new chunks are embedded and indexed, removed chunks and their
+        vectors are deleted and moved chunks are updated in place. The file_id stays the same.
+        Returns status "unchanged" without queueing when the bytes match the current revision.
+        Only the file's own tenant can replace it; other callers get 404.
+    Example Usage (cURL):
+        curl -X POST "http://localhost:8000/files/<file_id>/replace" -F "file=@manual-v2.pdf"
+    """
+    logger.info(f"[POST /files/{file_id}/replace] Revision upload requested: filename={file.filename}")
+    try:
+        file_service = FileService(file_config)
+        result, revision_path = await file_service.save_revision(file, file_id, core_config.upload_dir, init_service.database, tenant_id)
+        if revision_path is None:
+            logger.info(f"[POST /files/{file_id}/replace] Revision unchanged, ingestion skipped")
+            return result
+        result.job_id = await ingestion_queue.submit(file_id, revision_path, result.filename, user_id=result.user_id, mode="replace")
+        result.status = "queued"
+        logger.info(f"[POST /files/{file_id}/replace] Revision queued: {result}")
+        return result
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    except UploadTooLargeError as e:
+        logger.warning(f"[POST /files/{file_id}/replace] Rejected oversize revision: filename={file.filename}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"[POST /files/{file_id}/replace] Revision upload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="File replace failed")
+
 @app.delete("/files/{file_id}")
 async def delete_file(file_id: str):
     """Bir dosyayı tüm ilişkili verilerle birlikte siler (metadata, chunk, vector db)."""
@@ -84,6 +84,30 @@ class FileUploadResponse(BaseModel):
     chunked_total_size: int
     upload_time: datetime
     user_id: Optional[str] = None
+    sha256: Optional[str] = None
+    job_id: Optional[str] = None
+    status: Optional[str] = None
+
+class IngestionJobStatus(BaseModel):
+    job_id: str
+    file_id: str
+    filename: str
+    mode: str = "ingest"  # ingest, replace
+    status: str  # queued, running, completed, failed
+    stage: str  # queued, parsing, writing_chunks, embedding, completed, failed
+    pages_parsed: int = 0
+    pages_total: int = 0
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    vectors_indexed: int = 0
+    embedding_cache_hits: int = 0
+    embedding_cache_misses: int = 0
+    embedding_cache_saved_ms: int = 0
+    chunks_reused: int = 0
+    chunks_removed: int = 0
+    error: Optional[str] = None
+    created_at: Optional[float] = None
+    updated_at: Optional[float] = None
 
 class ModelCreateRequest(BaseModel):
     provider: ModelProvider = ModelProvider.OPENROUTER
@@ -110,6 +134,7 @@ class HealthCheckResponse(BaseModel):
     status: str
     database: str
     redis: str
+    vector_store: str = "unknown"
 
 class Role(str, Enum):
     ADMIN = "admin"
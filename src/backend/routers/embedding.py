@@ -1,16 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List
 from backend.services.embedding_service import EmbeddingService
-from backend.services.milvus_service import MilvusService
-from backend.services.rag_service import RagService
+from backend.services.vector_store import get_vector_store
+from backend.services.rag_service import get_rag_service
 from backend.services.llm_service import LlmService
+from backend.services.embedding.model_registry import get_model_registry
+from backend.services.embedding.cache import get_embedding_cache
+from backend.services.embedding.batcher import batcher_stats
+from backend.services.auth.scope import get_tenant_id
+import json
 import logging
 
 router = APIRouter()
 embedding_service = EmbeddingService()
-milvus_service = MilvusService()
-rag_service = RagService()
+milvus_service = get_vector_store()
+rag_service = get_rag_service()
 llm_service = LlmService()
 logger = logging.getLogger(__name__)
 
@@ -97,7 +102,13 @@ def get_models():
 def health_check():
     logger.info("[GET /embedding/health] Called")
     try:
-        status = {"status": "ok", "model": embedding_service.get_model_name()}
+        status = {
+            "status": "ok",
+            "model": embedding_service.get_model_name(),
+            "loaded_models": get_model_registry().memory_report(),
+            "embedding_cache": get_embedding_cache().report(),
+            "query_batcher": batcher_stats()
+        }
         logger.info(f"[GET /embedding/health] Success: {status}")
         return status
     except Exception as e:
@@ -105,17 +116,17 @@ def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post('/search', response_model=SearchResponse)
-def search_embeddings(request: SearchRequest):
+def search_embeddings(request: SearchRequest, tenant_id: str = Depends(get_tenant_id)):
     logger.info(f"[POST /embedding/search] Called with query: {request.query}, top_k: {request.top_k}")
     try:
         query_emb = embedding_service.embed([request.query])[0]
-        results = milvus_service.search(query_emb, top_k=request.top_k)
+        results = milvus_service.search(query_emb, top_k=request.top_k, tenant_id=tenant_id)
         search_results = []
         for hit in results[0]:
             search_results.append(SearchResult(
                 id=hit.id,
                 score=hit.distance,
-                metadata=hit.entity.get('metadata', '')
+                metadata=json.dumps(rag_service._extract_metadata(hit)[0], ensure_ascii=False, default=str)
             ))
         logger.info(f"[POST /embedding/search] Success: {len(search_results)} results")
         return {"results": search_results}
@@ -124,10 +135,10 @@ def search_embeddings(request: SearchRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post('/rag/retrieve', response_model=RagRetrieveResponse)
-async def rag_retrieve(request: RagRetrieveRequest):
+async def rag_retrieve(request: RagRetrieveRequest, tenant_id: str = Depends(get_tenant_id)):
     logger.info(f"[POST /embedding/rag/retrieve] Called with query: {request.query}, top_k: {request.top_k}")
     try:
-        context_chunks = await rag_service.retrieve_context(request.query, top_k=request.top_k)
+        context_chunks = await rag_service.retrieve_context(request.query, tenant_id=tenant_id)
         prompt = rag_service.assemble_prompt(request.query, context_chunks)
         search_results = [SearchResult(id=chunk['id'], score=chunk['score'], metadata=chunk['metadata']) for chunk in context_chunks]
         logger.info(f"[POST /embedding/rag/retrieve] Success: {len(search_results)} context chunks")
@@ -137,10 +148,10 @@ async def rag_retrieve(request: RagRetrieveRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post('/rag/complete', response_model=RagCompleteResponse)
-async def rag_complete(request: RagCompleteRequest):
+async def rag_complete(request: RagCompleteRequest, tenant_id: str = Depends(get_tenant_id)):
     logger.info(f"[POST /embedding/rag/complete] Called with query: {request.query}, top_k: {request.top_k}, max_tokens: {request.max_tokens}, temperature: {request.temperature}")
     try:
-        context_chunks = await rag_service.retrieve_context(request.query, top_k=request.top_k)
+        context_chunks = await rag_service.retrieve_context(request.query, tenant_id=tenant_id)
         prompt = rag_service.assemble_prompt(request.query, context_chunks)
         answer = llm_service.generate(prompt, max_tokens=request.max_tokens, temperature=request.temperature)
         search_results = [SearchResult(id=chunk['id'], score=chunk['score'], metadata=chunk['metadata']) for chunk in context_chunks]
@@ -1,3 +1,4 @@
+import shutil
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from backend.services.file_parsing.parser import FileParsingService
 from typing import List
@@ -11,7 +12,8 @@ def parse_file(file: UploadFile = File(...)):
         # Dosyayı geçici olarak kaydet
         temp_path = f"/tmp/{file.filename}"
         with open(temp_path, "wb") as f:
-            f.write(file.file.read())
+            # Dosyayı belleğe almadan parça parça kopyala
+            shutil.copyfileobj(file.file, f, 1024 * 1024)
         elements = file_parser.parse(temp_path)
         # Sadece text döndür (örnek)
         texts = [getattr(el, 'text', None) or el.get('text', None) for el in elements]
@@ -1,19 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any
 from backend.services.search.searcher import SearchService
 from backend.services.search.hybrid_search import hybrid_search
-from backend.services.milvus_service import MilvusService
-# BM25 index örneği için örnek: Whoosh veya benzeri bir arama motoru kullanılabilir
-# from backend.services.search.bm25_index_loader import load_bm25_index
+from backend.services.search.bm25_index import get_bm25_index
+from backend.services.search.config import SearchConfig
+from backend.services.rag_service import get_rag_service
+from backend.services.auth.scope import get_tenant_id
 
 router = APIRouter()
 searcher = SearchService()
+search_config = SearchConfig()
 
-# BM25 index örneği için örnek: Whoosh veya benzeri bir arama motoru kullanılabilir
-# from backend.services.search.bm25_index_loader import load_bm25_index
-
-bm25_index = None  # TODO: Uygun şekilde initialize et
+# child_chunks üzerindeki BM25 indeksi; ingestion worker'ları günceller, burada yalnızca okunur
+bm25_index = get_bm25_index() if search_config.bm25_enabled else None
 milvus_client = None  # TODO: Uygun şekilde initialize et
 
 class SearchRequest(BaseModel):
@@ -24,24 +24,38 @@ class HybridSearchRequest(BaseModel):
     query: str
     top_k: int = 10
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+
 @router.post("/search", response_model=List[Dict])
-def search_chunks(request: SearchRequest):
+def search_chunks(request: SearchRequest, tenant_id: str = Depends(get_tenant_id)):
     try:
-        results = searcher.search(request.embedding, top_k=request.top_k)
+        results = searcher.search(request.embedding, top_k=request.top_k, tenant_id=tenant_id)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/search/hybrid", response_model=List[Dict])
-def search_hybrid(request: HybridSearchRequest):
+async def search_hybrid(request: HybridSearchRequest, tenant_id: str = Depends(get_tenant_id)):
     try:
-        # bm25_index, milvus_client, cross_encoder_model sistemde uygun şekilde alınmalı
-        # Burada örnek olarak None geçiyoruz
-        if bm25_index is None:
-            return {"error": "BM25 index is not initialized!"}
-        if milvus_client is None:
-            return {"error": "Milvus client is not initialized!"}
-        results = hybrid_search(request.query, bm25_index=bm25_index, milvus_client=milvus_client, cross_encoder_model=None, top_k=request.top_k)
+        # bm25_index yoksa yalnızca vektör araması yapılır; milvus_client None ise paylaşılan client kullanılır.
+        # Arama çağıranın tenant'ıyla (JWT kullanıcısı veya ortak tenant) sınırlıdır.
+        results = await hybrid_search(request.query, bm25_index=bm25_index, milvus_client=milvus_client, cross_encoder_model=None, top_k=request.top_k, tenant_id=tenant_id)
         return results
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch", response_model=List[Dict])
+async def search_batch(request: BatchSearchRequest, tenant_id: str = Depends(get_tenant_id)):
+    """
+    Çok sorgulu RAG retrieval (değerlendirme işleri, entegrasyonlar): sorgular tek batch'te embed edilir, tek vektör
+    araması ve tek parent chunk sorgusuyla aranır. Sorgu sırasıyla {"query", "context"} listesi döner; context
+    /embedding/rag/retrieve ile aynı parent chunk'lardır.
+    """
+    if len(request.queries) > search_config.batch_max_queries:
+        raise HTTPException(status_code=413, detail=f"At most {search_config.batch_max_queries} queries per batch")
+    try:
+        contexts = await get_rag_service().retrieve_context_many(request.queries, tenant_id=tenant_id)
+        return [{"query": query, "context": context} for query, context in zip(request.queries, contexts)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
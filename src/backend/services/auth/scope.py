@@ -0,0 +1,26 @@
+from typing import Optional
+from fastapi import Header, HTTPException
+import jwt
+from backend.services.auth.utils import decode_jwt
+
+# Token'sız istekler ve user_id'si olmayan dosyalar ortak (anonim) tenant'ta tutulur
+SHARED_TENANT = ""
+
+def tenant_key(user_id) -> str:
+    """files.user_id değerinden vektör deposundaki tenant anahtarı."""
+    return str(user_id) if user_id else SHARED_TENANT
+
+def get_tenant_id(authorization: Optional[str] = Header(default=None)) -> str:
+    """
+    İsteğin arama/yükleme kapsamı: Bearer JWT varsa kullanıcının id'si (sub), yoksa ortak tenant.
+    Geçersiz veya süresi dolmuş token 401 döner; başka bir tenant'ın verisine düşülmez.
+    """
+    if not authorization:
+        return SHARED_TENANT
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Invalid authorization header")
+    try:
+        return tenant_key(decode_jwt(token).get("sub"))
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
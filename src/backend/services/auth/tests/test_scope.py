@@ -0,0 +1,17 @@
+from uuid import uuid4
+import pytest
+from fastapi import HTTPException
+from src.backend.services.auth.scope import SHARED_TENANT, get_tenant_id, tenant_key
+from src.backend.services.auth.utils import create_jwt
+
+def test_tenant_is_token_subject():
+    user_id = uuid4()
+    assert get_tenant_id(f"Bearer {create_jwt(user_id, [])}") == str(user_id)
+    assert get_tenant_id(None) == SHARED_TENANT
+    assert tenant_key(None) == SHARED_TENANT
+
+@pytest.mark.parametrize("header", ["Bearer not-a-jwt", "Basic abc", f"Bearer {create_jwt(uuid4(), [], expires_minutes=-1)}"])
+def test_invalid_token_is_rejected(header):
+    with pytest.raises(HTTPException) as error:
+        get_tenant_id(header)
+    assert error.value.status_code == 401
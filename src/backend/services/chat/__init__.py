@@ -7,6 +7,8 @@ from .service import ChatService
 from .storage import ChatStorageService
 from .context_storage import ContextStorageService
 from backend.services.core.migration_manager import MigrationManager
+from backend.services.search.bm25_index import get_bm25_index
+from backend.services.search.config import SearchConfig
 
 import logging
 
@@ -30,7 +32,8 @@ class ChatServiceManager:
             model_service=model_service,
             storage_service=self.storage_service,
             context_storage_service=self.context_storage_service,
-            redis_pool=redis
+            redis_pool=redis,
+            bm25_index=get_bm25_index() if SearchConfig().bm25_enabled else None
         )
         self.migration_manager = MigrationManager(database, "chat")  # <-- Doğru girintide ve __init__ içinde
 
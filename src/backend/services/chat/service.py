@@ -10,9 +10,13 @@ from .context_manager import ContextManager, ContextSettings, ContextWindow
 from .context_config import MODEL_CONTEXT_WINDOWS
 from .context_storage import ContextStorageService
 from datetime import datetime
-from backend.services.rag_service import RagService
+from backend.services.rag_service import get_rag_service
 from fastapi import HTTPException
 from backend.services.search.hybrid_search import hybrid_search
+from backend.services.tokenizer import get_tokenizer
+
+# Chat formatında her mesajın rol ve ayraçları için eklenen yaklaşık token
+MESSAGE_TOKEN_OVERHEAD = 4
 
 class UUIDEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -40,8 +44,8 @@ class ChatService:
         self.logger = logging.getLogger(__name__)
         self.context_managers = {}  # Model bazlı context manager'lar
         
-        # RAG service'i initialize ediyorum
-        self.rag_service = RagService()
+        # RAG service process genelinde paylaşılır (embedding modeli ve Milvus client'ı tekrar oluşturulmaz)
+        self.rag_service = get_rag_service()
         self.bm25_index = bm25_index
         self.milvus_client = milvus_client
         self.cross_encoder_model = cross_encoder_model
@@ -67,23 +71,25 @@ class ChatService:
             
         return self.context_managers[model_id]
 
-    async def get_rag_context(self, query: str) -> Optional[str]:
-        """RAG context'i alır ve sistem prompt'u olarak formatlar (hybrid search ile)"""
+    async def get_rag_context(self, query: str, tenant_id: Optional[str] = None) -> Optional[str]:
+        """RAG context'i alır ve sistem prompt'u olarak formatlar (hybrid search ile); arama tenant_id kapsamındadır"""
         try:
             self.logger.info(f"RAG context retrieval started for query: {query[:100]}...")
             # Hybrid search ile parent chunk'ları bul
-            if self.bm25_index is not None and self.milvus_client is not None:
-                parent_chunks = hybrid_search(
+            if self.bm25_index is not None:
+                parent_chunks = await hybrid_search(
                     query,
                     bm25_index=self.bm25_index,
                     milvus_client=self.milvus_client,
                     cross_encoder_model=self.cross_encoder_model,
-                    top_k=5
+                    top_k=5,
+                    rag_service=self.rag_service,
+                    tenant_id=tenant_id
                 )
                 self.logger.info("Hybrid search pipeline kullanıldı.")
             else:
-                self.logger.warning("BM25 veya Milvus index yok, sadece semantic search pipeline kullanılacak.")
-                parent_chunks = await self.rag_service.retrieve_context(query)
+                self.logger.warning("BM25 index yok, sadece semantic search pipeline kullanılacak.")
+                parent_chunks = await self.rag_service.retrieve_context(query, tenant_id=tenant_id)
             if parent_chunks:
                 context_texts = []
                 for chunk in parent_chunks:
@@ -106,9 +112,10 @@ class ChatService:
         self,
         request: ChatRequest,
         chat_id: Optional[UUID] = None,
-        chat_name: Optional[str] = None
+        chat_name: Optional[str] = None,
+        tenant_id: Optional[str] = None
     ) -> ChatResponse:
-        """Process a chat request and return response"""
+        """Process a chat request and return response (RAG context is retrieved within tenant_id's documents)"""
         self.logger.info(f"Processing chat request - chat_id: {chat_id}, chat_name: {chat_name or request.chat_name}")
         
         try:
@@ -165,7 +172,8 @@ class ChatService:
             response = await self.call_model_api(
                 session=session,
                 messages=messages,
-                custom_system_prompt=getattr(request.custom_config, 'system_prompt', None) if request.custom_config else None
+                custom_system_prompt=getattr(request.custom_config, 'system_prompt', None) if request.custom_config else None,
+                tenant_id=tenant_id
             )
             
             if not response:
@@ -330,28 +338,37 @@ class ChatService:
         except Exception as e:
             self.logger.error(f"Error invalidating cache: {str(e)}")
 
-    def _estimate_token_count(self, messages: List[dict]) -> int:
-        """Mesaj listesinin yaklaşık toplam token sayısını döndürür."""
-        total = 0
-        for msg in messages:
-            content = msg.get('content', '')
-            total += len(content.split()) * 2  # Basit tahmin
-        return total
+    def _message_token_counts(self, messages: List[dict], model: Optional[str] = None) -> List[int]:
+        """Mesaj başına token sayıları (içerik + rol/ayraç payı); sayım model ailesinin encoder'ı ile yapılır."""
+        contents = [msg.get('content') or '' for msg in messages]
+        return [count + MESSAGE_TOKEN_OVERHEAD for count in get_tokenizer().count_many(contents, model)]
+
+    def _estimate_token_count(self, messages: List[dict], model: Optional[str] = None) -> int:
+        """Mesaj listesinin toplam token sayısını döndürür."""
+        return sum(self._message_token_counts(messages, model))
 
-    def _truncate_messages_to_token_limit(self, messages: List[dict], token_limit: int) -> List[dict]:
-        """Token limiti aşılırsa en eski mesajdan başlayarak mesajları çıkarır. İlk system mesajı asla silinmez."""
+    def _truncate_messages_to_token_limit(self, messages: List[dict], token_limit: int, model: Optional[str] = None) -> List[dict]:
+        """
+        Token limiti aşılırsa en eski mesajdan başlayarak mesajları çıkarır. İlk system mesajı asla silinmez.
+        Mesaj başına sayılar bir kez alınır; çıkarılan mesajlar toplamdan düşülür.
+        """
         truncated = list(messages)
         # Eğer ilk mesaj system ise, onu koru
         system_msg = None
         if truncated and truncated[0].get('role') == 'system':
             system_msg = truncated.pop(0)
-        while self._estimate_token_count(truncated) > token_limit and len(truncated) > 1:
-            truncated.pop(0)
+        counts = self._message_token_counts(truncated, model)
+        total = sum(counts)
+        start = 0
+        while total > token_limit and len(truncated) - start > 1:
+            total -= counts[start]
+            start += 1
+        truncated = truncated[start:]
         if system_msg:
             truncated = [system_msg] + truncated
         return truncated
 
-    async def call_model_api(self, session, messages, custom_system_prompt=None):
+    async def call_model_api(self, session, messages, custom_system_prompt=None, tenant_id=None):
         """Gerçek model API çağrısı yapar. RAG entegrasyonu ile."""
         model_id = getattr(session, 'model_id', None)
         self.logger.info(f"call_model_api: model_id={model_id}")
@@ -374,7 +391,7 @@ class ChatService:
         messages_with_rag = list(messages)
         if user_message:
             query = user_message.content if hasattr(user_message, 'content') else user_message.get('content', '')
-            rag_context = await self.get_rag_context(query)
+            rag_context = await self.get_rag_context(query, tenant_id)
             if rag_context:
                 self.logger.info("RAG context added to system prompt (only for last user message)")
                 rag_system_message = {
@@ -393,7 +410,7 @@ class ChatService:
 
         # Token limiti uygula (truncate)
         token_limit = model_config.get("token_limit") or model_config.get("max_tokens") or 4000
-        messages_dict = self._truncate_messages_to_token_limit(messages_dict, token_limit)
+        messages_dict = self._truncate_messages_to_token_limit(messages_dict, token_limit, model)
         
         self.logger.debug(f"OpenRouter API FINAL request data: {messages_dict}")
         if model_config["provider"] == "openrouter":
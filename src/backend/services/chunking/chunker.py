@@ -2,15 +2,11 @@ from typing import List, Any, Dict
 import logging
 import re
 import nltk
-try:
-    import tiktoken
-    def count_tokens(text, model="gpt-3.5-turbo"):
-        enc = tiktoken.encoding_for_model(model)
-        return len(enc.encode(text))
-except ImportError:
-    def count_tokens(text, model=None):
-        # Fallback: kelime sayısını 1.5 ile çarp
-        return int(len(text.split()) * 1.5)
+from backend.services.tokenizer import get_tokenizer
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    # Encoder model ailesi başına bir kez yüklenir, sonuçlar ezberlenir
+    return get_tokenizer().count(text, model)
 
 class ChunkingService:
     def __init__(self, chunk_size: int = 4000, chunk_overlap: int = 200):
@@ -82,12 +78,14 @@ class ChunkingService:
 def paragraph_chunking(text: str, max_tokens: int = 500, overlap_sentences: int = 2, lang="turkish") -> list:
     """
     Paragraf bazlı chunking. Paragraflar 500 tokendan uzunsa, cümle bazında bölünür ve overlap uygulanır.
+    Token sayıları paragraf/cümle listeleri için toplu alınır; mevcut chunk sentences[start:idx]
+    aralığı olduğundan token toplamı prefix sum farkıyla hesaplanır.
     """
+    tokenizer = get_tokenizer()
     paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
     chunks = []
     chunk_id = 0
-    for para_idx, para in enumerate(paragraphs):
-        para_tokens = count_tokens(para)
+    for para_idx, (para, para_tokens) in enumerate(zip(paragraphs, tokenizer.count_many(paragraphs))):
         if para_tokens <= max_tokens:
             chunks.append({
                 "content": para,
@@ -101,16 +99,14 @@ def paragraph_chunking(text: str, max_tokens: int = 500, overlap_sentences: int
                 sentences = nltk.sent_tokenize(para, language=lang)
             except Exception:
                 sentences = [para]
-            current = []
-            current_tokens = 0
-            sent_idx = 0
-            while sent_idx < len(sentences):
-                sent = sentences[sent_idx]
-                sent_tokens = count_tokens(sent)
-                if current_tokens + sent_tokens > max_tokens and current:
+            sums = tokenizer.prefix_sums(sentences)
+            start = 0
+            for sent_idx in range(len(sentences)):
+                sent_tokens = sums[sent_idx + 1] - sums[sent_idx]
+                if sums[sent_idx] - sums[start] + sent_tokens > max_tokens and start < sent_idx:
                     # Overlap uygula
-                    overlap = sentences[max(0, sent_idx-overlap_sentences):sent_idx]
-                    chunk_text = ' '.join(current + overlap)
+                    overlap_start = max(0, sent_idx - overlap_sentences)
+                    chunk_text = ' '.join(sentences[start:sent_idx] + sentences[overlap_start:sent_idx])
                     chunks.append({
                         "content": chunk_text,
                         "order": chunk_id,
@@ -118,17 +114,13 @@ def paragraph_chunking(text: str, max_tokens: int = 500, overlap_sentences: int
                     })
                     chunk_id += 1
                     # Overlap ile yeni chunk başlat
-                    current = list(overlap)
-                    current_tokens = sum(count_tokens(s) for s in current)
-                current.append(sent)
-                current_tokens += sent_tokens
-                sent_idx += 1
-            if current:
-                chunk_text = ' '.join(current)
+                    start = overlap_start
+            if start < len(sentences):
+                chunk_text = ' '.join(sentences[start:])
                 chunks.append({
                     "content": chunk_text,
                     "order": chunk_id,
                     "metadata": {"paragraph_index": para_idx, "overlap": overlap_sentences}
                 })
                 chunk_id += 1
-    return chunks 
\ No newline at end of file
+    return chunks
@@ -33,6 +33,7 @@ def chunk_elements(elements):
     """
     parent_chunks = []
     child_chunks = []
+    order_counters = {}
     current_parent = None
     current_parent_id = 0
     section_level = 1
@@ -95,11 +96,13 @@ def chunk_elements(elements):
                         child_metadata.update(orig_dict)
                     except Exception:
                         pass
+                order = order_counters.get(current_parent["id"], 0)
+                order_counters[current_parent["id"]] = order + 1
                 child_chunks.append({
                     "parent_id": current_parent["id"],
                     "content": text_content,
                     "type": getattr(el, 'category', getattr(el, 'type', 'Text')),
-                    "order": len([c for c in child_chunks if c["parent_id"] == current_parent["id"]]),
+                    "order": order,
                     "metadata": child_metadata
                 })
 
@@ -2,4 +2,49 @@ from src.backend.services.chunking.chunker import ChunkingService
 
 def test_chunk_empty():
     service = ChunkingService()
-    assert service.chunk([]) == [] 
\ No newline at end of file
+    assert service.chunk([]) == [] 
+def _reference_paragraph_chunking(text, count, max_tokens, overlap_sentences, split):
+    # Prefix sum öncesi algoritma: overlap sonrası toplam yeniden hesaplanır
+    chunks = []
+    for para_idx, para in enumerate(p.strip() for p in text.split('\n') if p.strip()):
+        if count(para) <= max_tokens:
+            chunks.append(para)
+            continue
+        sentences = split(para)
+        current, current_tokens = [], 0
+        for sent_idx, sent in enumerate(sentences):
+            if current_tokens + count(sent) > max_tokens and current:
+                overlap = sentences[max(0, sent_idx - overlap_sentences):sent_idx]
+                chunks.append(' '.join(current + overlap))
+                current = list(overlap)
+                current_tokens = sum(count(s) for s in current)
+            current.append(sent)
+            current_tokens += count(sent)
+        if current:
+            chunks.append(' '.join(current))
+    return chunks
+
+def test_paragraph_chunking_matches_reference(monkeypatch):
+    from src.backend.services.chunking import chunker
+    from src.backend.services.tokenizer.service import TokenizerService
+
+    class WordEncoding:
+        def encode_ordinary(self, text):
+            return text.split()
+
+        def encode_ordinary_batch(self, texts, num_threads=1):
+            return [t.split() for t in texts]
+
+    tokenizer = TokenizerService(loader=lambda name: WordEncoding())
+    monkeypatch.setattr(chunker, "get_tokenizer", lambda: tokenizer)
+    monkeypatch.setattr(chunker.nltk, "sent_tokenize", lambda para, language=None: [s + "." for s in para.split(". ") if s])
+    sentences = [f"cümle {i} " + "kelime " * (i % 7) for i in range(40)]
+    text = "kısa paragraf\n" + ". ".join(sentences) + "\nson paragraf"
+    for max_tokens, overlap in ((10, 2), (25, 1), (25, 0)):
+        chunks = chunker.paragraph_chunking(text, max_tokens=max_tokens, overlap_sentences=overlap)
+        expected = _reference_paragraph_chunking(
+            text, lambda t: len(t.split()), max_tokens, overlap,
+            lambda para: [s + "." for s in para.split(". ") if s]
+        )
+        assert [c["content"] for c in chunks] == expected
+        assert [c["order"] for c in chunks] == list(range(len(chunks)))
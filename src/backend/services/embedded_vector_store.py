@@ -0,0 +1,480 @@
+import fcntl
+import json
+import logging
+import operator
+import os
+import re
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from backend.services.milvus_service import DEFAULT_COLLECTION, METRICS, normalize_rows, to_record, to_similarity
+from backend.services.vector_store import VectorStore
+
+MANIFEST = "manifest.json"
+LOCK_FILE = "LOCK"
+# String alanlar sözlükle tamsayı kodlara çevrilir; filtreler kod dizileri üzerinde vektörel çalışır
+STRING_FIELDS = ("tenant_id", "file_id", "chunk_type")
+INT_FIELDS = ("parent_id", "chunk_id", "chunk_order")
+FILTER_FIELDS = STRING_FIELDS + INT_FIELDS + ("id",)
+
+_LITERAL = r'"(?:[^"\\]|\\.)*"|-?\d+'
+_CLAUSE = re.compile(rf'(\w+)\s*(==|!=|>=|<=|>|<|in)\s*(\[\s*(?:(?:{_LITERAL})\s*,?\s*)*\]|{_LITERAL})')
+_AND = re.compile(r'and\b', re.I)
+_OPS = {"==": operator.eq, "!=": operator.ne, ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+logger = logging.getLogger(__name__)
+
+def _skip(text: str, pos: int, chars: str) -> int:
+    while pos < len(text) and text[pos] in chars:
+        pos += 1
+    return pos
+
+def parse_filter(expr: str) -> List[Tuple[str, str, object]]:
+    """
+    Milvus ifadelerinin embedded backend'de desteklenen alt kümesi: tipli alanlar ve id üzerinde ==, !=, <, <=, >, >=
+    ve in [...] karşılaştırmalarının 'and' ile birleşimi (tenant_filter ve delete_by_file'ın ürettiği biçim).
+    Desteklenmeyen ifadeler ValueError verir.
+    """
+    clauses, pos = [], 0
+    while True:
+        pos = _skip(expr, pos, " (")
+        match = _CLAUSE.match(expr, pos)
+        if not match or match.group(1) not in FILTER_FIELDS:
+            raise ValueError(f"Unsupported filter expression for the embedded vector store: {expr}")
+        field, op, raw = match.groups()
+        value = json.loads(raw)
+        if (op == "in") != isinstance(value, list) or (field in STRING_FIELDS and op not in ("==", "!=", "in")):
+            raise ValueError(f"Unsupported filter expression for the embedded vector store: {expr}")
+        clauses.append((field, op, value))
+        pos = _skip(expr, match.end(), " )")
+        if pos == len(expr):
+            return clauses
+        joined = _AND.match(expr, pos)
+        if not joined:
+            raise ValueError(f"Unsupported filter expression for the embedded vector store: {expr}")
+        pos = joined.end()
+
+class Hit:
+    """Milvus hit'iyle aynı alanlar: id, distance, similarity ve entity (alan -> değer)."""
+    __slots__ = ("id", "distance", "similarity", "entity")
+
+    def __init__(self, id: int, distance: float, similarity: float, entity: Dict):
+        self.id = id
+        self.distance = distance
+        self.similarity = similarity
+        self.entity = entity
+
+class _Columns:
+    """
+    Satır sırasıyla kayıt kolonları; kapasite ikiye katlanarak büyür, snapshot'lar [:count] görünümleridir.
+    Metin alanları kod olarak tutulur; sözlükler (vocab: değer -> kod, values: kod -> değer) yalnızca büyür ve
+    nesille birlikte değişir, böylece bir snapshot'ın kodları hep kendi sözlüğüyle çözülür.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.count = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.sq_norms = np.empty(capacity, dtype=np.float32)
+        self.codes = {field: np.empty(capacity, dtype=np.int32) for field in STRING_FIELDS}
+        self.ints = {field: np.empty(capacity, dtype=np.int64) for field in INT_FIELDS}
+        self.metadata: List[Dict] = []
+        self.vocab: Dict[str, Dict[str, int]] = {field: {} for field in STRING_FIELDS}
+        self.values: Dict[str, List[str]] = {field: [] for field in STRING_FIELDS}
+
+    def code(self, field: str, value: str) -> int:
+        vocab = self.vocab[field]
+        code = vocab.get(value)
+        if code is None:
+            # Değer önce values'a eklenir: vocab'da görünen her kod, aynı sözlüğü okuyan snapshot'larca çözülebilir
+            self.values[field].append(value)
+            code = vocab[value] = len(self.values[field]) - 1
+        return code
+
+    def reserve(self, extra: int) -> None:
+        capacity = len(self.ids)
+        if self.count + extra <= capacity:
+            return
+        while capacity < self.count + extra:
+            capacity *= 2
+        grow = lambda a: np.concatenate([a[:self.count], np.zeros(capacity - self.count, dtype=a.dtype)])
+        self.ids, self.alive, self.sq_norms = grow(self.ids), grow(self.alive), grow(self.sq_norms)
+        self.codes = {field: grow(a) for field, a in self.codes.items()}
+        self.ints = {field: grow(a) for field, a in self.ints.items()}
+
+class _Snapshot:
+    """Aramaların kilitsiz kullandığı görünüm; sonradan eklenen satırlar count dışında kalır."""
+
+    def __init__(self, columns: _Columns, vectors: Optional[np.ndarray]):
+        count = columns.count
+        self.count = count
+        self.vectors = vectors
+        self.ids = columns.ids[:count]
+        self.alive = columns.alive[:count]
+        self.sq_norms = columns.sq_norms[:count]
+        self.codes = {field: a[:count] for field, a in columns.codes.items()}
+        self.ints = {field: a[:count] for field, a in columns.ints.items()}
+        self.metadata = columns.metadata
+        self.vocab = columns.vocab
+        self.values = columns.values
+
+class EmbeddedVectorStore(VectorStore):
+    """
+    Milvus gerektirmeyen, tek düğümlü kurulumlar ve hermetik testler için vektör deposu.
+    - Vektörler nesil (generation) başına tek bir float32 matris dosyasına eklenir ve salt okunur mmap ile aranır;
+      kayıtlar ve silmeler aynı neslin JSON satırlı append log'unda tutulur. Yeniden başlatmada log baştan okunur.
+    - Yazarlar dosya kilidi altında ekler; ingestion worker'ları ve API process'i aynı dizini paylaşır, okuyucular
+      log büyüdükçe yalnızca yeni satırları okur.
+    - Arama tam (exact) top-k'dır: tek matris-vektör çarpımı (BLAS); tenant/filtre seçiciyse yalnızca eşleşen
+      satırlar skorlanır.
+    - Silinen satırlar canlı satırları geçince yeni bir nesle sıkıştırılır.
+    """
+
+    def __init__(self, path: Optional[str] = None, collection_name: Optional[str] = None, metric: Optional[str] = None, compact_min_deleted: Optional[int] = None):
+        collection_name = collection_name or os.getenv('VECTOR_STORE_COLLECTION', DEFAULT_COLLECTION)
+        self.collection_name = collection_name
+        self.path = path or os.path.join(os.getenv('VECTOR_STORE_DIR', '/uploads/.index/vectors'), collection_name)
+        self.metric = (metric or os.getenv('VECTOR_STORE_METRIC', 'COSINE')).upper()
+        if self.metric not in METRICS:
+            raise ValueError(f"Unsupported metric {self.metric}; expected one of {list(METRICS)}")
+        self.compact_min_deleted = compact_min_deleted or int(os.getenv('VECTOR_STORE_COMPACT_MIN_DELETED', '10000'))
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    # --- Durum ---
+
+    def _reset(self, manifest: Optional[Dict]) -> None:
+        self._manifest = manifest
+        self._generation = manifest["generation"] if manifest else None
+        self._next_id = manifest.get("next_id", 1) if manifest else 1
+        self._columns = _Columns()
+        self._row_of: Dict[int, int] = {}
+        self._offset = 0
+        self._vectors = None
+        self._snapshot = _Snapshot(self._columns, None)
+        self._key = None
+        if manifest:
+            self.metric = manifest["metric"]
+
+    def _file(self, kind: str, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        return os.path.join(self.path, f"{kind}-{generation}.{'f32' if kind == 'vectors' else 'jsonl'}")
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        tmp = os.path.join(self.path, f".{MANIFEST}.{uuid.uuid4().hex}")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+    def _stat_key(self):
+        try:
+            stat = os.stat(os.path.join(self.path, MANIFEST))
+        except FileNotFoundError:
+            return None
+        try:
+            log_size = os.path.getsize(self._file("log", self._generation)) if self._generation is not None else -1
+        except FileNotFoundError:
+            log_size = -1
+        return (stat.st_ino, stat.st_mtime_ns, log_size)
+
+    def _catch_up(self) -> None:
+        """Başka process'lerin (veya yeni neslin) log satırlarını uygular; self._lock altında çağrılır."""
+        key = self._stat_key()
+        if key == self._key:
+            return
+        data = b""
+        for attempt in range(3):
+            manifest = self._read_manifest()
+            if manifest is None:
+                if self._manifest is not None:
+                    self._reset(None)
+                break
+            if manifest["generation"] != self._generation:
+                self._reset(manifest)
+            try:
+                with open(self._file("log"), "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+                break
+            except FileNotFoundError:
+                # Okuma sırasında başka bir process sıkıştırıp eski nesli sildi; manifest'i yeniden oku
+                if attempt == 2:
+                    raise
+        if self._manifest is not None:
+            end = data.rfind(b"\n") + 1  # Yarım yazılmış son satır henüz uygulanmaz
+            if end:
+                self._apply([json.loads(line) for line in data[:end].splitlines()], end)
+        self._key = self._stat_key()
+
+    def _apply(self, entries: List[Dict], nbytes: int) -> None:
+        columns = self._columns
+        start = columns.count
+        inserts = [e for e in entries if "delete" not in e]
+        columns.reserve(len(inserts))
+        for entry in entries:
+            if "delete" in entry:
+                for vector_id in entry["delete"]:
+                    row = self._row_of.pop(vector_id, None)
+                    if row is not None:
+                        columns.alive[row] = False
+                continue
+            row = columns.count
+            columns.ids[row] = entry["id"]
+            columns.alive[row] = True
+            for field in STRING_FIELDS:
+                columns.codes[field][row] = columns.code(field, entry[field])
+            for field in INT_FIELDS:
+                columns.ints[field][row] = entry[field]
+            columns.metadata.append(entry["metadata"])
+            self._row_of[entry["id"]] = row
+            self._next_id = max(self._next_id, entry["id"] + 1)
+            columns.count += 1
+        self._offset += nbytes
+        if columns.count > start:
+            self._vectors = np.memmap(self._file("vectors"), dtype=np.float32, mode="r", shape=(columns.count, self._manifest["dim"]))
+            if self.metric == "L2":
+                new = self._vectors[start:]
+                columns.sq_norms[start:columns.count] = np.einsum("ij,ij->i", new, new)
+        self._snapshot = _Snapshot(columns, self._vectors)
+
+    def _refresh(self) -> _Snapshot:
+        with self._lock:
+            self._catch_up()
+            return self._snapshot
+
+    # --- Yazma ---
+
+    @contextmanager
+    def _writing(self):
+        """Process içi ve process'ler arası yazma kilidi; log'un sonuna yetişilmiş ve yarım kayıtlar kesilmiş olarak."""
+        with self._lock, self._file_lock():
+            self._key = None
+            self._catch_up()
+            if self._manifest is not None:
+                # Yarıda kalmış bir yazmanın log'a girmemiş vektörleri ve yarım log satırı atılır
+                vectors_size = self._columns.count * self._manifest["dim"] * 4
+                if os.path.getsize(self._file("vectors")) != vectors_size:
+                    os.truncate(self._file("vectors"), vectors_size)
+                if os.path.getsize(self._file("log")) != self._offset:
+                    os.truncate(self._file("log"), self._offset)
+            yield
+
+    def _append(self, entries: List[Dict], vectors: Optional[np.ndarray] = None, sync: bool = False) -> None:
+        data = b"".join(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n" for entry in entries)
+        targets = ([(self._file("vectors"), vectors.tobytes())] if vectors is not None else []) + [(self._file("log"), data)]
+        for path, payload in targets:
+            with open(path, "ab") as f:
+                f.write(payload)
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+        self._apply(entries, len(data))
+        self._key = self._stat_key()
+
+    def insert_embeddings(self, embeddings, metadata: List, batch_size: Optional[int] = None, async_insert: bool = False, flush: bool = False) -> List[int]:
+        """
+        Vektörleri matris dosyasına, kayıtları log'a tek seferde ekler (batch_size ve async_insert Milvus içindir).
+        flush: dosyalar fsync edilir.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError(f"embeddings must be a 2-D array, got shape {vectors.shape}")
+        if len(metadata) != len(vectors):
+            raise ValueError(f"metadata length {len(metadata)} does not match {len(vectors)} embeddings")
+        if not len(vectors):
+            return []
+        records = [to_record(m) for m in metadata]
+        with self._writing():
+            if self._manifest is None:
+                self._create(vectors.shape[1])
+            if vectors.shape[1] != self._manifest["dim"]:
+                raise ValueError(f"embedding dimension {vectors.shape[1]} does not match store dimension {self._manifest['dim']}")
+            if self.metric != "L2":
+                vectors = normalize_rows(vectors)
+            ids = list(range(self._next_id, self._next_id + len(vectors)))
+            self._append([{"id": i, **r} for i, r in zip(ids, records)], np.ascontiguousarray(vectors, dtype=np.float32), flush)
+        logger.info(f"[VECTORS] Inserted {len(ids)} embeddings into {self.path}")
+        return ids
+
+    def _create(self, dim: int) -> None:
+        manifest = {"generation": 0, "dim": int(dim), "metric": self.metric, "next_id": 1}
+        self._reset(manifest)
+        for kind in ("vectors", "log"):
+            open(self._file(kind), "wb").close()
+        self._write_manifest(manifest)
+
+    def delete_embeddings(self, ids: List[int], batch_size: Optional[int] = None) -> int:
+        if not ids:
+            return 0
+        with self._writing():
+            self._delete_locked([int(i) for i in ids if int(i) in self._row_of])
+        return len(ids)
+
+    def delete_by_file(self, file_ids: Union[str, Sequence[str]]) -> int:
+        file_ids = [file_ids] if isinstance(file_ids, str) else list(file_ids)
+        if not file_ids:
+            return 0
+        with self._writing():
+            snapshot = self._snapshot
+            ids = snapshot.ids[self._mask(snapshot, [("file_id", "in", file_ids)])].tolist()
+            self._delete_locked(ids)
+        logger.info(f"[VECTORS] Deleted {len(ids)} embeddings of {len(file_ids)} files from {self.path}")
+        return len(ids)
+
+    def delete_by_chunks(self, chunk_ids: Sequence[int], batch_size: Optional[int] = None) -> int:
+        chunk_ids = [int(i) for i in chunk_ids]
+        if not chunk_ids:
+            return 0
+        with self._writing():
+            snapshot = self._snapshot
+            ids = snapshot.ids[self._mask(snapshot, [("chunk_id", "in", chunk_ids)])].tolist()
+            self._delete_locked(ids)
+        logger.info(f"[VECTORS] Deleted {len(ids)} embeddings of {len(chunk_ids)} chunks from {self.path}")
+        return len(ids)
+
+    def _delete_locked(self, ids: List[int]) -> None:
+        if not ids:
+            return
+        self._append([{"delete": ids}])
+        deleted = self._columns.count - len(self._row_of)
+        if deleted >= self.compact_min_deleted and deleted > len(self._row_of):
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        """Canlı satırları yeni bir nesle yazar; manifest değişince okuyucular yeni nesli baştan yükler."""
+        snapshot, old = self._snapshot, self._generation
+        generation = old + 1
+        live = np.flatnonzero(snapshot.alive)
+        with open(self._file("vectors", generation), "wb") as f:
+            for start in range(0, len(live), 65536):
+                f.write(np.ascontiguousarray(snapshot.vectors[live[start:start + 65536]]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._file("log", generation), "wb") as f:
+            for row in live.tolist():
+                f.write(json.dumps(self._entry(snapshot, row), ensure_ascii=False).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        manifest = {**self._manifest, "generation": generation, "next_id": self._next_id}
+        self._write_manifest(manifest)
+        for kind in ("vectors", "log"):
+            os.remove(self._file(kind, old))
+        logger.info(f"[VECTORS] Compacted {self.path}: {snapshot.count} -> {len(live)} rows (generation {generation})")
+        self._reset(manifest)
+        self._catch_up()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._manifest is None:
+                return
+            for kind in ("vectors", "log"):
+                with open(self._file(kind), "ab") as f:
+                    os.fsync(f.fileno())
+
+    def drop(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._reset(None)
+
+    # --- Okuma ---
+
+    def _entry(self, snapshot: _Snapshot, row: int) -> Dict:
+        entry = {"id": int(snapshot.ids[row])}
+        for field in STRING_FIELDS:
+            entry[field] = snapshot.values[field][snapshot.codes[field][row]]
+        for field in INT_FIELDS:
+            entry[field] = int(snapshot.ints[field][row])
+        entry["metadata"] = snapshot.metadata[row]
+        return entry
+
+    def _mask(self, snapshot: _Snapshot, clauses) -> np.ndarray:
+        mask = snapshot.alive.copy()
+        for field, op, value in clauses:
+            if field in STRING_FIELDS:
+                vocab = snapshot.vocab[field]
+                values = value if op == "in" else [value]
+                matched = np.isin(snapshot.codes[field], [vocab[str(v)] for v in values if str(v) in vocab])
+                mask &= ~matched if op == "!=" else matched
+            else:
+                column = snapshot.ids if field == "id" else snapshot.ints[field]
+                mask &= np.isin(column, value) if op == "in" else _OPS[op](column, value)
+        return mask
+
+    def open(self) -> None:
+        self._refresh()
+
+    def health(self) -> Dict:
+        return {"ready": True, "backend": "embedded", "path": self.path, **self.stats()}
+
+    def stats(self) -> Dict:
+        snapshot = self._refresh()
+        return {"rows": snapshot.count, "live": int(snapshot.alive.sum()), "generation": self._generation, "metric": self.metric}
+
+    def search(self, query_embedding: List[float], top_k: int = 5, filter_expr: Optional[str] = None, similarity_threshold: float = 0.5, tenant_id: Optional[str] = None):
+        """Tam top-k arama; filter_expr için bkz. parse_filter. Sonuçlar MilvusService.search ile aynı biçimdedir."""
+        return self.search_many(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1), top_k, filter_expr, tenant_id)
+
+    def search_many(self, query_embeddings, top_k: int = 5, filter_expr: Optional[str] = None, tenant_id: Optional[str] = None) -> List[List[Hit]]:
+        """Çok sorgulu tam arama: tüm sorgular tek matris çarpımıyla skorlanır, filtre maskesi bir kez hesaplanır."""
+        clauses = parse_filter(filter_expr) if filter_expr else []
+        if tenant_id is not None:
+            clauses.append(("tenant_id", "==", tenant_id))
+        if not len(query_embeddings):
+            return []
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        snapshot = self._refresh()
+        if not snapshot.count:
+            return [[] for _ in range(len(queries))]
+        if queries.shape[1] != snapshot.vectors.shape[1]:
+            raise ValueError(f"query dimension {queries.shape[1]} does not match store dimension {snapshot.vectors.shape[1]}")
+        if self.metric != "L2":
+            queries = normalize_rows(queries)
+        mask = self._mask(snapshot, clauses)
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return [[] for _ in range(len(queries))]
+        if len(rows) * 4 < snapshot.count:
+            # Seçici filtre (ör. küçük bir tenant): yalnızca eşleşen satırlar skorlanır
+            scores = snapshot.vectors[rows] @ queries.T
+        else:
+            scores = (snapshot.vectors @ queries.T)[rows]
+        if self.metric == "L2":
+            distances = snapshot.sq_norms[rows, None] - 2 * scores + np.einsum("ij,ij->i", queries, queries)[None, :]
+            ranking = -distances
+        else:
+            distances = ranking = scores
+        k = min(top_k, len(rows))
+        results = []
+        for q in range(len(queries)):
+            column = ranking[:, q]
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top], kind="stable")]
+            hits = []
+            for i in top.tolist():
+                entry = self._entry(snapshot, int(rows[i]))
+                distance = float(distances[i, q])
+                hits.append(Hit(entry.pop("id"), distance, to_similarity(distance, self.metric), entry))
+            results.append(hits)
+        return results
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from .cache import get_embedding_cache
+from .config import EmbeddingConfig
+from .model_registry import get_model_registry
+
+class Histogram:
+    """Sabit üst sınırlı kovalarla (Prometheus tarzı, kümülatif olmayan) basit histogram."""
+
+    def __init__(self, bounds: Sequence[int]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0
+
+    def observe(self, value: int) -> None:
+        for idx, bound in enumerate(self.bounds):
+            if value <= bound:
+                break
+        else:
+            idx = len(self.bounds)
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += value
+
+    def as_dict(self) -> Dict:
+        buckets = {f"le_{bound}": n for bound, n in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {"buckets": buckets, "count": self.count, "mean": round(self.total / self.count, 2) if self.count else 0.0}
+
+def _power_of_two_bounds(limit: int) -> List[int]:
+    bounds = [1]
+    while bounds[-1] < limit:
+        bounds.append(bounds[-1] * 2)
+    return bounds
+
+class EmbeddingBatcher:
+    """
+    Eşzamanlı sorgu embedding isteklerini kuyruğa alıp mikro-batch'lere birleştiren async ön yüz.
+    Batch, max_batch_size metne ulaşınca ya da ilk metin max_wait_ms beklediğinde kapanır;
+    metinler uzunluğa göre sıralanıp encode_fn'e tek çağrıyla verilir. encode_fn tek thread'li bir
+    executor'da çalışır, böylece event loop bloklanmaz ve model aynı anda tek batch işler;
+    o sırada gelen istekler bir sonraki batch'te toplanır.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], Sequence], config: Optional[EmbeddingConfig] = None):
+        self.config = config or EmbeddingConfig()
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, self.config.batch_max_size)
+        self.max_wait = self.config.batch_max_wait_ms / 1000
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed-batch")
+        self._loop = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        bounds = _power_of_two_bounds(self.max_batch_size)
+        self.batch_sizes = Histogram(bounds)
+        self.queue_depths = Histogram(bounds + [self.max_batch_size * 4])
+        self.requests = 0
+        self.max_queue_depth = 0
+        self.wait_seconds = 0.0
+        self.encode_seconds = 0.0
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """texts için (len(texts), dim) float32 matris; metinler diğer çağıranlarınkilerle birlikte encode edilir."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        queue = self._ensure_started()
+        loop = asyncio.get_running_loop()
+        futures = []
+        now = time.perf_counter()
+        for text in texts:
+            future = loop.create_future()
+            queue.put_nowait((text, future, now))
+            futures.append(future)
+        depth = queue.qsize()
+        self.requests += 1
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self.queue_depths.observe(depth)
+        return np.stack(await asyncio.gather(*futures))
+
+    def stats(self) -> Dict:
+        batches = self.batch_sizes.count
+        texts = self.batch_sizes.total
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self.requests,
+            "batches": batches,
+            "avg_wait_ms": round(self.wait_seconds / texts * 1000, 2) if texts else 0.0,
+            "avg_encode_ms": round(self.encode_seconds / batches * 1000, 2) if batches else 0.0,
+            "batch_size_histogram": self.batch_sizes.as_dict(),
+            "queue_depth_histogram": self.queue_depths.as_dict(),
+        }
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        # Farklı bir event loop'tan (ör. test client'ları) çağrılırsa kuyruk o loop'a yeniden bağlanır
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._process(batch)
+
+    async def _process(self, batch) -> None:
+        # İptal edilmiş istekler (ör. client bağlantıyı kapattı) encode edilmez
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+        batch.sort(key=lambda item: len(item[0]))
+        started = time.perf_counter()
+        self.wait_seconds += sum(started - enqueued for _, _, enqueued in batch)
+        self.batch_sizes.observe(len(batch))
+        try:
+            vectors = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.encode_fn, [text for text, _, _ in batch]
+            )
+        except Exception as e:
+            self.logger.error(f"[EMBED_BATCH] Encode failed for batch of {len(batch)}: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.encode_seconds += time.perf_counter() - started
+        for (_, future, _), vector in zip(batch, np.asarray(vectors, dtype=np.float32)):
+            if not future.done():
+                future.set_result(vector)
+
+def _cached_encoder(model_name: str) -> Callable[[List[str]], np.ndarray]:
+    def encode(texts: List[str]) -> np.ndarray:
+        return get_embedding_cache().encode(
+            model_name,
+            texts,
+            lambda missing: get_model_registry().get(model_name).encode(
+                missing, convert_to_numpy=True, show_progress_bar=False
+            )
+        )
+    return encode
+
+# Model başına bir batcher: aynı modeli kullanan tüm servisler aynı kuyruğu paylaşır
+_batchers: Dict[str, EmbeddingBatcher] = {}
+
+def get_embedding_batcher(model_name: Optional[str] = None) -> EmbeddingBatcher:
+    """Get or create the process-wide query embedding batcher for a model"""
+    config = EmbeddingConfig()
+    model_name = model_name or config.default_model
+    if model_name not in _batchers:
+        _batchers[model_name] = EmbeddingBatcher(_cached_encoder(model_name), config)
+    return _batchers[model_name]
+
+def batcher_stats() -> Dict[str, Dict]:
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
+
+async def close_embedding_batchers() -> None:
+    for batcher in _batchers.values():
+        await batcher.close()
@@ -0,0 +1,326 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from backend.services.text import collapse_whitespace, normalize_unicode
+from .config import EmbeddingConfig
+from .onnx_backend import backend_tag
+
+def normalize_text(text: str) -> str:
+    """Cache anahtarı için metni normalize eder: NFC, fazla boşluk temizliği."""
+    return collapse_whitespace(normalize_unicode(text, 'NFC')).strip()
+
+def text_key(model_name: str, text: str) -> str:
+    """(model adı, normalize metnin SHA-256'sı) -> cache anahtarı."""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8", errors="replace")).hexdigest()
+    return f"{model_name}:{digest}"
+
+class CacheStats:
+    """Hit/miss sayaçları ve cache sayesinde atlanan encode süresinin tahmini."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def record(self, hits: int, misses: int, encode_seconds: float, saved_seconds: float) -> None:
+        self.hits += hits
+        self.misses += misses
+        self.encode_seconds += encode_seconds
+        self.saved_seconds += saved_seconds
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "encode_ms": int(self.encode_seconds * 1000),
+            "saved_ms": int(self.saved_seconds * 1000),
+        }
+
+class _DiskTier:
+    """
+    sqlite üzerinde kalıcı LRU katmanı. Aynı dosyayı API ve ingestion worker process'leri paylaşır (WAL).
+    Toplam vektör boyutu bütçeyi aşınca en uzun süredir kullanılmayan kayıtlar silinir.
+    """
+
+    def __init__(self, path: str, budget_bytes: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS encode_cost (model TEXT PRIMARY KEY, seconds_per_text REAL NOT NULL)")
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        found = {}
+        with self._lock:
+            # sqlite değişken limiti için anahtarlar parça parça sorgulanır
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                found.update(self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall())
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+        return found
+
+    def put_many(self, items: Dict[str, bytes]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)",
+                [(k, v, len(v), now) for k, v in items.items()]
+            )
+            self._conn.execute("COMMIT")
+            self._bytes += sum(len(v) for v in items.values())
+            if self._bytes > self.budget_bytes:
+                self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        # Diğer process'lerin yazdıkları da sayılsın diye toplam yeniden hesaplanır
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if self._bytes <= self.budget_bytes:
+            return
+        # Her tahliyede bütçenin %90'ına inilir; sınırda her put'ta tahliye yapılmaz
+        target = int(self.budget_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_used"):
+            if self._bytes - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+        self._bytes -= freed
+
+    def get_cost(self, model_name: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT seconds_per_text FROM encode_cost WHERE model = ?", (model_name,)).fetchone()
+        return row[0] if row else None
+
+    def set_cost(self, model_name: str, seconds_per_text: float) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO encode_cost (model, seconds_per_text) VALUES (?, ?)", (model_name, seconds_per_text))
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class EmbeddingCache:
+    """
+    Ingestion ve sorgu yollarının paylaştığı embedding cache'i.
+    Anahtar (model adı, normalize metin hash'i); yerel sqlite katmanı (LRU, boyut bütçeli) ve opsiyonel
+    Redis katmanı vardır. Redis'ten gelen vektörler yerel katmana da yazılır.
+    encode, yalnızca cache'te bulunmayan metinleri modele gönderir.
+    """
+
+    def __init__(self, config: Optional[EmbeddingConfig] = None, redis_client=None):
+        self.config = config or EmbeddingConfig()
+        self.logger = logging.getLogger(__name__)
+        self.stats = CacheStats()
+        self._disk = None
+        self._redis = redis_client
+        self._costs: Dict[str, float] = {}
+        if not self.config.cache_enabled:
+            return
+        try:
+            self._disk = _DiskTier(self.config.cache_path, self.config.cache_disk_budget_mb * 1048576)
+        except Exception as e:
+            self.logger.warning(f"[EMBED_CACHE] Disk tier disabled ({self.config.cache_path}): {e}")
+        if self._redis is None and self.config.cache_redis_url:
+            try:
+                import redis as redis_sync
+                self._redis = redis_sync.from_url(self.config.cache_redis_url)
+            except Exception as e:
+                self.logger.warning(f"[EMBED_CACHE] Redis tier disabled: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self._disk is not None or self._redis is not None
+
+    def get_many(self, model_name: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Her metin için cache'teki vektör ya da None."""
+        keys = [text_key(self._model_id(model_name), t) for t in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        return [np.frombuffer(found[k], dtype=np.float32) if k in found else None for k in keys]
+
+    def put_many(self, model_name: str, texts: Sequence[str], vectors) -> None:
+        model_id = self._model_id(model_name)
+        self._store({text_key(model_id, t): _to_bytes(v) for t, v in zip(texts, vectors)})
+
+    def encode(
+        self,
+        model_name: str,
+        texts: Sequence[str],
+        encode_fn: Callable[[List[str]], Sequence],
+        stats: Optional[CacheStats] = None
+    ) -> np.ndarray:
+        """
+        texts için (len(texts), dim) float32 matris döner. Cache'te olmayan (ve batch içinde tekrar etmeyen)
+        metinler tek encode_fn çağrısıyla üretilip cache'e yazılır.
+        stats verilirse bu çağrının sayaçları ona da eklenir (ör. upload bazında raporlama).
+        """
+        if not self.enabled or not texts:
+            started = time.perf_counter()
+            vectors = np.asarray(encode_fn(list(texts)), dtype=np.float32)
+            self._record(stats, 0, len(texts), time.perf_counter() - started, 0.0)
+            return vectors
+
+        model_name = self._model_id(model_name)
+        keys = [text_key(model_name, t) for t in texts]
+        unique = list(dict.fromkeys(keys))
+        found = self._lookup(unique)
+        missing = [k for k in unique if k not in found]
+        encode_seconds = 0.0
+        if missing:
+            first_text = {}
+            for key, text in zip(keys, texts):
+                first_text.setdefault(key, text)
+            started = time.perf_counter()
+            encoded = encode_fn([first_text[k] for k in missing])
+            encode_seconds = time.perf_counter() - started
+            fresh = {k: _to_bytes(v) for k, v in zip(missing, encoded)}
+            self._store(fresh)
+            found.update(fresh)
+            self._update_cost(model_name, encode_seconds / len(missing))
+
+        hits = len(texts) - len(missing)
+        saved = hits * self._cost(model_name)
+        self._record(stats, hits, len(missing), encode_seconds, saved)
+        return np.stack([np.frombuffer(found[k], dtype=np.float32) for k in keys])
+
+    def report(self) -> Dict:
+        report = {"enabled": self.enabled, "redis": self._redis is not None, **self.stats.as_dict()}
+        if self._disk is not None:
+            report["disk_mb"] = round(self._disk.size_bytes() / 1048576, 2)
+            report["disk_budget_mb"] = self.config.cache_disk_budget_mb
+        return report
+
+    def clear(self) -> None:
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def _lookup(self, keys: List[str]) -> Dict[str, bytes]:
+        found = {}
+        if self._disk is not None:
+            try:
+                found = self._disk.get_many(keys)
+            except Exception as e:
+                self.logger.warning(f"[EMBED_CACHE] Disk lookup failed: {e}")
+        remaining = [k for k in keys if k not in found]
+        if self._redis is not None and remaining:
+            try:
+                values = self._redis.mget([self._redis_key(k) for k in remaining])
+                from_redis = {k: v for k, v in zip(remaining, values) if v is not None}
+            except Exception as e:
+                self.logger.warning(f"[EMBED_CACHE] Redis lookup failed: {e}")
+                from_redis = {}
+            if from_redis and self._disk is not None:
+                try:
+                    self._disk.put_many(from_redis)
+                except Exception as e:
+                    self.logger.warning(f"[EMBED_CACHE] Disk backfill failed: {e}")
+            found.update(from_redis)
+        return found
+
+    def _store(self, items: Dict[str, bytes]) -> None:
+        if not items:
+            return
+        if self._disk is not None:
+            try:
+                self._disk.put_many(items)
+            except Exception as e:
+                self.logger.warning(f"[EMBED_CACHE] Disk write failed: {e}")
+        if self._redis is not None:
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                for key, value in items.items():
+                    pipe.set(self._redis_key(key), value, ex=self.config.cache_redis_ttl_seconds)
+                pipe.execute()
+            except Exception as e:
+                self.logger.warning(f"[EMBED_CACHE] Redis write failed: {e}")
+
+    def _model_id(self, model_name: str) -> str:
+        # ONNX/int8 vektörleri torch çıktısıyla birebir aynı değildir; backend'ler anahtarları paylaşmaz
+        tag = backend_tag(self.config)
+        return f"{model_name}@{tag}" if tag else model_name
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.config.cache_redis_prefix}{key}"
+
+    def _cost(self, model_name: str) -> float:
+        """Metin başına encode süresi (saniye); process'te ölçülmediyse disk katmanındaki son değer."""
+        if model_name not in self._costs and self._disk is not None:
+            try:
+                cost = self._disk.get_cost(model_name)
+            except Exception:
+                cost = None
+            if cost is not None:
+                self._costs[model_name] = cost
+        return self._costs.get(model_name, 0.0)
+
+    def _update_cost(self, model_name: str, seconds_per_text: float) -> None:
+        previous = self._costs.get(model_name)
+        # Tek bir yavaş batch tahmini bozmasın diye üstel ortalama
+        cost = seconds_per_text if previous is None else 0.8 * previous + 0.2 * seconds_per_text
+        self._costs[model_name] = cost
+        if self._disk is not None:
+            try:
+                self._disk.set_cost(model_name, cost)
+            except Exception:
+                pass
+
+    def _record(self, stats: Optional[CacheStats], hits: int, misses: int, encode_seconds: float, saved: float) -> None:
+        self.stats.record(hits, misses, encode_seconds, saved)
+        if stats is not None:
+            stats.record(hits, misses, encode_seconds, saved)
+
+def _to_bytes(vector) -> bytes:
+    if hasattr(vector, "detach"):
+        vector = vector.detach().cpu().numpy()
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+# Singleton cache instance
+_cache = None
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the process-wide embedding cache"""
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache(EmbeddingConfig())
+    return _cache
@@ -0,0 +1,24 @@
+from pydantic_settings import BaseSettings
+
+class EmbeddingConfig(BaseSettings):
+    default_model: str = "paraphrase-multilingual-MiniLM-L12-v2"
+    warmup_models: list = ["paraphrase-multilingual-MiniLM-L12-v2"]
+    memory_budget_mb: int = 2048  # Tüm yüklü modeller için toplam bellek bütçesi
+    idle_ttl_seconds: int = 1800  # Bu süre kullanılmayan model bütçe aşılınca boşaltılır
+    backend: str = "torch"  # "torch" (SentenceTransformer) veya "onnx" (ONNX Runtime, CPU)
+    onnx_dir: str = "/uploads/.cache/onnx"  # Dışa aktarılan grafikler; ilk yüklemede oluşturulur
+    onnx_quantize: bool = True  # int8 dinamik quantization
+    onnx_intra_op_threads: int = 0  # 0: process'e atanmış çekirdek sayısı
+    onnx_inter_op_threads: int = 1
+    batch_max_size: int = 32  # Sorgu mikro-batch'i en fazla bu kadar metin içerir
+    batch_max_wait_ms: float = 5.0  # Batch'in ilk metni en fazla bu kadar bekler
+    cache_enabled: bool = True
+    cache_path: str = "/uploads/.cache/embeddings.sqlite3"  # API ve worker process'leri aynı dosyayı paylaşır
+    cache_disk_budget_mb: int = 1024  # Aşılınca en uzun süredir kullanılmayan vektörler silinir
+    cache_redis_url: str = ""  # Boş değilse Redis ikinci katman olarak kullanılır
+    cache_redis_ttl_seconds: int = 604800
+    cache_redis_prefix: str = "embcache:"
+
+    class Config:
+        env_file = ".env"
+        env_prefix = "EMBEDDING_"
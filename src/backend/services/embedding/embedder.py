@@ -1,20 +1,28 @@
 from typing import List, Any, Dict
 import logging
-from sentence_transformers import SentenceTransformer
+from .cache import get_embedding_cache
+from .model_registry import get_model_registry
 
 class EmbeddingService:
     def __init__(self, model_name: str = 'paraphrase-multilingual-MiniLM-L12-v2'):
         self.logger = logging.getLogger(__name__)
-        self.model = SentenceTransformer(model_name)
         self.model_name = model_name
 
+    @property
+    def model(self):
+        return get_model_registry().get(self.model_name)
+
     def embed(self, chunks: List[Dict]) -> List[Dict]:
         """
         Her chunk için embedding üretir ve metadata ile birlikte döner.
         """
         self.logger.info(f"Embedding {len(chunks)} chunks with model {self.model_name}")
         texts = [chunk['content'] for chunk in chunks]
-        embeddings = self.model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
+        embeddings = get_embedding_cache().encode(
+            self.model_name,
+            texts,
+            lambda missing: self.model.encode(missing, show_progress_bar=False, convert_to_numpy=True)
+        )
         results = []
         for chunk, embedding in zip(chunks, embeddings):
             results.append({
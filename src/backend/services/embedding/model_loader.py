@@ -1,7 +1,8 @@
-from sentence_transformers import SentenceTransformer
+from .model_registry import get_model_registry
 
 def load_embedding_model(model_name):
     """
-    Model adını alıp uygun SentenceTransformer modelini yükler.
+    Model adını alıp uygun SentenceTransformer modelini ortak registry üzerinden döndürür.
+    Model process başına yalnızca bir kez yüklenir.
     """
-    return SentenceTransformer(model_name) 
\ No newline at end of file
+    return get_model_registry().get(model_name)
@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from .config import EmbeddingConfig
+
+def _default_loader(model_name: str, config: Optional[EmbeddingConfig] = None):
+    config = config or EmbeddingConfig()
+    if config.backend == "onnx":
+        from .onnx_backend import load_onnx_model
+        return load_onnx_model(model_name, config)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+def estimate_model_bytes(model) -> int:
+    """
+    Modelin parametre ve buffer'larının kapladığı belleği byte cinsinden tahmin eder.
+    ONNX modelleri için model dosyasının boyutu, diğer torch modülü olmayan nesneler için 0 döner.
+    """
+    if getattr(model, "memory_bytes", None) is not None:
+        return model.memory_bytes
+    total = 0
+    try:
+        for p in model.parameters():
+            total += p.numel() * p.element_size()
+        for b in model.buffers():
+            total += b.numel() * b.element_size()
+    except Exception:
+        return 0
+    return total
+
+class _Entry:
+    __slots__ = ("model", "size_bytes", "loaded_at", "last_used", "hits")
+
+    def __init__(self, model, size_bytes: int):
+        now = time.monotonic()
+        self.model = model
+        self.size_bytes = size_bytes
+        self.loaded_at = now
+        self.last_used = now
+        self.hits = 0
+
+class EmbeddingModelRegistry:
+    """
+    Process başına her embedding modelini bir kez yükleyen ortak kayıt.
+    RagService, FileService ve router'lar modeli buradan alır; böylece worker başına
+    tek bir MiniLM kopyası bellekte tutulur.
+    Bellek bütçesi aşıldığında idle_ttl_seconds süresince kullanılmamış modeller
+    en eski kullanılandan başlayarak boşaltılır: model yüklenirken ve kullanılırken (diğer modeller için)
+    ve API process'inde periyodik olarak evict_idle ile (bkz. HealthService.evict_idle_models).
+    """
+
+    def __init__(self, config: Optional[EmbeddingConfig] = None, loader: Optional[Callable[[str], Any]] = None):
+        self.config = config or EmbeddingConfig()
+        self._loader = loader or (lambda name: _default_loader(name, self.config))
+        self._models: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def get(self, model_name: Optional[str] = None):
+        """Modeli döndürür; yüklü değilse yükler (aynı model için eşzamanlı yükleme tek sefer yapılır)."""
+        model_name = model_name or self.config.default_model
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                entry.hits += 1
+                # Başka modeller bu arada idle kaldıysa bütçe aşımında burada da boşaltılır
+                self._evict_idle_locked(keep=model_name)
+                return entry.model
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(model_name)
+            if entry is None:
+                started = time.perf_counter()
+                model = self._loader(model_name)
+                entry = _Entry(model, estimate_model_bytes(model))
+                self.logger.info(
+                    f"Embedding model loaded: {model_name} "
+                    f"({entry.size_bytes / 1048576:.1f} MB, {time.perf_counter() - started:.2f}s)"
+                )
+                with self._lock:
+                    self._models[model_name] = entry
+                    self._evict_idle_locked(keep=model_name)
+            entry.last_used = time.monotonic()
+            entry.hits += 1
+            return entry.model
+
+    def warm_up(self, model_names: Optional[List[str]] = None) -> None:
+        """Startup'ta modelleri yükler ve kısa bir encode ile ilk çağrı gecikmesini ortadan kaldırır."""
+        for name in model_names or self.config.warmup_models:
+            try:
+                model = self.get(name)
+                if hasattr(model, "encode"):
+                    model.encode(["warm-up"], show_progress_bar=False)
+            except Exception as e:
+                self.logger.error(f"Embedding model warm-up failed for {name}: {e}")
+
+    def is_loaded(self, model_name: str) -> bool:
+        with self._lock:
+            return model_name in self._models
+
+    def unload(self, model_name: str) -> bool:
+        with self._lock:
+            return self._models.pop(model_name, None) is not None
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size_bytes for e in self._models.values())
+
+    def memory_report(self) -> Dict[str, Dict[str, Any]]:
+        """Model bazında bellek kullanımı ve kullanım istatistiklerini döndürür."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    "memory_mb": round(e.size_bytes / 1048576, 2),
+                    "hits": e.hits,
+                    "idle_seconds": round(now - e.last_used, 1),
+                    "loaded_seconds": round(now - e.loaded_at, 1),
+                }
+                for name, e in self._models.items()
+            }
+
+    def evict_idle(self) -> List[str]:
+        """Bütçe aşılmışsa idle modelleri boşaltır ve boşaltılan model adlarını döner."""
+        with self._lock:
+            return self._evict_idle_locked()
+
+    def _evict_idle_locked(self, keep: Optional[str] = None) -> List[str]:
+        budget = self.config.memory_budget_mb * 1048576
+        total = sum(e.size_bytes for e in self._models.values())
+        if total <= budget:
+            return []
+        now = time.monotonic()
+        candidates = sorted(
+            (
+                (e.last_used, name) for name, e in self._models.items()
+                if name != keep and now - e.last_used >= self.config.idle_ttl_seconds
+            )
+        )
+        evicted = []
+        for _, name in candidates:
+            if total <= budget:
+                break
+            total -= self._models.pop(name).size_bytes
+            evicted.append(name)
+        if evicted:
+            self.logger.info(f"Evicted idle embedding models: {evicted}")
+        return evicted
+
+# Singleton registry instance
+_registry = None
+
+def get_model_registry() -> EmbeddingModelRegistry:
+    """Get or create the process-wide embedding model registry"""
+    global _registry
+    if _registry is None:
+        _registry = EmbeddingModelRegistry(EmbeddingConfig())
+    return _registry
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from .config import EmbeddingConfig
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+META_FILE = "export.json"
+
+def backend_tag(config: EmbeddingConfig) -> str:
+    """Cache anahtarlarında kullanılan backend etiketi; torch için boş (mevcut anahtarlar korunur)."""
+    if config.backend != "onnx":
+        return ""
+    return "onnx-int8" if config.onnx_quantize else "onnx-fp32"
+
+def available_cores() -> int:
+    """Process'e atanmış CPU sayısı (cgroup/affinity kısıtları dahil)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+def export_dir(config: EmbeddingConfig, model_name: str) -> str:
+    return os.path.join(config.onnx_dir, model_name.replace("/", "__"))
+
+def export_model(model_name: str, target_dir: str, quantize: bool = True, opset: int = 14) -> str:
+    """
+    SentenceTransformer modelinin transformer gövdesini ONNX'e aktarır, tokenizer'ı ve pooling ayarlarını
+    yanına yazar; quantize=True ise ağırlıklar int8'e dinamik olarak quantize edilir.
+    Dosyalar önce geçici dizine yazılıp taşınır; API ve worker aynı anda export etse de yarım dosya okunmaz.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    pooling = st_model[1] if len(st_model) > 1 else None
+    tokenizer = transformer.tokenizer
+    auto_model = transformer.auto_model.eval()
+
+    os.makedirs(os.path.dirname(target_dir.rstrip("/")) or ".", exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".export-", dir=os.path.dirname(target_dir.rstrip("/")) or ".")
+    try:
+        sample = tokenizer(["export"], return_tensors="pt", padding=True)
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        model_path = os.path.join(work_dir, MODEL_FILE)
+        with torch.no_grad():
+            torch.onnx.export(
+                auto_model,
+                tuple(sample[name] for name in input_names),
+                model_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=opset,
+                do_constant_folding=True,
+            )
+        if quantize:
+            quantize_dynamic(model_path, os.path.join(work_dir, QUANTIZED_FILE), weight_type=QuantType.QInt8)
+
+        tokenizer.backend_tokenizer.save(os.path.join(work_dir, TOKENIZER_FILE))
+        meta = {
+            "model_name": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "pooling": "cls" if pooling is not None and getattr(pooling, "pooling_mode_cls_token", False) else "mean",
+            "normalize": any(type(module).__name__ == "Normalize" for module in st_model),
+            "pad_token": tokenizer.pad_token,
+            "pad_id": tokenizer.pad_token_id,
+            "dimension": st_model.get_sentence_embedding_dimension(),
+        }
+        with open(os.path.join(work_dir, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+        if os.path.isdir(target_dir):
+            shutil.rmtree(target_dir, ignore_errors=True)
+        os.replace(work_dir, target_dir)
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+    logger.info(f"[ONNX] Exported {model_name} to {target_dir} (quantized={quantize})")
+    return target_dir
+
+class OnnxEmbeddingModel:
+    """
+    Dışa aktarılmış transformer grafiğini ONNX Runtime ile çalıştıran, SentenceTransformer.encode ile
+    uyumlu embedding modeli. Tokenization `tokenizers` ile, pooling numpy ile yapılır; torch gerektirmez.
+    Metinler uzunluğa göre sıralanıp batch'lenir, böylece padding en aza iner.
+    """
+
+    def __init__(self, session, tokenizer, meta: Dict[str, Any], model_path: Optional[str] = None):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.meta = meta
+        self.max_seq_length = meta["max_seq_length"]
+        self.memory_bytes = os.path.getsize(model_path) if model_path and os.path.exists(model_path) else 0
+        self._input_names = [i.name for i in session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.meta["dimension"]
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ):
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        output = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            output[idx] = self._encode_batch([texts[i] for i in idx])
+        if normalize_embeddings or self.meta.get("normalize"):
+            output /= np.clip(np.linalg.norm(output, axis=1, keepdims=True), 1e-12, None)
+        return output[0] if single else output
+
+    def _encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        hidden = self.session.run(None, {name: feeds[name] for name in self._input_names})[0]
+        if self.meta.get("pooling") == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+def session_options(config: EmbeddingConfig):
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = config.onnx_intra_op_threads or available_cores()
+    options.inter_op_num_threads = config.onnx_inter_op_threads
+    return options
+
+def load_onnx_model(model_name: str, config: Optional[EmbeddingConfig] = None) -> OnnxEmbeddingModel:
+    """Export dizini yoksa modeli bir kez dışa aktarır, ardından ONNX Runtime oturumunu açar."""
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+
+    config = config or EmbeddingConfig()
+    target_dir = export_dir(config, model_name)
+    model_file = QUANTIZED_FILE if config.onnx_quantize else MODEL_FILE
+    model_path = os.path.join(target_dir, model_file)
+    if not os.path.exists(model_path):
+        export_model(model_name, target_dir, quantize=config.onnx_quantize)
+
+    with open(os.path.join(target_dir, META_FILE)) as f:
+        meta = json.load(f)
+    tokenizer = Tokenizer.from_file(os.path.join(target_dir, TOKENIZER_FILE))
+    tokenizer.enable_truncation(max_length=meta["max_seq_length"])
+    tokenizer.enable_padding(pad_id=meta["pad_id"], pad_token=meta["pad_token"])
+    session = ort.InferenceSession(model_path, sess_options=session_options(config), providers=["CPUExecutionProvider"])
+    logger.info(
+        f"[ONNX] Loaded {model_name} ({model_file}, intra_op_threads={config.onnx_intra_op_threads or available_cores()})"
+    )
+    return OnnxEmbeddingModel(session, tokenizer, meta, model_path)
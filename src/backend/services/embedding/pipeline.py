@@ -1,6 +1,6 @@
-from sentence_transformers import SentenceTransformer
-import unicodedata
-import re
+from .cache import get_embedding_cache
+from .model_registry import get_model_registry
+from backend.services.text import collapse_whitespace, normalize_unicode, strip_unsafe
 import logging
 
 def clean_text_for_embedding(text):
@@ -13,15 +13,15 @@ def clean_text_for_embedding(text):
     
     # Unicode normalization
     try:
-        text = unicodedata.normalize('NFKC', text)
+        text = normalize_unicode(text, 'NFKC')
     except:
         pass
     
     # Sadece printable ASCII + temel Unicode karakterleri tut
-    text = ''.join(char for char in text if ord(char) < 127 or char.isalnum() or char.isspace())
+    text = strip_unsafe(text)
     
     # Fazla boşlukları temizle
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = collapse_whitespace(text.strip())
     
     # Çok kısa veya boş text'leri düzelt
     if len(text.strip()) < 3:
@@ -29,15 +29,16 @@ def clean_text_for_embedding(text):
     
     return text
 
-def embed_chunks(chunks, model_name="paraphrase-multilingual-MiniLM-L12-v2"):
+def embed_chunks(chunks, model_name="paraphrase-multilingual-MiniLM-L12-v2", cache_stats=None):
     """
     Verilen chunk listesini embedding modeline gönder ve vektörleri döndür.
-    Text encoding sorunlarını çözer.
+    Text encoding sorunlarını çözer. Daha önce embed edilmiş metinler embedding cache'inden gelir;
+    cache_stats (CacheStats) verilirse hit/miss ve kazanılan süre ona eklenir.
     """
     logger = logging.getLogger(__name__)
     
     try:
-        model = SentenceTransformer(model_name)
+        model = get_model_registry().get(model_name)
         
         # Tüm chunk content'lerini güvenli hale getir
         texts = []
@@ -48,8 +49,13 @@ def embed_chunks(chunks, model_name="paraphrase-multilingual-MiniLM-L12-v2"):
         
         logger.info(f"Embedding {len(texts)} chunks with model {model_name}")
         
-        # Embedding işlemi
-        embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        # Embedding işlemi; yalnızca cache'te olmayan metinler modele gider
+        embeddings = get_embedding_cache().encode(
+            model_name,
+            texts,
+            lambda missing: model.encode(missing, convert_to_numpy=True, show_progress_bar=False),
+            stats=cache_stats
+        )
         
         logger.info(f"Successfully generated {len(embeddings)} embeddings")
         return embeddings
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import numpy as np
+from src.backend.services.embedding.batcher import EmbeddingBatcher
+from src.backend.services.embedding.config import EmbeddingConfig
+
+class _RecordingEncoder:
+    def __init__(self):
+        self.batches = []
+        self.threads = set()
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.threads.add(threading.current_thread().name)
+        return np.array([[float(len(t)), 0.0] for t in texts], dtype=np.float32)
+
+def test_concurrent_requests_coalesce_into_batches():
+    encoder = _RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, EmbeddingConfig(batch_max_size=8, batch_max_wait_ms=50))
+
+    async def run():
+        texts = ["x" * (i % 7 + 1) for i in range(20)]
+        results = await asyncio.gather(*(batcher.embed([t]) for t in texts))
+        await batcher.close()
+        return texts, results
+
+    texts, results = asyncio.run(run())
+    for text, vectors in zip(texts, results):
+        assert vectors.shape == (1, 2) and vectors[0, 0] == len(text)
+    assert [len(b) for b in encoder.batches] == [8, 8, 4]
+    # Batch içi metinler uzunluğa göre sıralı
+    assert all(batch == sorted(batch, key=len) for batch in encoder.batches)
+    assert encoder.threads and all(name.startswith("embed-batch") for name in encoder.threads)
+    stats = batcher.stats()
+    assert stats["requests"] == 20 and stats["batches"] == 3
+    assert stats["batch_size_histogram"]["buckets"]["le_8"] == 2
+    assert stats["max_queue_depth"] == 20
+
+def test_encode_error_propagates_to_every_caller():
+    def failing(texts):
+        raise RuntimeError("model unavailable")
+    batcher = EmbeddingBatcher(failing, EmbeddingConfig(batch_max_wait_ms=20))
+
+    async def run():
+        results = await asyncio.gather(batcher.embed(["a"]), batcher.embed(["b", "c"]), return_exceptions=True)
+        # Hata sonrası batcher yeni istekleri işlemeye devam eder
+        batcher.encode_fn = _RecordingEncoder()
+        after = await batcher.embed(["ok"])
+        await batcher.close()
+        return results, after
+
+    results, after = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert after[0, 0] == 2.0
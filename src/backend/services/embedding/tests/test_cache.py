@@ -0,0 +1,52 @@
+import numpy as np
+from src.backend.services.embedding.cache import CacheStats, EmbeddingCache
+from src.backend.services.embedding.config import EmbeddingConfig
+
+class _CountingModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[float(len(t)), 1.0, 2.0] for t in texts], dtype=np.float32)
+
+def _cache(tmp_path, **overrides):
+    config = EmbeddingConfig(cache_path=str(tmp_path / "cache.sqlite3"), **overrides)
+    return EmbeddingCache(config)
+
+def test_only_misses_are_encoded(tmp_path):
+    cache = _cache(tmp_path)
+    model = _CountingModel()
+    first = cache.encode("m", ["alpha", "beta", "alpha"], model.encode)
+    assert model.calls == [["alpha", "beta"]]
+    stats = CacheStats()
+    second = cache.encode("m", ["beta", "alpha ", "gamma"], model.encode, stats=stats)
+    assert model.calls[-1] == ["gamma"]
+    np.testing.assert_array_equal(second[:2], first[[1, 0]])
+    assert (stats.hits, stats.misses) == (2, 1)
+    # Farklı model aynı metin için ayrı anahtar kullanır
+    cache.encode("other", ["alpha"], model.encode)
+    assert model.calls[-1] == ["alpha"]
+
+def test_disk_tier_persists_across_instances(tmp_path):
+    model = _CountingModel()
+    _cache(tmp_path).encode("m", ["kalıcı metin"], model.encode)
+    reopened = _cache(tmp_path)
+    stats = CacheStats()
+    reopened.encode("m", ["kalıcı metin"], model.encode, stats=stats)
+    assert len(model.calls) == 1
+    assert stats.hit_rate == 1.0
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    # Her vektör 12 byte; bütçe ~5 vektör
+    cache = _cache(tmp_path, cache_disk_budget_mb=1)
+    cache._disk.budget_bytes = 60
+    model = _CountingModel()
+    for i in range(5):
+        cache.encode("m", [f"t{i}"], model.encode)
+        cache.encode("m", ["t0"], model.encode)
+    cache.encode("m", ["t5", "t6"], model.encode)
+    assert cache._disk.size_bytes() <= 60
+    cached = cache.get_many("m", ["t0", "t1", "t6"])
+    assert cached[0] is not None and cached[2] is not None
+    assert cached[1] is None
@@ -0,0 +1,30 @@
+from src.backend.services.embedding.config import EmbeddingConfig
+from src.backend.services.embedding.model_registry import EmbeddingModelRegistry
+
+def test_model_loaded_once():
+    loads = []
+    registry = EmbeddingModelRegistry(EmbeddingConfig(), loader=lambda name: loads.append(name) or object())
+    first = registry.get("model-a")
+    assert registry.get("model-a") is first
+    assert loads == ["model-a"]
+    assert "model-a" in registry.memory_report()
+
+def test_idle_models_evicted_over_budget():
+    config = EmbeddingConfig(memory_budget_mb=0, idle_ttl_seconds=0)
+    registry = EmbeddingModelRegistry(config, loader=lambda name: object())
+    registry.get("model-a")
+    registry._models["model-a"].size_bytes = 1048576
+    registry.get("model-b")
+    assert not registry.is_loaded("model-a")
+    assert registry.is_loaded("model-b")
+
+def test_single_idle_model_evicted_periodically():
+    config = EmbeddingConfig(memory_budget_mb=0, idle_ttl_seconds=0)
+    registry = EmbeddingModelRegistry(config, loader=lambda name: object())
+    registry.get("model-a")
+    registry._models["model-a"].size_bytes = 1048576
+    # Kullanılan model kendi get() çağrısında boşaltılmaz; idle kalınca evict_idle ile boşaltılır
+    registry.get("model-a")
+    assert registry.is_loaded("model-a")
+    assert registry.evict_idle() == ["model-a"]
+    assert not registry.is_loaded("model-a")
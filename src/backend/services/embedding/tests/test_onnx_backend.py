@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from src.backend.services.embedding.config import EmbeddingConfig
+from src.backend.services.embedding.onnx_backend import OnnxEmbeddingModel, load_onnx_model
+
+class _Encoding:
+    def __init__(self, ids, width):
+        self.ids = ids + [0] * (width - len(ids))
+        self.attention_mask = [1] * len(ids) + [0] * (width - len(ids))
+        self.type_ids = [0] * width
+
+class _FakeTokenizer:
+    def encode_batch(self, texts):
+        ids = [[len(word) for word in text.split()] for text in texts]
+        width = max(len(i) for i in ids)
+        return [_Encoding(i, width) for i in ids]
+
+class _Input:
+    def __init__(self, name):
+        self.name = name
+
+class _FakeSession:
+    """Token başına hidden state = [token id, 1]; mean pooling sonucu elle hesaplanabilir."""
+
+    def get_inputs(self):
+        return [_Input("input_ids"), _Input("attention_mask")]
+
+    def run(self, outputs, feeds):
+        ids = feeds["input_ids"].astype(np.float32)
+        # Padding pozisyonlarına çöp değer koy: maske dışında kalmalı
+        hidden = np.stack([ids, np.ones_like(ids)], axis=-1)
+        hidden[feeds["attention_mask"] == 0] = 99.0
+        return [hidden]
+
+def test_mean_pooling_and_order_preserved():
+    meta = {"max_seq_length": 128, "pooling": "mean", "normalize": False, "dimension": 2}
+    model = OnnxEmbeddingModel(_FakeSession(), _FakeTokenizer(), meta)
+    texts = ["a bb", "cccc", "a bb ccc dddd", "ee"]
+    vectors = model.encode(texts, batch_size=2)
+    np.testing.assert_allclose(vectors[:, 0], [1.5, 4.0, 2.5, 2.0])
+    np.testing.assert_allclose(vectors[:, 1], 1.0)
+    np.testing.assert_allclose(model.encode("a bb"), vectors[0])
+
+def test_parity_with_sentence_transformers(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    st = pytest.importorskip("sentence_transformers")
+    model_name = "paraphrase-multilingual-MiniLM-L12-v2"
+    texts = [
+        "Hyperion yüklenen belgeleri bölümlere ayırır.",
+        "The ingestion worker embeds every child chunk.",
+        "Kısa",
+        "Milvus koleksiyonu 384 boyutlu vektörler saklar ve benzerlik araması yapar. " * 8,
+    ]
+    reference = st.SentenceTransformer(model_name).encode(texts, convert_to_numpy=True)
+    for quantize, threshold in ((False, 0.9999), (True, 0.98)):
+        config = EmbeddingConfig(onnx_dir=str(tmp_path), onnx_quantize=quantize)
+        vectors = load_onnx_model(model_name, config).encode(texts)
+        assert vectors.shape == reference.shape == (len(texts), 384)
+        cosine = (vectors * reference).sum(axis=1) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+        )
+        assert cosine.min() >= threshold, (quantize, cosine)
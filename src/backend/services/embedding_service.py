@@ -1,26 +1,46 @@
-from sentence_transformers import SentenceTransformer
+from backend.services.embedding.batcher import get_embedding_batcher
+from backend.services.embedding.cache import get_embedding_cache
+from backend.services.embedding.model_registry import get_model_registry
 from typing import List
 import threading
-import unicodedata
-import re
+from backend.services.text import collapse_whitespace, normalize_unicode
 
 class EmbeddingService:
     def __init__(self, model_name: str = 'paraphrase-multilingual-MiniLM-L12-v2'):
         self.model_name = model_name
         self._lock = threading.Lock()
-        self.model = SentenceTransformer(model_name)
+
+    @property
+    def model(self):
+        # Model ortak registry'den alınır; servis örnekleri aynı model kopyasını paylaşır
+        return get_model_registry().get(self.model_name)
 
     def preprocess(self, text: str) -> str:
         # Unicode normalization, lower, strip, fazla boşluk temizliği
-        text = unicodedata.normalize('NFC', text)
+        text = normalize_unicode(text, 'NFC')
         text = text.lower().strip()
-        text = re.sub(r'\s+', ' ', text)
-        return text
+        return collapse_whitespace(text)
+
+    def _encode(self, preprocessed: List[str]):
+        # Aynı metin (ör. tekrarlanan sorgu) modele ikinci kez gönderilmez
+        return get_embedding_cache().encode(
+            self.model_name,
+            preprocessed,
+            lambda missing: self.model.encode(missing, convert_to_numpy=True, show_progress_bar=False)
+        )
 
     def embed(self, texts: List[str]) -> List[List[float]]:
         with self._lock:
             preprocessed = [self.preprocess(t) for t in texts]
-            return self.model.encode(preprocessed, convert_to_numpy=False, show_progress_bar=False)
+            return self._encode(preprocessed).tolist()
+
+    async def embed_async(self, texts: List[str]) -> List[List[float]]:
+        """
+        embed'in async karşılığı: metinler eşzamanlı diğer sorgularla aynı mikro-batch'te,
+        event loop'u bloklamadan encode edilir.
+        """
+        preprocessed = [self.preprocess(t) for t in texts]
+        return (await get_embedding_batcher(self.model_name).embed(preprocessed)).tolist()
 
     def get_model_name(self) -> str:
         return self.model_name
@@ -34,17 +54,24 @@ class EmbeddingService:
             'paraphrase-MiniLM-L6-v2'
         ]
 
-    def embed_and_store_child_chunks(self, child_chunks: List[dict], milvus_service, parent_id: int):
+    def embed_and_store_child_chunks(self, child_chunks: List[dict], milvus_service, parent_id: int) -> List[int]:
         """
-        Her bir child chunk'ın embedding'ini alır ve parent_id, type, order, metadata ile birlikte Milvus'a ekler.
+        Child chunk'ların embedding'lerini tek seferde alır ve parent_id, type, order, metadata ile birlikte
+        Milvus'a toplu olarak ekler. Eklenen vektörlerin primary key'lerini döner.
         """
+        if not child_chunks:
+            return []
         texts = [chunk['content'] for chunk in child_chunks]
-        embeddings = self.embed(texts)
-        for chunk, embedding in zip(child_chunks, embeddings):
-            metadata = {
+        with self._lock:
+            preprocessed = [self.preprocess(t) for t in texts]
+            embeddings = self._encode(preprocessed)
+        metadata = [
+            {
                 'parent_id': parent_id,
                 'type': chunk.get('type'),
                 'order': chunk.get('order'),
                 'metadata': chunk.get('metadata')
             }
-            milvus_service.insert_embedding(embedding, metadata) 
\ No newline at end of file
+            for chunk in child_chunks
+        ]
+        return milvus_service.insert_embeddings(embeddings, metadata)
@@ -1,5 +1,6 @@
 import logging
 import json
+from backend.services.text import strip_unsafe
 
 def safe_serialize(obj):
     """
@@ -7,7 +8,7 @@ def safe_serialize(obj):
     """
     if isinstance(obj, str):
         # String'deki problematik karakterleri temizle
-        return ''.join(char for char in obj if ord(char) < 127 or char.isalnum() or char.isspace())
+        return strip_unsafe(obj)
     elif isinstance(obj, list):
         return [safe_serialize(item) for item in obj]
     elif isinstance(obj, dict):
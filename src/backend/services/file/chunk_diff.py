@@ -0,0 +1,71 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class OldParent:
+    __slots__ = ("id", "title", "order", "content_hash", "metadata")
+
+    def __init__(self, id: int, title: str, order: Optional[int], content_hash: str, metadata: Optional[dict]):
+        self.id = id
+        self.title = title
+        self.order = order
+        self.content_hash = content_hash
+        self.metadata = metadata or {}
+
+class OldChild:
+    __slots__ = ("id", "parent_id", "order", "vector_id")
+
+    def __init__(self, id: int, parent_id: int, order: Optional[int], vector_id: Optional[int]):
+        self.id = id
+        self.parent_id = parent_id
+        self.order = order
+        self.vector_id = vector_id
+
+class ChunkDiff:
+    """
+    Dokümanın DB'deki parent/child chunk'larını yeni revizyonun bölümleriyle eşleştirir.
+    Yalnızca id, sıra, parent metadata'sı ve içerik hash'leri tutulur; içerik metni belleğe alınmaz.
+    - Parent: önce aynı başlık + aynı içerik hash'i, yoksa aynı başlık aranır (yerinde güncellenir).
+    - Child: aynı içerik hash'i aranır; tercihen aynı parent altındaki kayıt seçilir.
+    Eşleşmeyen eski kayıtlar revizyonda silinmiş sayılır.
+    """
+
+    def __init__(self, old_parents: Iterable[Tuple], old_children: Iterable[Tuple]):
+        self._by_content: Dict[Tuple[str, str], deque] = {}
+        self._by_title: Dict[str, deque] = {}
+        self._parents: Dict[int, OldParent] = {}
+        for parent_id, title, order, content_hash, metadata in old_parents:
+            parent = OldParent(parent_id, title or "", order, content_hash, metadata)
+            self._parents[parent_id] = parent
+            self._by_content.setdefault((parent.title, content_hash), deque()).append(parent)
+            self._by_title.setdefault(parent.title, deque()).append(parent)
+        self._children: Dict[str, List[OldChild]] = {}
+        for child_id, parent_id, order, vector_id, content_hash in old_children:
+            self._children.setdefault(content_hash, []).append(OldChild(child_id, parent_id, order, vector_id))
+        self._used_parents = set()
+
+    def match_parent(self, title: str, content_hash: str) -> Optional[OldParent]:
+        """Yeni bölüm için yeniden kullanılacak eski parent'ı döner (yoksa None)."""
+        title = title or ""
+        for candidates in (self._by_content.get((title, content_hash)), self._by_title.get(title)):
+            while candidates:
+                parent = candidates.popleft()
+                if parent.id not in self._used_parents:
+                    self._used_parents.add(parent.id)
+                    return parent
+        return None
+
+    def match_child(self, content_hash: str, parent_id: Optional[int]) -> Optional[OldChild]:
+        """Aynı içerikli eski child'ı döner ve tüketir; parent_id'si eşleşen kayıt önceliklidir."""
+        candidates = self._children.get(content_hash)
+        if not candidates:
+            return None
+        for idx, child in enumerate(candidates):
+            if child.parent_id == parent_id:
+                return candidates.pop(idx)
+        return candidates.pop(0)
+
+    def removed_children(self) -> List[OldChild]:
+        return [child for candidates in self._children.values() for child in candidates]
+
+    def removed_parents(self) -> List[int]:
+        return [parent_id for parent_id in self._parents if parent_id not in self._used_parents]
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+from databases import Database
+
+def content_hash(content: str) -> str:
+    """Chunk içeriğinin SHA-256 hex özeti; Postgres'teki encode(sha256(convert_to(content, 'UTF8')), 'hex') ile aynıdır."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+class BulkChunkWriter:
+    """
+    Parent ve child chunk'ları toplu olarak Postgres'e yazar.
+    - Tüm parent'lar tek bir INSERT ... SELECT unnest(...) ile eklenir, id'ler giriş sırasıyla döner.
+    - Child id'leri sequence'tan tek sorguda ayrılır, satırlar COPY ile (asyncpg) ya da
+      çok satırlı unnest batch'leri ile akıtılır.
+    - Hepsi tek bir transaction içinde çalışır; hata olursa hiçbir satır kalmaz.
+    - Her child'ın içerik hash'i (content_hash) yazılır; revizyon yüklemeleri bununla eşleştirilir.
+    """
+
+    PARENT_INSERT = """
+    INSERT INTO parent_chunks (document_id, title, content, "order", metadata)
+    SELECT CAST(:document_id AS uuid), t.title, t.content, t.ord, CAST(t.metadata AS jsonb)
+    FROM unnest(
+        CAST(:titles AS text[]), CAST(:contents AS text[]), CAST(:orders AS integer[]), CAST(:metadatas AS text[])
+    ) WITH ORDINALITY AS t(title, content, ord, metadata, idx)
+    ORDER BY t.idx
+    RETURNING id
+    """
+
+    CHILD_INSERT = """
+    INSERT INTO child_chunks (id, parent_id, content, type, "order", metadata, content_hash)
+    SELECT t.id, t.parent_id, t.content, t.type, t.ord, CAST(t.metadata AS jsonb), t.content_hash
+    FROM unnest(
+        CAST(:ids AS integer[]), CAST(:parent_ids AS integer[]), CAST(:contents AS text[]),
+        CAST(:types AS text[]), CAST(:orders AS integer[]), CAST(:metadatas AS text[]), CAST(:hashes AS text[])
+    ) AS t(id, parent_id, content, type, ord, metadata, content_hash)
+    """
+
+    CHILD_COLUMNS = ["id", "parent_id", "content", "type", "order", "metadata", "content_hash"]
+
+    def __init__(self, db: Database, batch_size: int = 5000, use_copy: bool = True):
+        self.db = db
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.logger = logging.getLogger(__name__)
+
+    async def insert_parents(self, document_id: str, parent_chunks: List[Dict]) -> List[int]:
+        """Tüm parent chunk'ları tek sorguda ekler, id'leri parent_chunks sırasıyla döner."""
+        if not parent_chunks:
+            return []
+        values = {
+            "document_id": document_id,
+            "titles": [p["title"] for p in parent_chunks],
+            "contents": [p["content"] for p in parent_chunks],
+            "orders": [p.get("order") for p in parent_chunks],
+            "metadatas": [json.dumps(p.get("metadata", {}), ensure_ascii=True) for p in parent_chunks],
+        }
+        rows = await self.db.fetch_all(self.PARENT_INSERT, values)
+        # Sequence değerleri ORDER BY sırasıyla atanır; RETURNING sırası garanti olmadığından sırala
+        return sorted(row[0] for row in rows)
+
+    async def insert_children(self, rows: List[Tuple]) -> List[int]:
+        """
+        rows: (parent_id, content, type, order, metadata_json, content_hash) tuple'ları.
+        Eklenen child chunk id'lerini rows sırasıyla döner.
+        """
+        if not rows:
+            return []
+        id_rows = await self.db.fetch_all(
+            "SELECT nextval(pg_get_serial_sequence('child_chunks', 'id')) FROM generate_series(1, :n)",
+            {"n": len(rows)}
+        )
+        ids = sorted(row[0] for row in id_rows)
+        records = [(child_id, *row) for child_id, row in zip(ids, rows)]
+
+        raw = self._raw_connection() if self.use_copy else None
+        if raw is not None and hasattr(raw, "copy_records_to_table"):
+            await raw.copy_records_to_table("child_chunks", records=records, columns=self.CHILD_COLUMNS)
+        else:
+            for start in range(0, len(records), self.batch_size):
+                batch = records[start:start + self.batch_size]
+                await self.db.execute(self.CHILD_INSERT, {
+                    "ids": [r[0] for r in batch],
+                    "parent_ids": [r[1] for r in batch],
+                    "contents": [r[2] for r in batch],
+                    "types": [r[3] for r in batch],
+                    "orders": [r[4] for r in batch],
+                    "metadatas": [r[5] for r in batch],
+                    "hashes": [r[6] for r in batch],
+                })
+        return ids
+
+    async def write(
+        self,
+        document_id: str,
+        parent_chunks: List[Dict],
+        child_chunks: List[Dict],
+        existing_parent_ids: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Parent ve child chunk'ları tek transaction içinde yazar.
+        Child'ların parent_id alanı parent_chunks içindeki yerel "id" değerini göstermelidir; zaten
+        DB'de olan parent'lar existing_parent_ids (yerel id -> DB id) ile verilebilir.
+        Yazılan her child'a "db_id" atanır; yerel parent id -> DB parent id eşlemesi döner.
+        """
+        async with self.db.transaction():
+            parent_ids = await self.insert_parents(document_id, parent_chunks)
+            parent_id_map = dict(existing_parent_ids or {})
+            parent_id_map.update({p["id"]: db_id for p, db_id in zip(parent_chunks, parent_ids)})
+            rows = [
+                (
+                    parent_id_map[c["parent_id"]],
+                    c["content"],
+                    c.get("type"),
+                    c.get("order"),
+                    json.dumps(c.get("metadata", {}), ensure_ascii=True),
+                    content_hash(c["content"]),
+                )
+                for c in child_chunks
+            ]
+            child_ids = await self.insert_children(rows)
+        for child, child_id in zip(child_chunks, child_ids):
+            child["db_id"] = child_id
+        self.logger.info(f"Bulk wrote {len(parent_ids)} parent and {len(child_ids)} child chunks for document {document_id}")
+        return parent_id_map
+
+    def _raw_connection(self):
+        # databases, transaction içindeki aktif bağlantıyı task bazında döndürür
+        try:
+            return self.db.connection().raw_connection
+        except Exception:
+            return None
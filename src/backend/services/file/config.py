@@ -3,6 +3,9 @@ from pydantic_settings import BaseSettings
 class FileConfig(BaseSettings):
     max_file_size: int = 1048576000  # 100MB (10x artırıldı)
     allowed_types: list = ["text/plain", "application/pdf"]
+    upload_chunk_size: int = 1048576  # Upload diske bu boyutta parçalarla akıtılır (1MB)
+    embed_batch_size: int = 256  # Her batch Milvus'a eklendiği anda aranabilir olur
+    pdf_extract_workers: int = 1  # >1 ise PDF sayfa çıkarımı process pool'da paralel yapılır
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,4 @@
+-- Milvus primary key'ini child chunk ile ilişkilendir
+ALTER TABLE child_chunks ADD COLUMN IF NOT EXISTS vector_id BIGINT;
+
+CREATE INDEX IF NOT EXISTS idx_child_chunks_vector_id ON child_chunks(vector_id);
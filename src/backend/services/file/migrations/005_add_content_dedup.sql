@@ -0,0 +1,15 @@
+-- İçerik bazlı dedup: aynı byte'lara sahip upload'lar tek chunk/vektör kümesini paylaşır
+ALTER TABLE files ADD COLUMN IF NOT EXISTS content_sha256 CHAR(64);
+-- Chunk'ların (parent_chunks.document_id) bağlı olduğu files kaydı; kendi içeriğine sahip dosyada kendisi
+ALTER TABLE files ADD COLUMN IF NOT EXISTS content_file_id UUID;
+
+CREATE INDEX IF NOT EXISTS idx_files_content_sha256 ON files(content_sha256);
+CREATE INDEX IF NOT EXISTS idx_files_content_file_id ON files(content_file_id);
+
+-- Her içerik için sahip dosya ve referans sayısı
+CREATE TABLE IF NOT EXISTS file_contents (
+    content_sha256 CHAR(64) PRIMARY KEY,
+    owner_file_id UUID NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
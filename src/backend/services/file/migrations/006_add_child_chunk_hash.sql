@@ -0,0 +1,2 @@
+-- Revizyon yüklemelerinde child chunk'lar içerik hash'i ile eşleştirilir (bkz. FileService.reingest_file)
+ALTER TABLE child_chunks ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
@@ -0,0 +1,8 @@
+-- İçerik dedup'ı tenant (dosyayı yükleyen kullanıcı) içinde yapılır: vektörler tenant partition'ında
+-- tutulduğundan farklı tenant'lar aynı chunk/vektör kümesini paylaşamaz. '' ortak (anonim) tenant'tır.
+ALTER TABLE file_contents ADD COLUMN IF NOT EXISTS tenant_id TEXT NOT NULL DEFAULT '';
+UPDATE file_contents c SET tenant_id = f.user_id::text
+FROM files f
+WHERE f.file_id = c.owner_file_id AND f.user_id IS NOT NULL AND c.tenant_id = '';
+ALTER TABLE file_contents DROP CONSTRAINT IF EXISTS file_contents_pkey;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_file_contents_sha_tenant ON file_contents(content_sha256, tenant_id);
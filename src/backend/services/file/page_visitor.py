@@ -0,0 +1,196 @@
+import logging
+import mmap
+import re
+from contextlib import contextmanager
+import fitz  # PyMuPDF
+from backend.services.text import collapse_whitespace, strip_unprintable
+
+# Sayfa düzeni tek get_text("dict") çağrısıyla alınır; görsel blokları (bbox) da dahil
+LAYOUT_FLAGS = fitz.TEXTFLAGS_DICT
+
+BULLET_PATTERNS = [
+    re.compile(r'^\s*[\u2022\u2023\u25E6\u2043\u2219\*-]\s+'),
+    re.compile(r'^\s*\d+\.|^\s*[a-zA-Z]\)'),
+]
+
+# pdfplumber'ın "lines" stratejisi en az bir hücre için 2 yatay ve 2 dikey çizgiye ihtiyaç duyar
+MIN_RULING_LINES = 2
+# Eğimli sayılmayacak çizgiler için koordinat toleransı (pt)
+RULING_TOLERANCE = 1.0
+
+@contextmanager
+def open_pdf(file_path):
+    """
+    Kayıtlı PDF'i salt okunur mmap üzerinden açar. MuPDF doğrudan eşlenmiş sayfalardan okur;
+    dosya içeriği Python belleğine kopyalanmaz ve aynı dosyayı açan worker'lar page cache'i paylaşır.
+    """
+    with open(file_path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        doc = fitz.open(stream=view, filetype="pdf")
+        try:
+            yield doc
+        finally:
+            doc.close()
+    finally:
+        view.release()
+        mapped.close()
+
+def clean_page_text(text):
+    """
+    Yazdırılamayan karakterler (\n ve \t hariç) silinir, her boşluk dizisi (satır sonları dahil)
+    tek boşluğa indirilir ve metin kırpılır.
+    """
+    if not text:
+        return ""
+    return collapse_whitespace(strip_unprintable(text, keep='\n\t')).strip()
+
+def text_blocks(layout):
+    return [block for block in layout["blocks"] if block.get("type", 0) == 0]
+
+class PageExtractor:
+    """
+    Sayfa ziyaretçisine takılan extractor arayüzü.
+    visit her sayfa için bir kez, hazır düzen (layout) ile çağrılır; sonuçlar sayfa sırasıyla
+    items listesinde birikir, böylece sayfa aralıklarına bölünmüş çalıştırmalar uç uca eklenebilir.
+    """
+    name = ""
+
+    def __init__(self):
+        self.items = []
+
+    def visit(self, page_num, page, layout):
+        raise NotImplementedError
+
+class TextExtractor(PageExtractor):
+    """(page_num, temizlenmiş sayfa metni); get_text("text") ile aynı metni düzen üzerinden kurar."""
+    name = "text"
+
+    def visit(self, page_num, page, layout):
+        raw = "\n".join(
+            "\n".join("".join(span["text"] for span in line["spans"]) for line in block.get("lines", []))
+            for block in text_blocks(layout)
+        )
+        self.items.append((page_num, clean_page_text(raw)))
+
+class ListExtractor(PageExtractor):
+    """(page_num, blok metni) — madde işaretli veya numaralı liste blokları."""
+    name = "lists"
+
+    def visit(self, page_num, page, layout):
+        for block in text_blocks(layout):
+            block_text = " ".join(span["text"] for line in block.get("lines", []) for span in line.get("spans", [])).strip()
+            if block_text and any(pat.match(block_text) for pat in BULLET_PATTERNS):
+                self.items.append((page_num, block_text))
+
+class ImageExtractor(PageExtractor):
+    """(page_num, bbox) — düzendeki görsel blokları."""
+    name = "images"
+
+    def visit(self, page_num, page, layout):
+        for block in layout["blocks"]:
+            if block.get("type") == 1:
+                self.items.append((page_num, [round(v, 2) for v in block["bbox"]]))
+
+class RuledTableDetector(PageExtractor):
+    """
+    page_num — çizgili tablo içerebilecek sayfalar. Vektör çizimlerdeki yatay/dikey çizgiler sayılır;
+    pdfplumber yalnızca bu sayfalarda çalıştırılır.
+    """
+    name = "table_pages"
+
+    def visit(self, page_num, page, layout):
+        horizontal = vertical = 0
+        for path in page.get_drawings():
+            for item in path["items"]:
+                if item[0] == "l":
+                    p1, p2 = item[1], item[2]
+                    if abs(p1.y - p2.y) <= RULING_TOLERANCE:
+                        horizontal += 1
+                    elif abs(p1.x - p2.x) <= RULING_TOLERANCE:
+                        vertical += 1
+                elif item[0] in ("re", "qu"):
+                    horizontal += 2
+                    vertical += 2
+            if horizontal >= MIN_RULING_LINES and vertical >= MIN_RULING_LINES:
+                self.items.append(page_num)
+                return
+
+EXTRACTORS = {cls.name: cls for cls in (TextExtractor, ListExtractor, ImageExtractor, RuledTableDetector)}
+
+class PageVisitor:
+    """
+    Her sayfanın düzenini bir kez alır ve takılı tüm extractor'lara dağıtır.
+    Aynı sayfa için birden fazla get_text / pdfplumber geçişi yapılmaz.
+    """
+
+    def __init__(self, extractors):
+        self.extractors = [EXTRACTORS[e]() if isinstance(e, str) else e for e in extractors]
+        self.logger = logging.getLogger(__name__)
+
+    def iter_pages(self, doc, start=0, end=None):
+        """Akış hali: her sayfa için (page_num, extractor adı -> yalnızca o sayfanın sonuçları) üretir."""
+        end = doc.page_count if end is None else min(end, doc.page_count)
+        for page_num in range(start, end):
+            for extractor in self.extractors:
+                extractor.items = []
+            try:
+                page = doc[page_num]
+                layout = page.get_text("dict", flags=LAYOUT_FLAGS)
+                for extractor in self.extractors:
+                    extractor.visit(page_num, page, layout)
+            except Exception as e:
+                self.logger.warning(f"Sayfa {page_num} okunurken hata: {e}")
+            yield page_num, {extractor.name: extractor.items for extractor in self.extractors}
+
+    def run(self, doc, start=0, end=None, progress=None):
+        """Tüm aralığı ziyaret eder; extractor adı -> sayfa sırasıyla birleştirilmiş sonuçlar."""
+        merged = {extractor.name: [] for extractor in self.extractors}
+        end = doc.page_count if end is None else min(end, doc.page_count)
+        for page_num, results in self.iter_pages(doc, start, end):
+            for name, items in results.items():
+                merged[name].extend(items)
+            if progress:
+                progress(page_num + 1, end)
+        return merged
+
+def visit_pages(file_path, extractor_names, start, end):
+    """Process pool worker: dokümanı path ile açar, [start, end) sayfalarının sayfa bazlı sonuçlarını döner."""
+    with open_pdf(file_path) as doc:
+        return list(PageVisitor(extractor_names).iter_pages(doc, start, end))
+
+class RuledTableReader:
+    """pdfplumber dokümanını ilk ihtiyaçta bir kez açar ve istenen sayfaların çizgili tablolarını okur."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._pdf = None
+
+    def tables(self, page_num):
+        """(page_num, tablo sırası, tab/satır ayrılmış içerik) listesi; page_num 0 tabanlı."""
+        if self._pdf is None:
+            import pdfplumber
+            self._pdf = pdfplumber.open(self.file_path)
+        page = self._pdf.pages[page_num]
+        tables = []
+        for t_idx, table in enumerate(page.extract_tables()):
+            # Her hücreyi stringe çevir, None ise '' yap
+            content = '\n'.join(['\t'.join([str(cell) if cell is not None else '' for cell in row]) for row in table if row])
+            tables.append((page_num, t_idx, content))
+        # pdfminer düzen önbelleğini bırak; sayfa nesneleri doküman boyunca tutulmasın
+        page.close()
+        return tables
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+def extract_ruled_tables(file_path, page_nums):
+    """pdfplumber'ı yalnızca verilen sayfalarda (0 tabanlı) çalıştırır."""
+    reader = RuledTableReader(file_path)
+    try:
+        return [table for page_num in page_nums for table in reader.tables(page_num)]
+    finally:
+        reader.close()
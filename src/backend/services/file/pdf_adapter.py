@@ -1,9 +1,10 @@
 import fitz  # PyMuPDF
-import pdfplumber
 import re
-import nltk
 import logging
+from collections import deque
+from contextlib import ExitStack
 from backend.services.chunking.chunker import paragraph_chunking
+from backend.services.file.page_visitor import PageVisitor, RuledTableReader, open_pdf, visit_pages, extract_ruled_tables, clean_page_text
 
 def build_toc_hierarchy(toc):
     """
@@ -31,327 +32,301 @@ def build_toc_hierarchy(toc):
         parents.append(node)
     return parents
 
-def split_paragraphs_and_sentences(text, lang="turkish"):
-    paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
-    sentences = []
-    for para in paragraphs:
-        try:
-            sents = nltk.sent_tokenize(para, language=lang)
-        except Exception:
-            sents = [para]
-        sentences.extend([s for s in sents if s.strip()])
-    return sentences
+def section_text(page_texts, start, end):
+    """
+    [start, end) aralığındaki temizlenmiş sayfa metinlerini tek bölüm metninde birleştirir.
+    page_texts: sayfa numarası -> metin eşlemesi.
+    """
+    joined_text = "\n".join(text for text in (page_texts.get(page_num) for page_num in range(start, end)) if text)
+    return re.sub(r'(?<!\n)\n(?!\n)', ' ', joined_text)
 
-def extract_headings_by_font_style(doc):
-    parent_chunks = []
-    child_chunks = []
-    parent_id = 0
-    current_parent_id = None
-    font_sizes = []
-    # Önce tüm font büyüklüklerini topla
-    for page in doc:
-        blocks = page.get_text("dict")["blocks"]
-        for block in blocks:
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    font_sizes.append(span["size"])
-    if not font_sizes:
-        return parent_chunks, child_chunks
-    unique_sizes = sorted(list(set(font_sizes)), reverse=True)
-    heading_sizes = unique_sizes[:2]  # En büyük 2 font başlık için
-    for page_num, page in enumerate(doc):
-        blocks = page.get_text("dict")["blocks"]
-        for block in blocks:
-            block_text = ""
-            block_is_heading = False
-            block_font_size = None
-            block_bold = False
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    block_text += span["text"]
-                    if span["size"] in heading_sizes:
-                        block_is_heading = True
-                        block_font_size = span["size"]
-                    if "Bold" in span["font"]:
-                        block_bold = True
-            text = block_text.strip()
-            if not text:
-                continue
-            if block_is_heading or block_bold or is_title_like(text):
-                parent_chunks.append({
-                    "id": parent_id,
-                    "title": text,
-                    "content": "",
-                    "order": parent_id,
-                    "metadata": {"section_level": 1, "page": page_num+1, "parent_title": text, "font_size": block_font_size, "bold": block_bold}
-                })
-                current_parent_id = parent_id
-                parent_id += 1
-            else:
-                if current_parent_id is None:
-                    parent_chunks.append({
-                        "id": parent_id,
-                        "title": f"Page {page_num+1}",
-                        "content": "",
-                        "order": parent_id,
-                        "metadata": {"section_level": 0, "page": page_num+1, "parent_title": f"Page {page_num+1}"}
-                    })
-                    current_parent_id = parent_id
-                    parent_id += 1
-                for sent in split_paragraphs_and_sentences(text):
-                    child_chunks.append({
-                        "parent_id": current_parent_id,
-                        "content": sent,
-                        "type": "Text",
-                        "order": len([c for c in child_chunks if c["parent_id"] == current_parent_id]),
-                        "metadata": {"page": page_num+1, "parent_title": parent_chunks[current_parent_id]["title"]}
-                    })
-    return parent_chunks, child_chunks
+def chunk_section(parent_id, parent_title, text):
+    """
+    Bölüm metninden parent'a ait child chunk'ları üretir.
+    "order" alanı atanmaz; çağıran taraf parent bazlı sayaçla atar.
+    """
+    logger = logging.getLogger(__name__)
+    if not text:
+        logger.warning(f"Parent {parent_id} için metin çıkarılamadı")
+        return []
 
-def fallback_page_parents(doc):
-    parent_chunks = []
-    child_chunks = []
-    for page_num, page in enumerate(doc):
-        parent_id = page_num
-        parent_chunks.append({
-            "id": parent_id,
+    logger.info(f"[PDF PARSE] Parent {parent_id} ('{parent_title}') metin uzunluğu: {len(text)} karakter (temizlenmiş)")
+
+    try:
+        chunks = paragraph_chunking(text, max_tokens=500, overlap_sentences=2, lang="turkish")
+        logger.info(f"[PDF PARSE] Parent {parent_id} için {len(chunks)} chunk üretildi")
+    except Exception as e:
+        logger.error(f"Chunk oluşturulurken hata: {e}")
+        return []
+
+    return [
+        {
+            "parent_id": parent_id,
+            "content": chunk["content"],
+            "type": "Text",
+            "metadata": {"parent_title": parent_title, **chunk["metadata"]}
+        }
+        for chunk in chunks
+        if chunk["content"].strip()
+    ]
+
+def _chunk_sections_worker(sections):
+    """Process pool worker: (parent_id, title, text) bölümlerinin chunk'larını sırayla döner."""
+    return [chunk_section(parent_id, title, text) for parent_id, title, text in sections]
+
+# Bu sayfa sayısının altındaki dokümanlarda process pool maliyeti kazançtan büyük
+PARALLEL_MIN_PAGES = 50
+
+# Her sayfa için tek düzen geçişinde çalışan extractor'lar
+PAGE_EXTRACTORS = ["text", "lists", "images", "table_pages"]
+
+_extract_pool = None
+
+def _get_extract_pool(workers):
+    global _extract_pool
+    if _extract_pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        _extract_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _extract_pool
+
+def _page_ranges(page_count, num_shards):
+    step = max(-(-page_count // num_shards), 1)
+    return [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+def iter_page_results(doc, file_path=None, workers=1, progress=None):
+    """
+    Sayfaları PAGE_EXTRACTORS ile bir kez ziyaret eder ve sayfa sırasıyla (page_num, sonuçlar) üretir.
+    workers > 1 ise sayfa aralıkları process pool'a dağıtılır; aynı anda en fazla workers * 2 aralık
+    işlenir, böylece bellekte doküman boyundan bağımsız sayıda sayfa sonucu bulunur.
+    """
+    report = progress or (lambda done, total: None)
+    total = doc.page_count
+    if workers <= 1 or file_path is None or total < 2:
+        for page_num, results in PageVisitor(PAGE_EXTRACTORS).iter_pages(doc):
+            yield page_num, results
+            report(page_num + 1, total)
+        return
+
+    pool = _get_extract_pool(workers)
+    ranges = deque(_page_ranges(total, workers * 4))
+    in_flight = deque()
+    while ranges or in_flight:
+        while ranges and len(in_flight) < workers * 2:
+            start, end = ranges.popleft()
+            in_flight.append(pool.submit(visit_pages, file_path, PAGE_EXTRACTORS, start, end))
+        for page_num, results in in_flight.popleft().result():
+            yield page_num, results
+            report(page_num + 1, total)
+
+def page_parents(doc):
+    """Her sayfa için bir parent chunk üretir (TOC'suz dokümanlar için)."""
+    return [
+        {
+            "id": page_num,
             "title": f"Page {page_num+1}",
             "content": "",
-            "order": parent_id,
+            "order": page_num,
             "metadata": {"section_level": 0, "page": page_num+1, "parent_title": f"Page {page_num+1}"}
-        })
-        blocks = page.get_text("blocks")
-        for block in blocks:
-            text = block[4].strip()
-            if text:
-                for sent in split_paragraphs_and_sentences(text):
-                    child_chunks.append({
-                        "parent_id": parent_id,
-                        "content": sent,
-                        "type": "Text",
-                        "order": len([c for c in child_chunks if c["parent_id"] == parent_id]),
-                        "metadata": {"page": page_num+1, "parent_title": f"Page {page_num+1}"}
-                    })
-    return parent_chunks, child_chunks
+        }
+        for page_num in range(doc.page_count)
+    ]
 
-def extract_tables_and_images(file_path, parent_chunks):
+def section_tasks(doc):
     """
-    pdfplumber ile tablo ve görselleri tespit et, bulundukları sayfanın en yakın parent_id'sine child olarak ata.
+    TOC'ta birden fazla başlık varsa TOC hiyerarşisini, yoksa sayfa parent'larını kullanır.
+    Dönüş: (parent_chunks, (parent_id, title, start, end) listesi); [start, end) bölümün sayfa aralığı.
     """
-    child_chunks = []
-    with pdfplumber.open(file_path) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            # Tablo extraction
-            tables = page.extract_tables()
-            for t_idx, table in enumerate(tables):
-                # Her hücreyi stringe çevir, None ise '' yap
-                content = '\n'.join(['\t'.join([str(cell) if cell is not None else '' for cell in row]) for row in table if row])
-                parent_id = find_parent_for_page(parent_chunks, page_num+1)
-                child_chunks.append({
-                    "parent_id": parent_id,
-                    "type": "table",
-                    "content": content,
-                    "order": t_idx,
-                    "metadata": {"page": page_num+1}
-                })
-            # Görsel extraction
-            images = page.images
-            for i_idx, img in enumerate(images):
-                parent_id = find_parent_for_page(parent_chunks, page_num+1)
-                bbox = img.get('bbox')
-                if bbox is not None:
-                    child_chunks.append({
-                        "parent_id": parent_id,
-                        "type": "image",
-                        "content": f"Image on page {page_num+1}, bbox: {bbox}",
-                        "order": i_idx,
-                        "metadata": {"page": page_num+1, "bbox": bbox}
-                    })
-    return child_chunks
+    toc = doc.get_toc()  # [ [level, title, page], ... ]
+    page_count = doc.page_count
+    if len(toc) <= 1:
+        parent_chunks = page_parents(doc)
+        return parent_chunks, [(p["id"], p["title"], p["id"], p["id"] + 1) for p in parent_chunks]
+    parent_chunks = build_toc_hierarchy(toc)
+    tasks = []
+    for i, parent in enumerate(parent_chunks):
+        start = min(max(parent["page"] - 1, 0), page_count)
+        next_idx = i + 1
+        while next_idx < len(parent_chunks) and parent_chunks[next_idx]["level"] > parent["level"]:
+            next_idx += 1
+        end = parent_chunks[next_idx]["page"] - 1 if next_idx < len(parent_chunks) else page_count
+        tasks.append((parent["id"], parent["title"], start, min(max(end, start), page_count)))
+    return parent_chunks, tasks
 
-def find_parent_for_page(parent_chunks, page):
-    # Sayfa numarasına göre en yakın parent_id'yi bul
-    candidates = [p for p in parent_chunks if p.get("metadata", {}).get("page") == page]
-    if candidates:
-        return candidates[-1]["id"]
-    # Hiçbiri yoksa ilk parent'a bağla
-    return parent_chunks[0]["id"] if parent_chunks else None
+def page_owners(tasks, page_count):
+    """
+    Her sayfanın tablo/liste/görsellerinin bağlanacağı görev indeksi: sayfada ya da öncesinde başlayan
+    son bölüm. Hiçbir bölüm başlamadıysa ilk bölüm.
+    """
+    owners = [0] * page_count
+    starts = sorted((start, idx) for idx, (_, _, start, _) in enumerate(tasks))
+    current, pos = 0, 0
+    for page_num in range(page_count):
+        while pos < len(starts) and starts[pos][0] <= page_num:
+            current = starts[pos][1]
+            pos += 1
+        owners[page_num] = current
+    return owners
 
-def extract_lists(doc, parent_chunks):
+def build_section(parent, text_children, owned, table_reader):
     """
-    PyMuPDF ile sayfa ve bloklarda madde işaretli veya numaralı listeleri tespit et, ilgili parent'a child olarak ata.
+    Bölümün child chunk'larını sırayla birleştirir: önce metin chunk'ları, sonra bölüme ait sayfalardaki
+    tablo, görsel ve listeler. "order" parent içindeki sıradır; parent content child'lardan doldurulur.
     """
-    child_chunks = []
-    bullet_patterns = [r'^\s*[\u2022\u2023\u25E6\u2043\u2219\*-]\s+', r'^\s*\d+\.|^\s*[a-zA-Z]\)']
-    for page_num, page in enumerate(doc):
-        blocks = page.get_text("dict")["blocks"]
-        for block in blocks:
-            block_text = " ".join([span["text"] for line in block.get("lines", []) for span in line.get("spans", [])]).strip()
-            if not block_text:
-                continue
-            for pat in bullet_patterns:
-                if re.match(pat, block_text):
-                    parent_id = find_parent_for_page(parent_chunks, page_num+1)
-                    child_chunks.append({
-                        "parent_id": parent_id,
-                        "type": "list",
-                        "content": block_text,
-                        "order": len([c for c in child_chunks if c.get("parent_id") == parent_id]),
-                        "metadata": {"page": page_num+1}
-                    })
-                    break
-    return child_chunks
+    children = list(text_children)
+    for kind, page_num, value in owned:
+        if kind == "table":
+            for _, _, content in table_reader.tables(page_num):
+                children.append({"parent_id": parent["id"], "type": "table", "content": content, "metadata": {"page": page_num+1}})
+        elif kind == "image":
+            children.append({
+                "parent_id": parent["id"],
+                "type": "image",
+                "content": f"Image on page {page_num+1}, bbox: {value}",
+                "metadata": {"page": page_num+1, "bbox": value}
+            })
+        else:
+            children.append({"parent_id": parent["id"], "type": "list", "content": value, "metadata": {"page": page_num+1}})
+    children = [c for c in children if c.get("content", "").strip()]
+    for order, child in enumerate(children):
+        child["order"] = order
+    if not parent.get("title", "").strip():
+        parent["title"] = f"Page {parent['metadata'].get('page', parent['id'] + 1)}"
+    parent["content"] = "\n".join(c["content"] for c in children)
+    return parent, children
 
-def extract_pdf_document(file_path):
+def iter_pdf_sections(file_path, progress=None, workers=1):
+    """
+    PDF'i bölüm bölüm işler ve tamamlanan her bölüm için (parent_chunk, child_chunks) üretir.
+    Bellekte yalnızca henüz tamamlanmamış bölümlerin sayfa metinleri ve sayfa öğeleri tutulur;
+    peak bellek doküman boyuna değil en uzun bölüme bağlıdır.
+    Bölümler sayfa aralıkları bittiği sırayla üretilir (iç içe TOC'ta alt başlık üst başlıktan önce gelebilir).
+    progress: opsiyonel callback(pages_parsed, pages_total).
+    workers: 1'den büyükse sayfa ziyareti ve chunking process pool'da, sıra korunarak paralel yapılır.
+    """
     logger = logging.getLogger(__name__)
+    stack = ExitStack()
     try:
-        doc = fitz.open(file_path)
+        doc = stack.enter_context(open_pdf(file_path))
     except Exception as e:
         logger.error(f"PDF açılırken hata: {e}")
         raise
 
-    toc = doc.get_toc()  # [ [level, title, page], ... ]
-    parent_chunks = []
-    child_chunks = []
+    table_reader = RuledTableReader(file_path)
+    try:
+        page_count = doc.page_count
+        if page_count < PARALLEL_MIN_PAGES:
+            workers = 1
+        parent_chunks, tasks = section_tasks(doc)
+        owners = page_owners(tasks, page_count)
 
-    def clean_text(text):
-        if not text:
-            return ""
-        # Remove non-printable characters except newlines and tabs
-        text = ''.join(char for char in text if char.isprintable() or char in '\n\t')
-        # Replace multiple spaces with single space
-        text = re.sub(r'\s+', ' ', text)
-        # Replace multiple newlines with double newline
-        text = re.sub(r'\n\s*\n\s*\n*', '\n\n', text)
-        return text.strip()
+        # Bölüm, sayfa aralığı ve sahip olduğu sayfalar ziyaret edilince hazırdır
+        ready_at = [end for _, _, _, end in tasks]
+        for page_num, idx in enumerate(owners):
+            ready_at[idx] = max(ready_at[idx], page_num + 1)
+        ready_buckets = {}
+        for idx, ready in enumerate(ready_at):
+            ready_buckets.setdefault(ready, []).append(idx)
 
-    if toc:
-        parent_chunks = build_toc_hierarchy(toc)
-        for i, parent in enumerate(parent_chunks):
-            start = parent["page"] - 1
-            next_idx = i + 1
-            while next_idx < len(parent_chunks) and parent_chunks[next_idx]["level"] > parent["level"]:
-                next_idx += 1
-            end = parent_chunks[next_idx]["page"] - 1 if next_idx < len(parent_chunks) else doc.page_count
-            
-            all_text = []
-            for page_num in range(start, end):
-                try:
-                    page = doc[page_num]
-                    page_text = page.get_text("text")
-                    if page_text:
-                        cleaned_text = clean_text(page_text)
-                        if cleaned_text:
-                            all_text.append(cleaned_text)
-                except Exception as e:
-                    logger.warning(f"Sayfa {page_num} okunurken hata: {e}")
-                    continue
+        starts = sorted((start, idx) for idx, (_, _, start, _) in enumerate(tasks))
+        done = [False] * len(tasks)
+        start_pos = 0
+        page_texts = {}
+        owned = {}
+        batch, batch_pages = [], 0
+        batch_target = max(page_count // (workers * 4), 1)
+        in_flight = deque()
+        any_children = False
 
-            joined_text = "\n".join(all_text)
-            cleaned_text = re.sub(r'(?<!\n)\n(?!\n)', ' ', joined_text)
-            
-            if not cleaned_text:
-                logger.warning(f"Parent {parent['id']} için metin çıkarılamadı")
-                continue
+        def submit(indices):
+            sections = [(tasks[i][0], tasks[i][1], section_text(page_texts, tasks[i][2], tasks[i][3])) for i in indices]
+            items = [owned.pop(i, []) for i in indices]
+            if workers > 1:
+                future = _get_extract_pool(workers).submit(_chunk_sections_worker, sections)
+                in_flight.append((indices, future.result, items))
+            else:
+                results = _chunk_sections_worker(sections)
+                in_flight.append((indices, lambda: results, items))
 
-            logger.info(f"[PDF PARSE] Parent {parent['id']} ('{parent['title']}') metin uzunluğu: {len(cleaned_text)} karakter (temizlenmiş)")
-            
-            try:
-                chunks = paragraph_chunking(cleaned_text, max_tokens=500, overlap_sentences=2, lang="turkish")
-                logger.info(f"[PDF PARSE] Parent {parent['id']} için {len(chunks)} chunk üretildi")
-                
-                for chunk in chunks:
-                    if not chunk["content"].strip():
-                        continue
-                    child_chunks.append({
-                        "parent_id": parent["id"],
-                        "content": chunk["content"],
-                        "type": "Text",
-                        "order": len([c for c in child_chunks if c["parent_id"] == parent["id"]]),
-                        "metadata": {"parent_title": parent["title"], **chunk["metadata"]}
-                    })
-            except Exception as e:
-                logger.error(f"Chunk oluşturulurken hata: {e}")
-                continue
+        def drain(limit):
+            while len(in_flight) > limit:
+                indices, result, items = in_flight.popleft()
+                for i, text_children, section_items in zip(indices, result(), items):
+                    yield build_section(parent_chunks[i], text_children, section_items, table_reader)
 
-    if not parent_chunks or len(parent_chunks) == 1:
-        try:
-            parent_chunks, _ = fallback_page_parents(doc)
-            for parent in parent_chunks:
-                page_num = parent["metadata"].get("page", 1) - 1
-                try:
-                    page = doc[page_num]
-                    page_text = page.get_text("text")
-                    cleaned_text = clean_text(page_text)
-                    
-                    if not cleaned_text:
-                        continue
+        def release(indices):
+            nonlocal start_pos
+            for i in indices:
+                done[i] = True
+            while start_pos < len(starts) and done[starts[start_pos][1]]:
+                start_pos += 1
+            low = starts[start_pos][0] if start_pos < len(starts) else page_count
+            for page_num in [p for p in page_texts if p < low]:
+                del page_texts[page_num]
 
-                    chunks = paragraph_chunking(cleaned_text, max_tokens=500, overlap_sentences=2, lang="turkish")
-                    
-                    for chunk in chunks:
-                        if not chunk["content"].strip():
-                            continue
-                        child_chunks.append({
-                            "parent_id": parent["id"],
-                            "content": chunk["content"],
-                            "type": "Text",
-                            "order": len([c for c in child_chunks if c["parent_id"] == parent["id"]]),
-                            "metadata": {"parent_title": parent["title"], **chunk["metadata"]}
-                        })
-                except Exception as e:
-                    logger.warning(f"Sayfa {page_num} işlenirken hata: {e}")
-                    continue
-        except Exception as e:
-            logger.error(f"Fallback page parents oluşturulurken hata: {e}")
+        def schedule(indices, flush=False):
+            nonlocal batch, batch_pages
+            for i in indices:
+                batch.append(i)
+                batch_pages += max(tasks[i][3] - tasks[i][2], 1)
+            if batch and (flush or batch_pages >= batch_target):
+                submit(batch)
+                release(batch)
+                batch, batch_pages = [], 0
 
-    try:
-        # Tablo ve görselleri child olarak ekle
-        table_image_chunks = extract_tables_and_images(file_path, parent_chunks)
-        child_chunks.extend(table_image_chunks)
-        
-        # Listeleri child olarak ekle
-        list_chunks = extract_lists(doc, parent_chunks)
-        child_chunks.extend(list_chunks)
-    except Exception as e:
-        logger.error(f"Tablo/görsel/liste çıkarılırken hata: {e}")
+        schedule(ready_buckets.get(0, []))
+        pages = iter_page_results(doc, file_path=file_path, workers=workers, progress=progress)
+        for page_num, results in pages:
+            for _, text in results["text"]:
+                page_texts[page_num] = text
+            owner_items = owned.setdefault(owners[page_num], [])
+            if results["table_pages"]:
+                owner_items.append(("table", page_num, None))
+            owner_items.extend(("image", page_num, bbox) for _, bbox in results["images"])
+            owner_items.extend(("list", page_num, block_text) for _, block_text in results["lists"])
+            schedule(ready_buckets.get(page_num + 1, []), flush=page_num + 1 == page_count)
+            for section in drain(workers * 2 if workers > 1 else 0):
+                any_children = any_children or bool(section[1])
+                yield section
+        schedule([], flush=True)
+        for section in drain(0):
+            any_children = any_children or bool(section[1])
+            yield section
 
-    doc.close()
-    
-    # Son kontrol ve temizlik
-    parent_chunks = [p for p in parent_chunks if p.get("title", "").strip()]
-    child_chunks = [c for c in child_chunks if c.get("content", "").strip()]
-    
-    if not parent_chunks:
-        parent_chunks = [{
-            "id": 0,
-            "title": "Document Content",
-            "content": "",
-            "order": 0,
-            "metadata": {"section_level": 0, "section_type": "document"}
-        }]
-    
-    if not child_chunks:
-        child_chunks = [{
-            "parent_id": parent_chunks[0]["id"],
-            "content": "[No readable content found in document]",
-            "type": "Text",
-            "order": 0,
-            "metadata": parent_chunks[0]["metadata"].copy()
-        }]
+        if not any_children:
+            fallback = {
+                "id": len(parent_chunks),
+                "title": "Document Content",
+                "content": "[No readable content found in document]",
+                "order": len(parent_chunks),
+                "metadata": {"section_level": 0, "section_type": "document"}
+            }
+            yield fallback, [{
+                "parent_id": fallback["id"],
+                "content": "[No readable content found in document]",
+                "type": "Text",
+                "order": 0,
+                "metadata": fallback["metadata"].copy()
+            }]
+    finally:
+        table_reader.close()
+        stack.close()
+
+def extract_pdf_document(file_path, progress=None, workers=1):
+    """
+    iter_pdf_sections'ın tüm bölümlerini toplayan liste hali; (parent_chunks, child_chunks) döner.
+    progress: opsiyonel callback(pages_parsed, pages_total); sayfa ziyareti ilerledikçe çağrılır.
+    workers: 1'den büyükse sayfa ziyareti ve chunking process pool'da paralel yapılır.
+    """
+    logger = logging.getLogger(__name__)
+    parent_chunks = []
+    child_chunks = []
+    for parent, children in iter_pdf_sections(file_path, progress=progress, workers=workers):
+        parent_chunks.append(parent)
+        child_chunks.extend(children)
+    parent_chunks.sort(key=lambda p: p["id"])
 
     logger.info(f"[PDF PARSE] Parent chunk sayısı: {len(parent_chunks)}")
     logger.info(f"[PDF PARSE] Child chunk sayısı: {len(child_chunks)}")
 
     return parent_chunks, child_chunks
-
-def is_title_like(text):
-    if not text or len(text) > 120:
-        return False
-    if re.match(r'^(\d+\.)+(\d+)?', text.strip()):
-        return True
-    if text.isupper() and len(text) < 40:
-        return True
-    if re.match(r'^(Bölüm|Section|Başlık)', text.strip(), re.IGNORECASE):
-        return True
-    return False 
\ No newline at end of file
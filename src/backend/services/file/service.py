@@ -1,258 +1,889 @@
+import asyncio
+import hashlib
 import logging
 import os
 import uuid
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 from backend.models import FileUploadResponse
 from .config import FileConfig
 from databases import Database
 import json
-from backend.services.embedding.model_loader import load_embedding_model
+from backend.services.embedding.cache import CacheStats
 from backend.services.embedding.pipeline import embed_chunks
 from backend.services.chunking.parent_child_chunker import chunk_elements
-from backend.services.milvus_service import MilvusService
+from backend.services.vector_store import VectorStore, get_vector_store
 from backend.services.evaluation.logger import log_search
+from backend.services.text import is_printable, strip_unsafe
 import traceback
-from backend.services.file.pdf_adapter import extract_pdf_document
+from backend.services.file.pdf_adapter import iter_pdf_sections
+from backend.services.file.chunk_writer import BulkChunkWriter, content_hash
+from backend.services.file.chunk_diff import ChunkDiff
+from backend.services.search.bm25_index import get_bm25_index
+from backend.services.search.config import SearchConfig
+from backend.services.auth.scope import tenant_key
+
+class UploadTooLargeError(ValueError):
+    """Upload, max_file_size sınırını aştı."""
 
 class FileService:
     def __init__(self, config: FileConfig):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.bm25_enabled = SearchConfig().bm25_enabled
 
-    async def cleanup_file(self, db: Database, file_id: str):
-        """Hem Postgres'ten hem Milvus'tan dosya ile ilgili tüm verileri siler."""
+    async def cleanup_file(self, db: Database, file_id: str, purge_content: bool = False):
+        """
+        Dosya kaydını siler. İçerik başka dosyalarca da kullanılıyorsa yalnızca referans sayısı düşer
+        (silinen dosya içeriğin sahibiyse chunk'lar kalan en eski referansa devredilir); son referans
+        gittiğinde Postgres chunk'ları ve Milvus vektörleri de silinir.
+        purge_content: referanslardan bağımsız olarak içeriği temizle (başarısız ingestion sonrası).
+        """
         try:
-            # Postgres: parent_chunks, child_chunks, files
-            await db.execute("DELETE FROM child_chunks WHERE parent_id IN (SELECT id FROM parent_chunks WHERE document_id = :file_id)", {"file_id": file_id})
-            await db.execute("DELETE FROM parent_chunks WHERE document_id = :file_id", {"file_id": file_id})
-            await db.execute("DELETE FROM files WHERE file_id = :file_id", {"file_id": file_id})
-            # Milvus: metadata içinde file_id geçen tüm embedding'leri sil
-            try:
-                milvus_service = MilvusService()
-                milvus_service._connect_and_init()
-                collection = milvus_service._collection
-                expr = f"metadata like '%{file_id}%'"
-                results = collection.query(expr, output_fields=["id", "metadata"])
-                ids_to_delete = [r["id"] for r in results if file_id in r["metadata"]]
-                if ids_to_delete:
-                    collection.delete(f"id in [{','.join(map(str, ids_to_delete))}]")
-            except Exception as milvus_error:
-                self.logger.warning(f"Milvus cleanup failed: {milvus_error}")
+            async with db.transaction():
+                released = await self._release_content(db, file_id, purge_content)
+                if released is None:
+                    return
+                await db.execute("DELETE FROM files WHERE file_id = :file_id", {"file_id": file_id})
+            vector_ids, chunk_ids = released
+            # Başarısız ingestion'da id'si child_chunks'a yazılamamış vektörler de chunk_id ve file_id ile temizlenir
+            await self._delete_vectors(vector_ids, file_id=file_id if purge_content else None, chunk_ids=chunk_ids)
+            await self._delete_lexical(chunk_ids)
         except Exception as e:
             self.logger.error(f"Cleanup failed for file_id={file_id}: {e}")
 
-    async def handle_file_upload(self, file, upload_dir: str, db: Database, user_id: Optional[str] = None) -> FileUploadResponse:
-        """Yeni pipeline: custom parsing + parent-child chunking + embedding + Milvus + detaylı loglama"""
+    async def _release_content(self, db: Database, file_id: str, purge_content: bool = False) -> Optional[Tuple[List[int], List[int]]]:
+        """
+        Dosyanın içerik referansını bırakır; files kaydı silinmez. Son referanssa (veya purge_content)
+        Postgres chunk'ları silinir ve Milvus'tan silinecek vector id'leri ile BM25 indeksinden silinecek
+        child chunk id'leri döner. Dosya kaydı yoksa None.
+        """
+        row = await db.fetch_one(
+            "SELECT content_sha256, content_file_id, user_id FROM files WHERE file_id = :file_id", {"file_id": file_id}
+        )
+        if row is None:
+            return None
+        content_sha256 = row["content_sha256"]
+        tenant_id = tenant_key(row["user_id"])
+        owner_id = str(row["content_file_id"]) if row["content_file_id"] else file_id
+        vector_ids, chunk_ids = [], []
+        async with db.transaction():
+            remaining = 0
+            if content_sha256 and not purge_content:
+                # Yalnızca dosyanın bağlı olduğu sahibin satırı: aynı (sha, tenant) için sonradan yeniden yüklenen
+                # içeriğin satırı bu dosyanın referansını hiç saymadı
+                ref = await db.fetch_one(
+                    """
+                    UPDATE file_contents SET ref_count = ref_count - 1
+                    WHERE content_sha256 = :sha AND tenant_id = :tenant_id AND owner_file_id = :owner_id RETURNING ref_count
+                    """,
+                    {"sha": content_sha256, "tenant_id": tenant_id, "owner_id": owner_id}
+                )
+                remaining = ref["ref_count"] if ref else 0
+            if remaining > 0:
+                if owner_id == file_id:
+                    await self._hand_off_content(db, file_id, content_sha256, tenant_id)
+            else:
+                if content_sha256:
+                    await db.execute(
+                        "DELETE FROM file_contents WHERE content_sha256 = :sha AND tenant_id = :tenant_id AND owner_file_id = :owner_id",
+                        {"sha": content_sha256, "tenant_id": tenant_id, "owner_id": owner_id}
+                    )
+                if purge_content:
+                    # Sahibin ingestion'ı başarısız oldu: bu sırada kopya olarak kaydedilen dosyalar silinen içeriğe
+                    # bağlı kalmamalı. İçerik bağları kaldırılır ve chunk'sız (başarısız) kalırlar; yeniden yüklenmeleri gerekir.
+                    orphans = await db.fetch_all(
+                        """
+                        UPDATE files SET content_sha256 = NULL, content_file_id = NULL, num_chunks = 0, chunked_total_size = 0
+                        WHERE content_file_id = :owner_id AND file_id != :owner_id RETURNING file_id
+                        """,
+                        {"owner_id": owner_id}
+                    )
+                    if orphans:
+                        self.logger.warning(
+                            f"Content of failed ingestion {owner_id} purged; unlinked duplicates: {[str(r['file_id']) for r in orphans]}"
+                        )
+                # Postgres: parent_chunks, child_chunks
+                rows = await db.fetch_all(
+                    """
+                    SELECT c.id, c.vector_id FROM child_chunks c JOIN parent_chunks p ON c.parent_id = p.id
+                    WHERE p.document_id = :owner_id
+                    """,
+                    {"owner_id": owner_id}
+                )
+                vector_ids = [r["vector_id"] for r in rows if r["vector_id"] is not None]
+                chunk_ids = [r["id"] for r in rows]
+                await db.execute("DELETE FROM child_chunks WHERE parent_id IN (SELECT id FROM parent_chunks WHERE document_id = :owner_id)", {"owner_id": owner_id})
+                await db.execute("DELETE FROM parent_chunks WHERE document_id = :owner_id", {"owner_id": owner_id})
+        return vector_ids, chunk_ids
+
+    async def _delete_vectors(
+        self,
+        vector_ids: List[int],
+        milvus_service: Optional[VectorStore] = None,
+        file_id: Optional[str] = None,
+        chunk_ids: Optional[List[int]] = None
+    ):
+        # Vektör deposu: child_chunks.vector_id ile eşlenen vektörleri primary key ile, chunk_ids verilirse id'si
+        # child_chunks'a yazılamamış vektörleri de chunk_id alanıyla sil. Devredilmiş içeriğin vektörleri ilk
+        # yükleyenin file_id'sini taşır; chunk_id ile temizlik dosyadan bağımsızdır. file_id verilirse
+        # dosyanın kalan tüm vektörleri (chunk kaydı hiç yazılamamış olanlar dahil) file_id alanıyla silinir.
+        if not vector_ids and not file_id and not chunk_ids:
+            return
         try:
-            # Safe filename encoding - EN BAŞTA TANIMLA
-            try:
-                safe_filename = safe_utf8(file.filename)
-            except Exception as e:
-                self.logger.error(f"Filename decode error: {e}, filename: {file.filename}")
-                traceback.print_exc()
-                safe_filename = "ERROR"
-            
-            # Validate file type
-            if file.content_type not in self.config.allowed_types:
-                raise ValueError(f"Unsupported file type: {file.content_type}")
-
-            # Validate file size
-            contents = await file.read()
-            if len(contents) > self.config.max_file_size:
-                raise ValueError(f"File size exceeds maximum allowed {self.config.max_file_size} bytes")
-
-            # Save file
-            file_id = str(uuid.uuid4())
-            file_path = os.path.join(upload_dir, file_id)
-            with open(file_path, "wb") as f:
-                f.write(contents)
-
-            # Dosya metadata'sını files tablosuna EKLE (önce!)
-            try:
-                insert_query = """
-                INSERT INTO files (file_id, original_filename, content_type, original_size, num_chunks, chunked_total_size, upload_time, user_id)
-                VALUES (:file_id, :original_filename, :content_type, :original_size, 0, 0, :upload_time, :user_id)
+            milvus_service = milvus_service or get_vector_store()
+            await milvus_service.delete_embeddings_async(vector_ids)
+            if chunk_ids:
+                await milvus_service.delete_by_chunks_async(chunk_ids)
+            if file_id:
+                await milvus_service.delete_by_file_async(file_id)
+        except Exception as milvus_error:
+            self.logger.warning(f"Milvus cleanup failed: {milvus_error}")
+
+    def _lexical_writer(self):
+        """Bir ingestion'ın BM25 değişikliklerini biriktiren yazar (BM25 kapalıysa None)."""
+        return get_bm25_index().writer() if self.bm25_enabled else None
+
+    async def _commit_lexical(self, writer):
+        # BM25 indeksi türetilmiş veridir; güncellenemezse ingestion başarısız sayılmaz
+        if writer is None:
+            return
+        try:
+            await asyncio.to_thread(writer.commit)
+        except Exception as index_error:
+            self.logger.warning(f"BM25 index update failed: {index_error}")
+
+    async def _delete_lexical(self, chunk_ids: List[int]):
+        if not chunk_ids or not self.bm25_enabled:
+            return
+        writer = self._lexical_writer()
+        writer.delete(chunk_ids)
+        await self._commit_lexical(writer)
+
+    async def _hand_off_content(self, db: Database, file_id: str, content_sha256: str, tenant_id: str):
+        """Silinen sahip dosyanın chunk'larını aynı içeriğe referans veren en eski dosyaya devreder."""
+        heir = await db.fetch_one(
+            """
+            SELECT file_id FROM files WHERE content_file_id = :file_id AND file_id != :file_id
+            ORDER BY upload_time LIMIT 1
+            """,
+            {"file_id": file_id}
+        )
+        if heir is None:
+            return
+        values = {"old": file_id, "new": str(heir["file_id"])}
+        await db.execute("UPDATE parent_chunks SET document_id = :new WHERE document_id = :old", values)
+        await db.execute("UPDATE files SET content_file_id = :new WHERE content_file_id = :old", values)
+        await db.execute(
+            "UPDATE file_contents SET owner_file_id = :new WHERE content_sha256 = :sha AND tenant_id = :tenant_id",
+            {"new": values["new"], "sha": content_sha256, "tenant_id": tenant_id}
+        )
+        self.logger.info(f"Content {content_sha256} handed off from {file_id} to {values['new']}")
+
+    async def register_content(self, db: Database, file_id: str, content_sha256: str, tenant_id: str) -> Optional[dict]:
+        """
+        Dosyanın içeriğini tenant'ın referans sayacına kaydeder. İçerik aynı tenant'ta daha önce yüklenmişse dosya kaydı mevcut
+        chunk/vektörlere bağlanır ve sahip dosyanın {file_id, num_chunks, chunked_total_size} bilgisi döner;
+        yeni içerikse None döner ve dosya kendi içeriğinin sahibi olur.
+        """
+        async with db.transaction():
+            row = await db.fetch_one(
                 """
-                try:
-                    safe_filename_ascii = safe_ascii_filename(file.filename)
-                except Exception as e:
-                    self.logger.error(f"Files table filename decode error: {e}, filename: {file.filename}")
-                    traceback.print_exc()
-                    safe_filename_ascii = "ERROR_FILENAME"
-                values = {
+                INSERT INTO file_contents (content_sha256, tenant_id, owner_file_id, ref_count)
+                VALUES (:sha, :tenant_id, :file_id, 1)
+                ON CONFLICT (content_sha256, tenant_id) DO UPDATE SET ref_count = file_contents.ref_count + 1
+                RETURNING owner_file_id
+                """,
+                {"sha": content_sha256, "tenant_id": tenant_id, "file_id": file_id}
+            )
+            owner_id = str(row["owner_file_id"])
+            owner = await db.fetch_one(
+                "SELECT num_chunks, chunked_total_size FROM files WHERE file_id = :owner_id", {"owner_id": owner_id}
+            )
+            await db.execute(
+                """
+                UPDATE files SET content_file_id = :owner_id, num_chunks = :num_chunks, chunked_total_size = :chunked_total_size
+                WHERE file_id = :file_id
+                """,
+                {
+                    "owner_id": owner_id,
+                    "num_chunks": owner["num_chunks"] if owner else 0,
+                    "chunked_total_size": owner["chunked_total_size"] if owner else 0,
                     "file_id": file_id,
-                    "original_filename": safe_filename_ascii,
-                    "content_type": file.content_type,
-                    "original_size": len(contents),
-                    "upload_time": datetime.now(timezone.utc),
-                    "user_id": user_id
                 }
-                await db.execute(insert_query, values)
+            )
+        if owner_id == file_id:
+            return None
+        return {
+            "file_id": owner_id,
+            "num_chunks": owner["num_chunks"] if owner else 0,
+            "chunked_total_size": owner["chunked_total_size"] if owner else 0,
+        }
+
+    async def handle_file_upload(self, file, upload_dir: str, db: Database, user_id: Optional[str] = None) -> FileUploadResponse:
+        """Yeni pipeline: custom parsing + parent-child chunking + embedding + Milvus + detaylı loglama"""
+        try:
+            result = await self.save_upload(file, upload_dir, db, user_id=user_id)
+            if result.status == "duplicate":
+                return result
+            file_path = os.path.join(upload_dir, result.file_id)
+            num_chunks, chunked_total_size = await self.ingest_file(db, result.file_id, file_path, result.filename)
+            result.num_chunks = num_chunks
+            result.chunked_total_size = chunked_total_size
+            return result
+        except Exception as e:
+            self.logger.error(f"File upload failed: {str(e)}")
+            raise
+
+    async def save_upload(self, file, upload_dir: str, db: Database, user_id: Optional[str] = None) -> FileUploadResponse:
+        """
+        Dosyayı doğrular, upload dizinine parça parça akıtarak kaydeder ve files tablosuna ekler
+        (chunking/embedding yapılmaz). Bellekte en fazla bir upload_chunk_size parçası tutulur;
+        SHA-256 yazım sırasında hesaplanır.
+        """
+        self._validate_upload(file)
+
+        # Save file
+        file_id = str(uuid.uuid4())
+        file_path = os.path.join(upload_dir, file_id)
+        size, sha256 = await self._stream_to_disk(file, file_path)
+
+        # Dosya metadata'sını files tablosuna EKLE (önce!)
+        try:
+            insert_query = """
+            INSERT INTO files (file_id, original_filename, content_type, original_size, num_chunks, chunked_total_size, upload_time, user_id, content_sha256)
+            VALUES (:file_id, :original_filename, :content_type, :original_size, 0, 0, :upload_time, :user_id, :content_sha256)
+            """
+            try:
+                safe_filename_ascii = safe_ascii_filename(file.filename)
             except Exception as e:
-                self.logger.error(f"Files table insert error (pre-chunk): {e}, values: {values}")
+                self.logger.error(f"Files table filename decode error: {e}, filename: {file.filename}")
                 traceback.print_exc()
-                raise
+                safe_filename_ascii = "ERROR_FILENAME"
+            values = {
+                "file_id": file_id,
+                "original_filename": safe_filename_ascii,
+                "content_type": file.content_type,
+                "original_size": size,
+                "upload_time": datetime.now(timezone.utc),
+                "user_id": user_id,
+                "content_sha256": sha256
+            }
+            await db.execute(insert_query, values)
+        except Exception as e:
+            self.logger.error(f"Files table insert error (pre-chunk): {e}, values: {values}")
+            traceback.print_exc()
+            raise
 
-            # --- Yeni pipeline ---
-            try:
-                parent_chunks, child_chunks = extract_pdf_document(file_path)
-                parent_chunks = fill_parent_chunk_content(parent_chunks, child_chunks)
-            except Exception as extract_error:
-                self.logger.error(f"File extract failed: {extract_error}")
-                await self.cleanup_file(db, file_id)
-                raise
-
-            # Parent chunk'ları kaydet
-            parent_id_map = {}
-            try:
-                for parent in parent_chunks:
-                    insert_query = """
-                    INSERT INTO parent_chunks (document_id, title, content, "order", metadata)
-                    VALUES (:document_id, :title, :content, :order, :metadata)
-                    RETURNING id
-                    """
-                    safe_title = safe_utf8(parent["title"])
-                    safe_content = safe_utf8(parent["content"])
-                    values = {
-                        "document_id": file_id,
-                        "title": safe_title,
-                        "content": safe_content,
-                        "order": parent["order"],
-                        "metadata": json.dumps(parent.get("metadata", {}), ensure_ascii=True)
-                    }
-                    row = await db.fetch_one(insert_query, values)
-                    parent_id = row[0] if row else None
-                    parent_id_map[parent["id"]] = parent_id
-            except Exception as parent_error:
-                self.logger.error(f"Parent chunk insert failed: {parent_error}")
-                await self.cleanup_file(db, file_id)
-                raise
-
-            # Child chunk'ları kaydet
-            try:
-                for child in child_chunks:
-                    insert_query = """
-                    INSERT INTO child_chunks (parent_id, content, type, "order", metadata)
-                    VALUES (:parent_id, :content, :type, :order, :metadata)
-                    RETURNING id
+        result = FileUploadResponse(
+            file_id=file_id,
+            filename=safe_filename_ascii,
+            content_type=file.content_type,
+            size=size,
+            num_chunks=0,
+            chunked_total_size=0,
+            upload_time=values["upload_time"],
+            user_id=user_id,
+            sha256=sha256
+        )
+
+        # Aynı içerik daha önce yüklendiyse parse/chunk/embed tekrarlanmaz; kopya diskte tutulmaz
+        try:
+            owner = await self.register_content(db, file_id, sha256, tenant_key(user_id))
+        except Exception as e:
+            self.logger.error(f"Content registration failed for file_id={file_id}: {e}")
+            await self.cleanup_file(db, file_id)
+            await asyncio.get_running_loop().run_in_executor(None, _remove_quietly, file_path)
+            raise
+        if owner is not None:
+            await asyncio.get_running_loop().run_in_executor(None, _remove_quietly, file_path)
+            result.num_chunks = owner["num_chunks"]
+            result.chunked_total_size = owner["chunked_total_size"]
+            result.status = "duplicate"
+            self.logger.info(f"Upload {file_id} deduplicated against {owner['file_id']} (sha256={sha256})")
+        return result
+
+    def _validate_upload(self, file):
+        # Validate file type
+        if file.content_type not in self.config.allowed_types:
+            raise ValueError(f"Unsupported file type: {file.content_type}")
+
+        # Boyut biliniyorsa hiç okumadan reddet
+        declared_size = getattr(file, "size", None)
+        if declared_size is not None and declared_size > self.config.max_file_size:
+            raise UploadTooLargeError(f"File size exceeds maximum allowed {self.config.max_file_size} bytes")
+
+    async def _stream_to_disk(self, file, file_path: str) -> Tuple[int, str]:
+        """
+        Upload'ı upload_chunk_size'lık parçalarla diske yazar; yazma ve hash thread pool'da yapılır,
+        event loop bloklanmaz. Sınır aşılır aşılmaz yarım dosya silinir ve UploadTooLargeError fırlatılır.
+        Dönüş: (byte sayısı, SHA-256 hex)
+        """
+        loop = asyncio.get_running_loop()
+        hasher = hashlib.sha256()
+        size = 0
+        out = await loop.run_in_executor(None, open, file_path, "wb")
+        try:
+            while True:
+                chunk = await file.read(self.config.upload_chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.config.max_file_size:
+                    raise UploadTooLargeError(f"File size exceeds maximum allowed {self.config.max_file_size} bytes")
+                await loop.run_in_executor(None, _write_chunk, out, hasher, chunk)
+        except BaseException:
+            await loop.run_in_executor(None, out.close)
+            await loop.run_in_executor(None, _remove_quietly, file_path)
+            raise
+        await loop.run_in_executor(None, out.close)
+        return size, hasher.hexdigest()
+
+    async def ingest_file(
+        self,
+        db: Database,
+        file_id: str,
+        file_path: str,
+        filename: str,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Tuple[int, int]:
+        """
+        Kaydedilmiş dosyayı bölüm bölüm parse eder; tamamlanan bölümler biriktikçe chunk'ları yazar,
+        embedding'leri batch'ler halinde Milvus'a ekler. Bellekte yalnızca bekleyen batch tutulur ve
+        her batch eklendiği anda aranabilir hale gelir.
+        progress: stage, pages_parsed, pages_total, chunks_total, chunks_embedded, vectors_indexed,
+        embedding_cache_hits, embedding_cache_misses, embedding_cache_saved_ms alanlarıyla çağrılan opsiyonel callback.
+        Dönüş: (child chunk sayısı, toplam chunk boyutu)
+        """
+        report = progress or (lambda **fields: None)
+        writer = BulkChunkWriter(db)
+        milvus_service = get_vector_store()
+        # Vektörler dosyayı yükleyen kullanıcının tenant partition'ına yazılır
+        user_id = await db.fetch_val("SELECT user_id FROM files WHERE file_id = :file_id", {"file_id": file_id})
+        owner = {"tenant_id": tenant_key(user_id), "file_id": file_id}
+        batch_size = self.config.embed_batch_size
+        pending_parents, pending_children = [], []
+        counts = {"parents": 0, "children": 0}
+        cache_stats = CacheStats()
+        lexical = self._lexical_writer()
+        safe_total_size = 0
+
+        async def flush():
+            if not pending_parents:
+                return
+            await self._write_and_index(db, writer, milvus_service, owner, pending_parents, pending_children, counts, cache_stats, report, lexical)
+            pending_parents.clear()
+            pending_children.clear()
+
+        # --- Yeni pipeline: bölümler geldikçe yaz, embed et ve Milvus'a ekle ---
+        report(stage="parsing")
+        sections = iter_pdf_sections(
+            file_path,
+            progress=lambda done, total: report(pages_parsed=done, pages_total=total),
+            workers=self.config.pdf_extract_workers
+        )
+        try:
+            for parent, children in sections:
+                parent, children, section_size = self._sanitize_section(parent, children)
+                pending_parents.append(parent)
+                pending_children.extend(children)
+                safe_total_size += section_size
+                if len(pending_children) >= batch_size:
+                    await flush()
+            await flush()
+        except Exception as ingest_error:
+            self.logger.error(f"File ingest failed: {ingest_error}")
+            await self.cleanup_file(db, file_id, purge_content=True)
+            # files kaydı silindi; yüklenen dosya diskte sahipsiz kalmamalı
+            await asyncio.get_running_loop().run_in_executor(None, _remove_quietly, file_path)
+            raise
+        finally:
+            sections.close()
+        await self._commit_lexical(lexical)
+
+        self.logger.info(
+            f"[EMBED_CACHE] {file_id}: {cache_stats.hits} hit / {cache_stats.misses} miss "
+            f"(hit rate {cache_stats.hit_rate:.1%}, ~{cache_stats.saved_seconds:.2f}s saved)"
+        )
+
+        # Detaylı loglama - safe metadata
+        try:
+            safe_log_metadata = {
+                "file_id": file_id,
+                "filename": filename,
+                "parent_chunks_count": counts["parents"],
+                "child_chunks_count": counts["children"],
+                "embeddings": counts["children"],
+                "embedding_cache": cache_stats.as_dict()
+            }
+            log_search(
+                query="[UPLOAD]",
+                results=[],
+                metadata=safe_log_metadata
+            )
+        except Exception as log_error:
+            self.logger.warning(f"Logging failed: {str(log_error)}")
+
+        # Dosya metadata'sını güncelle (chunk sayısı ve toplam boyut)
+        try:
+            update_query = """
+            UPDATE files SET num_chunks = :num_chunks, chunked_total_size = :chunked_total_size
+            WHERE file_id = :file_id OR content_file_id = :file_id
+            """
+            await db.execute(update_query, {"num_chunks": counts["children"], "chunked_total_size": safe_total_size, "file_id": file_id})
+        except Exception as update_error:
+            self.logger.warning(f"Files table update failed: {update_error}")
+
+        report(stage="completed")
+        return counts["children"], safe_total_size
+
+    async def save_revision(self, file, file_id: str, upload_dir: str, db: Database, tenant_id: str) -> Tuple[FileUploadResponse, Optional[str]]:
+        """
+        Mevcut bir dokümanın yeni revizyonunu doğrular ve upload dizinine geçici bir dosya olarak akıtır
+        (files kaydı reingest_file tamamlanınca güncellenir). İçerik mevcut revizyonla aynıysa dosya
+        tutulmaz ve status "unchanged" döner.
+        Dosya tenant_id'ye (isteği yapanın kapsamı) ait değilse bulunamamış sayılır; başka bir tenant'ın
+        dokümanının varlığı da açığa çıkmaz.
+        Dönüş: (yanıt, revizyon dosyasının yolu ya da None)
+        """
+        row = await db.fetch_one(
+            """
+            SELECT num_chunks, chunked_total_size, upload_time, user_id, content_sha256
+            FROM files WHERE file_id = :file_id
+            """,
+            {"file_id": file_id}
+        )
+        if row is None or tenant_key(row["user_id"]) != tenant_id:
+            raise FileNotFoundError(f"File not found: {file_id}")
+        self._validate_upload(file)
+
+        revision_path = os.path.join(upload_dir, f"{file_id}.{uuid.uuid4().hex}.rev")
+        size, sha256 = await self._stream_to_disk(file, revision_path)
+        try:
+            safe_filename_ascii = safe_ascii_filename(file.filename)
+        except Exception as e:
+            self.logger.error(f"Revision filename decode error: {e}, filename: {file.filename}")
+            safe_filename_ascii = "ERROR_FILENAME"
+        result = FileUploadResponse(
+            file_id=file_id,
+            filename=safe_filename_ascii,
+            content_type=file.content_type,
+            size=size,
+            num_chunks=row["num_chunks"],
+            chunked_total_size=row["chunked_total_size"],
+            upload_time=row["upload_time"],
+            user_id=str(row["user_id"]) if row["user_id"] is not None else None,
+            sha256=sha256
+        )
+        if sha256 == row["content_sha256"]:
+            await asyncio.get_running_loop().run_in_executor(None, _remove_quietly, revision_path)
+            result.status = "unchanged"
+            return result, None
+        return result, revision_path
+
+    async def reingest_file(
+        self,
+        db: Database,
+        file_id: str,
+        revision_path: str,
+        filename: str,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Tuple[int, int]:
+        """
+        Dokümanın yeni revizyonunu ("replace document") uygular. Revizyon bölüm bölüm parse edilir ve
+        child chunk'lar içerik hash'i ile dokümanın mevcut child_chunks kayıtlarıyla eşleştirilir:
+        - yeni chunk'lar yazılır, embed edilir ve Milvus'a eklenir,
+        - yalnızca sırası değişenlerin "order" alanı yerinde güncellenir,
+        - başka parent'a taşınanların parent_id'si güncellenir; Milvus'taki parent_id alanı
+          değiştiği için vektörleri embedding cache'ten yeniden eklenir,
+        - revizyonda bulunmayan chunk'lar ve vektörleri silinir.
+        Böylece embedding ve Milvus maliyeti doküman boyutuyla değil değişikliğin boyutuyla orantılıdır.
+        Chunk'lar başka dosyalarla paylaşılıyorsa paylaşım bırakılır ve revizyon sıfırdan işlenir.
+        Hata durumunda doküman kısmen güncellenmiş kalabilir; aynı revizyon tekrar yüklendiğinde
+        eşleştirme kaldığı yerden tamamlar.
+        progress: ingest_file alanlarına ek olarak chunks_reused, chunks_removed.
+        Dönüş: (child chunk sayısı, toplam chunk boyutu)
+        """
+        report = progress or (lambda **fields: None)
+        loop = asyncio.get_running_loop()
+        file_path = os.path.join(os.path.dirname(revision_path), file_id)
+        size = os.path.getsize(revision_path)
+        new_sha = await loop.run_in_executor(None, _file_sha256, revision_path)
+        row = await db.fetch_one(
+            """
+            SELECT f.content_sha256, f.content_file_id, f.user_id, c.ref_count
+            FROM files f LEFT JOIN file_contents c
+                ON c.content_sha256 = f.content_sha256 AND c.tenant_id = COALESCE(f.user_id::text, '')
+            WHERE f.file_id = :file_id
+            """,
+            {"file_id": file_id}
+        )
+        if row is None:
+            await loop.run_in_executor(None, _remove_quietly, revision_path)
+            raise FileNotFoundError(f"File not found: {file_id}")
+        old_sha = row["content_sha256"]
+        tenant_id = tenant_key(row["user_id"])
+
+        # Revizyon aynı tenant'taki başka bir dosyayla birebir aynıysa parse etmeden onun chunk'larını paylaş
+        same_content = await db.fetch_one(
+            "SELECT owner_file_id FROM file_contents WHERE content_sha256 = :sha AND tenant_id = :tenant_id",
+            {"sha": new_sha, "tenant_id": tenant_id}
+        )
+        if same_content is not None and str(same_content["owner_file_id"]) != file_id:
+            async with db.transaction():
+                vector_ids, chunk_ids = await self._release_content(db, file_id) or ([], [])
+                await db.execute(
                     """
-                    try:
-                        safe_child_content = safe_utf8(child["content"])
-                    except Exception as e:
-                        self.logger.error(f"Child chunk decode error: {e}, content: {child['content']}")
-                        traceback.print_exc()
-                        safe_child_content = "ERROR"
-                    if not safe_child_content or not safe_child_content.strip() or not all(c.isprintable() for c in safe_child_content):
+                    UPDATE files SET content_sha256 = :sha, content_file_id = NULL, original_filename = :filename, original_size = :size
+                    WHERE file_id = :file_id
+                    """,
+                    {"sha": new_sha, "filename": filename, "size": size, "file_id": file_id}
+                )
+                owner = await self.register_content(db, file_id, new_sha, tenant_id)
+            await self._delete_vectors(vector_ids, chunk_ids=chunk_ids)
+            await self._delete_lexical(chunk_ids)
+            await loop.run_in_executor(None, _remove_quietly, revision_path)
+            await loop.run_in_executor(None, _remove_quietly, file_path)
+            self.logger.info(f"Revision of {file_id} deduplicated against {owner['file_id']} (sha256={new_sha})")
+            report(stage="completed")
+            return owner["num_chunks"], owner["chunked_total_size"]
+
+        shared = (row["content_file_id"] is not None and str(row["content_file_id"]) != file_id) or (row["ref_count"] or 0) > 1
+        if shared:
+            # Paylaşılan chunk'lar diğer dosyalarda kalır (sahipse en eski referansa devredilir)
+            async with db.transaction():
+                vector_ids, chunk_ids = await self._release_content(db, file_id) or ([], [])
+                await db.execute(
+                    "UPDATE files SET content_sha256 = NULL, content_file_id = :file_id WHERE file_id = :file_id",
+                    {"file_id": file_id}
+                )
+            await self._delete_vectors(vector_ids, chunk_ids=chunk_ids)
+            await self._delete_lexical(chunk_ids)
+            old_sha = None
+
+        # Eski chunk'ların yalnızca id, sıra ve hash'leri okunur; hash'i olmayan eski kayıtlar için Postgres'te hesaplanır
+        old_parents = await db.fetch_all(
+            """
+            SELECT id, title, "order", encode(sha256(convert_to(content, 'UTF8')), 'hex') AS content_hash, metadata
+            FROM parent_chunks WHERE document_id = :file_id
+            """,
+            {"file_id": file_id}
+        )
+        old_children = await db.fetch_all(
+            """
+            SELECT c.id, c.parent_id, c."order", c.vector_id,
+                   COALESCE(c.content_hash, encode(sha256(convert_to(c.content, 'UTF8')), 'hex')) AS content_hash
+            FROM child_chunks c JOIN parent_chunks p ON c.parent_id = p.id
+            WHERE p.document_id = :file_id
+            """,
+            {"file_id": file_id}
+        )
+        diff = ChunkDiff(
+            [(r["id"], r["title"], r["order"], r["content_hash"], _json_field(r["metadata"])) for r in old_parents],
+            [(r["id"], r["parent_id"], r["order"], r["vector_id"], r["content_hash"]) for r in old_children]
+        )
+        del old_parents, old_children
+
+        writer = BulkChunkWriter(db)
+        milvus_service = get_vector_store()
+        batch_size = self.config.embed_batch_size
+        counts = {"parents": 0, "children": 0, "total": 0, "reused": 0}
+        cache_stats = CacheStats()
+        lexical = self._lexical_writer()
+        safe_total_size = 0
+        pending = _RevisionBatch()
+
+        async def flush():
+            if pending.empty():
+                return
+            report(stage="writing_chunks", chunks_total=counts["total"], chunks_reused=counts["reused"])
+            async with db.transaction():
+                parent_id_map = await writer.write(file_id, pending.parents, pending.children, existing_parent_ids=pending.existing)
+                if pending.parent_updates:
+                    await db.execute_many(
+                        'UPDATE parent_chunks SET content = :content, "order" = :order, metadata = CAST(:metadata AS jsonb) WHERE id = :id',
+                        pending.parent_updates
+                    )
+                if pending.order_updates:
+                    await db.execute_many('UPDATE child_chunks SET "order" = :order WHERE id = :id', pending.order_updates)
+                if pending.moved:
+                    await db.execute_many(
+                        'UPDATE child_chunks SET parent_id = :parent_id, "order" = :order, vector_id = NULL WHERE id = :id',
+                        [{"id": c["db_id"], "parent_id": parent_id_map[c["parent_id"]], "order": c.get("order")} for c in pending.moved]
+                    )
+            counts["parents"] += len(pending.parents)
+            if lexical is not None and pending.moved:
+                # Taşınan chunk'lar BM25'te yeni parent_id'leriyle yeniden eklenir
+                lexical.delete(c["db_id"] for c in pending.moved)
+            await self._embed_and_index(db, milvus_service, {"tenant_id": tenant_id, "file_id": file_id}, pending.children + pending.moved, parent_id_map, counts, cache_stats, report, lexical)
+            # Taşınan chunk'ların eski parent_id'li vektörleri, yenileri eklendikten sonra silinir
+            await self._delete_vectors(pending.stale_vectors, milvus_service)
+            pending.clear()
+
+        report(stage="parsing")
+        sections = iter_pdf_sections(
+            revision_path,
+            progress=lambda done, total: report(pages_parsed=done, pages_total=total),
+            workers=self.config.pdf_extract_workers
+        )
+        try:
+            for parent, children in sections:
+                parent, children, section_size = self._sanitize_section(parent, children)
+                safe_total_size += section_size
+                parent_hash = content_hash(parent["content"])
+                old_parent = diff.match_parent(parent["title"], parent_hash)
+                parent_db_id = None
+                if old_parent is None:
+                    pending.parents.append(parent)
+                else:
+                    parent_db_id = old_parent.id
+                    pending.existing[parent["id"]] = parent_db_id
+                    metadata_json = json.dumps(parent.get("metadata", {}), ensure_ascii=True)
+                    if (old_parent.content_hash, old_parent.order, old_parent.metadata) != (parent_hash, parent.get("order"), json.loads(metadata_json)):
+                        pending.parent_updates.append({
+                            "id": parent_db_id,
+                            "content": parent["content"],
+                            "order": parent.get("order"),
+                            "metadata": metadata_json,
+                        })
+                for child in children:
+                    counts["total"] += 1
+                    old_child = diff.match_child(content_hash(child["content"]), parent_db_id)
+                    if old_child is None:
+                        pending.children.append(child)
                         continue
-                    values = {
-                        "parent_id": parent_id_map[child["parent_id"]],
-                        "content": safe_child_content,
-                        "type": child.get("type"),
-                        "order": child.get("order"),
-                        "metadata": json.dumps(child.get("metadata", {}), ensure_ascii=True)
-                    }
-                    row = await db.fetch_one(insert_query, values)
-                    child["db_id"] = row[0] if row else None
-            except Exception as child_error:
-                self.logger.error(f"Child chunk insert failed: {child_error}")
-                await self.cleanup_file(db, file_id)
-                raise
-
-            # Child chunk embedding ve Milvus'a ekleme
-            try:
-                embedding_model = load_embedding_model("paraphrase-multilingual-MiniLM-L12-v2")
-                embeddings = embed_chunks(child_chunks, model_name="paraphrase-multilingual-MiniLM-L12-v2")
-                milvus_service = MilvusService()
-                for child, embedding in zip(child_chunks, embeddings):
-                    metadata = {
-                        "parent_id": parent_id_map[child["parent_id"]],
-                        "type": child.get("type"),
-                        "order": child.get("order"),
-                        "metadata": child.get("metadata", {})
-                    }
-                    try:
-                        safe_metadata_str = json.dumps(metadata, ensure_ascii=True)
-                    except Exception as e:
-                        safe_metadata_str = json.dumps({
-                            "parent_id": metadata.get("parent_id", "unknown"),
-                            "type": str(metadata.get("type", "text")),
-                            "order": metadata.get("order", 0),
-                            "encoding_error": str(e)
-                        }, ensure_ascii=True)
-                    try:
-                        milvus_service.insert_embedding(embedding, safe_metadata_str)
-                    except Exception as milvus_error:
-                        self.logger.error(f"Milvus insert failed: {milvus_error}")
-                        await self.cleanup_file(db, file_id)
-                        raise
-            except Exception as embed_error:
-                self.logger.error(f"Embedding/Milvus failed: {embed_error}")
-                await self.cleanup_file(db, file_id)
-                raise
-
-            # Detaylı loglama - safe metadata
-            try:
-                safe_log_metadata = {
+                    counts["reused"] += 1
+                    if parent_db_id is not None and old_child.parent_id == parent_db_id:
+                        if old_child.order != child.get("order"):
+                            pending.order_updates.append({"id": old_child.id, "order": child.get("order")})
+                        continue
+                    pending.moved.append({**child, "db_id": old_child.id})
+                    if old_child.vector_id is not None:
+                        pending.stale_vectors.append(old_child.vector_id)
+                if len(pending.children) + len(pending.moved) >= batch_size:
+                    await flush()
+            await flush()
+        except Exception as reingest_error:
+            self.logger.error(f"File reingest failed for {file_id}: {reingest_error}")
+            await loop.run_in_executor(None, _remove_quietly, revision_path)
+            raise
+        finally:
+            sections.close()
+
+        # Revizyonda karşılığı olmayan chunk'lar; parent'lar child'ları taşındıktan sonra silinir
+        removed = diff.removed_children()
+        async with db.transaction():
+            if removed:
+                await db.execute("DELETE FROM child_chunks WHERE id = ANY(:ids)", {"ids": [c.id for c in removed]})
+            removed_parents = diff.removed_parents()
+            if removed_parents:
+                await db.execute("DELETE FROM parent_chunks WHERE id = ANY(:ids)", {"ids": removed_parents})
+            if old_sha:
+                await db.execute(
+                    "DELETE FROM file_contents WHERE content_sha256 = :sha AND tenant_id = :tenant_id AND owner_file_id = :file_id",
+                    {"sha": old_sha, "tenant_id": tenant_id, "file_id": file_id}
+                )
+            await db.execute(
+                """
+                UPDATE files SET content_sha256 = :sha, content_file_id = NULL, original_filename = :filename,
+                    original_size = :size, num_chunks = :num_chunks, chunked_total_size = :chunked_total_size
+                WHERE file_id = :file_id
+                """,
+                {
+                    "sha": new_sha, "filename": filename, "size": size, "num_chunks": counts["total"],
+                    "chunked_total_size": safe_total_size, "file_id": file_id,
+                }
+            )
+            await self.register_content(db, file_id, new_sha, tenant_id)
+        await self._delete_vectors([c.vector_id for c in removed if c.vector_id is not None], milvus_service)
+        if lexical is not None:
+            lexical.delete(c.id for c in removed)
+            await self._commit_lexical(lexical)
+        await loop.run_in_executor(None, os.replace, revision_path, file_path)
+
+        self.logger.info(
+            f"[REINGEST] {file_id}: {counts['total']} chunks, {counts['reused']} reused, "
+            f"{counts['children']} embedded, {len(removed)} removed "
+            f"(cache hit rate {cache_stats.hit_rate:.1%})"
+        )
+        try:
+            log_search(
+                query="[REINGEST]",
+                results=[],
+                metadata={
                     "file_id": file_id,
-                    "filename": safe_filename,
-                    "parent_chunks_count": len(parent_chunks),
-                    "child_chunks_count": len(child_chunks),
-                    "embeddings": len(child_chunks)
+                    "filename": filename,
+                    "child_chunks_count": counts["total"],
+                    "chunks_reused": counts["reused"],
+                    "chunks_embedded": counts["children"],
+                    "chunks_removed": len(removed),
+                    "embedding_cache": cache_stats.as_dict()
                 }
-                log_search(
-                    query="[UPLOAD]",
-                    results=[],
-                    metadata=safe_log_metadata
-                )
-            except Exception as log_error:
-                self.logger.warning(f"Logging failed: {str(log_error)}")
+            )
+        except Exception as log_error:
+            self.logger.warning(f"Logging failed: {str(log_error)}")
+        report(stage="completed", chunks_total=counts["total"], chunks_reused=counts["reused"], chunks_removed=len(removed))
+        return counts["total"], safe_total_size
 
-            # Safe chunk size calculation
-            safe_total_size = 0
-            for c in child_chunks:
-                try:
-                    content = c.get("content", "")
-                    if isinstance(content, str):
-                        clean_content = ''.join(char for char in content if ord(char) < 127 or char.isalnum() or char.isspace())
-                        safe_total_size += len(clean_content.encode("utf-8", errors="ignore"))
-                    else:
-                        safe_total_size += len(str(content).encode("utf-8", errors="ignore"))
-                except Exception:
-                    safe_total_size += 100
-            
-            # Dosya metadata'sını güncelle (chunk sayısı ve toplam boyut)
+    def _sanitize_section(self, parent, children):
+        """
+        Bölümü DB ve Milvus'a yazılabilir hale getirir; boş veya yazdırılamayan child'lar atlanır.
+        Dönüş: (parent, child'lar, child içeriklerinin toplam boyutu)
+        """
+        safe_parent = {**parent, "title": safe_utf8(parent["title"]), "content": safe_utf8(parent["content"])}
+        safe_children = []
+        size = 0
+        for child in children:
             try:
-                update_query = """
-                UPDATE files SET num_chunks = :num_chunks, chunked_total_size = :chunked_total_size WHERE file_id = :file_id
-                """
-                await db.execute(update_query, {"num_chunks": len(child_chunks), "chunked_total_size": safe_total_size, "file_id": file_id})
-            except Exception as update_error:
-                self.logger.warning(f"Files table update failed: {update_error}")
-
-            return FileUploadResponse(
-                file_id=file_id,
-                filename=safe_ascii_filename(file.filename),
-                content_type=file.content_type,
-                size=len(contents),
-                num_chunks=len(child_chunks),
-                chunked_total_size=safe_total_size,
-                upload_time=datetime.now(timezone.utc),
-                user_id=user_id
+                safe_child_content = safe_utf8(child["content"])
+            except Exception as e:
+                self.logger.error(f"Child chunk decode error: {e}, content: {child['content']}")
+                traceback.print_exc()
+                safe_child_content = "ERROR"
+            if not safe_child_content or not safe_child_content.strip() or not is_printable(safe_child_content):
+                continue
+            safe_children.append({**child, "content": safe_child_content})
+            size += safe_content_size(safe_child_content)
+        return safe_parent, safe_children, size
+
+    async def _write_and_index(self, db: Database, writer: BulkChunkWriter, milvus_service: VectorStore, owner: Dict[str, str], parents, children, counts, cache_stats, report, lexical=None):
+        """
+        Tamamlanmış bölümlerden biriken parent/child chunk'ları tek transaction'da yazar,
+        ardından child'ları embed edip Milvus'a ekler.
+        """
+        report(stage="writing_chunks", chunks_total=counts["children"] + len(children))
+        parent_id_map = await writer.write(owner["file_id"], parents, children)
+        counts["parents"] += len(parents)
+        await self._embed_and_index(db, milvus_service, owner, children, parent_id_map, counts, cache_stats, report, lexical)
+
+    async def _embed_and_index(self, db: Database, milvus_service: VectorStore, owner: Dict[str, str], children, parent_id_map, counts, cache_stats, report, lexical=None):
+        """
+        DB'ye yazılmış ("db_id" atanmış) child'ları embed_batch_size'lık batch'ler halinde embed edip Milvus'a ekler.
+        Embedding cache sayaçları cache_stats'te upload boyunca birikir.
+        lexical verilirse child'lar BM25 yazarına da eklenir (commit'i çağıran yapar).
+        """
+        report(stage="embedding")
+        batch_size = self.config.embed_batch_size
+        for start in range(0, len(children), batch_size):
+            batch = children[start:start + batch_size]
+            embeddings = embed_chunks(batch, model_name="paraphrase-multilingual-MiniLM-L12-v2", cache_stats=cache_stats)
+            report(
+                chunks_embedded=counts["children"] + len(batch),
+                embedding_cache_hits=cache_stats.hits,
+                embedding_cache_misses=cache_stats.misses,
+                embedding_cache_saved_ms=int(cache_stats.saved_seconds * 1000)
             )
-        except Exception as e:
-            self.logger.error(f"File upload failed: {str(e)}")
+            await self._index_batch(db, milvus_service, owner, batch, embeddings, parent_id_map)
+            if lexical is not None:
+                try:
+                    lexical.add_many(
+                        (child["db_id"], parent_id_map[child["parent_id"]], child["content"], owner["tenant_id"])
+                        for child in batch if child.get("db_id") is not None
+                    )
+                except Exception as index_error:
+                    self.logger.warning(f"BM25 indexing failed: {index_error}")
+            counts["children"] += len(batch)
+            report(vectors_indexed=counts["children"])
+
+    async def _index_batch(self, db: Database, milvus_service: VectorStore, owner: Dict[str, str], batch, embeddings, parent_id_map):
+        """
+        Bir child chunk batch'inin vektörlerini Milvus'a ekler ve primary key'leri child_chunks'a yazar.
+        owner: {"tenant_id", "file_id"}; içeriğin sahibi dosya ve onu yükleyen kullanıcının tenant'ı.
+        """
+        # tenant_id, file_id, parent_id ve chunk_id tipli skaler alanlara yazılır; metadata JSON alanında kalır
+        records = [
+            {
+                **owner,
+                "parent_id": parent_id_map[child["parent_id"]],
+                "chunk_id": child.get("db_id"),
+                "type": child.get("type"),
+                "order": child.get("order"),
+                "metadata": child.get("metadata", {})
+            }
+            for child in batch
+        ]
+        try:
+            vector_ids = await milvus_service.insert_embeddings_async(embeddings, records, async_insert=True)
+        except Exception as milvus_error:
+            self.logger.error(f"Milvus insert failed: {milvus_error}")
             raise
+        # Milvus primary key'lerini child_chunks tablosuna geri yaz
+        vector_id_values = [
+            {"vector_id": vector_id, "id": child["db_id"]}
+            for child, vector_id in zip(batch, vector_ids)
+            if child.get("db_id") is not None
+        ]
+        if vector_id_values:
+            await db.execute_many(
+                "UPDATE child_chunks SET vector_id = :vector_id WHERE id = :id",
+                vector_id_values
+            )
+
+class _RevisionBatch:
+    """reingest_file'da bir sonraki flush'a kadar biriken yazma/güncelleme işleri."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.parents = []  # yeni parent'lar (yerel id)
+        self.existing = {}  # yeniden kullanılan parent'lar: yerel id -> DB id
+        self.parent_updates = []
+        self.children = []  # yeni child'lar; embed edilir
+        self.moved = []  # başka parent'a taşınan child'lar ("db_id" ile); vektörleri yeniden eklenir
+        self.order_updates = []
+        self.stale_vectors = []
+
+    def empty(self):
+        return not (self.parents or self.children or self.moved or self.parent_updates or self.order_updates)
+
+def _file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1048576), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def _json_field(value):
+    # JSONB sütunları sürücüye göre str ya da dict gelebilir
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return {}
+    return value or {}
+
+def _write_chunk(out, hasher, chunk):
+    hasher.update(chunk)
+    out.write(chunk)
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
 
 def fill_parent_chunk_content(parent_chunks, child_chunks):
     """
     Her parent chunk'ın content alanını, o parent'a bağlı child chunk'ların content'lerinin birleştirilmiş haliyle doldurur.
     """
-    parent_map = {p["id"]: p for p in parent_chunks}
+    contents = {}
+    for c in child_chunks:
+        if c.get("content"):
+            contents.setdefault(c.get("parent_id"), []).append(c["content"])
     for p in parent_chunks:
-        p["content"] = "\n".join([c["content"] for c in child_chunks if c.get("parent_id") == p["id"] and c.get("content")])
+        p["content"] = "\n".join(contents.get(p["id"], []))
     return parent_chunks
 
+def safe_content_size(content):
+    """Chunk içeriğinin güvenli karakterlerle UTF-8 byte boyutu (files.chunked_total_size için)."""
+    try:
+        if isinstance(content, str):
+            return len(strip_unsafe(content).encode("utf-8", errors="ignore"))
+        return len(str(content).encode("utf-8", errors="ignore"))
+    except Exception:
+        return 100
+
 def safe_utf8(text):
     try:
         return text.encode("utf-8", errors="replace").decode("utf-8")
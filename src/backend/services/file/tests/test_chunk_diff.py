@@ -0,0 +1,17 @@
+from src.backend.services.file.chunk_diff import ChunkDiff
+
+def test_chunk_diff_reuses_moves_and_removes():
+    diff = ChunkDiff(
+        [(1, "Giriş", 0, "p1", {"page": 1}), (2, "Yöntem", 1, "p2", {"page": 2})],
+        [(10, 1, 0, 100, "a"), (11, 1, 1, 101, "b"), (12, 2, 0, 102, "c"), (13, 2, 1, 103, "a")],
+    )
+    # Başlığı aynı, içeriği değişmiş bölüm aynı parent'ı kullanır
+    parent = diff.match_parent("Giriş", "p1-yeni")
+    assert parent.id == 1
+    # Aynı içerikli iki child varsa aynı parent altındaki tercih edilir
+    assert diff.match_child("a", 1).id == 10
+    assert diff.match_child("c", 1).id == 12  # Yöntem'den taşındı
+    assert diff.match_child("yeni", 1) is None
+    assert diff.match_parent("Sonuç", "p3") is None
+    assert sorted(c.id for c in diff.removed_children()) == [11, 13]
+    assert diff.removed_parents() == [2]
@@ -0,0 +1,70 @@
+import fitz
+from src.backend.services.file import pdf_adapter
+from src.backend.services.file.page_visitor import PageVisitor, clean_page_text
+
+def _make_pdf(path, pages=12):
+    doc = fitz.open()
+    toc = []
+    for page_num in range(pages):
+        page = doc.new_page()
+        if page_num % 3 == 0:
+            toc.append([1, f"Bölüm {page_num // 3 + 1}", page_num + 1])
+        page.insert_text((72, 72), f"Sayfa {page_num + 1} içeriği. Hyperion test metni.", fontsize=10)
+    doc.set_toc(toc)
+    doc.save(path)
+    doc.close()
+
+def test_parallel_extraction_matches_serial(tmp_path, monkeypatch):
+    file_path = str(tmp_path / "doc.pdf")
+    _make_pdf(file_path)
+    monkeypatch.setattr(pdf_adapter, "PARALLEL_MIN_PAGES", 0)
+    serial = pdf_adapter.extract_pdf_document(file_path, workers=1)
+    try:
+        parallel = pdf_adapter.extract_pdf_document(file_path, workers=2)
+    finally:
+        if pdf_adapter._extract_pool is not None:
+            pdf_adapter._extract_pool.shutdown()
+            pdf_adapter._extract_pool = None
+    assert parallel == serial
+
+def test_page_owners_use_last_section_started():
+    tasks = [(0, "Bölüm 1", 1, 6), (1, "1.1", 1, 3), (2, "1.2", 3, 6)]
+    assert pdf_adapter.page_owners(tasks, 6) == [0, 1, 1, 2, 2, 2]
+
+def test_sections_stream_with_linear_order(tmp_path, monkeypatch):
+    file_path = str(tmp_path / "doc.pdf")
+    _make_pdf(file_path)
+    # Bölüm metnini tek chunk olarak döndür; tokenizer'a bağımlı olmasın
+    monkeypatch.setattr(pdf_adapter, "paragraph_chunking", lambda text, **kwargs: [{"content": text, "metadata": {}}])
+    seen = set()
+    for parent, children in pdf_adapter.iter_pdf_sections(file_path):
+        assert parent["id"] not in seen
+        seen.add(parent["id"])
+        assert all(child["parent_id"] == parent["id"] for child in children)
+        assert [child["order"] for child in children] == list(range(len(children)))
+        assert parent["content"] == "\n".join(child["content"] for child in children)
+    assert seen == {0, 1, 2, 3}
+
+def test_page_visitor_text_matches_get_text(tmp_path):
+    file_path = str(tmp_path / "doc.pdf")
+    _make_pdf(file_path, pages=3)
+    doc = fitz.open(file_path)
+    pages = PageVisitor(["text"]).run(doc)["text"]
+    assert pages == [(n, clean_page_text(doc[n].get_text("text"))) for n in range(3)]
+    doc.close()
+
+def test_ruled_table_precheck_flags_only_table_pages(tmp_path):
+    file_path = str(tmp_path / "table.pdf")
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Tablosuz sayfa", fontsize=10)
+    page = doc.new_page()
+    for i in range(3):
+        page.draw_line((72, 100 + i * 20), (272, 100 + i * 20))
+        page.draw_line((72 + i * 100, 100), (72 + i * 100, 140))
+    page.insert_text((76, 114), "a", fontsize=10)
+    doc.save(file_path)
+    doc.close()
+
+    doc = fitz.open(file_path)
+    assert PageVisitor(["table_pages"]).run(doc)["table_pages"] == [1]
+    doc.close()
@@ -0,0 +1,44 @@
+import asyncio
+import hashlib
+import io
+import os
+import pytest
+from datetime import datetime
+from starlette.datastructures import UploadFile
+from src.backend.services.file.config import FileConfig
+from src.backend.services.file.service import FileService, UploadTooLargeError
+
+def test_upload_streamed_with_hash(tmp_path):
+    payload = os.urandom(300_000)
+    service = FileService(FileConfig(upload_chunk_size=65536))
+    target = str(tmp_path / "upload")
+    size, sha256 = asyncio.run(service._stream_to_disk(UploadFile(io.BytesIO(payload), filename="a.pdf"), target))
+    assert size == len(payload)
+    assert sha256 == hashlib.sha256(payload).hexdigest()
+    with open(target, "rb") as f:
+        assert f.read() == payload
+
+def test_oversize_upload_rejected_and_removed(tmp_path):
+    service = FileService(FileConfig(max_file_size=100_000, upload_chunk_size=65536))
+    target = str(tmp_path / "upload")
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(service._stream_to_disk(UploadFile(io.BytesIO(b"x" * 200_000), filename="a.pdf"), target))
+    assert not os.path.exists(target)
+
+class _FilesDb:
+    def __init__(self, row):
+        self.row = row
+
+    async def fetch_one(self, query, values=None):
+        return self.row
+
+def test_revision_of_another_tenants_file_is_not_found(tmp_path):
+    service = FileService(FileConfig())
+    db = _FilesDb({"num_chunks": 3, "chunked_total_size": 10, "upload_time": datetime(2024, 1, 1), "user_id": "owner", "content_sha256": "x"})
+    upload = UploadFile(io.BytesIO(b"%PDF"), filename="a.pdf", headers={"content-type": "application/pdf"})
+    for caller in ("intruder", ""):
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(service.save_revision(upload, "f1", str(tmp_path), db, caller))
+    assert os.listdir(tmp_path) == []
+    result, revision_path = asyncio.run(service.save_revision(upload, "f1", str(tmp_path), db, "owner"))
+    assert result.user_id == "owner" and os.path.exists(revision_path)
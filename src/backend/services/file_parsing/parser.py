@@ -1,8 +1,7 @@
 from typing import List, Any
 import logging
 import os
-import re
-import unicodedata
+from backend.services.text import ascii_text, collapse_whitespace, normalize_unicode, strip_unprintable
 
 class FileParsingService:
     def __init__(self):
@@ -25,10 +24,9 @@ class FileParsingService:
     def clean_text(self, text):
         if not isinstance(text, str):
             text = str(text)
-        text = unicodedata.normalize('NFKC', text)
-        text = ''.join(c for c in text if c.isprintable())
-        text = re.sub(r'\s+', ' ', text)
-        return text
+        text = normalize_unicode(text, 'NFKC')
+        text = strip_unprintable(text)
+        return collapse_whitespace(text)
 
     def safe_utf8(self, text):
         if not isinstance(text, str):
@@ -84,7 +82,7 @@ class FileParsingService:
             try:
                 with open(file_path, 'rb') as f:
                     raw_bytes = f.read()
-                content = ''.join(chr(b) for b in raw_bytes if 32 <= b <= 126 or b in [9, 10, 13])
+                content = ascii_text(raw_bytes)
                 content = self.safe_utf8(self.clean_text(content))
                 if content.strip():
                     return [{'text': content, 'type': 'text'}]
@@ -1,8 +1,11 @@
+import asyncio
 import logging
 from typing import Dict
 from backend.models import HealthCheckResponse
 from .config import HealthConfig
 from backend.services.core.init_service import InitService
+from backend.services.vector_store import get_vector_store, get_vector_store_executor
+from backend.services.embedding.model_registry import get_model_registry
 
 class HealthService:
     def __init__(self, config: HealthConfig, init_service: InitService):
@@ -17,12 +20,55 @@ class HealthService:
             return HealthCheckResponse(
                 status="healthy",
                 database=health_status["database"],
-                redis=health_status["redis"]
+                redis=health_status["redis"],
+                vector_store="ready" if get_vector_store().health()["ready"] else "unavailable"
             )
         except Exception as e:
             self.logger.error(f"Health check failed: {str(e)}")
             return HealthCheckResponse(
                 status="unhealthy",
                 database="error",
-                redis="error"
-            )
\ No newline at end of file
+                redis="error",
+                vector_store="error"
+            )
+
+    async def readiness(self) -> Dict:
+        """Trafik alınabilir mi: veritabanı ve Redis bağlı, vektör deposu bağlı ve koleksiyonu yüklü."""
+        core = await self.init_service.health_check()
+        vector_store = get_vector_store().health()
+        return {
+            "ready": core["database"] == "connected" and core["redis"] == "connected" and vector_store["ready"],
+            "database": core["database"],
+            "redis": core["redis"],
+            "vector_store": vector_store,
+            "vector_store_executor": get_vector_store_executor().stats(),
+        }
+
+    async def monitor_vector_store(self) -> None:
+        """
+        Vektör deposunu check_interval saniyede bir yoklar: bağlantı koptuysa backoff ile yeniden bağlanır, koleksiyon
+        yeniden yüklenir. Böylece readiness ilk istek gelmeden güncellenir.
+        """
+        store = get_vector_store()
+        while True:
+            # Tek bir başarısız kontrol (ör. embedded depoda bozuk log satırı) döngüyü sonlandırmamalı
+            try:
+                status = await asyncio.to_thread(store.check)
+                if not status["ready"]:
+                    self.logger.warning(f"[HEALTH] Vector store not ready: {status}")
+            except Exception as e:
+                self.logger.error(f"[HEALTH] Vector store check failed: {e}")
+            await asyncio.sleep(self.config.check_interval)
+
+    async def evict_idle_models(self) -> None:
+        """
+        check_interval saniyede bir idle embedding modellerini boşaltır (bellek bütçesi aşılmışsa). Tek modelli
+        process'te yeni model yüklenmediği için boşaltma yalnızca buradan tetiklenir.
+        """
+        registry = get_model_registry()
+        while True:
+            await asyncio.sleep(self.config.check_interval)
+            try:
+                registry.evict_idle()
+            except Exception as e:
+                self.logger.error(f"[HEALTH] Idle model eviction failed: {e}")
@@ -0,0 +1,6 @@
+# Background ingestion job components
+from .config import IngestionConfig
+from .jobs import JobStore, JobProgress
+from .queue import IngestionQueue
+
+__all__ = ['IngestionConfig', 'JobStore', 'JobProgress', 'IngestionQueue']
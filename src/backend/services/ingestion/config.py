@@ -0,0 +1,12 @@
+from pydantic_settings import BaseSettings
+
+class IngestionConfig(BaseSettings):
+    workers: int = 2  # Modeli önceden yüklenmiş ingestion process sayısı
+    queue_key: str = "ingest:queue"
+    job_key_prefix: str = "ingest:job:"
+    job_ttl_seconds: int = 86400  # Tamamlanan job kayıtları 1 gün tutulur
+    poll_timeout_seconds: int = 1
+
+    class Config:
+        env_file = ".env"
+        env_prefix = "INGEST_"
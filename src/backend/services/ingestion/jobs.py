@@ -0,0 +1,97 @@
+import logging
+import time
+import uuid
+from typing import Dict, Optional
+from .config import IngestionConfig
+
+# Sayısal ilerleme alanları; Redis'ten okunurken int'e çevrilir
+PROGRESS_FIELDS = (
+    "pages_parsed", "pages_total", "chunks_total", "chunks_embedded", "vectors_indexed",
+    "embedding_cache_hits", "embedding_cache_misses", "embedding_cache_saved_ms",
+    "chunks_reused", "chunks_removed",
+)
+
+def job_key(config: IngestionConfig, job_id: str) -> str:
+    return f"{config.job_key_prefix}{job_id}"
+
+def _decode(raw: Dict) -> Dict:
+    job = {}
+    for key, value in raw.items():
+        key = key.decode() if isinstance(key, bytes) else key
+        value = value.decode() if isinstance(value, bytes) else value
+        if key in PROGRESS_FIELDS or key in ("created_at", "updated_at"):
+            try:
+                value = float(value) if key.endswith("_at") else int(value)
+            except (TypeError, ValueError):
+                pass
+        job[key] = value
+    return job
+
+class JobStore:
+    """API tarafı: job kayıtlarını redis.asyncio ile oluşturur ve okur."""
+
+    def __init__(self, redis, config: IngestionConfig):
+        self.redis = redis
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+
+    async def create(self, file_id: str, file_path: str, filename: str, user_id: Optional[str] = None, mode: str = "ingest") -> str:
+        """mode: "ingest" yeni dosya, "replace" file_path'teki revizyonu mevcut dokümana uygular."""
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        fields = {
+            "job_id": job_id,
+            "file_id": file_id,
+            "file_path": file_path,
+            "filename": filename,
+            "user_id": user_id or "",
+            "mode": mode,
+            "status": "queued",
+            "stage": "queued",
+            "error": "",
+            "created_at": now,
+            "updated_at": now,
+        }
+        fields.update({name: 0 for name in PROGRESS_FIELDS})
+        key = job_key(self.config, job_id)
+        await self.redis.hset(key, mapping=fields)
+        await self.redis.expire(key, self.config.job_ttl_seconds)
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        raw = await self.redis.hgetall(job_key(self.config, job_id))
+        if not raw:
+            return None
+        job = _decode(raw)
+        job.pop("file_path", None)
+        return job
+
+    async def mark_failed(self, job_id: str, error: str) -> None:
+        await self.redis.hset(job_key(self.config, job_id), mapping={
+            "status": "failed", "error": error, "updated_at": time.time()
+        })
+
+class JobProgress:
+    """Worker tarafı: ilerlemeyi senkron redis client ile job kaydına yazar."""
+
+    def __init__(self, redis_url: str, config: IngestionConfig, job_id: str):
+        import redis as redis_sync
+        self.client = redis_sync.from_url(redis_url)
+        self.key = job_key(config, job_id)
+
+    def load(self) -> Dict:
+        return _decode(self.client.hgetall(self.key))
+
+    def update(self, **fields) -> None:
+        if "stage" in fields and "status" not in fields:
+            stage = fields["stage"]
+            fields["status"] = stage if stage in ("completed", "failed") else "running"
+        fields["updated_at"] = time.time()
+        try:
+            self.client.hset(self.key, mapping=fields)
+        except Exception as e:
+            # İlerleme raporu ingestion'ı durdurmamalı
+            logging.getLogger(__name__).warning(f"Job progress update failed for {self.key}: {e}")
+
+    def close(self) -> None:
+        self.client.close()
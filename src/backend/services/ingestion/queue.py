@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from .config import IngestionConfig
+from .jobs import JobStore
+from .worker import init_worker, run_ingestion_job
+
+class IngestionQueue:
+    """
+    Redis list tabanlı ingestion kuyruğu.
+    Upload endpoint'i job'ı kuyruğa ekler ve hemen döner; dispatcher job'ları Redis'ten alıp
+    modeli önceden yüklenmiş, sınırlı sayıda worker process'e dağıtır.
+    Kuyruk Redis'te tutulduğu için birden fazla API worker aynı kuyruğu paylaşabilir.
+    """
+
+    def __init__(self, redis, config: IngestionConfig):
+        self.redis = redis
+        self.config = config
+        self.jobs = JobStore(redis, config)
+        self.logger = logging.getLogger(__name__)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._slots = asyncio.Semaphore(config.workers)
+        self._running = set()
+
+    async def submit(self, file_id: str, file_path: str, filename: str, user_id: Optional[str] = None, mode: str = "ingest") -> str:
+        job_id = await self.jobs.create(file_id, file_path, filename, user_id=user_id, mode=mode)
+        await self.redis.lpush(self.config.queue_key, job_id)
+        self.logger.info(f"Ingestion job queued: job_id={job_id}, file_id={file_id}, mode={mode}")
+        return job_id
+
+    async def start(self) -> None:
+        if self._dispatcher is not None:
+            return
+        # torch ve asyncio durumunu fork etmemek için spawn kullanılır
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.config.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker
+        )
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        self.logger.info(f"Ingestion queue started with {self.config.workers} workers")
+
+    async def stop(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Boş worker yoksa kuyruktan job alma; job'lar Redis'te bekler
+            await self._slots.acquire()
+            try:
+                item = await self.redis.brpop(self.config.queue_key, timeout=self.config.poll_timeout_seconds)
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            except Exception as e:
+                self._slots.release()
+                self.logger.error(f"Ingestion queue poll failed: {e}")
+                await asyncio.sleep(self.config.poll_timeout_seconds)
+                continue
+            if item is None:
+                self._slots.release()
+                continue
+            job_id = item[1].decode() if isinstance(item[1], bytes) else item[1]
+            task = asyncio.ensure_future(self._run_job(loop, job_id))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_job(self, loop, job_id: str) -> None:
+        try:
+            status = await loop.run_in_executor(self._pool, run_ingestion_job, job_id)
+            self.logger.info(f"Ingestion job {job_id} finished: {status}")
+        except Exception as e:
+            self.logger.error(f"Ingestion job {job_id} crashed: {e}")
+            await self.jobs.mark_failed(job_id, str(e))
+        finally:
+            self._slots.release()
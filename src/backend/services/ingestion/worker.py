@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from databases import Database
+from backend.services.core.config import CoreConfig
+from backend.services.embedding.model_registry import get_model_registry
+from backend.services.file.config import FileConfig
+from backend.services.file.service import FileService
+from backend.services.vector_store import get_vector_store
+from .config import IngestionConfig
+from .jobs import JobProgress
+
+def init_worker() -> None:
+    """Process pool initializer: embedding modelini ve vektör deposu bağlantısını job gelmeden önce hazırlar."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    get_model_registry().warm_up()
+    try:
+        # Process'in tüm job'ları aynı bağlantıyı ve yüklenmiş koleksiyonu kullanır
+        get_vector_store().open()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Vector store not ready in worker: {e}")
+
+def run_ingestion_job(job_id: str) -> str:
+    """Worker process'te bir ingestion job'ını çalıştırır ve son durumu döner."""
+    return asyncio.run(_run(job_id))
+
+async def _run(job_id: str) -> str:
+    logger = logging.getLogger(__name__)
+    core_config = CoreConfig()
+    progress = JobProgress(core_config.redis_url, IngestionConfig(), job_id)
+    db = Database(core_config.database_url)
+    try:
+        job = progress.load()
+        await db.connect()
+        file_service = FileService(FileConfig())
+        # Revizyon job'ları mevcut chunk'larla karşılaştırılarak uygulanır
+        run = file_service.reingest_file if job.get("mode") == "replace" else file_service.ingest_file
+        await run(
+            db,
+            job["file_id"],
+            job["file_path"],
+            job["filename"],
+            progress=progress.update
+        )
+        return "completed"
+    except Exception as e:
+        logger.error(f"Ingestion job {job_id} failed: {e}", exc_info=True)
+        progress.update(stage="failed", error=str(e))
+        return "failed"
+    finally:
+        if db.is_connected:
+            await db.disconnect()
+        progress.close()
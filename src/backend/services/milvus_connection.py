@@ -0,0 +1,147 @@
+from typing import Callable, Dict, Optional
+import os
+import threading
+import time
+import logging
+import grpc
+from pymilvus import Collection, connections, utility
+from pymilvus.exceptions import ConnectionNotExistException, MilvusUnavailableException
+
+# Bağlantının koptuğunu gösteren hatalar; diğer hatalar (ör. geçersiz ifade) bağlantı durumunu etkilemez
+CONNECTION_ERRORS = (MilvusUnavailableException, ConnectionNotExistException, ConnectionError, grpc.RpcError)
+
+class MilvusUnavailableError(ConnectionError):
+    """Milvus'a bağlanılamıyor; yeniden deneme backoff süresi dolana kadar çağrılar beklemeden bu hatayı alır."""
+
+class MilvusConnectionManager:
+    """
+    Process genelinde tek Milvus bağlantısı (alias) ve yüklenmiş (pinned) koleksiyonlar.
+    - Koleksiyonlar bir kez açılır/oluşturulur ve load edilir; yeniden bağlanınca tekrar load edilir.
+    - Bağlantı hatasında bağlantı düşürülür ve üstel backoff ile yeniden denenir; backoff süresince çağrılar
+      Milvus'u beklemeden MilvusUnavailableError alır.
+    - status() hazır olma (readiness) bilgisini, ping() aktif sağlık kontrolünü verir.
+    """
+
+    def __init__(self, host: str = None, port: str = None, alias: str = None):
+        self.host = host or os.getenv('MILVUS_HOST', 'milvus')
+        self.port = port or os.getenv('MILVUS_PORT', '19530')
+        self.alias = alias or os.getenv('MILVUS_ALIAS', 'default')
+        self.timeout = float(os.getenv('MILVUS_TIMEOUT', '10'))
+        self.backoff_initial = float(os.getenv('MILVUS_RECONNECT_BACKOFF_MS', '500')) / 1000
+        self.backoff_max = float(os.getenv('MILVUS_RECONNECT_BACKOFF_MAX_MS', '30000')) / 1000
+        self._lock = threading.RLock()
+        self._connected = False
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_error: Optional[str] = None
+        self._collections: Dict[str, Collection] = {}
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def ensure_connected(self) -> None:
+        """Bağlı değilse bağlanır (backoff süresi dolduysa); bağlanamazsa MilvusUnavailableError."""
+        if self._connected:
+            return
+        with self._lock:
+            if self._connected:
+                return
+            wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                raise MilvusUnavailableError(f"Milvus {self.address} unavailable (retry in {wait:.1f}s): {self._last_error}")
+            try:
+                connections.connect(alias=self.alias, host=self.host, port=self.port, timeout=self.timeout)
+                # Yeniden bağlanmada (ör. Milvus yeniden başladı) pinned koleksiyonlar tekrar belleğe alınır
+                for collection in self._collections.values():
+                    collection.load(timeout=self.timeout)
+            except Exception as e:
+                self._mark_failed(e)
+                raise MilvusUnavailableError(f"Milvus {self.address} unavailable: {e}") from e
+            self._connected = True
+            self._failures = 0
+            self._last_error = None
+            self.logger.info(f"[MILVUS] Connected to {self.address} (alias={self.alias}, {len(self._collections)} collections loaded)")
+
+    def _mark_failed(self, error: Exception) -> None:
+        with self._lock:
+            self._connected = False
+            self._failures += 1
+            delay = min(self.backoff_max, self.backoff_initial * 2 ** (self._failures - 1))
+            self._retry_at = time.monotonic() + delay
+            self._last_error = str(error)
+            try:
+                connections.disconnect(self.alias)
+            except Exception:
+                pass
+            self.logger.warning(f"[MILVUS] Connection to {self.address} failed ({self._failures}x), retrying in {delay:.1f}s: {error}")
+
+    def collection(self, name: str, factory: Optional[Callable[[str], Collection]] = None) -> Collection:
+        """
+        Koleksiyonu ilk kullanımda açar (factory ile oluşturup indeksleyebilir) ve load eder; sonraki çağrılar
+        aynı nesneyi döner.
+        """
+        self.ensure_connected()
+        collection = self._collections.get(name)
+        if collection is not None:
+            return collection
+        with self._lock:
+            if name not in self._collections:
+                collection = self.call(factory or (lambda n: Collection(n, using=self.alias)), name)
+                self.call(collection.load, timeout=self.timeout)
+                self._collections[name] = collection
+                self.logger.info(f"[MILVUS] Loaded collection {name}")
+            return self._collections[name]
+
+    def release(self, name: str) -> None:
+        """Koleksiyonu pinned kümesinden çıkarır (ör. drop sonrası)."""
+        with self._lock:
+            self._collections.pop(name, None)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Bir Milvus çağrısını bağlantı üzerinden yapar; bağlantı hatasında bağlantı düşürülür ve hata yükseltilir."""
+        self.ensure_connected()
+        try:
+            return fn(*args, **kwargs)
+        except CONNECTION_ERRORS as e:
+            self._mark_failed(e)
+            raise
+
+    def ping(self) -> bool:
+        """Aktif sağlık kontrolü: sunucu sürümünü sorar; başarısızsa backoff ile yeniden bağlanma başlar."""
+        try:
+            self.call(utility.get_server_version, using=self.alias, timeout=self.timeout)
+            return True
+        except Exception:
+            return False
+
+    def status(self) -> Dict:
+        """Hazır olma bilgisi: ready yalnızca bağlıyken ve en az bir koleksiyon yüklüyken True'dur."""
+        with self._lock:
+            return {
+                "ready": self._connected and bool(self._collections),
+                "connected": self._connected,
+                "address": self.address,
+                "alias": self.alias,
+                "collections": sorted(self._collections),
+                "failures": self._failures,
+                "last_error": self._last_error,
+                "retry_in_s": round(max(0.0, self._retry_at - time.monotonic()), 1) if not self._connected else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connected:
+                connections.disconnect(self.alias)
+            self._connected = False
+            self._collections.clear()
+
+# Singleton: MILVUS_HOST/MILVUS_PORT adresine process genelinde tek bağlantı
+_milvus_connection = None
+
+def get_milvus_connection() -> MilvusConnectionManager:
+    global _milvus_connection
+    if _milvus_connection is None:
+        _milvus_connection = MilvusConnectionManager()
+    return _milvus_connection
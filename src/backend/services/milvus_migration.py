@@ -0,0 +1,142 @@
+"""
+Eski bir Milvus koleksiyonunu güncel tipli şemaya (bkz. milvus_service.SCHEMA_VERSION) taşır.
+
+v1 koleksiyonunda (embeddings) yalnızca vektör ve 512 karakterlik JSON metadata vardır; file_id ve chunk_id yoktur.
+v2 koleksiyonunda (chunks_v2) tenant partition key'i yoktur. Taşıma Postgres'teki child_chunks.vector_id eşlemesini
+kullanır: her chunk'ın vektörü eski koleksiyondan primary key ile okunur, tenant_id/file_id/parent_id/chunk_id
+alanlarıyla yeni koleksiyona yazılır ve child_chunks.vector_id yeni primary key ile güncellenir.
+Yeniden embedding gerekmez; Postgres'te karşılığı olmayan (yetim) vektörler taşınmaz.
+Yarıda kalan taşıma tekrar çalıştırılabilir: vector_id'si zaten yeni koleksiyonu gösteren chunk'lar atlanır.
+Taşıma sırasında ingestion worker'larının durdurulması önerilir.
+
+Kullanım:
+    python -m backend.services.milvus_migration --source chunks_v2 --batch-size 1000 [--drop-source]
+"""
+import argparse
+import asyncio
+import json
+import logging
+from typing import Dict, Optional
+from databases import Database
+from pymilvus import utility
+from backend.services.auth.scope import tenant_key
+from backend.services.core.init_service import get_db
+from backend.services.milvus_service import LEGACY_COLLECTION, MilvusService
+
+logger = logging.getLogger(__name__)
+
+CHUNKS_QUERY = """
+SELECT c.id, c.parent_id, c.vector_id, c.type, c."order", c.metadata, p.document_id, f.user_id
+FROM child_chunks c JOIN parent_chunks p ON c.parent_id = p.id
+LEFT JOIN files f ON f.file_id = p.document_id
+WHERE c.vector_id IS NOT NULL AND c.id > :last_id
+ORDER BY c.id
+LIMIT :limit
+"""
+
+def _json_field(value) -> Dict:
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return {}
+    return value or {}
+
+async def migrate_collection(
+    db: Database,
+    source: str = LEGACY_COLLECTION,
+    target: Optional[str] = None,
+    batch_size: int = 1000,
+    drop_source: bool = False
+) -> Dict[str, int]:
+    """
+    source koleksiyonundaki vektörleri target (varsayılan: güncel şema koleksiyonu) koleksiyonuna taşır.
+    drop_source: tüm chunk'lar taşındıysa (eksik yoksa) eski koleksiyonu siler.
+    Dönüş: {"migrated", "skipped", "missing"}; skipped daha önce taşınmış, missing vector_id'si iki koleksiyonda da
+    bulunamayan (yeniden ingest edilmesi gereken) chunk sayısıdır.
+    """
+    target_service = MilvusService(collection_name=target)
+    if target_service.collection_name == source:
+        raise ValueError(f"Source and target collection are the same: {source}")
+    connection = target_service.connection
+    await asyncio.to_thread(target_service._connect_and_init)
+    if not await asyncio.to_thread(connection.call, utility.has_collection, source, using=connection.alias):
+        raise ValueError(f"Milvus collection not found: {source}")
+    source_collection = await asyncio.to_thread(connection.collection, source)
+
+    stats = {"migrated": 0, "skipped": 0, "missing": 0}
+    last_id = 0
+    while True:
+        rows = await db.fetch_all(CHUNKS_QUERY, {"last_id": last_id, "limit": batch_size})
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        hits = await asyncio.to_thread(
+            connection.call,
+            source_collection.query,
+            expr=f"id in [{','.join(str(int(r['vector_id'])) for r in rows)}]",
+            output_fields=["id", "embedding"]
+        )
+        vectors = {hit["id"]: hit["embedding"] for hit in hits}
+        found = [r for r in rows if r["vector_id"] in vectors]
+        absent = [int(r["vector_id"]) for r in rows if r["vector_id"] not in vectors]
+        if absent:
+            # Önceki bir çalıştırmada taşınmış chunk'lar hedef koleksiyondadır
+            present = await asyncio.to_thread(
+                connection.call, target_service._collection.query, expr=f"id in [{','.join(map(str, absent))}]", output_fields=["id"]
+            )
+            stats["skipped"] += len(present)
+            stats["missing"] += len(absent) - len(present)
+        if found:
+            records = [
+                {
+                    "tenant_id": tenant_key(r["user_id"]),
+                    "file_id": str(r["document_id"]),
+                    "parent_id": r["parent_id"],
+                    "chunk_id": r["id"],
+                    "type": r["type"],
+                    "order": r["order"],
+                    "metadata": _json_field(r["metadata"]),
+                }
+                for r in found
+            ]
+            new_ids = await asyncio.to_thread(
+                target_service.insert_embeddings, [vectors[r["vector_id"]] for r in found], records
+            )
+            await db.execute_many(
+                "UPDATE child_chunks SET vector_id = :vector_id WHERE id = :id",
+                [{"vector_id": vector_id, "id": r["id"]} for r, vector_id in zip(found, new_ids)]
+            )
+            stats["migrated"] += len(found)
+        logger.info(f"[MILVUS_MIGRATION] {source} -> {target_service.collection_name}: {stats} (last chunk id {last_id})")
+
+    await asyncio.to_thread(target_service.flush)
+    if drop_source:
+        if stats["missing"]:
+            logger.warning(f"[MILVUS_MIGRATION] {stats['missing']} chunks were not found in {source}; keeping it")
+        else:
+            await asyncio.to_thread(connection.call, utility.drop_collection, source, using=connection.alias)
+            connection.release(source)
+            logger.info(f"[MILVUS_MIGRATION] Dropped {source}")
+    return stats
+
+async def _run(args) -> Dict[str, int]:
+    db = get_db()
+    await db.connect()
+    try:
+        return await migrate_collection(db, args.source, args.target, args.batch_size, args.drop_source)
+    finally:
+        await db.disconnect()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=LEGACY_COLLECTION)
+    parser.add_argument("--target", default=None, help="Varsayılan: MILVUS_COLLECTION veya güncel şema koleksiyonu")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--drop-source", action="store_true", help="Eksiksiz taşındıysa eski koleksiyonu sil")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(_run(args)))
+
+if __name__ == "__main__":
+    main()
@@ -1,97 +1,355 @@
-from pymilvus import Collection, CollectionSchema, FieldSchema, DataType, connections, utility
-from typing import List, Optional
+from pymilvus import Collection, CollectionSchema, FieldSchema, DataType, utility
+from typing import Dict, List, Optional, Sequence, Union
 import numpy as np
 import os
 import json
 import logging
+from backend.services.milvus_connection import MilvusConnectionManager, get_milvus_connection
+from backend.services.vector_store import VectorStore
 
-class MilvusService:
-    def __init__(self, host: str = None, port: str = None, collection_name: str = 'embeddings'):
-        self.host = host or os.getenv('MILVUS_HOST', 'milvus')
-        self.port = port or os.getenv('MILVUS_PORT', '19530')
-        self.collection_name = collection_name
-        self._connected = False
+# Koleksiyon şeması sürümlüdür; şema değiştiğinde yeni sürüm yeni bir koleksiyona yazılır ve
+# eski koleksiyon backend.services.milvus_migration ile taşınır.
+SCHEMA_VERSION = 3
+DEFAULT_COLLECTION = f"chunks_v{SCHEMA_VERSION}"
+LEGACY_COLLECTION = "embeddings"
+LEGACY_COLLECTIONS = [LEGACY_COLLECTION] + [f"chunks_v{version}" for version in range(2, SCHEMA_VERSION)]
+EMBEDDING_DIM = 384  # MiniLM-L6-v2 / paraphrase-multilingual-MiniLM-L12-v2 için 384
+FILE_ID_MAX_LENGTH = 64
+TENANT_ID_MAX_LENGTH = 64
+CHUNK_TYPE_MAX_LENGTH = 32
+
+# Filtre ve silme ifadelerinde kullanılan skaler alanlar ve indeks tipleri
+SCALAR_INDEXES = {"file_id": "Trie", "parent_id": "STL_SORT", "chunk_id": "STL_SORT"}
+# Insert kolonları şema sırasıyla (auto_id primary key ve vektör hariç)
+RECORD_FIELDS = ["tenant_id", "file_id", "parent_id", "chunk_id", "chunk_type", "chunk_order", "metadata"]
+OUTPUT_FIELDS = RECORD_FIELDS
+
+def build_schema(dim: int = EMBEDDING_DIM) -> CollectionSchema:
+    """
+    Child chunk vektörleri için tipli şema; chunk'a ait serbest alanlar JSON metadata'da tutulur.
+    tenant_id partition key'dir: Milvus vektörleri tenant hash'ine göre partition'lara dağıtır ve
+    tenant_id filtreli aramalar yalnızca o tenant'ın partition'ını tarar.
+    """
+    fields = [
+        FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dim),
+        FieldSchema(name="tenant_id", dtype=DataType.VARCHAR, max_length=TENANT_ID_MAX_LENGTH, is_partition_key=True),
+        FieldSchema(name="file_id", dtype=DataType.VARCHAR, max_length=FILE_ID_MAX_LENGTH),
+        FieldSchema(name="parent_id", dtype=DataType.INT64),
+        FieldSchema(name="chunk_id", dtype=DataType.INT64),
+        FieldSchema(name="chunk_type", dtype=DataType.VARCHAR, max_length=CHUNK_TYPE_MAX_LENGTH),
+        FieldSchema(name="chunk_order", dtype=DataType.INT64),
+        FieldSchema(name="metadata", dtype=DataType.JSON),
+    ]
+    return CollectionSchema(fields, description=f"Child chunk embeddings (schema v{SCHEMA_VERSION})")
+
+def _as_int(value, default: int = -1) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def to_record(metadata: Union[Dict, str, None]) -> Dict:
+    """
+    Insert girdisini şema alanlarına ayırır. dict veya JSON string kabul edilir; JSON olmayan string
+    {"text": ...} metadata'sı olarak saklanır. Bilinmeyen id'ler -1 olur.
+    """
+    if isinstance(metadata, str):
+        try:
+            parsed = json.loads(metadata)
+        except ValueError:
+            parsed = None
+        metadata = parsed if isinstance(parsed, dict) else {"text": metadata}
+    metadata = dict(metadata or {})
+    extra = metadata.pop("metadata", None)
+    record = {
+        "tenant_id": str(metadata.pop("tenant_id", None) or "")[:TENANT_ID_MAX_LENGTH],
+        "file_id": str(metadata.pop("file_id", None) or "")[:FILE_ID_MAX_LENGTH],
+        "parent_id": _as_int(metadata.pop("parent_id", None)),
+        "chunk_id": _as_int(metadata.pop("chunk_id", None)),
+        "chunk_type": str(metadata.pop("type", None) or metadata.pop("chunk_type", None) or "")[:CHUNK_TYPE_MAX_LENGTH],
+        "chunk_order": _as_int(metadata.pop("order", None), 0),
+    }
+    if isinstance(extra, dict):
+        metadata.update(extra)
+    elif extra is not None:
+        metadata["metadata"] = extra
+    try:
+        json.dumps(metadata)
+    except (TypeError, ValueError):
+        # JSON'a çevrilemeyen değerler (ör. bytes, datetime) string olarak saklanır
+        metadata = json.loads(json.dumps(metadata, default=str))
+    record["metadata"] = metadata
+    return record
+
+def quote(value: str) -> str:
+    """Milvus ifadeleri için string literal (tırnak ve ters bölü kaçışlı)."""
+    return json.dumps(str(value), ensure_ascii=False)
+
+def tenant_filter(tenant_id: Optional[str], filter_expr: Optional[str] = None) -> Optional[str]:
+    """Arama ifadesini tenant kapsamıyla birleştirir; tenant_id None ise kapsam uygulanmaz."""
+    if tenant_id is None:
+        return filter_expr
+    scope = f"tenant_id == {quote(tenant_id)}"
+    return f"{scope} and ({filter_expr})" if filter_expr else scope
+
+# ANN indeks tipleri: (varsayılan build parametreleri, varsayılan arama parametreleri).
+# IVF_PQ'da m vektör boyutunu bölmelidir (384 / 48 = 8 boyutlu alt vektörler).
+INDEX_DEFAULTS = {
+    "FLAT": ({}, {}),
+    "IVF_FLAT": ({"nlist": 1024}, {"nprobe": 16}),
+    "IVF_SQ8": ({"nlist": 1024}, {"nprobe": 16}),
+    "IVF_PQ": ({"nlist": 1024, "m": 48, "nbits": 8}, {"nprobe": 16}),
+    "HNSW": ({"M": 16, "efConstruction": 200}, {"ef": 64}),
+}
+METRICS = ("L2", "IP", "COSINE")
+VECTOR_INDEX_NAME = "embedding_idx"
+
+def _json_env(name: str) -> Dict:
+    value = os.getenv(name)
+    return json.loads(value) if value else {}
+
+def build_index_params(index_type: str, metric: str, params: Optional[Dict] = None) -> Dict:
+    """create_index için parametreler; params indeks tipinin varsayılanlarını ezer."""
+    index_type, metric = index_type.upper(), metric.upper()
+    if index_type not in INDEX_DEFAULTS:
+        raise ValueError(f"Unsupported index type {index_type}; expected one of {sorted(INDEX_DEFAULTS)}")
+    if metric not in METRICS:
+        raise ValueError(f"Unsupported metric {metric}; expected one of {list(METRICS)}")
+    return {"index_type": index_type, "metric_type": metric, "params": {**INDEX_DEFAULTS[index_type][0], **(params or {})}}
+
+def build_search_params(index_type: str, metric: str, params: Optional[Dict] = None, top_k: Optional[int] = None) -> Dict:
+    """search için parametreler; HNSW'de ef en az top_k olmalıdır."""
+    merged = {**INDEX_DEFAULTS.get(index_type.upper(), ({}, {}))[1], **(params or {})}
+    if "ef" in merged and top_k:
+        merged["ef"] = max(int(merged["ef"]), top_k)
+    return {"metric_type": metric.upper(), "params": merged}
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Vektörleri birim uzunluğa getirir; IP metriğinde iç çarpım böylece kosinüs benzerliği olur."""
+    return vectors / np.clip(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12, None)
+
+def to_similarity(distance: Optional[float], metric: str) -> float:
+    """
+    Milvus skorunu "büyük = daha benzer" benzerliğe çevirir. COSINE ve (normalize vektörlerde) IP skoru
+    doğrudan kosinüs benzerliğidir; L2 koleksiyonlarında eski 1 / (1 + mesafe) dönüşümü korunur.
+    """
+    if distance is None:
+        return 0.0
+    if metric == "L2":
+        return 1 / (1 + distance)
+    return float(distance)
+
+class MilvusService(VectorStore):
+    def __init__(self, host: str = None, port: str = None, collection_name: str = None, insert_batch_size: int = None, connection: Optional[MilvusConnectionManager] = None):
+        # Tüm Milvus çağrıları paylaşılan bağlantı yöneticisinden geçer; farklı bir adres verilirse kendi bağlantısı açılır
+        if connection is None and (host or port):
+            connection = MilvusConnectionManager(host, port, alias=f"{host}:{port}")
+        self.connection = connection or get_milvus_connection()
+        self.insert_batch_size = insert_batch_size or int(os.getenv('MILVUS_INSERT_BATCH_SIZE', '1000'))
+        self.collection_name = collection_name or os.getenv('MILVUS_COLLECTION', DEFAULT_COLLECTION)
+        self.num_partitions = int(os.getenv('MILVUS_NUM_PARTITIONS', '64'))
+        # Vektör indeksi yalnızca yeni koleksiyonlarda bu ayarlarla kurulur; mevcut koleksiyonun indeks tipi ve metriği
+        # bağlantıda koleksiyondan okunur (bkz. _adopt_vector_index)
+        self.index_type = os.getenv('MILVUS_INDEX_TYPE', 'HNSW').upper()
+        self.metric = os.getenv('MILVUS_METRIC', 'COSINE').upper()
+        self.index_params = build_index_params(self.index_type, self.metric, _json_env('MILVUS_INDEX_PARAMS'))
+        self.search_params = _json_env('MILVUS_SEARCH_PARAMS')
         self._collection = None
         self.logger = logging.getLogger(__name__)
 
-    def _connect_and_init(self):
-        if not self._connected:
-            connections.connect(host=self.host, port=self.port)
-            self._connected = True
+    def _connect_and_init(self) -> Collection:
+        """Bağlantıyı (gerekirse backoff ile yeniden) kurar; koleksiyon bağlantı yöneticisinde bir kez açılıp load edilir."""
+        self.connection.ensure_connected()
         if self._collection is None:
-            self._collection = self._get_or_create_collection(self.collection_name)
+            self._collection = self.connection.collection(self.collection_name, self._get_or_create_collection)
+        return self._collection
+
+    def open(self) -> None:
+        self._connect_and_init()
+
+    def health(self) -> Dict:
+        return {**self.connection.status(), "backend": "milvus", "collection": self.collection_name}
+
+    def check(self) -> Dict:
+        try:
+            self._connect_and_init()
+            self.connection.ping()
+        except Exception as e:
+            self.logger.warning(f"[MILVUS] Health check failed: {e}")
+        return self.health()
 
     def _get_or_create_collection(self, name: str) -> Collection:
-        if utility.has_collection(name):
-            return Collection(name)
-        # Varsayılan şema: id (int64), embedding (float_vector), metadata (string)
-        fields = [
-            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=384),  # MiniLM-L6-v2 için 384
-            FieldSchema(name="metadata", dtype=DataType.VARCHAR, max_length=512)
-        ]
-        schema = CollectionSchema(fields, description="Embeddings collection")
-        collection = Collection(name, schema)
-        # Index oluştur
-        index_params = {"index_type": "IVF_FLAT", "metric_type": "L2", "params": {"nlist": 128}}
-        collection.create_index(field_name="embedding", index_params=index_params)
-        collection.load()
+        using = self.connection.alias
+        if utility.has_collection(name, using=using):
+            collection = Collection(name, using=using)
+            missing = {field.name for field in build_schema().fields} - {field.name for field in collection.schema.fields}
+            if missing:
+                raise RuntimeError(
+                    f"Milvus collection '{name}' uses an older schema (missing {sorted(missing)}); "
+                    f"run 'python -m backend.services.milvus_migration --source {name}'"
+                )
+            self._adopt_vector_index(collection)
+            return collection
+        collection = Collection(name, build_schema(), using=using, num_partitions=self.num_partitions)
+        # Vektör indeksi (MILVUS_INDEX_TYPE / MILVUS_METRIC / MILVUS_INDEX_PARAMS)
+        collection.create_index(field_name="embedding", index_params=self.index_params, index_name=VECTOR_INDEX_NAME)
+        # Skaler indeksler: file_id/parent_id/chunk_id filtreleri ve silmeleri koleksiyon boyutundan bağımsız kalır
+        for field, index_type in SCALAR_INDEXES.items():
+            collection.create_index(field_name=field, index_params={"index_type": index_type}, index_name=f"{field}_idx")
+        for legacy in LEGACY_COLLECTIONS:
+            if legacy != name and utility.has_collection(legacy, using=using):
+                self.logger.warning(
+                    f"[MILVUS] Created {name} (schema v{SCHEMA_VERSION}) while older collection '{legacy}' exists; "
+                    f"run 'python -m backend.services.milvus_migration --source {legacy}' to move its vectors"
+                )
         return collection
 
-    def insert_embedding(self, embedding: List[float], metadata: str):
+    def _adopt_vector_index(self, collection: Collection) -> None:
+        """Mevcut koleksiyonun vektör indeksinin tipini ve metriğini kullanır; arama metriği indeksle aynı olmalıdır."""
+        for index in collection.indexes:
+            if index.field_name != "embedding":
+                continue
+            index_type = str(index.params.get("index_type", self.index_type)).upper()
+            metric = str(index.params.get("metric_type", self.metric)).upper()
+            if (index_type, metric) != (self.index_type, self.metric):
+                self.logger.warning(
+                    f"[MILVUS] {collection.name} is indexed with {index_type}/{metric}; configured "
+                    f"{self.index_type}/{self.metric} only applies to new collections"
+                )
+            self.index_type, self.metric = index_type, metric
+            return
+
+    def insert_embeddings(
+        self,
+        embeddings,
+        metadata: List,
+        batch_size: Optional[int] = None,
+        async_insert: bool = False,
+        flush: bool = False
+    ) -> List[int]:
+        """
+        Çok sayıda vektörü kolon bazlı (columnar) batch'ler halinde Milvus'a ekler.
+        embeddings: (N, dim) float32 array (veya ona dönüştürülebilir bir dizi)
+        metadata: N elemanlı dict/JSON string listesi; tenant_id, file_id, parent_id, chunk_id, type ve order anahtarları
+            tipli alanlara, kalanlar JSON metadata alanına yazılır (bkz. to_record)
+        async_insert: batch'ler beklemeden gönderilir, sonuçlar sonda toplanır
+        flush: insert sonrası segmentleri kalıcı hale getirir
+        Dönüş: eklenen satırların primary key'leri (giriş sırasıyla)
+        """
         self._connect_and_init()
-        # Milvus float_vector field requires numpy array
-        import numpy as np
-        
-        # Convert to numpy array regardless of input type
-        if hasattr(embedding, 'tolist'):
-            # If it's a tensor, convert to list first, then numpy
-            embedding_list = embedding.tolist()
-        else:
-            embedding_list = list(embedding)
-            
-        # Create numpy array with explicit float32 dtype
-        embedding_array = np.array(embedding_list, dtype=np.float32)
-        
-        # Metadata dict ise JSON'a çevir
-        if isinstance(metadata, dict):
-            metadata = json.dumps(metadata, ensure_ascii=False)
-        
-        # Milvus insert format: [values] not {"field": [values]}
-        data = [
-            [embedding_array],  # embedding field
-            [metadata]          # metadata field
-        ]
-        self._collection.insert(data)
-
-    def search(self, query_embedding: List[float], top_k: int = 5, filter_expr: Optional[str] = None, similarity_threshold: float = 0.5):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError(f"embeddings must be a 2-D array, got shape {vectors.shape}")
+        if self.metric != "L2":
+            vectors = normalize_rows(vectors)
+        if len(metadata) != len(vectors):
+            raise ValueError(f"metadata length {len(metadata)} does not match {len(vectors)} embeddings")
+        batch_size = batch_size or self.insert_batch_size
+
+        records = [to_record(m) for m in metadata]
+        columns = [vectors] + [[r[field] for r in records] for field in RECORD_FIELDS]
+
+        primary_keys: List[int] = []
+        pending = []
+        starts = range(0, len(vectors), batch_size)
+        for start in starts:
+            end = start + batch_size
+            # Milvus insert format: şema sırasıyla kolon listeleri (auto_id primary key hariç)
+            data = [column[start:end] for column in columns]
+            if async_insert:
+                pending.append(self.connection.call(self._collection.insert, data, _async=True))
+            else:
+                primary_keys.extend(self.connection.call(self._collection.insert, data).primary_keys)
+        for future in pending:
+            primary_keys.extend(self.connection.call(future.result).primary_keys)
+        if flush:
+            self.connection.call(self._collection.flush)
+        self.logger.info(f"Inserted {len(primary_keys)} embeddings into {self.collection_name} in {len(starts)} batches")
+        return primary_keys
+
+    def delete_embeddings(self, ids: List[int], batch_size: Optional[int] = None) -> int:
+        """Verilen primary key'lere sahip vektörleri batch'ler halinde siler; silinen id sayısını döner."""
+        if not ids:
+            return 0
         self._connect_and_init()
+        batch_size = batch_size or self.insert_batch_size
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            self.connection.call(self._collection.delete, f"id in [{','.join(str(int(i)) for i in batch)}]")
+        self.logger.info(f"Deleted {len(ids)} embeddings from {self.collection_name}")
+        return len(ids)
+
+    def delete_by_chunks(self, chunk_ids: Sequence[int], batch_size: Optional[int] = None) -> int:
+        """chunk_id alanı üzerinden batch'ler halinde siler; silinen sayıyı döner."""
+        chunk_ids = list(chunk_ids)
+        if not chunk_ids:
+            return 0
+        self._connect_and_init()
+        batch_size = batch_size or self.insert_batch_size
+        deleted = 0
+        for start in range(0, len(chunk_ids), batch_size):
+            batch = chunk_ids[start:start + batch_size]
+            result = self.connection.call(self._collection.delete, f"chunk_id in [{','.join(str(int(i)) for i in batch)}]")
+            deleted += getattr(result, 'delete_count', 0)
+        self.logger.info(f"Deleted {deleted} embeddings of {len(chunk_ids)} chunks from {self.collection_name}")
+        return deleted
+
+    def delete_by_file(self, file_ids: Union[str, Sequence[str]]) -> int:
+        """file_id skaler indeksi üzerinden bir veya birden çok dosyanın tüm vektörlerini siler; silinen sayıyı döner."""
+        file_ids = [file_ids] if isinstance(file_ids, str) else list(file_ids)
+        if not file_ids:
+            return 0
+        self._connect_and_init()
+        result = self.connection.call(self._collection.delete, f"file_id in [{','.join(quote(f) for f in file_ids)}]")
+        deleted = getattr(result, 'delete_count', 0)
+        self.logger.info(f"Deleted {deleted} embeddings of {len(file_ids)} files from {self.collection_name}")
+        return deleted
+
+    def flush(self) -> None:
+        self._connect_and_init()
+        self.connection.call(self._collection.flush)
+
+    def drop(self) -> None:
+        self._connect_and_init()
+        self.connection.call(utility.drop_collection, self.collection_name, using=self.connection.alias)
+        self.connection.release(self.collection_name)
+        self._collection = None
+
+    def search(self, query_embedding: List[float], top_k: int = 5, filter_expr: Optional[str] = None, similarity_threshold: float = 0.5, tenant_id: Optional[str] = None):
+        """
+        tenant_id verilirse arama o tenant'ın partition'ıyla sınırlanır (partition key filtresi);
+        None ise tüm koleksiyon aranır. Her hit'e metriğe göre hesaplanan similarity eklenir (bkz. to_similarity).
+        """
+        return self.search_many([query_embedding], top_k=top_k, filter_expr=filter_expr, tenant_id=tenant_id)
+
+    def search_many(self, query_embeddings, top_k: int = 5, filter_expr: Optional[str] = None, tenant_id: Optional[str] = None) -> List[List]:
+        """Tüm sorgular tek bir Milvus search isteğiyle (nq = sorgu sayısı) aranır; sorgu başına hit listesi döner."""
+        self._connect_and_init()
+        if not len(query_embeddings):
+            return []
+
+        # (nq, dim) float32 matris (zaten float32 ise kopyalanmaz)
+        embedding_array = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        if self.metric != "L2":
+            embedding_array = normalize_rows(embedding_array)
         
-        # Convert query embedding to proper format (same as insert_embedding)
-        if hasattr(query_embedding, 'tolist'):
-            # If it's a tensor, convert to list first, then numpy
-            embedding_list = query_embedding.tolist()
-        else:
-            embedding_list = list(query_embedding)
-            
-        # Create numpy array with explicit float32 dtype
-        embedding_array = np.array(embedding_list, dtype=np.float32)
-        
-        search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
-        results = self._collection.search(
-            data=[embedding_array],  # Use converted numpy array
+        results = self.connection.call(
+            self._collection.search,
+            data=list(embedding_array),
             anns_field="embedding",
-            param=search_params,
+            param=build_search_params(self.index_type, self.metric, self.search_params, top_k),
             limit=top_k,
-            expr=filter_expr,
-            output_fields=["metadata"]  # Metadata field'ını da döndür
+            expr=tenant_filter(tenant_id, filter_expr),
+            output_fields=OUTPUT_FIELDS  # Tipli alanlar ve JSON metadata
         )
-        # L2 mesafesini benzerliğe çevir (örnek: similarity = 1 / (1 + distance))
         filtered_results = []
-        for hit in results[0]:
-            distance = getattr(hit, 'distance', None)
-            similarity = 1 / (1 + distance) if distance is not None else 0
-            self.logger.info(f"Milvus search result: distance={distance}, similarity={similarity}")
-            hit.similarity = similarity  # similarity attribute'u ekle
-            filtered_results.append(hit)
-        return [filtered_results] 
\ No newline at end of file
+        for hits in results:
+            query_hits = []
+            for hit in hits:
+                distance = getattr(hit, 'distance', None)
+                hit.similarity = to_similarity(distance, self.metric)  # similarity attribute'u ekle
+                query_hits.append(hit)
+            filtered_results.append(query_hits)
+        self.logger.debug(f"Milvus search: nq={len(filtered_results)}, hits={sum(len(h) for h in filtered_results)}")
+        return filtered_results
@@ -1,22 +1,41 @@
 from backend.services.embedding_service import EmbeddingService
-from backend.services.milvus_service import MilvusService
+from backend.services.vector_store import get_vector_store
 from backend.services.core.init_service import get_db
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+import asyncio
 import re
+import os
 import json
 import logging
 
+# Benzerlik eşikleri (yüksek kalite, yedek) Milvus metriğine göre: L2 koleksiyonlarında 1 / (1 + mesafe),
+# COSINE/IP'de kosinüs benzerliği ölçeğindedir. RAG_SIMILARITY_THRESHOLD / RAG_FALLBACK_THRESHOLD ile ezilebilir;
+# değerler backend.benchmarks.ann_index_tuning ve değerlendirme setiyle ayarlanır.
+SIMILARITY_THRESHOLDS = {"L2": (0.12, 0.1), "IP": (0.5, 0.35), "COSINE": (0.5, 0.35)}
+
 class RagService:
     def __init__(self):
         self.embedding_service = EmbeddingService()
-        self.milvus_service = MilvusService()
+        self.milvus_service = get_vector_store()
         self.logger = logging.getLogger(__name__)
 
     def _extract_metadata(self, hit) -> Tuple[dict, str, float]:
-        """Milvus hit'inden metadata, parent_id ve similarity score çıkarır"""
-        metadata = None
-        if hasattr(hit, 'entity') and hit.entity:
-            metadata_str = hit.entity.get('metadata', '')
+        """
+        Milvus hit'inden metadata, parent_id ve similarity score çıkarır.
+        Tipli şemada parent_id/chunk_id/file_id doğrudan skaler alanlardan okunur; JSON yalnızca
+        eski (v1) koleksiyondaki string metadata için ayrıştırılır.
+        """
+        entity = getattr(hit, 'entity', None)
+        parent_id = entity.get('parent_id') if entity else None
+        if parent_id is not None:
+            metadata = dict(entity.get('metadata') or {})
+            for field in ('file_id', 'chunk_id', 'chunk_type', 'chunk_order'):
+                metadata[field] = entity.get(field)
+            metadata['parent_id'] = parent_id if parent_id >= 0 else None
+            return metadata, metadata['parent_id'], getattr(hit, 'similarity', None)
+
+        if entity:
+            metadata_str = entity.get('metadata', '')
         elif hasattr(hit, 'metadata'):
             metadata_str = hit.metadata
         else:
@@ -68,71 +87,126 @@ class RagService:
         
         return selected_hits
 
-    async def retrieve_context(self, query: str) -> List[Dict]:
+    def _thresholds(self) -> Tuple[float, float]:
+        high, fallback = SIMILARITY_THRESHOLDS.get(self.milvus_service.metric, SIMILARITY_THRESHOLDS["COSINE"])
+        return (
+            float(os.getenv('RAG_SIMILARITY_THRESHOLD', high)),
+            float(os.getenv('RAG_FALLBACK_THRESHOLD', fallback))
+        )
+
+    async def fetch_parent_chunks(self, parent_ids: List[int], tenant_id: Optional[str] = None) -> Dict[int, Dict]:
         """
-        İki aşamalı retrieval pipeline:
-        1. İlk 5 sonuç içinde:
-           - 0.12 üzerindeki tüm değerler için retrieval
-           - 0.12 üzerinde değer yoksa, 0.1 üzerindeki en iyi 2 değer (farklı parent'lardan)
-        2. Ortak parent kontrolü:
-           - Seçilen değerlerin parent'ları ortaksa, bir sonraki en yüksek değere geç
-           - Benzersiz parent bulunana kadar devam et
+        parent_id -> {"title", "content"}; tek sorguda çekilir.
+        tenant_id verilirse yalnızca o tenant'ın dosyalarına ait parent'lar döner (tenant'sız
+        indekslerden, ör. BM25, gelen adaylar burada kapsam dışı bırakılır).
         """
-        query_proc = self.embedding_service.preprocess(query)
-        query_emb = self.embedding_service.embed([query_proc])[0]
-        
-        # İlk 5 sonuç
-        results_5 = self.milvus_service.search(query_emb, top_k=5)
-        
-        # 0.12 threshold için kontrol
-        high_quality_hits = self._get_unique_parent_chunks(
-            results_5[0], 
-            threshold=0.12,
-            max_parents=5  # 0.12 üzerindeki tüm değerler
+        if not parent_ids:
+            return {}
+        db = get_db()
+        values = {"parent_ids": list(parent_ids)}
+        if tenant_id is None:
+            query_text = """
+            SELECT id, title, content FROM parent_chunks WHERE id = ANY(:parent_ids)
+            """
+        else:
+            query_text = """
+            SELECT p.id, p.title, p.content FROM parent_chunks p JOIN files f ON f.file_id = p.document_id
+            WHERE p.id = ANY(:parent_ids) AND COALESCE(f.user_id::text, '') = :tenant_id
+            """
+            values["tenant_id"] = tenant_id
+        result = await db.fetch_all(query_text, values)
+        return {row["id"]: {"title": row["title"], "content": row["content"]} for row in result}
+
+    def _select_hits(self, hits) -> List[Tuple]:
+        """
+        Bir sorgunun ilk 5 hit'inden context'e girecek (score, parent_id, hit) üçlüleri:
+        - yüksek eşik üzerindeki tüm değerler
+        - yüksek eşik üzerinde değer yoksa, yedek eşik üzerindeki en iyi 2 değer (farklı parent'lardan)
+        Eşikler koleksiyonun metriğine göre seçilir (bkz. SIMILARITY_THRESHOLDS).
+        """
+        high_threshold, fallback_threshold = self._thresholds()
+        # Yüksek eşik için kontrol
+        selected = self._get_unique_parent_chunks(
+            hits, 
+            threshold=high_threshold,
+            max_parents=5  # Yüksek eşik üzerindeki tüm değerler
         )
         
-        # Eğer 0.12 üzerinde değer yoksa, 0.1 threshold ile dene
-        if not high_quality_hits:
-            high_quality_hits = self._get_unique_parent_chunks(
-                results_5[0],
-                threshold=0.1,
+        # Eğer yüksek eşik üzerinde değer yoksa, yedek eşik ile dene
+        if not selected:
+            selected = self._get_unique_parent_chunks(
+                hits,
+                threshold=fallback_threshold,
                 max_parents=2  # En iyi 2 farklı parent
             )
         
         # Seçilen parent'ları logla
-        for score, parent_id, _ in high_quality_hits:
+        for score, parent_id, _ in selected:
             self.logger.info(f"[RAG] Seçilen parent_id: {parent_id}, similarity: {score}")
+        return selected
+
+    async def retrieve_context(self, query: str, tenant_id: Optional[str] = None) -> List[Dict]:
+        """
+        İki aşamalı retrieval pipeline:
+        1. İlk 5 sonuç içinde:
+           - yüksek eşik üzerindeki tüm değerler için retrieval
+           - yüksek eşik üzerinde değer yoksa, yedek eşik üzerindeki en iyi 2 değer (farklı parent'lardan)
+           Eşikler koleksiyonun metriğine göre seçilir (bkz. SIMILARITY_THRESHOLDS).
+        2. Ortak parent kontrolü:
+           - Seçilen değerlerin parent'ları ortaksa, bir sonraki en yüksek değere geç
+           - Benzersiz parent bulunana kadar devam et
+        tenant_id: arama kapsamı (bkz. auth.scope.get_tenant_id); verilirse yalnızca o tenant'ın
+        Milvus partition'ı aranır, fetch edilen parent'lar da o tenant'a ait olmalıdır.
+        """
+        return (await self.retrieve_context_many([query], tenant_id))[0]
+
+    async def retrieve_context_many(self, queries: List[str], tenant_id: Optional[str] = None) -> List[List[Dict]]:
+        """
+        retrieve_context'in çok sorgulu karşılığı; sorgu sırasıyla her sorgunun context listesini döner.
+        Birden çok sorgu mikro-batcher'a (batch_max_size ile sınırlı) girmeden, executor'da tek model çağrısıyla
+        embed edilir; tek sorgu eşzamanlı diğer sorgularla aynı mikro-batch'e katılır. Ardından tek vektör araması
+        (nq = sorgu sayısı) yapılır ve bütün sorguların parent chunk'ları tek veritabanı sorgusuyla çekilir.
+        """
+        if not queries:
+            return []
+        if len(queries) == 1:
+            query_embs = await self.embedding_service.embed_async(queries)
+        else:
+            query_embs = await asyncio.to_thread(self.embedding_service.embed, queries)
         
-        # Parent chunk'ları veritabanından çek
-        db = get_db()
-        parent_chunks = {}
+        # Sorgu başına ilk 5 sonuç
+        results_5 = await self.milvus_service.search_many_async(query_embs, top_k=5, tenant_id=tenant_id)
+        selected = [self._select_hits(hits) for hits in results_5]  # (score, parent_id, hit)
         
-        if high_quality_hits:
-            selected_parent_ids = [hit[1] for hit in high_quality_hits]  # (score, parent_id, hit)
-            query_text = """
-            SELECT id, title, content FROM parent_chunks WHERE id = ANY(:parent_ids)
-            """
-            result = await db.fetch_all(query_text, {"parent_ids": selected_parent_ids})
-            for row in result:
-                parent_chunks[row["id"]] = {
-                    "title": row["title"],
-                    "content": row["content"]
-                }
+        # Parent chunk'ları veritabanından çek (sorgular arasında ortak parent'lar bir kez)
+        parent_ids = list(dict.fromkeys(parent_id for hits in selected for _, parent_id, _ in hits))
+        parent_chunks = await self.fetch_parent_chunks(parent_ids, tenant_id)
         
         # Sonuçları hazırla
-        final_context = []
-        for _, parent_id, _ in high_quality_hits:
-            if parent_id in parent_chunks:
-                final_context.append({
+        contexts = []
+        for hits in selected:
+            contexts.append([
+                {
                     "parent_id": parent_id,
                     "parent_title": parent_chunks[parent_id]["title"],
                     "parent_content": parent_chunks[parent_id]["content"]
-                })
-        
-        return final_context
+                }
+                for _, parent_id, _ in hits if parent_id in parent_chunks
+            ])
+        return contexts
 
     def assemble_prompt(self, query: str, context_chunks: List[Dict]) -> str:
         # Bağlam olarak chunk['text'] kullan
         context_text = "\n".join([chunk["text"] for chunk in context_chunks if chunk["text"]])
         prompt = f"Soru: {query}\n\nBağlam:\n{context_text}\n\nYanıt:"
-        return prompt 
\ No newline at end of file
+        return prompt 
+
+# Singleton RAG service instance
+_rag_service = None
+
+def get_rag_service() -> RagService:
+    """Get or create the process-wide RAG service (shared embedding service and Milvus client)"""
+    global _rag_service
+    if _rag_service is None:
+        _rag_service = RagService()
+    return _rag_service
@@ -0,0 +1,55 @@
+import re
+from functools import lru_cache
+from typing import List
+from backend.services.text import normalize_unicode
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Türkçe büyük/küçük harf kuralları: I -> ı, İ -> i (str.lower "İ"yi "i̇" yapar)
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+# Kök bulunduktan sonra Türkçe karakterler ASCII'ye katlanır; "ozellik" sorgusu "özellik" ile eşleşir
+_ASCII_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+
+STOPWORDS = frozenset("""
+acaba ama ancak artık aslında az bazı belki ben bile bir biri birkaç birşey biz bu buna bunda bundan bunu bunun
+çok çünkü da daha de defa diye dolayı en gibi hem hep hepsi her hiç için ile ise kadar ki kim mi mı mu mü nasıl
+ne neden nerede niye o olan olarak oldu olduğu olduğunu olmak olmayan olur şey şu sonra tüm ve veya ya yani
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+""".split())
+
+# Çekim ekleri (uzundan kısaya); kök en az MIN_STEM karakter kalacak şekilde sondan tekrarlı olarak atılır.
+# Ünlü uyumu varyantları açıkça listelenir; yapım ekleri anlamı değiştirdiği için atılmaz.
+SUFFIXES = sorted("""
+ndaki ndeki ndan nden daki deki taki teki dan den tan ten nda nde da de ta te
+nın nin nun nün ın in un ün yla yle la le ya ye yı yi yu yü na ne nı ni nu nü
+ları leri lar ler ımız imiz umuz ümüz ınız iniz unuz ünüz sı si su sü
+dır dir dur dür tır tir tur tür ması mesi mak mek
+ı i u ü a e
+""".split(), key=len, reverse=True)
+# Uzunluğa göre gruplanır: her adımda tüm ekleri denemek yerine uzunluk başına tek küme araması yapılır
+_SUFFIXES_BY_LEN = [
+    (length, frozenset(s for s in SUFFIXES if len(s) == length))
+    for length in sorted({len(s) for s in SUFFIXES}, reverse=True)
+]
+MIN_STEM = 3
+MAX_STRIPS = 3
+
+@lru_cache(maxsize=262144)
+def stem(token: str) -> str:
+    """Hafif Türkçe kök bulucu: çekim eklerini atar, ardından ASCII'ye katlar."""
+    for _ in range(MAX_STRIPS):
+        for length, suffixes in _SUFFIXES_BY_LEN:
+            if len(token) - length >= MIN_STEM and token[-length:] in suffixes:
+                token = token[:-length]
+                break
+        else:
+            break
+    return token.translate(_ASCII_FOLD)
+
+def turkish_lower(text: str) -> str:
+    return text.translate(_TURKISH_LOWER).lower()
+
+def analyze(text: str) -> List[str]:
+    """Metni BM25 terimlerine çevirir: NFKC, Türkçe küçük harf, stopword eleme, kök bulma."""
+    text = turkish_lower(normalize_unicode(text, 'NFKC'))
+    return [stem(token) for token in TOKEN_RE.findall(text) if token not in STOPWORDS]
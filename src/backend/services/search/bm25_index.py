@@ -0,0 +1,634 @@
+import asyncio
+import fcntl
+import heapq
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import uuid
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.services.auth.scope import tenant_key
+from .analyzer import analyze
+from .config import SearchConfig
+
+MANIFEST = "manifest.json"
+LOCK_FILE = "LOCK"
+REBUILD_LOCK_FILE = "REBUILD.lock"
+MAX_TF = np.iinfo(np.uint16).max
+
+logger = logging.getLogger(__name__)
+
+def _write_segment(path: str, terms: List[str], term_ids, docs, tfs, doc_ids, parent_ids, doc_lens, tenants: List[str], doc_tenants) -> None:
+    """
+    Posting'leri (terim id'si, segment içi doküman no, tf) düz dizilerinden segment dizinini yazar.
+    Terimler UTF-8 byte sırasına göre dizilir (ikili arama); her terimin posting'leri doküman no'ya göre sıralıdır.
+    Dokümanın tenant'ı segmentin tenant listesindeki sırasıyla tutulur (-1: tenant'ı bilinmiyor).
+    """
+    encoded = [t.encode("utf-8") for t in terms]
+    order = sorted(range(len(encoded)), key=encoded.__getitem__)
+    rank = np.empty(len(encoded), dtype=np.int64)
+    rank[order] = np.arange(len(encoded))
+    term_rank = rank[np.asarray(term_ids, dtype=np.int64)]
+    docs = np.asarray(docs, dtype=np.int32)
+    perm = np.lexsort((docs, term_rank))
+    post_docs = docs[perm]
+    post_tfs = np.minimum(np.asarray(tfs, dtype=np.int64)[perm], MAX_TF).astype(np.uint16)
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_rank, minlength=len(encoded)), out=offsets[1:])
+    doc_lens = np.asarray(doc_lens, dtype=np.int32)
+
+    os.makedirs(path)
+    blob = [encoded[i] for i in order]
+    term_offsets = np.zeros(len(blob) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in blob], out=term_offsets[1:])
+    with open(os.path.join(path, "terms.bin"), "wb") as f:
+        f.write(b"".join(blob))
+    arrays = {
+        "term_offsets": term_offsets,
+        "post_offsets": offsets,
+        "post_docs": post_docs,
+        "post_tfs": post_tfs,
+        # WAND/MaxScore üst sınırı için: tf ile artan, doküman uzunluğu ile azalan skorun en kötü durumu
+        "term_max_tf": np.maximum.reduceat(post_tfs, offsets[:-1]),
+        "term_min_dl": np.minimum.reduceat(doc_lens[post_docs], offsets[:-1]),
+        "doc_ids": np.asarray(doc_ids, dtype=np.int64),
+        "parent_ids": np.asarray(parent_ids, dtype=np.int64),
+        "doc_lens": doc_lens,
+        "tenants": np.asarray(tenants, dtype=str),
+        "doc_tenants": np.asarray(doc_tenants, dtype=np.int32),
+    }
+    for name, values in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), values)
+
+class SegmentBuilder:
+    """Bellekte biriken dokümanlardan yeni bir segment oluşturur; posting'ler düz dizilerde tutulur."""
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.term_ids = array("I")
+        self.docs = array("I")
+        self.tfs = array("I")
+        self.doc_ids = array("q")
+        self.parent_ids = array("q")
+        self.doc_lens = array("I")
+        self.tenants: Dict[str, int] = {}
+        self.doc_tenants = array("i")
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add(self, doc_id: int, parent_id: int, text: str, tenant_id: Optional[str] = None) -> None:
+        terms = analyze(text or "")
+        local = len(self.doc_ids)
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            term_id = self.vocab.setdefault(term, len(self.vocab))
+            self.term_ids.append(term_id)
+            self.docs.append(local)
+            self.tfs.append(tf)
+        self.doc_ids.append(int(doc_id))
+        self.parent_ids.append(int(parent_id) if parent_id is not None else -1)
+        self.doc_lens.append(len(terms))
+        self.doc_tenants.append(self.tenants.setdefault(tenant_id, len(self.tenants)) if tenant_id is not None else -1)
+
+    def write(self, path: str) -> bool:
+        """Segmenti yazar; hiç terim yoksa yazmaz ve False döner."""
+        if not self.vocab:
+            return False
+        _write_segment(
+            path, list(self.vocab), self.term_ids, self.docs, self.tfs, self.doc_ids, self.parent_ids, self.doc_lens,
+            list(self.tenants), self.doc_tenants
+        )
+        return True
+
+class Segment:
+    """Diskteki değişmez segment; diziler mmap ile açılır, terim sözlüğü ikili aramayla taranır."""
+
+    def __init__(self, path: str, seq: int):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.seq = seq
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        self.terms = np.memmap(os.path.join(path, "terms.bin"), dtype=np.uint8, mode="r")
+        self.term_offsets = load("term_offsets")
+        self.post_offsets = load("post_offsets")
+        self.post_docs = load("post_docs")
+        self.post_tfs = load("post_tfs")
+        self.term_max_tf = load("term_max_tf")
+        self.term_min_dl = load("term_min_dl")
+        self.doc_ids = load("doc_ids")
+        self.parent_ids = load("parent_ids")
+        self.doc_lens = load("doc_lens")
+        self.num_terms = len(self.term_offsets) - 1
+        self.num_docs = len(self.doc_ids)
+        try:
+            self.tenants = {str(t): i for i, t in enumerate(np.load(os.path.join(path, "tenants.npy")))}
+            self.doc_tenants = load("doc_tenants")
+        except FileNotFoundError:
+            # Tenant bilgisi eklenmeden önce yazılmış segment
+            self.tenants, self.doc_tenants = {}, None
+        # Tenant'ı bilinmeyen dokümanlar tenant filtresinden geçer (parent çekimi yine tenant'a göre eler)
+        self.untenanted = self.doc_tenants is None or bool((self.doc_tenants < 0).any())
+        self.live: Optional[np.ndarray] = None
+        self._live_df: Dict[int, int] = {}
+
+    def term_bytes(self, idx: int) -> bytes:
+        return self.terms[self.term_offsets[idx]:self.term_offsets[idx + 1]].tobytes()
+
+    def lookup(self, term: bytes) -> int:
+        low, high = 0, self.num_terms
+        while low < high:
+            mid = (low + high) // 2
+            if self.term_bytes(mid) < term:
+                low = mid + 1
+            else:
+                high = mid
+        return low if low < self.num_terms and self.term_bytes(low) == term else -1
+
+    def postings(self, idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.post_offsets[idx], self.post_offsets[idx + 1]
+        return self.post_docs[start:end], self.post_tfs[start:end]
+
+    def doc_freq(self, idx: int) -> int:
+        """Terimi içeren canlı doküman sayısı; silme içeren segmentlerde terim başına bir kez hesaplanır."""
+        start, end = int(self.post_offsets[idx]), int(self.post_offsets[idx + 1])
+        live = self.live
+        if live is None:
+            return end - start
+        df = self._live_df.get(idx)
+        if df is None:
+            df = int(np.count_nonzero(live[self.post_docs[start:end]]))
+            self._live_df[idx] = df
+        return df
+
+    def apply_tombstones(self, ids: np.ndarray, seqs: np.ndarray) -> None:
+        # Silme, yalnızca kendisinden önce oluşturulmuş segmentlere uygulanır; aynı id sonradan yeniden eklenebilir
+        ids = ids[seqs > self.seq]
+        dead = np.isin(self.doc_ids, ids) if len(ids) else None
+        self._live_df = {}
+        self.live = ~dead if dead is not None and dead.any() else None
+
+    def tenant_code(self, tenant_id: Optional[str]) -> Optional[int]:
+        """Aramanın tenant filtresi: None filtre yok, -2 tenant'ın bu segmentte dokümanı yok."""
+        if tenant_id is None or self.doc_tenants is None:
+            return None
+        return self.tenants.get(tenant_id, -2)
+
+    def live_count(self) -> int:
+        return self.num_docs if self.live is None else int(self.live.sum())
+
+    def live_length(self) -> int:
+        lens = self.doc_lens if self.live is None else self.doc_lens[self.live]
+        return int(lens.sum(dtype=np.int64))
+
+class _Snapshot:
+    """Aramaların kilitsiz kullandığı, manifest'in bir sürümüne ait segment kümesi ve global istatistikler."""
+
+    def __init__(self, version: int, segments: List[Segment], k1: float, b: float):
+        self.version = version
+        self.segments = segments
+        self.num_docs = sum(s.live_count() for s in segments)
+        total_length = sum(s.live_length() for s in segments)
+        self.avgdl = total_length / self.num_docs if self.num_docs else 1.0
+        # Doküman başına BM25 uzunluk normalizasyonu: k1 * (1 - b + b * dl / avgdl)
+        self.norms = {
+            s.name: (k1 * (1 - b + b * np.asarray(s.doc_lens, dtype=np.float32) / self.avgdl)).astype(np.float32)
+            for s in segments
+        }
+
+class BM25Index:
+    """
+    child_chunks üzerinde segment tabanlı BM25 ters indeksi.
+    - Her commit yeni, değişmez bir segment yazar (numpy dizileri, mmap ile açılır); silmeler sıra numaralı
+      tombstone'lardır. Manifest, dosya kilidi altında atomik olarak güncellenir, böylece ingestion worker
+      process'leri yazar ve API process'i manifest değiştiğinde yeni segmentleri görür.
+    - Segment sayısı sınırı aşınca en küçük segmentler birleştirilir ve silinmiş dokümanlar atılır.
+    - Sorgular MaxScore tarzı budama ile top-k döner: kısa posting listeleri tam skorlanır, kalan terimlerin
+      skor üst sınırları toplamı k'inci skorun altına düşünce uzun listeler yalnızca adaylar için yoklanır.
+    - Her doküman yükleyen kullanıcının tenant'ıyla saklanır; tenant_id verilen aramalarda top-k yalnızca o
+      tenant'ın dokümanları arasından seçilir (idf ve ortalama uzunluk indeks genelinden hesaplanır).
+    """
+
+    def __init__(self, config: Optional[SearchConfig] = None, path: Optional[str] = None):
+        self.config = config or SearchConfig()
+        self.path = path or self.config.bm25_index_dir
+        self.k1 = self.config.bm25_k1
+        self.b = self.config.bm25_b
+        self._lock = threading.Lock()
+        self._snapshot = _Snapshot(0, [], self.k1, self.b)
+        self._manifest_stat = None
+
+    # --- Manifest ve yazma ---
+
+    @contextmanager
+    def _file_lock(self, name: str = LOCK_FILE, blocking: bool = True):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, name), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": 0, "segments": [], "tombstones": None}
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        tmp = os.path.join(self.path, f".{MANIFEST}.{uuid.uuid4().hex}")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+    def _load_tombstones(self, manifest: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        if not manifest.get("tombstones"):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        with np.load(os.path.join(self.path, manifest["tombstones"])) as data:
+            return data["ids"], data["seqs"]
+
+    def _save_tombstones(self, manifest: Dict, ids: np.ndarray, seqs: np.ndarray) -> None:
+        # Artık hiçbir segmente uygulanmayan tombstone'lar atılır
+        oldest = min((s["seq"] for s in manifest["segments"]), default=None)
+        keep = seqs > oldest if oldest is not None else np.zeros(len(ids), dtype=bool)
+        ids, seqs = ids[keep], seqs[keep]
+        if not len(ids):
+            manifest["tombstones"] = None
+            return
+        name = f"tombstones-{manifest['version']}.npz"
+        with open(os.path.join(self.path, name), "wb") as f:
+            np.savez(f, ids=ids, seqs=seqs)
+        manifest["tombstones"] = name
+
+    def commit(self, builder: Optional[SegmentBuilder] = None, deletes: Sequence[int] = (), replace_before: Optional[int] = None) -> None:
+        """
+        Silmeleri ve (varsa) yeni segmenti tek manifest sürümünde uygular. Silmeler yeni segmenti etkilemez,
+        böylece taşınan bir chunk aynı commit'te silinip yeniden eklenebilir.
+        replace_before: bu sürümde ve öncesinde oluşturulmuş segmentler ve tombstone'lar atılır (yeniden kurma).
+        """
+        os.makedirs(self.path, exist_ok=True)
+        segment_name = None
+        if builder is not None and len(builder):
+            segment_name = f"seg-{uuid.uuid4().hex}"
+            # Segment kilit dışında geçici adla yazılır; kilit altında yeniden adlandırılır ki başka bir
+            # yazarın çöp toplaması onu manifest'e girmeden silmesin
+            if not builder.write(os.path.join(self.path, f".{segment_name}")):
+                segment_name = None
+        if segment_name is None and not len(deletes) and replace_before is None:
+            return
+        with self._file_lock():
+            if segment_name is not None:
+                os.rename(os.path.join(self.path, f".{segment_name}"), os.path.join(self.path, segment_name))
+            manifest = self._read_manifest()
+            version = manifest["version"] + 1
+            ids, seqs = self._load_tombstones(manifest)
+            segments = manifest["segments"]
+            if replace_before is not None:
+                segments = [s for s in segments if s["seq"] > replace_before]
+                keep = seqs > replace_before
+                ids, seqs = ids[keep], seqs[keep]
+            if len(deletes):
+                deletes = np.unique(np.asarray(deletes, dtype=np.int64))
+                ids = np.concatenate([ids, deletes])
+                seqs = np.concatenate([seqs, np.full(len(deletes), version, dtype=np.int64)])
+            if segment_name is not None:
+                segments = segments + [{"name": segment_name, "seq": version}]
+            manifest = {"version": version, "segments": segments, "tombstones": manifest.get("tombstones")}
+            if len(deletes) or replace_before is not None:
+                self._save_tombstones(manifest, ids, seqs)
+            if len(manifest["segments"]) > self.config.bm25_max_segments:
+                self._merge_locked(manifest, ids, seqs)
+            self._write_manifest(manifest)
+            self._collect_garbage(manifest)
+
+    def _merge_locked(self, manifest: Dict, ids: np.ndarray, seqs: np.ndarray) -> None:
+        """En küçük segmentleri tek segmentte birleştirir; silinmiş dokümanlar kopyalanmaz."""
+        entries = sorted(manifest["segments"], key=lambda s: os.path.getsize(os.path.join(self.path, s["name"], "post_docs.npy")))
+        sources = entries[:max(2, self.config.bm25_merge_factor)]
+        vocab: Dict[str, int] = {}
+        tenants: Dict[str, int] = {}
+        term_ids, docs, tfs, doc_ids, parent_ids, doc_lens, doc_tenants = [], [], [], [], [], [], []
+        base = 0
+        for entry in sources:
+            segment = Segment(os.path.join(self.path, entry["name"]), entry["seq"])
+            segment.apply_tombstones(ids, seqs)
+            live = segment.live if segment.live is not None else np.ones(segment.num_docs, dtype=bool)
+            new_local = np.cumsum(live) - 1 + base
+            term_map = np.array(
+                [vocab.setdefault(segment.term_bytes(i).decode("utf-8"), len(vocab)) for i in range(segment.num_terms)],
+                dtype=np.int64
+            )
+            post_terms = np.repeat(np.arange(segment.num_terms), np.diff(segment.post_offsets))
+            keep = live[segment.post_docs]
+            term_ids.append(term_map[post_terms[keep]])
+            docs.append(new_local[segment.post_docs[keep]])
+            tfs.append(np.asarray(segment.post_tfs)[keep])
+            doc_ids.append(segment.doc_ids[live])
+            parent_ids.append(segment.parent_ids[live])
+            doc_lens.append(segment.doc_lens[live])
+            if segment.doc_tenants is None:
+                doc_tenants.append(np.full(int(live.sum()), -1, dtype=np.int32))
+            else:
+                tenant_map = np.array([tenants.setdefault(t, len(tenants)) for t in segment.tenants] + [-1], dtype=np.int32)
+                doc_tenants.append(tenant_map[segment.doc_tenants[live]])  # -1 -> son eleman (-1)
+            base += int(live.sum())
+        version = manifest["version"]
+        remaining = [s for s in manifest["segments"] if s not in sources]
+        if base:
+            name = f"seg-{uuid.uuid4().hex}"
+            # Birleşik segment tüm mevcut tombstone'lardan yenidir; silmeler yukarıda zaten uygulandı
+            _write_segment(
+                os.path.join(self.path, name), list(vocab), np.concatenate(term_ids), np.concatenate(docs),
+                np.concatenate(tfs), np.concatenate(doc_ids), np.concatenate(parent_ids), np.concatenate(doc_lens),
+                list(tenants), np.concatenate(doc_tenants)
+            )
+            remaining.append({"name": name, "seq": version + 1})
+        manifest["version"] = version + 1
+        manifest["segments"] = remaining
+        self._save_tombstones(manifest, ids, seqs)
+        logger.info(f"[BM25] Merged {len(sources)} segments ({base} live docs); {len(remaining)} segments remain")
+
+    def _collect_garbage(self, manifest: Dict) -> None:
+        referenced = {s["name"] for s in manifest["segments"]} | {manifest.get("tombstones")}
+        for name in os.listdir(self.path):
+            if name in referenced or name in (MANIFEST, LOCK_FILE, REBUILD_LOCK_FILE) or name.startswith("."):
+                continue
+            target = os.path.join(self.path, name)
+            if os.path.isdir(target):
+                shutil.rmtree(target, ignore_errors=True)
+            else:
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+
+    def writer(self) -> "BM25Writer":
+        return BM25Writer(self)
+
+    # --- Okuma ---
+
+    def version(self) -> int:
+        return self._read_manifest()["version"]
+
+    def refresh(self) -> _Snapshot:
+        """Manifest değiştiyse segmentleri yeniden açar (değişmeyen segmentler yeniden kullanılır)."""
+        try:
+            stat = os.stat(os.path.join(self.path, MANIFEST))
+            key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            key = None
+        if key == self._manifest_stat:
+            return self._snapshot
+        with self._lock:
+            if key == self._manifest_stat:
+                return self._snapshot
+            for attempt in range(3):
+                manifest = self._read_manifest()
+                try:
+                    ids, seqs = self._load_tombstones(manifest)
+                    opened = {s.name: s for s in self._snapshot.segments}
+                    segments = []
+                    for entry in manifest["segments"]:
+                        segment = opened.get(entry["name"]) or Segment(os.path.join(self.path, entry["name"]), entry["seq"])
+                        segment.apply_tombstones(ids, seqs)
+                        segments.append(segment)
+                    break
+                except FileNotFoundError:
+                    # Okuma sırasında yazar manifest'i değiştirip eski dosyaları sildi; yeniden oku
+                    if attempt == 2:
+                        raise
+            self._snapshot = _Snapshot(manifest["version"], segments, self.k1, self.b)
+            self._manifest_stat = key
+            return self._snapshot
+
+    def is_empty(self) -> bool:
+        return not self.refresh().segments
+
+    def needs_rebuild(self) -> bool:
+        """İndeks boşsa veya tenant bilgisi olmayan (eski) dokümanlar içeriyorsa True."""
+        segments = self.refresh().segments
+        return not segments or any(s.untenanted for s in segments)
+
+    def stats(self) -> Dict:
+        snapshot = self.refresh()
+        return {
+            "version": snapshot.version,
+            "segments": len(snapshot.segments),
+            "documents": snapshot.num_docs,
+            "avgdl": round(snapshot.avgdl, 2),
+        }
+
+    def search(self, query: str, top_k: int = 10, tenant_id: Optional[str] = None) -> List[Dict]:
+        """
+        Sorgu için en yüksek BM25 skorlu child chunk'lar: [{"id", "parent_id", "score"}]
+        tenant_id verilirse yalnızca o tenant'ın (ve tenant'ı bilinmeyen eski) dokümanları skorlanır.
+        """
+        snapshot = self.refresh()
+        terms = list(dict.fromkeys(analyze(query)))
+        if not terms or not snapshot.segments or top_k <= 0:
+            return []
+        encoded = [t.encode("utf-8") for t in terms]
+        per_segment = [(segment, [segment.lookup(t) for t in encoded]) for segment in snapshot.segments]
+        df = [0] * len(terms)
+        for segment, idxs in per_segment:
+            for i, idx in enumerate(idxs):
+                if idx >= 0:
+                    df[i] += segment.doc_freq(idx)
+        n = snapshot.num_docs
+        idf = [math.log(1 + (n - d + 0.5) / (d + 0.5)) for d in df]
+
+        top: List[Tuple[float, int, int]] = []  # (skor, chunk id, parent id) min-heap
+        for segment, idxs in per_segment:
+            tenant = segment.tenant_code(tenant_id)
+            if tenant == -2 and not segment.untenanted:
+                continue
+            self._search_segment(segment, snapshot.norms[segment.name], snapshot.avgdl, idxs, idf, top_k, top, tenant)
+        # Yeniden kurma sırasında aynı chunk iki segmentte bulunabilir
+        best: Dict[int, Tuple[float, int]] = {}
+        for score, doc_id, parent_id in top:
+            if doc_id not in best or score > best[doc_id][0]:
+                best[doc_id] = (score, parent_id)
+        ranked = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:top_k]
+        return [
+            {"id": doc_id, "parent_id": parent_id if parent_id >= 0 else None, "score": float(score)}
+            for doc_id, (score, parent_id) in ranked
+        ]
+
+    def _search_segment(self, segment: Segment, norms: np.ndarray, avgdl: float, idxs, idf, top_k: int, top, tenant: Optional[int] = None) -> None:
+        k1, b = self.k1, self.b
+        terms = []
+        for i, idx in enumerate(idxs):
+            if idx < 0:
+                continue
+            max_tf = float(segment.term_max_tf[idx])
+            min_dl = float(segment.term_min_dl[idx])
+            upper = idf[i] * max_tf * (k1 + 1) / (max_tf + k1 * (1 - b + b * min_dl / avgdl))
+            docs, tfs = segment.postings(idx)
+            terms.append((len(docs), upper, idf[i], docs, tfs))
+        if not terms:
+            return
+        # Kısa (nadir, yüksek idf'li) listeler önce tam skorlanır
+        terms.sort(key=lambda t: t[0])
+        remaining = [0.0] * (len(terms) + 1)
+        for i in range(len(terms) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + terms[i][1]
+
+        cand_docs = np.empty(0, dtype=np.int32)
+        cand_scores = np.empty(0, dtype=np.float32)
+        probing = False
+        for i, (_, _, term_idf, docs, tfs) in enumerate(terms):
+            threshold = self._threshold(cand_scores, top, top_k)
+            if not probing and len(cand_docs) and remaining[i] <= threshold:
+                # Görülmemiş dokümanlar eşiği geçemez: kalan listeler yalnızca adaylar için yoklanır
+                probing = True
+            if probing:
+                keep = cand_scores + remaining[i] > threshold
+                cand_docs, cand_scores = cand_docs[keep], cand_scores[keep]
+                if not len(cand_docs):
+                    return
+                pos = np.searchsorted(docs, cand_docs)
+                pos[pos >= len(docs)] = 0
+                hit = np.asarray(docs)[pos] == cand_docs
+                tf = np.asarray(tfs)[pos[hit]].astype(np.float32)
+                cand_scores[hit] += term_idf * tf * (k1 + 1) / (tf + norms[cand_docs[hit]])
+                continue
+            docs = np.asarray(docs)
+            if segment.live is not None:
+                alive = segment.live[docs]
+                docs, tfs = docs[alive], np.asarray(tfs)[alive]
+            if tenant is not None:
+                owners = segment.doc_tenants[docs]
+                owned = (owners == tenant) | (owners < 0)
+                docs, tfs = docs[owned], np.asarray(tfs)[owned]
+            tf = np.asarray(tfs, dtype=np.float32)
+            scores = (term_idf * tf * (k1 + 1) / (tf + norms[docs])).astype(np.float32)
+            if not len(cand_docs):
+                cand_docs, cand_scores = docs.astype(np.int32), scores
+            else:
+                merged, inverse = np.unique(np.concatenate([cand_docs, docs]), return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=np.concatenate([cand_scores, scores])).astype(np.float32)
+                cand_docs = merged.astype(np.int32)
+
+        if not len(cand_docs):
+            return
+        if len(cand_docs) > top_k:
+            best = np.argpartition(cand_scores, -top_k)[-top_k:]
+            cand_docs, cand_scores = cand_docs[best], cand_scores[best]
+        for doc, score in zip(cand_docs.tolist(), cand_scores.tolist()):
+            item = (score, int(segment.doc_ids[doc]), int(segment.parent_ids[doc]))
+            if len(top) < top_k:
+                heapq.heappush(top, item)
+            elif score > top[0][0]:
+                heapq.heapreplace(top, item)
+
+    @staticmethod
+    def _threshold(cand_scores: np.ndarray, top, top_k: int) -> float:
+        """Adayların kısmi skorları ve önceki segmentlerin kesin skorlarından k'inci en yüksek skor (alt sınır)."""
+        pool = len(cand_scores) + len(top)
+        if pool < top_k:
+            return 0.0
+        if len(cand_scores) >= top_k:
+            kth = float(np.partition(cand_scores, -top_k)[-top_k])
+            return max(kth, top[0][0]) if len(top) == top_k else kth
+        scores = np.concatenate([cand_scores, np.array([s for s, _, _ in top], dtype=np.float32)])
+        return float(np.partition(scores, -top_k)[-top_k])
+
+class BM25Writer:
+    """
+    Bir ingestion/silme işleminin indeks değişikliklerini biriktirir; commit edilene kadar görünmez.
+    Çok büyük dokümanlarda belleği sınırlamak için segment_max_docs'ta ara commit yapılır.
+    """
+
+    def __init__(self, index: BM25Index):
+        self.index = index
+        self.builder = SegmentBuilder()
+        self.deletes: List[int] = []
+        self._added = set()
+
+    def add(self, doc_id: int, parent_id: int, text: str, tenant_id: Optional[str] = None) -> None:
+        self.builder.add(doc_id, parent_id, text, tenant_id)
+        self._added.add(int(doc_id))
+        if len(self.builder) >= self.index.config.bm25_segment_max_docs:
+            self.commit()
+
+    def add_many(self, docs: Iterable[Tuple]) -> None:
+        """docs: (chunk id, parent id, metin[, tenant_id]) demetleri."""
+        for doc in docs:
+            self.add(*doc)
+
+    def delete(self, doc_ids: Iterable[int]) -> None:
+        doc_ids = [int(i) for i in doc_ids]
+        # Silmeler yalnızca önceki segmentlere uygulanır; bu yazarın henüz commit edilmemiş eklemelerini
+        # de kapsaması için önce onlar commit edilir
+        if not self._added.isdisjoint(doc_ids):
+            self.commit()
+        self.deletes.extend(doc_ids)
+
+    def commit(self) -> None:
+        builder, deletes = self.builder, self.deletes
+        self.builder, self.deletes, self._added = SegmentBuilder(), [], set()
+        self.index.commit(builder, deletes)
+
+async def rebuild_bm25_index(db, index: Optional[BM25Index] = None, page_size: int = 20000, only_if_stale: bool = False) -> int:
+    """
+    İndeksi child_chunks tablosundan baştan kurar; chunk'ın tenant'ı, parent'ının ait olduğu dosyayı yükleyen
+    kullanıcıdır. Kurma süresince başka process'lerin commit ettiği segmentler korunur. Aynı anda yalnızca bir
+    process kurar; diğerleri atlar. only_if_stale: yalnızca needs_rebuild() doğruysa kurar.
+    Dönüş: indekslenen chunk sayısı.
+    """
+    index = index or get_bm25_index()
+    with index._file_lock(REBUILD_LOCK_FILE, blocking=False) as acquired:
+        if not acquired or (only_if_stale and not index.needs_rebuild()):
+            return 0
+        start_version = index.version()
+        builder = SegmentBuilder()
+        last_id, total = 0, 0
+        while True:
+            rows = await db.fetch_all(
+                """
+                SELECT c.id, c.parent_id, c.content, f.user_id
+                FROM child_chunks c
+                JOIN parent_chunks p ON p.id = c.parent_id
+                JOIN files f ON f.file_id = p.document_id
+                WHERE c.id > :last_id ORDER BY c.id LIMIT :limit
+                """,
+                {"last_id": last_id, "limit": page_size}
+            )
+            if not rows:
+                break
+            for row in rows:
+                builder.add(row["id"], row["parent_id"], row["content"], tenant_key(row["user_id"]))
+            last_id = rows[-1]["id"]
+            total += len(rows)
+            if len(builder) >= index.config.bm25_segment_max_docs:
+                # Ara segmentler eski segmentleri henüz silmez; hepsi son commit'te değiştirilir
+                await asyncio.to_thread(index.commit, builder)
+                builder = SegmentBuilder()
+        await asyncio.to_thread(index.commit, builder, (), start_version)
+    logger.info(f"[BM25] Rebuilt index from child_chunks: {total} chunks")
+    return total
+
+# Singleton BM25 index instance
+_bm25_index = None
+
+def get_bm25_index() -> BM25Index:
+    """Get or create the process-wide BM25 index"""
+    global _bm25_index
+    if _bm25_index is None:
+        _bm25_index = BM25Index(SearchConfig())
+    return _bm25_index
@@ -1,7 +1,8 @@
-def bm25_search(query, index, top_k=10):
+def bm25_search(query, index, top_k=10, tenant_id=None):
     """
     BM25 arama motorunda sorgu yap. (Elasticsearch/Whoosh/benzeri ile uyumlu)
+    tenant_id verilirse top-k yalnızca o tenant'ın dokümanlarından seçilir.
     """
-    # index.search(query, top_k) gibi bir arayüz varsayalım
-    results = index.search(query, top_k=top_k)
+    # index.search(query, top_k, tenant_id) gibi bir arayüz varsayalım
+    results = index.search(query, top_k=top_k, tenant_id=tenant_id)
     return results 
\ No newline at end of file
@@ -3,6 +3,33 @@ from pydantic_settings import BaseSettings
 class SearchConfig(BaseSettings):
     top_k_default: int = 5
     similarity_threshold: float = 0.7
+    hybrid_candidates: int = 20  # Her kaynaktan fusion öncesi alınan sonuç sayısı
+    hybrid_weight_bm25: float = 0.5
+    hybrid_weight_vector: float = 0.5
+    # Aşama zaman aşımları; süresi dolan aşama boş sonuç sayılır, arama kalan kaynaklarla devam eder
+    embed_timeout_ms: int = 2000
+    bm25_timeout_ms: int = 1000
+    vector_timeout_ms: int = 2000
+    parent_fetch_timeout_ms: int = 2000
+    rerank_timeout_ms: int = 3000
+    batch_max_queries: int = 1000  # /search/batch isteği başına en fazla sorgu
+    # Cross-encoder rerank aşaması (bkz. rerank.CrossEncoderReranker)
+    rerank_enabled: bool = False  # True: hybrid arama cross_encoder_model verilmese de paylaşılan reranker'ı kullanır
+    rerank_model: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"  # Çok dilli (Türkçe dahil) MS MARCO cross-encoder
+    rerank_backend: str = "torch"  # "torch" (sentence-transformers CrossEncoder) veya "onnx" (ONNX Runtime, CPU)
+    rerank_onnx_dir: str = "/uploads/.cache/onnx"
+    rerank_onnx_quantize: bool = True  # int8 dinamik quantization
+    rerank_onnx_intra_op_threads: int = 0  # 0: process'e atanmış çekirdek sayısı
+    rerank_batch_size: int = 16  # Tek predict çağrısındaki (sorgu, aday) çifti
+    rerank_budget_ms: int = 250  # Süre dolunca kalan adaylar skorlanmaz, o ana kadarki en iyi sıralama döner
+    rerank_cache_size: int = 50000  # (sorgu hash'i, chunk id, içerik hash'i) -> skor LRU önbelleğindeki çift sayısı
+    bm25_enabled: bool = True
+    bm25_index_dir: str = "/uploads/.index/bm25"  # API ve ingestion worker process'leri aynı dizini paylaşır
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    bm25_max_segments: int = 16  # Aşılınca en küçük segmentler birleştirilir
+    bm25_merge_factor: int = 8  # Bir birleştirmede kaç segment tek segmente indirilir
+    bm25_segment_max_docs: int = 100000  # Tek ingestion'da bu kadar chunk birikince ara segment yazılır
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.services.embedding.onnx_backend import available_cores
+from .config import SearchConfig
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+META_FILE = "export.json"
+
+def export_dir(config: SearchConfig, model_name: str) -> str:
+    return os.path.join(config.rerank_onnx_dir, model_name.replace("/", "__"))
+
+def export_cross_encoder(model_name: str, target_dir: str, quantize: bool = True, opset: int = 14) -> str:
+    """
+    sentence-transformers CrossEncoder modelinin sınıflandırma gövdesini (logits) ONNX'e aktarır ve tokenizer'ı
+    (çift şablonu dahil) yanına yazar; quantize=True ise ağırlıklar int8'e dinamik olarak quantize edilir.
+    Dosyalar önce geçici dizine yazılıp taşınır (bkz. embedding.onnx_backend.export_model).
+    """
+    import torch
+    from sentence_transformers import CrossEncoder
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    cross_encoder = CrossEncoder(model_name, device="cpu")
+    tokenizer = cross_encoder.tokenizer
+    model = cross_encoder.model.eval()
+    max_length = cross_encoder.max_length or min(tokenizer.model_max_length, 512)
+
+    os.makedirs(os.path.dirname(target_dir.rstrip("/")) or ".", exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".export-", dir=os.path.dirname(target_dir.rstrip("/")) or ".")
+    try:
+        sample = tokenizer([["soru", "belge"]], return_tensors="pt", padding=True)
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+        model_path = os.path.join(work_dir, MODEL_FILE)
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                model_path,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=opset,
+                do_constant_folding=True,
+            )
+        if quantize:
+            quantize_dynamic(model_path, os.path.join(work_dir, QUANTIZED_FILE), weight_type=QuantType.QInt8)
+
+        tokenizer.backend_tokenizer.save(os.path.join(work_dir, TOKENIZER_FILE))
+        meta = {
+            "model_name": model_name,
+            "max_length": max_length,
+            "num_labels": model.config.num_labels,
+            "pad_token": tokenizer.pad_token,
+            "pad_id": tokenizer.pad_token_id,
+        }
+        with open(os.path.join(work_dir, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+        if os.path.isdir(target_dir):
+            shutil.rmtree(target_dir, ignore_errors=True)
+        os.replace(work_dir, target_dir)
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+    logger.info(f"[ONNX] Exported cross-encoder {model_name} to {target_dir} (quantized={quantize})")
+    return target_dir
+
+class OnnxCrossEncoder:
+    """
+    Dışa aktarılmış cross-encoder grafiğini ONNX Runtime ile çalıştıran, CrossEncoder.predict ile uyumlu model.
+    Tek etiketli modellerde skor sigmoid(logit)'tir (CrossEncoder varsayılanı); torch gerektirmez.
+    Çiftler uzunluğa göre sıralanıp batch'lenir, böylece padding en aza iner.
+    """
+
+    def __init__(self, session, tokenizer, meta: Dict[str, Any], model_path: Optional[str] = None):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.meta = meta
+        self.memory_bytes = os.path.getsize(model_path) if model_path and os.path.exists(model_path) else 0
+        self._input_names = [i.name for i in session.get_inputs()]
+
+    def predict(self, sentences: Sequence[Tuple[str, str]], batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        pairs: List[Tuple[str, str]] = [tuple(pair) for pair in sentences]
+        num_labels = self.meta.get("num_labels", 1)
+        if not pairs:
+            return np.zeros((0,) if num_labels == 1 else (0, num_labels), dtype=np.float32)
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][0]) + len(pairs[i][1]), reverse=True)
+        logits = np.empty((len(pairs), num_labels), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            logits[idx] = self._predict_batch([pairs[i] for i in idx])
+        if num_labels == 1:
+            return 1 / (1 + np.exp(-logits[:, 0]))
+        return logits
+
+    def _predict_batch(self, pairs: Sequence[Tuple[str, str]]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(pairs))
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        return self.session.run(None, {name: feeds[name] for name in self._input_names})[0]
+
+def load_cross_encoder(model_name: str, config: Optional[SearchConfig] = None):
+    """
+    config.rerank_backend'e göre cross-encoder: "torch" için sentence-transformers CrossEncoder, "onnx" için
+    (export dizini yoksa bir kez dışa aktarılan) OnnxCrossEncoder.
+    """
+    config = config or SearchConfig()
+    if config.rerank_backend != "onnx":
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(model_name)
+
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+
+    target_dir = export_dir(config, model_name)
+    model_file = QUANTIZED_FILE if config.rerank_onnx_quantize else MODEL_FILE
+    model_path = os.path.join(target_dir, model_file)
+    if not os.path.exists(model_path):
+        export_cross_encoder(model_name, target_dir, quantize=config.rerank_onnx_quantize)
+
+    with open(os.path.join(target_dir, META_FILE)) as f:
+        meta = json.load(f)
+    tokenizer = Tokenizer.from_file(os.path.join(target_dir, TOKENIZER_FILE))
+    tokenizer.enable_truncation(max_length=meta["max_length"])
+    tokenizer.enable_padding(pad_id=meta["pad_id"], pad_token=meta["pad_token"])
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = config.rerank_onnx_intra_op_threads or available_cores()
+    options.inter_op_num_threads = 1
+    session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+    logger.info(f"[ONNX] Loaded cross-encoder {model_name} ({model_file}, intra_op_threads={options.intra_op_num_threads})")
+    return OnnxCrossEncoder(session, tokenizer, meta, model_path)
@@ -13,4 +13,28 @@ def fuse_results(bm25_results, vector_results, weight_bm25=0.5, weight_vector=0.
             fused[res['id']] = weight_vector * res['score']
     # Skora göre sırala ve top_k döndür
     sorted_results = sorted(fused.items(), key=lambda x: x[1], reverse=True)[:top_k]
-    return [{'id': rid, 'score': score} for rid, score in sorted_results] 
\ No newline at end of file
+    return [{'id': rid, 'score': score} for rid, score in sorted_results] 
+
+def _min_max(scores):
+    if not scores:
+        return {}
+    low, high = min(scores.values()), max(scores.values())
+    if high == low:
+        return {key: 1.0 for key in scores}
+    return {key: (value - low) / (high - low) for key, value in scores.items()}
+
+def fuse_parent_scores(bm25_scores, vector_scores, weight_bm25=0.5, weight_vector=0.5, top_k=10):
+    """
+    parent_id -> skor sözlüklerini birleştirir. BM25 ve benzerlik skorları farklı ölçekte olduğundan
+    her kaynak kendi içinde [0, 1] aralığına (min-max) çekilip ağırlıklı toplanır; bir kaynakta
+    bulunmayan parent o kaynaktan 0 alır.
+    Dönüş: [(parent_id, fused, bm25_norm, vector_norm)] fused skora göre azalan.
+    """
+    bm25_norm = _min_max(bm25_scores)
+    vector_norm = _min_max(vector_scores)
+    fused = []
+    for pid in set(bm25_norm) | set(vector_norm):
+        b, v = bm25_norm.get(pid, 0.0), vector_norm.get(pid, 0.0)
+        fused.append((pid, weight_bm25 * b + weight_vector * v, b, v))
+    fused.sort(key=lambda item: item[1], reverse=True)
+    return fused[:top_k]
@@ -1,51 +1,155 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
 from . import bm25_service, vector_service, fusion, rerank
-from backend.services.rag_service import RagService
+from .config import SearchConfig
+from backend.services.rag_service import get_rag_service
 
-def hybrid_search(query, bm25_index, milvus_client, cross_encoder_model, top_k=10):
+logger = logging.getLogger(__name__)
+
+async def _with_timeout(stage: str, coro, timeout_ms: int, timings: Dict[str, float], default):
+    """Aşamayı zaman aşımıyla çalıştırır; hata veya zaman aşımında default döner (arama kısmi sonuçla sürer)."""
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(coro, timeout_ms / 1000)
+    except asyncio.TimeoutError:
+        logger.warning(f"[HYBRID] {stage} timed out after {timeout_ms} ms")
+        return default
+    except Exception as e:
+        logger.error(f"[HYBRID] {stage} failed: {e}")
+        return default
+    finally:
+        timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+def _bm25_parent_scores(results) -> Dict[int, float]:
+    """BM25 sonuçlarından parent başına en yüksek skor."""
+    scores: Dict[int, float] = {}
+    for res in results or []:
+        pid = res.get('parent_id') or (res.get('metadata') or {}).get('parent_id')
+        if pid is not None and res.get('score') is not None:
+            scores[pid] = max(scores.get(pid, float('-inf')), res['score'])
+    return scores
+
+def _vector_parent_scores(rag_service, results) -> Dict[int, float]:
+    """Milvus hit'lerinden parent başına en yüksek benzerlik."""
+    scores: Dict[int, float] = {}
+    for hit in (results[0] if results else []):
+        _, pid, score = rag_service._extract_metadata(hit)
+        if pid is not None and score is not None:
+            scores[pid] = max(scores.get(pid, float('-inf')), score)
+    return scores
+
+async def hybrid_search(
+    query,
+    bm25_index=None,
+    milvus_client=None,
+    cross_encoder_model=None,
+    top_k=10,
+    rag_service=None,
+    config: Optional[SearchConfig] = None,
+    tenant_id: Optional[str] = None
+) -> List[Dict]:
     """
-    Advanced RAG hybrid search pipeline:
-    - BM25 ve vektör arama yapılır.
-    - Semantic search pipeline'ı ile parent chunk'lar alınır.
-    - BM25 ve vektör sonuçları fusion ile birleştirilir.
-    - Parent chunk tekrarları engellenir.
-    - İlk 10-20 sonuç cross-encoder ile rerank edilir.
-    - Sonuçlar içerik ve metadata ile birlikte döner.
+    Advanced RAG hybrid search pipeline (async):
+    - BM25 ve vektör araması eşzamanlı çalışır; her kaynağın sonucu gelir gelmez parent chunk'ları
+      veritabanından çekilir, diğer kaynak beklenmez.
+    - Her aşamanın zaman aşımı vardır; süresi dolan kaynak atlanır.
+    - Skorlar kaynak bazında normalize edilip parent düzeyinde ağırlıklı birleştirilir (fusion).
+    - cross_encoder_model (ham model veya CrossEncoderReranker) verilirse ya da SEARCH_RERANK_ENABLED açıksa fused
+      adaylar cross-encoder ile, zaman bütçesi içinde rerank edilir (bkz. rerank.CrossEncoderReranker).
+    - Sonuçlar içerik, fused skor ve kaynak bazlı skorlarla döner.
+    - tenant_id verilirse vektör araması o tenant'ın partition'ıyla, BM25 top-k'sı o tenant'ın dokümanlarıyla
+      sınırlanır; böylece fusion normalizasyonu da yalnızca tenant'ın skorlarını görür. Parent'lar ayrıca
+      tenant'a göre çekilir.
+    Embedding modeli, Milvus client'ı ve DB paylaşılan RagService üzerinden kullanılır.
     """
-    # BM25 ve vektör arama
-    bm25_results = bm25_service.bm25_search(query, bm25_index, top_k=top_k)
-    vector_results = vector_service.vector_search(query, milvus_client, top_k=top_k)
-    # Semantic search ile parent chunk'ları al
-    rag_service = RagService()
-    import asyncio
-    parent_chunks_semantic = asyncio.run(rag_service.retrieve_context(query))
-    # Fusion
-    fused = fusion.fuse_results(bm25_results, vector_results, top_k=top_k)
-    # Parent chunk tekrarlarını engelle, semantic search parent'larını da dahil et
-    parent_ids = set()
-    results_with_content = []
-    # BM25 ve vektör sonuçlarından parent_id topla
-    for res in bm25_results + vector_results:
-        meta = res.get('metadata', {})
-        pid = meta.get('parent_id')
-        if pid:
-            parent_ids.add(pid)
-    # Semantic search parent'larını da ekle
-    for p in parent_chunks_semantic:
-        parent_ids.add(p['parent_id'])
-    # Parent chunk'ları veritabanından çek (örnek: rag_service ile)
-    # (Burada async/await yerine örnek sync çağrı var, gerçek kodda async olmalı)
-    parent_chunks = {p['parent_id']: p for p in parent_chunks_semantic}
-    # Sonuçları parent bazında birleştir
-    for pid in parent_ids:
-        parent = parent_chunks.get(pid)
-        if parent:
-            results_with_content.append({
-                'parent_id': pid,
-                'parent_title': parent['parent_title'],
-                'parent_content': parent['parent_content'],
-                'score': None,  # Fusion skorunu buraya ekleyebilirsin
-                'source': 'hybrid',
-            })
-    # Fusion skorlarını parent_id ile eşleştirip ekle (isteğe bağlı)
-    # Sonuçları skora göre sırala ve dön
-    return results_with_content[:top_k] 
\ No newline at end of file
+    config = config or SearchConfig()
+    rag_service = rag_service or get_rag_service()
+    milvus_client = milvus_client or rag_service.milvus_service
+    candidates = max(top_k, config.hybrid_candidates)
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    parents: Dict[int, Dict] = {}
+    requested = set()
+    failed = set()  # Çekimi zaman aşımına uğrayan veya hata veren parent'lar
+
+    async def fetch_parents(stage: str, parent_ids) -> None:
+        missing = [pid for pid in parent_ids if pid not in requested]
+        requested.update(missing)
+        if missing:
+            fetched = await _with_timeout(
+                stage, rag_service.fetch_parent_chunks(missing, tenant_id), config.parent_fetch_timeout_ms, timings, None
+            )
+            if fetched is None:
+                failed.update(missing)
+            else:
+                parents.update(fetched)
+
+    async def bm25_stage() -> Dict[int, float]:
+        if bm25_index is None:
+            return {}
+        results = await _with_timeout(
+            "bm25",
+            asyncio.to_thread(bm25_service.bm25_search, query, bm25_index, top_k=candidates, tenant_id=tenant_id),
+            config.bm25_timeout_ms, timings, []
+        )
+        scores = _bm25_parent_scores(results)
+        await fetch_parents("parents_bm25", scores)
+        return scores
+
+    async def vector_stage() -> Dict[int, float]:
+        embeddings = await _with_timeout(
+            "embed", rag_service.embedding_service.embed_async([query]), config.embed_timeout_ms, timings, None
+        )
+        if not embeddings:
+            return {}
+        results = await _with_timeout(
+            "vector",
+            vector_service.vector_search(embeddings[0], milvus_client, top_k=candidates, tenant_id=tenant_id),
+            config.vector_timeout_ms, timings, None
+        )
+        scores = _vector_parent_scores(rag_service, results)
+        await fetch_parents("parents_vector", scores)
+        return scores
+
+    bm25_scores, vector_scores = await asyncio.gather(bm25_stage(), vector_stage())
+    # Bir kaynağın çekimi başarısız olduysa o parent'lar diğer kaynakta atlanmıştır; fusion'dan önce bir kez daha istenir
+    if failed:
+        requested.difference_update(failed)
+        await fetch_parents("parents_retry", sorted(failed))
+    fused = fusion.fuse_parent_scores(
+        bm25_scores,
+        vector_scores,
+        weight_bm25=config.hybrid_weight_bm25 if bm25_scores else 0.0,
+        weight_vector=config.hybrid_weight_vector if vector_scores else 0.0,
+        top_k=candidates
+    )
+    results = []
+    for pid, score, bm25_norm, vector_norm in fused:
+        parent = parents.get(pid)
+        if not parent:
+            continue
+        results.append({
+            'parent_id': pid,
+            'parent_title': parent['title'],
+            'parent_content': parent['content'],
+            'content': parent['content'],
+            'score': round(score, 6),
+            'bm25_score': bm25_scores.get(pid),
+            'vector_score': vector_scores.get(pid),
+            'source': 'hybrid' if pid in bm25_scores and pid in vector_scores else ('bm25' if pid in bm25_scores else 'vector'),
+        })
+
+    reranker = rerank.as_reranker(cross_encoder_model, config)
+    if reranker is not None and results:
+        # Reranker rerank_budget_ms dolunca kendisi durur; rerank_timeout_ms yalnızca son çare sınırıdır
+        reranked = await _with_timeout(
+            "rerank", reranker.rerank(query, results, top_k), config.rerank_timeout_ms, timings, None
+        )
+        results = reranked if reranked is not None else results
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"[HYBRID] {len(results[:top_k])} parents (bm25={len(bm25_scores)}, vector={len(vector_scores)}) timings_ms={timings}")
+    return results[:top_k]
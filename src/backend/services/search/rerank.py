@@ -1,8 +1,169 @@
-def rerank_with_cross_encoder(query, candidates, cross_encoder_model, top_k=10):
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .config import SearchConfig
+
+logger = logging.getLogger(__name__)
+
+def query_hash(query: str) -> str:
+    return hashlib.sha1(query.strip().encode("utf-8")).hexdigest()[:16]
+
+def candidate_id(candidate: Dict):
+    """Önbellek anahtarındaki chunk kimliği: chunk_id, yoksa parent_id, o da yoksa id."""
+    for field in ("chunk_id", "parent_id", "id"):
+        if candidate.get(field) is not None:
+            return candidate[field]
+    return None
+
+def content_hash(candidate: Dict) -> str:
+    return hashlib.sha1(candidate.get("content", "").encode("utf-8")).hexdigest()[:16]
+
+def cache_key(qhash: str, candidate: Dict) -> Tuple[str, object, str]:
     """
-    Sonuçları cross-encoder ile yeniden sırala.
+    (sorgu hash'i, chunk id, içerik hash'i): revizyonla içeriği aynı id altında yeniden yazılan parent'lar
+    (bkz. FileService.reingest_file) eski metnin skoruyla eşleşmez.
+    """
+    return qhash, candidate_id(candidate), content_hash(candidate)
+
+def _as_scores(output) -> np.ndarray:
+    """predict çıktısını aday başına tek skora indirger; çok etiketli modellerde son (ilgili) sınıf kullanılır."""
+    scores = np.asarray(output, dtype=np.float32)
+    return scores[:, -1] if scores.ndim == 2 else scores.reshape(-1)
+
+def rerank_with_cross_encoder(query, candidates, cross_encoder_model, top_k=10, batch_size=32):
+    """
+    Sonuçları cross-encoder ile yeniden sırala (senkron, bütçesiz; async kod CrossEncoderReranker kullanmalıdır).
     """
     pairs = [(query, c['content']) for c in candidates]
-    scores = cross_encoder_model.predict(pairs)
+    scores = _as_scores(cross_encoder_model.predict(pairs, batch_size=batch_size)) if pairs else []
     reranked = sorted(zip(candidates, scores), key=lambda x: x[1], reverse=True)[:top_k]
-    return [c for c, s in reranked] 
\ No newline at end of file
+    return [c for c, s in reranked]
+
+class CrossEncoderReranker:
+    """
+    Cross-encoder rerank aşaması:
+    - Adaylar gelen (fused) sırayla sabit boyutlu batch'lerde, event loop dışında skorlanır.
+    - Çift skorları (sorgu hash'i, chunk id, içerik hash'i) anahtarıyla LRU önbellekte tutulur; tekrarlanan sorgular modeli çağırmaz.
+    - Bir sonraki batch zaman bütçesini aşacaksa durulur: skorlanan adaylar cross-encoder skoruna göre, kalanlar
+      gelen sırayla arkalarına eklenir. Böylece p99 bütçe ile sınırlı kalır.
+    Model (torch veya ONNX, bkz. cross_encoder.load_cross_encoder) ilk kullanımda yüklenir.
+    """
+
+    def __init__(self, model=None, model_name: Optional[str] = None, config: Optional[SearchConfig] = None):
+        self.config = config or SearchConfig()
+        self.model_name = model_name or self.config.rerank_model
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, object, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.pairs_scored = 0
+        self.cache_hits = 0
+        self.budget_stops = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from .cross_encoder import load_cross_encoder
+                    started = time.perf_counter()
+                    self._model = load_cross_encoder(self.model_name, self.config)
+                    logger.info(f"[RERANK] Loaded {self.model_name} ({self.config.rerank_backend}, {time.perf_counter() - started:.2f}s)")
+        return self._model
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        return _as_scores(self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False))
+
+    def _cached(self, keys: List[Tuple[str, object, str]]) -> List[Optional[float]]:
+        with self._cache_lock:
+            scores = []
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+            return scores
+
+    def _remember(self, items: Dict[Tuple[str, object, str], float]) -> None:
+        with self._cache_lock:
+            self._cache.update(items)
+            while len(self._cache) > self.config.rerank_cache_size:
+                self._cache.popitem(last=False)
+
+    async def rerank(self, query: str, candidates: List[Dict], top_k: int = 10, budget_ms: Optional[float] = None) -> List[Dict]:
+        """
+        candidates (content alanlı, en iyiden kötüye sıralı) içinden en iyi top_k; skorlanan adaylara
+        rerank_score eklenir, bütçe yetmediği için skorlanamayanlarda rerank_score None'dır.
+        """
+        budget = (self.config.rerank_budget_ms if budget_ms is None else budget_ms) / 1000
+        deadline = time.perf_counter() + budget
+        qhash = query_hash(query)
+        keys = [cache_key(qhash, c) for c in candidates]
+        scores = self._cached(keys)
+        self.cache_hits += sum(score is not None for score in scores)
+        pending = [i for i, score in enumerate(scores) if score is None]
+
+        batch_size = max(1, self.config.rerank_batch_size)
+        slowest_batch = 0.0
+        for start in range(0, len(pending), batch_size):
+            # Bir sonraki batch'in en yavaş batch kadar süreceği varsayılır; bütçeyi aşacaksa başlanmaz
+            if time.perf_counter() + slowest_batch > deadline:
+                self.budget_stops += 1
+                logger.info(f"[RERANK] Budget {budget * 1000:.0f} ms exhausted, {len(pending) - start}/{len(candidates)} candidates left unscored")
+                break
+            batch = pending[start:start + batch_size]
+            batch_started = time.perf_counter()
+            batch_scores = await asyncio.to_thread(self._predict, [(query, candidates[i].get('content', '')) for i in batch])
+            slowest_batch = max(slowest_batch, time.perf_counter() - batch_started)
+            for i, score in zip(batch, batch_scores.tolist()):
+                scores[i] = score
+            self.pairs_scored += len(batch)
+            self._remember({keys[i]: scores[i] for i in batch})
+
+        scored = sorted((i for i, score in enumerate(scores) if score is not None), key=lambda i: scores[i], reverse=True)
+        unscored = [i for i, score in enumerate(scores) if score is None]
+        return [{**candidates[i], 'rerank_score': scores[i]} for i in scored + unscored][:top_k]
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model_name,
+            "backend": self.config.rerank_backend,
+            "loaded": self._model is not None,
+            "pairs_scored": self.pairs_scored,
+            "cache_hits": self.cache_hits,
+            "cache_size": len(self._cache),
+            "budget_stops": self.budget_stops,
+        }
+
+# Process genelinde paylaşılan reranker (model ve skor önbelleği bir kez tutulur)
+_cross_encoder_reranker = None
+_wrapped_models: Dict[int, CrossEncoderReranker] = {}  # id(model) -> reranker; reranker modeli canlı tutar
+_reranker_lock = threading.Lock()
+
+def get_cross_encoder_reranker(config: Optional[SearchConfig] = None) -> CrossEncoderReranker:
+    global _cross_encoder_reranker
+    with _reranker_lock:
+        if _cross_encoder_reranker is None:
+            _cross_encoder_reranker = CrossEncoderReranker(config=config)
+        return _cross_encoder_reranker
+
+def as_reranker(cross_encoder_model=None, config: Optional[SearchConfig] = None) -> Optional[CrossEncoderReranker]:
+    """
+    hybrid_search'ün cross_encoder_model argümanını reranker'a çevirir: reranker olduğu gibi, ham model
+    (predict'li) model başına tek reranker'la sarılır; None ise rerank_enabled açıksa paylaşılan reranker döner.
+    """
+    config = config or SearchConfig()
+    if cross_encoder_model is None:
+        return get_cross_encoder_reranker(config) if config.rerank_enabled else None
+    if isinstance(cross_encoder_model, CrossEncoderReranker):
+        return cross_encoder_model
+    with _reranker_lock:
+        reranker = _wrapped_models.get(id(cross_encoder_model))
+        if reranker is None:
+            reranker = _wrapped_models[id(cross_encoder_model)] = CrossEncoderReranker(model=cross_encoder_model, config=config)
+        return reranker
@@ -0,0 +1,95 @@
+import math
+import random
+from collections import Counter
+from src.backend.services.search.analyzer import analyze
+from src.backend.services.search.bm25_index import BM25Index
+from src.backend.services.search.config import SearchConfig
+
+WORDS = ("belge belgeler belgenin arama aramada vektör indeks indekste parça parçalar model modeli "
+         "özellik özellikleri sorgu sorgular türkçe metin metinler kedi köpek ev evde hızlı yavaş").split()
+
+def _brute_force(docs, query, k1=1.2, b=0.75):
+    """Referans BM25: tüm canlı dokümanlar üzerinde tam skorlama."""
+    analyzed = {doc_id: Counter(analyze(text)) for doc_id, (_, text) in docs.items()}
+    lengths = {doc_id: sum(c.values()) for doc_id, c in analyzed.items()}
+    n = len(docs)
+    avgdl = sum(lengths.values()) / n
+    scores = Counter()
+    for term in dict.fromkeys(analyze(query)):
+        df = sum(1 for c in analyzed.values() if term in c)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for doc_id, counts in analyzed.items():
+            tf = counts.get(term, 0)
+            if tf:
+                scores[doc_id] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[doc_id] / avgdl))
+    return scores
+
+def test_topk_matches_brute_force_across_segments_and_deletes(tmp_path):
+    rng = random.Random(3)
+    index = BM25Index(SearchConfig(bm25_max_segments=4, bm25_merge_factor=2), path=str(tmp_path))
+    live = {}
+    writer = index.writer()
+    next_id = 1
+    for _ in range(9):
+        for _ in range(rng.randint(20, 60)):
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25)))
+            writer.add(next_id, next_id // 10, text)
+            live[next_id] = (next_id // 10, text)
+            next_id += 1
+        # Silinen ve başka parent'a taşınıp yeniden eklenen chunk'lar
+        removed = rng.sample(sorted(live), 8)
+        writer.delete(removed)
+        for doc_id in removed[:3]:
+            del live[doc_id]
+        for doc_id in removed[3:]:
+            live[doc_id] = (999, live[doc_id][1])
+            writer.add(doc_id, 999, live[doc_id][1])
+        writer.commit()
+    assert index.stats()["segments"] <= 4
+    assert index.stats()["documents"] == len(live)
+
+    for query in ("belge özellik", "kedi evde hızlı", "arama indeks vektör model", "metin"):
+        expected = _brute_force(live, query)
+        results = index.search(query, top_k=10)
+        top_scores = sorted(expected.values(), reverse=True)[:10]
+        assert len(results) == len(top_scores)
+        assert all(abs(r["score"] - s) < 1e-3 for r, s in zip(results, top_scores))
+        for r in results:
+            assert abs(expected[r["id"]] - r["score"]) < 1e-3
+            assert r["parent_id"] == live[r["id"]][0]
+
+def test_changes_from_another_writer_become_visible(tmp_path):
+    reader = BM25Index(SearchConfig(), path=str(tmp_path))
+    assert reader.search("belge", 5) == []
+    writer = BM25Index(SearchConfig(), path=str(tmp_path)).writer()
+    writer.add(1, 7, "Belgelerin özellikleri")
+    writer.commit()
+    assert [r["id"] for r in reader.search("belgenin özelliği", 5)] == [1]
+    writer.delete([1])
+    writer.commit()
+    assert reader.search("belge", 5) == []
+
+def test_tenant_search_only_ranks_the_callers_documents(tmp_path):
+    index = BM25Index(SearchConfig(bm25_max_segments=2, bm25_merge_factor=2), path=str(tmp_path))
+    writer = index.writer()
+    # Büyük tenant'ın daha iyi eşleşen dokümanları küçük tenant'ınkileri global top-k'dan iterdi
+    for doc_id in range(1, 41):
+        writer.add(doc_id, doc_id, "belge belge özellik", "buyuk")
+        if doc_id % 10 == 0:
+            writer.commit()
+    writer.add(100, 50, "uzun bir metin içinde geçen belge", "kucuk")
+    writer.add(101, 51, "kedi evde", "kucuk")
+    writer.commit()
+    assert index.stats()["segments"] <= 2
+
+    assert [r["id"] for r in index.search("belge", top_k=5, tenant_id="kucuk")] == [100]
+    assert {r["id"] for r in index.search("belge", top_k=50, tenant_id="buyuk")} == set(range(1, 41))
+    assert index.search("belge", top_k=5, tenant_id="baska") == []
+    assert len(index.search("belge", top_k=50)) == 41
+    assert not index.needs_rebuild()
+
+    # Tenant'sız (eski) dokümanlar filtreden geçer ve yeniden kurmayı tetikler
+    writer.add(200, 60, "belge", None)
+    writer.commit()
+    assert {r["id"] for r in index.search("belge", top_k=5, tenant_id="kucuk")} == {100, 200}
+    assert index.needs_rebuild()
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+from src.backend.services.rag_service import RagService
+from src.backend.services.search.config import SearchConfig
+from src.backend.services.search.hybrid_search import hybrid_search
+from src.backend.services.vector_store import VectorStore
+
+class _Hit:
+    def __init__(self, parent_id, similarity):
+        self.entity = {'metadata': json.dumps({'parent_id': parent_id})}
+        self.similarity = similarity
+
+class _Embedder:
+    async def embed_async(self, texts):
+        return [[0.1, 0.2] for _ in texts]
+
+class _Milvus:
+    search_async = VectorStore.search_async
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.tenants = []
+
+    def search(self, query_embedding, top_k=5, filter_expr=None, tenant_id=None):
+        self.tenants.append(tenant_id)
+        time.sleep(self.delay)
+        return [[_Hit(1, 0.9), _Hit(2, 0.5), _Hit(1, 0.4)]]
+
+class _BM25Index:
+    def __init__(self, delay=0.2):
+        self.delay = delay
+
+    def search(self, query, top_k=10, tenant_id=None):
+        time.sleep(self.delay)
+        return [{'id': 10, 'score': 7.0, 'metadata': {'parent_id': 3}}, {'id': 11, 'score': 3.0, 'parent_id': 2}]
+
+class _Rag:
+    _extract_metadata = RagService._extract_metadata
+
+    def __init__(self, milvus, foreign=()):
+        self.embedding_service = _Embedder()
+        self.milvus_service = milvus
+        self.foreign = set(foreign)  # başka tenant'a ait parent'lar
+        self.fetches = []
+
+    async def fetch_parent_chunks(self, parent_ids, tenant_id=None):
+        self.fetches.append(sorted(parent_ids))
+        return {
+            pid: {'title': f'P{pid}', 'content': f'content {pid}'}
+            for pid in parent_ids if tenant_id is None or pid not in self.foreign
+        }
+
+def test_sources_run_concurrently_with_fused_scores():
+    rag = _Rag(_Milvus())
+    started = time.perf_counter()
+    results = asyncio.run(hybrid_search("soru", bm25_index=_BM25Index(), top_k=5, rag_service=rag))
+    assert time.perf_counter() - started < 0.35
+    by_parent = {r['parent_id']: r for r in results}
+    assert set(by_parent) == {1, 2, 3}
+    # Parent 2 iki kaynakta da var; her parent yalnızca bir kez çekilir
+    assert by_parent[2]['source'] == 'hybrid'
+    assert sorted(pid for batch in rag.fetches for pid in batch) == [1, 2, 3]
+    assert all(r['score'] is not None for r in results)
+    assert [r['score'] for r in results] == sorted((r['score'] for r in results), reverse=True)
+    assert by_parent[1]['vector_score'] == 0.9
+
+def test_timed_out_stage_is_skipped():
+    rag = _Rag(_Milvus(delay=0.0))
+    config = SearchConfig(bm25_timeout_ms=50)
+    results = asyncio.run(hybrid_search("soru", bm25_index=_BM25Index(delay=0.3), top_k=5, rag_service=rag, config=config))
+    assert {r['parent_id'] for r in results} == {1, 2}
+    assert all(r['source'] == 'vector' for r in results)
+
+def test_tenant_scope_limits_vector_search_and_bm25_candidates():
+    milvus = _Milvus(delay=0.0)
+    rag = _Rag(milvus, foreign={3})
+    results = asyncio.run(hybrid_search("soru", bm25_index=_BM25Index(delay=0.0), top_k=5, rag_service=rag, tenant_id="u1"))
+    assert milvus.tenants == ["u1"]
+    # Parent 3 yalnızca (tenant'sız) BM25 indeksinden geldi ve başka tenant'a ait
+    assert {r['parent_id'] for r in results} == {1, 2}
+
+class _CrossEncoder:
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        return [float(content.split()[-1]) for _, content in pairs]
+
+def test_cross_encoder_reranks_fused_results():
+    rag = _Rag(_Milvus(delay=0.0))
+    results = asyncio.run(hybrid_search("soru", bm25_index=_BM25Index(delay=0.0), cross_encoder_model=_CrossEncoder(), top_k=2, rag_service=rag))
+    assert [r['parent_id'] for r in results] == [3, 2]
+    assert results[0]['rerank_score'] == 3.0
+
+class _FlakyRag(_Rag):
+    async def fetch_parent_chunks(self, parent_ids, tenant_id=None):
+        if not self.fetches:
+            self.fetches.append(None)
+            raise ConnectionError("db down")
+        return await super().fetch_parent_chunks(parent_ids, tenant_id)
+
+def test_failed_parent_fetch_is_retried_before_fusion():
+    rag = _FlakyRag(_Milvus(delay=0.0))
+    results = asyncio.run(hybrid_search("soru", bm25_index=_BM25Index(delay=0.0), top_k=5, rag_service=rag))
+    # İlk çekim (hangi kaynağınki olursa olsun) başarısız; ortak parent 2 diğer kaynakta atlanmış olsa da sonuçta yer alır
+    assert {r['parent_id'] for r in results} == {1, 2, 3}
@@ -0,0 +1,98 @@
+import asyncio
+import time
+import numpy as np
+from src.backend.services.search.config import SearchConfig
+from src.backend.services.search.cross_encoder import OnnxCrossEncoder
+from src.backend.services.search.rerank import CrossEncoderReranker, as_reranker
+
+class _Model:
+    """Skor = içerikteki sayı; her predict çağrısının batch boyutu kaydedilir."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append(len(pairs))
+        time.sleep(self.delay)
+        return np.array([float(content.split()[-1]) for _, content in pairs])
+
+def _candidates(scores):
+    return [{'parent_id': i, 'content': f'parent {score}'} for i, score in enumerate(scores)]
+
+def _reranker(model, **config):
+    return CrossEncoderReranker(model=model, config=SearchConfig(**{'rerank_batch_size': 4, 'rerank_budget_ms': 10000, **config}))
+
+def test_batches_and_orders_by_cross_encoder_score():
+    model = _Model()
+    results = asyncio.run(_reranker(model).rerank("soru", _candidates([3, 9, 1, 7, 5, 8, 2, 6, 4, 0]), top_k=3))
+    assert model.batches == [4, 4, 2]
+    assert [r['parent_id'] for r in results] == [1, 5, 3]
+    assert results[0]['rerank_score'] == 9.0
+
+def test_pair_scores_are_cached_per_query():
+    model = _Model()
+    reranker = _reranker(model)
+    candidates = _candidates([3, 9, 1, 7, 5])
+    asyncio.run(reranker.rerank("soru", candidates))
+    asyncio.run(reranker.rerank(" soru ", candidates + _candidates([0, 0, 0, 0, 0, 4])[5:]))
+    # İkinci çağrıda yalnızca yeni aday (parent 5) skorlanır
+    assert model.batches == [4, 1, 1]
+    asyncio.run(reranker.rerank("başka soru", candidates))
+    assert model.batches[-2:] == [4, 1]
+    assert reranker.stats()['cache_hits'] == 5
+
+def test_rewritten_content_is_rescored():
+    model = _Model()
+    reranker = _reranker(model)
+    asyncio.run(reranker.rerank("soru", [{'parent_id': 7, 'content': 'eski 1'}]))
+    # Revizyon parent'ın içeriğini aynı id altında yeniden yazar; eski skor kullanılmamalı
+    results = asyncio.run(reranker.rerank("soru", [{'parent_id': 7, 'content': 'yeni 5'}]))
+    assert model.batches == [1, 1] and results[0]['rerank_score'] == 5.0
+
+def test_budget_stops_early_with_best_ordering_so_far():
+    model = _Model(delay=0.05)
+    reranker = _reranker(model, rerank_batch_size=2, rerank_budget_ms=80)
+    started = time.perf_counter()
+    results = asyncio.run(reranker.rerank("soru", _candidates([1, 9, 8, 7, 6, 5]), top_k=6))
+    assert time.perf_counter() - started < 0.1
+    assert model.batches == [2]
+    # Skorlanan iki aday cross-encoder sırasıyla, kalanlar gelen (fused) sırayla
+    assert [r['parent_id'] for r in results] == [1, 0, 2, 3, 4, 5]
+    assert results[2]['rerank_score'] is None and reranker.stats()['budget_stops'] == 1
+
+def test_as_reranker_wraps_raw_models_once():
+    model = _Model()
+    assert as_reranker(model) is as_reranker(model)
+    assert as_reranker(None, SearchConfig(rerank_enabled=False)) is None
+
+class _Encoding:
+    def __init__(self, ids, width):
+        self.ids = ids + [0] * (width - len(ids))
+        self.attention_mask = [1] * len(ids) + [0] * (width - len(ids))
+        self.type_ids = [0] * width
+
+class _FakeTokenizer:
+    def encode_batch(self, pairs):
+        ids = [[len(word) for word in f"{query} {text}".split()] for query, text in pairs]
+        width = max(len(i) for i in ids)
+        return [_Encoding(i, width) for i in ids]
+
+class _Input:
+    def __init__(self, name):
+        self.name = name
+
+class _FakeSession:
+    """Logit = maskelenmiş token id toplamı - 5."""
+
+    def get_inputs(self):
+        return [_Input("input_ids"), _Input("attention_mask")]
+
+    def run(self, outputs, feeds):
+        return [((feeds["input_ids"] * feeds["attention_mask"]).sum(axis=1, keepdims=True) - 5).astype(np.float32)]
+
+def test_onnx_cross_encoder_scores_in_input_order():
+    model = OnnxCrossEncoder(_FakeSession(), _FakeTokenizer(), {"max_length": 128, "num_labels": 1})
+    scores = model.predict([("a", "bb"), ("a", "bbbb ccc"), ("a", "b")], batch_size=2)
+    np.testing.assert_allclose(scores, 1 / (1 + np.exp(-np.array([-2.0, 3.0, -3.0]))), rtol=1e-6)
+    assert model.predict([]).shape == (0,)
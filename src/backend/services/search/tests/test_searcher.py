@@ -2,4 +2,15 @@ from src.backend.services.search.searcher import SearchService
 
 def test_search_empty():
     service = SearchService()
-    assert service.search(None) == [] 
\ No newline at end of file
+    assert service.search(None) == [] 
+def test_search_uses_vector_store(tmp_path):
+    from src.backend.services.embedded_vector_store import EmbeddedVectorStore
+    store = EmbeddedVectorStore(path=str(tmp_path))
+    store.insert_embeddings([[1.0, 0.0], [0.0, 1.0]], [
+        {"tenant_id": "u1", "chunk_id": 1, "order": 2, "metadata": {"text": "bir"}},
+        {"tenant_id": "u2", "chunk_id": 2, "metadata": {"text": "iki"}},
+    ])
+    service = SearchService(store)
+    results = service.search([0.9, 0.1], top_k=2)
+    assert [r['content'] for r in results] == ['bir', 'iki'] and results[0]['order'] == 2
+    assert [r['metadata']['chunk_id'] for r in service.search([0.9, 0.1], tenant_id="u2")] == [2]
@@ -1,6 +1,6 @@
-def vector_search(query_embedding, milvus_client, top_k=10):
+async def vector_search(query_embedding, milvus_client, top_k=10, tenant_id=None):
     """
-    Milvus'ta vektör arama yap.
+    Vektör deposunda arama yap (event loop'u bloklamadan). tenant_id verilirse yalnızca o tenant'ın partition'ı aranır.
     """
-    results = milvus_client.search(query_embedding, top_k=top_k)
-    return results 
\ No newline at end of file
+    results = await milvus_client.search_async(query_embedding, top_k=top_k, tenant_id=tenant_id)
+    return results
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from src.backend.services.embedded_vector_store import EmbeddedVectorStore, parse_filter
+
+def _vectors(count, dim=8, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+
+def _store(path, **kwargs):
+    store = EmbeddedVectorStore(path=str(path), **kwargs)
+    vectors = _vectors(20)
+    ids = store.insert_embeddings(vectors, [
+        {"tenant_id": "a" if i < 10 else "b", "file_id": f"f{i % 3}", "parent_id": i // 2, "chunk_id": i, "metadata": {"n": i}}
+        for i in range(20)
+    ])
+    return store, vectors, ids
+
+def test_exact_search_returns_milvus_like_hits(tmp_path):
+    store, vectors, ids = _store(tmp_path)
+    hits = store.search(vectors[12], top_k=3)[0]
+    assert hits[0].id == ids[12] and hits[0].similarity == pytest.approx(1.0)
+    assert hits[0].entity["chunk_id"] == 12 and hits[0].entity["metadata"] == {"n": 12}
+    assert [h.similarity for h in hits] == sorted((h.similarity for h in hits), reverse=True)
+    # L2'de skor kare mesafedir, benzerlik 1 / (1 + mesafe)
+    l2, _, _ = _store(tmp_path / "l2", metric="L2")
+    nearest = l2.search(vectors[4] + 0.01, top_k=1)[0][0]
+    assert nearest.entity["chunk_id"] == 4 and nearest.distance == pytest.approx(0.0008, abs=1e-4)
+
+def test_tenant_scope_and_filter_expression(tmp_path):
+    store, vectors, _ = _store(tmp_path)
+    assert {h.entity["tenant_id"] for h in store.search(vectors[12], top_k=5, tenant_id="a")[0]} == {"a"}
+    hits = store.search(vectors[12], top_k=20, filter_expr='file_id in ["f0"] and (chunk_id > 5)')[0]
+    assert sorted(h.entity["chunk_id"] for h in hits) == [6, 9, 12, 15, 18]
+    assert store.search(vectors[0], tenant_id="yok")[0] == []
+    assert parse_filter('tenant_id == "x\\"y" and parent_id != -1') == [("tenant_id", "==", 'x"y'), ("parent_id", "!=", -1)]
+    with pytest.raises(ValueError):
+        parse_filter('chunk_id > 3 or chunk_id < 1')
+
+def test_search_many_matches_single_query_search(tmp_path):
+    for metric in ("COSINE", "L2"):
+        store, vectors, _ = _store(tmp_path / metric, metric=metric)
+        queries = vectors[[3, 12, 17]] + 0.05
+        batched = store.search_many(queries, top_k=4, tenant_id="b")
+        assert len(batched) == 3
+        for query, hits in zip(queries, batched):
+            single = store.search(query, top_k=4, tenant_id="b")[0]
+            assert [h.id for h in hits] == [h.id for h in single]
+            assert [h.distance for h in hits] == pytest.approx([h.distance for h in single], abs=1e-5)
+    assert store.search_many([]) == []
+    assert store.search_many(queries, tenant_id="yok") == [[], [], []]
+
+def test_deletes_are_persisted_and_seen_by_other_instances(tmp_path):
+    store, vectors, ids = _store(tmp_path)
+    reader = EmbeddedVectorStore(path=str(tmp_path))
+    assert store.delete_by_file("f0") == 7
+    store.delete_embeddings(ids[1:3])
+    assert reader.stats()["live"] == 11
+    assert ids[1] not in {h.id for h in reader.search(vectors[1], top_k=20)[0]}
+    # Yeniden açılan depo log'dan aynı durumu kurar ve id'ler devam eder
+    reopened = EmbeddedVectorStore(path=str(tmp_path))
+    assert reopened.stats()["live"] == 11
+    assert reopened.insert_embeddings(vectors[:1], [{}]) == [ids[-1] + 1]
+
+def test_compaction_and_torn_writes(tmp_path):
+    store, vectors, ids = _store(tmp_path, compact_min_deleted=5)
+    reader = EmbeddedVectorStore(path=str(tmp_path))
+    store.delete_embeddings(ids[:15])
+    assert store.stats() == {"rows": 5, "live": 5, "generation": 1, "metric": "COSINE"}
+    assert [h.id for h in reader.search(vectors[17], top_k=1)[0]] == [ids[17]]
+    # Yarıda kalmış bir yazma (log'a girmemiş vektör, yarım log satırı) sonraki yazmada atılır
+    with open(tmp_path / "vectors-1.f32", "ab") as f:
+        f.write(b"\0" * 10)
+    with open(tmp_path / "log-1.jsonl", "ab") as f:
+        f.write(b'{"id": 99')
+    assert reader.stats()["rows"] == 5
+    assert store.insert_embeddings(vectors[:2], [{}, {}]) == [ids[-1] + 1, ids[-1] + 2]
+    assert EmbeddedVectorStore(path=str(tmp_path)).stats()["live"] == 7
+
+def test_snapshot_decodes_with_its_own_vocabulary_after_compaction(tmp_path):
+    store, _, ids = _store(tmp_path, compact_min_deleted=5)
+    snapshot = store._refresh()
+    # Sıkıştırma sözlükleri yeniden kurar: yeni nesilde "b" kodu 0 olur ("a" eski nesilde 0'dı)
+    store.delete_embeddings(ids[:10] + ids[10:13])
+    assert store.stats()["generation"] == 1
+    assert store._entry(snapshot, 15)["tenant_id"] == "b"
+    assert np.flatnonzero(store._mask(snapshot, [("tenant_id", "==", "b")])).tolist() == list(range(13, 20))
+
+def test_delete_by_chunks_ignores_file_ownership(tmp_path):
+    store, vectors, ids = _store(tmp_path)
+    # Chunk'lar f0/f1/f2 dosyalarına dağılmış; silme yalnızca chunk_id alanına bakar
+    assert store.delete_by_chunks([0, 1, 2, 99]) == 3
+    assert store.delete_by_chunks([]) == 0
+    assert store.stats()["live"] == 17
+    assert {h.entity["chunk_id"] for h in store.search(vectors[1], top_k=20)[0]}.isdisjoint({0, 1, 2})
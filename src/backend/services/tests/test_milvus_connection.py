@@ -0,0 +1,110 @@
+import pytest
+from pymilvus.exceptions import MilvusUnavailableException
+from src.backend.services import milvus_connection
+from src.backend.services.milvus_connection import MilvusConnectionManager, MilvusUnavailableError
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+class _Connections:
+    def __init__(self):
+        self.up = False
+        self.connects = 0
+
+    def connect(self, **kwargs):
+        self.connects += 1
+        if not self.up:
+            raise MilvusUnavailableException(message="down")
+
+    def disconnect(self, alias):
+        pass
+
+class _Collection:
+    def __init__(self):
+        self.loads = 0
+
+    def load(self, timeout=None):
+        self.loads += 1
+
+@pytest.fixture
+def manager(monkeypatch):
+    clock, conns = _Clock(), _Connections()
+    monkeypatch.setattr(milvus_connection, "time", clock)
+    monkeypatch.setattr(milvus_connection, "connections", conns)
+    monkeypatch.setenv("MILVUS_RECONNECT_BACKOFF_MS", "1000")
+    monkeypatch.setenv("MILVUS_RECONNECT_BACKOFF_MAX_MS", "3000")
+    return MilvusConnectionManager("h", "1", alias="t"), clock, conns
+
+def test_reconnect_uses_exponential_backoff(manager):
+    manager, clock, conns = manager
+    with pytest.raises(MilvusUnavailableError):
+        manager.ensure_connected()
+    # Backoff süresince Milvus'a gidilmeden hata döner
+    with pytest.raises(MilvusUnavailableError):
+        manager.ensure_connected()
+    assert conns.connects == 1 and manager.status()["retry_in_s"] == 1.0
+    clock.now += 1
+    with pytest.raises(MilvusUnavailableError):
+        manager.ensure_connected()
+    assert manager.status()["retry_in_s"] == 2.0
+    clock.now += 10
+    with pytest.raises(MilvusUnavailableError):
+        manager.ensure_connected()
+    assert manager.status()["retry_in_s"] == 3.0  # üst sınır
+    clock.now += 3
+    conns.up = True
+    manager.ensure_connected()
+    assert manager.status()["connected"] and manager.status()["failures"] == 0
+
+def test_collections_are_pinned_and_reloaded_after_reconnect(manager):
+    manager, clock, conns = manager
+    conns.up = True
+    collection = _Collection()
+    created = []
+    factory = lambda name: created.append(name) or collection
+    assert manager.collection("c", factory) is collection
+    assert manager.collection("c", factory) is collection
+    assert created == ["c"] and collection.loads == 1 and manager.status()["ready"]
+
+    def fail():
+        raise MilvusUnavailableException(message="gone")
+    with pytest.raises(MilvusUnavailableException):
+        manager.call(fail)
+    assert not manager.status()["ready"]
+    clock.now += 1
+    manager.ensure_connected()
+    assert collection.loads == 2
+    # Bağlantı dışı hatalar bağlantıyı düşürmez
+    with pytest.raises(ValueError):
+        manager.call(lambda: (_ for _ in ()).throw(ValueError("bad expr")))
+    assert manager.status()["ready"]
+
+def test_health_monitor_survives_failing_checks(monkeypatch):
+    import asyncio
+    from src.backend.services.health import service as health_module
+    from src.backend.services.health.config import HealthConfig
+
+    class _Store:
+        checks = 0
+
+        def check(self):
+            self.checks += 1
+            if self.checks == 1:
+                raise ValueError("corrupt log line")
+            return {"ready": True}
+
+    store = _Store()
+    monkeypatch.setattr(health_module, "get_vector_store", lambda: store)
+    health = health_module.HealthService(HealthConfig(check_interval=0), init_service=None)
+
+    async def run():
+        task = asyncio.create_task(health.monitor_vector_store())
+        while store.checks < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert store.checks >= 3
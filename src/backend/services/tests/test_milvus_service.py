@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+from src.backend.services.milvus_service import (
+    MilvusService, RECORD_FIELDS, build_index_params, build_schema, build_search_params, tenant_filter, to_record, to_similarity
+)
+from src.backend.services.rag_service import RagService
+
+class _Result:
+    def __init__(self, keys=(), delete_count=0):
+        self.primary_keys = list(keys)
+        self.delete_count = delete_count
+
+class _SearchHit:
+    def __init__(self, id, distance):
+        self.id = id
+        self.distance = distance
+
+class _Collection:
+    def __init__(self):
+        self.inserted = []
+        self.deleted = []
+        self.searches = []
+
+    def search(self, data, anns_field, param, limit, expr, output_fields):
+        self.searches.append((data, expr))
+        return [[_SearchHit(q * 10 + i, 0.9 - i * 0.1) for i in range(limit)] for q in range(len(data))]
+
+    def insert(self, data, _async=False):
+        self.inserted.append(data)
+        start = sum(len(d[0]) for d in self.inserted[:-1])
+        return _Result(range(start, start + len(data[0])))
+
+    def delete(self, expr):
+        self.deleted.append(expr)
+        return _Result(delete_count=3)
+
+class _Connection:
+    alias = "test"
+
+    def ensure_connected(self):
+        pass
+
+    def call(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+def _service():
+    service = MilvusService(collection_name="test", insert_batch_size=2, connection=_Connection())
+    service._collection = _Collection()
+    return service
+
+def test_record_fields_follow_schema_order():
+    # auto_id primary key ve vektör dışındaki alanlar insert kolonlarıyla aynı sırada olmalı
+    assert [f.name for f in build_schema().fields][2:] == RECORD_FIELDS
+
+def test_to_record_splits_typed_fields():
+    record = to_record({"file_id": "f-1", "parent_id": 7, "chunk_id": 42, "type": "table", "order": 3, "metadata": {"page": 2}})
+    assert record == {"tenant_id": "", "file_id": "f-1", "parent_id": 7, "chunk_id": 42, "chunk_type": "table", "chunk_order": 3, "metadata": {"page": 2}}
+    assert to_record("serbest metin") == {"tenant_id": "", "file_id": "", "parent_id": -1, "chunk_id": -1, "chunk_type": "", "chunk_order": 0, "metadata": {"text": "serbest metin"}}
+    assert to_record('{"parent_id": "5"}')["parent_id"] == 5
+    assert to_record({"metadata": {"raw": b"x"}})["metadata"] == {"raw": "b'x'"}
+
+def test_insert_is_columnar_and_batched():
+    service = _service()
+    keys = service.insert_embeddings([[0.0] * 4] * 3, [{"file_id": "f", "parent_id": i, "chunk_id": 10 + i} for i in range(3)])
+    assert keys == [0, 1, 2]
+    first, second = service._collection.inserted
+    assert len(first) == 1 + len(RECORD_FIELDS)
+    assert first[RECORD_FIELDS.index("chunk_id") + 1] == [10, 11]
+    assert second[RECORD_FIELDS.index("parent_id") + 1] == [2]
+
+def test_insert_normalizes_vectors_for_cosine_and_ip():
+    service = _service()
+    service.metric = "IP"
+    service.insert_embeddings([[3.0, 4.0, 0.0, 0.0]], [{}])
+    assert np.allclose(service._collection.inserted[0][0], [[0.6, 0.8, 0.0, 0.0]])
+    service.metric = "L2"
+    service.insert_embeddings([[3.0, 4.0, 0.0, 0.0]], [{}])
+    assert np.allclose(service._collection.inserted[1][0], [[3.0, 4.0, 0.0, 0.0]])
+
+def test_index_and_search_params_are_configurable():
+    assert build_index_params("hnsw", "cosine", {"M": 32}) == {
+        "index_type": "HNSW", "metric_type": "COSINE", "params": {"M": 32, "efConstruction": 200}
+    }
+    assert build_search_params("IVF_SQ8", "IP", {"nprobe": 64}) == {"metric_type": "IP", "params": {"nprobe": 64}}
+    # HNSW'de ef top_k'dan küçük olamaz
+    assert build_search_params("HNSW", "COSINE", {"ef": 16}, top_k=50)["params"]["ef"] == 50
+    with pytest.raises(ValueError):
+        build_index_params("DISKANN_X", "COSINE")
+    with pytest.raises(ValueError):
+        build_index_params("HNSW", "HAMMING")
+
+def test_similarity_follows_metric():
+    assert to_similarity(0.83, "COSINE") == pytest.approx(0.83)
+    assert to_similarity(3.0, "L2") == pytest.approx(0.25)
+    assert to_similarity(None, "IP") == 0.0
+
+def test_tenant_filter_scopes_search_expression():
+    assert tenant_filter(None, "chunk_id > 0") == "chunk_id > 0"
+    assert tenant_filter("u1") == 'tenant_id == "u1"'
+    assert tenant_filter("", "chunk_id > 0") == 'tenant_id == "" and (chunk_id > 0)'
+    assert build_schema().fields[2].is_partition_key
+
+def test_delete_by_file_uses_scalar_expression():
+    service = _service()
+    assert service.delete_by_file(['a"b', "c"]) == 3
+    assert service._collection.deleted == ['file_id in ["a\\"b","c"]']
+
+def test_search_many_is_a_single_request():
+    service = _service()
+    results = service.search_many(np.ones((3, 4)), top_k=2, tenant_id="t")
+    assert len(service._collection.searches) == 1
+    data, expr = service._collection.searches[0]
+    assert len(data) == 3 and expr == 'tenant_id == "t"'
+    assert [[hit.id for hit in hits] for hits in results] == [[0, 1], [10, 11], [20, 21]]
+    assert results[1][0].similarity == to_similarity(0.9, service.metric)
+    assert [h.id for h in service.search([1.0] * 4, top_k=1)[0]] == [0]
+
+class _Hit:
+    def __init__(self, entity):
+        self.entity = entity
+        self.similarity = 0.8
+
+def test_extract_metadata_reads_typed_fields():
+    metadata, parent_id, score = RagService._extract_metadata(None, _Hit({
+        "file_id": "f", "parent_id": 9, "chunk_id": 4, "chunk_type": "text", "chunk_order": 1, "metadata": {"page": 3}
+    }))
+    assert (parent_id, score) == (9, 0.8)
+    assert metadata["chunk_id"] == 4 and metadata["page"] == 3
+    # Eski koleksiyonun JSON string metadata'sı da okunur
+    assert RagService._extract_metadata(None, _Hit({"metadata": '{"parent_id": 2}'}))[1] == 2
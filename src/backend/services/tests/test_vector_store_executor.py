@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import threading
+import time
+import numpy as np
+import pytest
+from src.backend.services.rag_service import RagService
+from src.backend.services.vector_store import VectorStore, VectorStoreTimeoutError, get_vector_store_executor
+
+class _SlowStore(VectorStore):
+    """Bloklayan bir Milvus client'ı gibi davranır: insert batch başına 50 ms, arama 5 ms."""
+
+    def __init__(self, insert_delay=0.05, search_delay=0.005):
+        self.insert_delay = insert_delay
+        self.search_delay = search_delay
+
+    def insert_embeddings(self, embeddings, metadata, batch_size=None, async_insert=False, flush=False):
+        time.sleep(self.insert_delay)
+        return list(range(len(metadata)))
+
+    def delete_embeddings(self, ids, batch_size=None):
+        time.sleep(self.insert_delay)
+        return len(ids)
+
+    def delete_by_file(self, file_ids):
+        return 0
+
+    def delete_by_chunks(self, chunk_ids, batch_size=None):
+        return 0
+
+    def search(self, query_embedding, top_k=5, filter_expr=None, similarity_threshold=0.5, tenant_id=None):
+        time.sleep(self.search_delay)
+        return [[]]
+
+    def health(self):
+        return {"ready": True, "backend": "slow"}
+
+    def flush(self):
+        pass
+
+    def drop(self):
+        pass
+
+class _Embedder:
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(("embed", list(texts)))
+        return [[0.1, 0.2] for _ in texts]
+
+    async def embed_async(self, texts):
+        self.calls.append(("embed_async", list(texts)))
+        return [[0.1, 0.2] for _ in texts]
+
+def _rag(store):
+    rag = RagService.__new__(RagService)
+    rag.embedding_service = _Embedder()
+    rag.milvus_service = store
+    rag.logger = logging.getLogger(__name__)
+
+    async def fetch_parent_chunks(parent_ids, tenant_id=None):
+        return {}
+    rag.fetch_parent_chunks = fetch_parent_chunks
+    return rag
+
+class _GatedStore(_SlowStore):
+    """Insert'ler gate açılana kadar bloklanır; her çağrının hangi thread'de çalıştığı kaydedilir."""
+
+    def __init__(self):
+        super().__init__(search_delay=0)
+        self.gate = threading.Event()
+        self.threads = {"insert": set(), "search": set()}
+
+    def insert_embeddings(self, embeddings, metadata, batch_size=None, async_insert=False, flush=False):
+        self.threads["insert"].add(threading.current_thread().name)
+        self.gate.wait(10)
+        return list(range(len(metadata)))
+
+    def search(self, query_embedding, top_k=5, filter_expr=None, similarity_threshold=0.5, tenant_id=None):
+        self.threads["search"].add(threading.current_thread().name)
+        return [[]]
+
+def test_chat_searches_complete_while_write_pool_is_saturated():
+    store = _GatedStore()
+    rag = _rag(store)
+    executor = get_vector_store_executor()
+
+    async def run():
+        ingest = asyncio.gather(*(
+            store.insert_embeddings_async(np.zeros((100, 2)), [{}] * 100) for _ in range(executor.write_concurrency * 4)
+        ))
+        await asyncio.sleep(0)
+        try:
+            # Yazma havuzunun tüm thread'leri bloklu ve kuyrukta bekleyen yazmalar var; aramalar yine tamamlanmalı
+            saturated = executor.stats()["in_flight"]["write"]
+            contexts = await asyncio.wait_for(asyncio.gather(*(rag.retrieve_context("soru") for _ in range(20))), 5)
+            still_pending = not ingest.done()
+        finally:
+            store.gate.set()
+        await ingest
+        return saturated, contexts, still_pending
+
+    saturated, contexts, still_pending = asyncio.run(run())
+    assert saturated == executor.write_concurrency * 4
+    assert contexts == [[]] * 20 and still_pending
+    # Bloklayan çağrılar event loop thread'inde değil, ayrılmış havuzlarda çalışır
+    assert store.threads["insert"] and all(name.startswith("vector-write") for name in store.threads["insert"])
+    assert store.threads["search"] and all(name.startswith("vector-read") for name in store.threads["search"])
+
+def test_calls_time_out_including_queue_wait():
+    store = _SlowStore(insert_delay=0.3)
+
+    async def run():
+        with pytest.raises(VectorStoreTimeoutError):
+            await store.insert_embeddings_async([[0.0]], [{}], timeout=0.05)
+        # Arama zaman aşımı yazma kuyruğundan bağımsızdır
+        return await store.search_async([0.0], timeout=1.0)
+    assert asyncio.run(run()) == [[]]
+
+class _Hit:
+    def __init__(self, parent_id, similarity):
+        self.entity = {"parent_id": parent_id, "metadata": {}}
+        self.similarity = similarity
+
+class _BatchStore(_SlowStore):
+    def __init__(self):
+        super().__init__(search_delay=0)
+        self.calls = []
+
+    def search_many(self, query_embeddings, top_k=5, filter_expr=None, tenant_id=None):
+        self.calls.append((len(query_embeddings), tenant_id))
+        return [[_Hit(1, 0.9), _Hit(2, 0.8)], [], [_Hit(2, 0.7), _Hit(3, 0.2)]]
+
+def test_retrieve_context_many_batches_search_and_parent_fetch():
+    store = _BatchStore()
+    rag = _rag(store)
+    fetched = []
+
+    async def fetch_parent_chunks(parent_ids, tenant_id=None):
+        fetched.append(list(parent_ids))
+        return {i: {"title": f"t{i}", "content": f"c{i}"} for i in parent_ids}
+    rag.fetch_parent_chunks = fetch_parent_chunks
+
+    contexts = asyncio.run(rag.retrieve_context_many(["a", "b", "c"], tenant_id="u1"))
+    assert rag.embedding_service.calls == [("embed", ["a", "b", "c"])]
+    assert store.calls == [(3, "u1")]
+    assert fetched == [[1, 2, 3]]
+    assert [[c["parent_id"] for c in context] for context in contexts] == [[1, 2], [], [2, 3]]
+    assert asyncio.run(rag.retrieve_context_many([])) == []
@@ -0,0 +1,11 @@
+# Shared text normalization helpers
+from .sanitize import (
+    ascii_text,
+    collapse_whitespace,
+    is_printable,
+    normalize_unicode,
+    strip_unprintable,
+    strip_unsafe,
+)
+
+__all__ = ['ascii_text', 'collapse_whitespace', 'is_printable', 'normalize_unicode', 'strip_unprintable', 'strip_unsafe']
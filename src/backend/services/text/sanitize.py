@@ -0,0 +1,71 @@
+"""
+Ingestion, embedding ve loglama yollarının paylaştığı metin temizleme fonksiyonları.
+Karakter bazlı Python döngüleri yerine str.translate tabloları ve önceden derlenmiş regex'ler kullanılır.
+
+Çıktı tanımları (c: tek karakter):
+- strip_unsafe(text): c korunur ⇔ ord(c) < 127 veya c.isalnum() veya c.isspace()
+  (ASCII kontrol karakterleri ve boşluk sayılan karakterler korunur, DEL (0x7f) ve alfanümerik
+  olmayan ASCII dışı karakterler — noktalama, sembol, emoji, kontrol — silinir).
+- strip_unprintable(text, keep): c korunur ⇔ c.isprintable() veya c in keep.
+- is_printable(text): tüm karakterler yazdırılabilir mi (boş metin için True).
+- collapse_whitespace(text): her \\s+ dizisi tek boşluğa indirilir; baş/son boşluk kırpılmaz.
+- normalize_unicode(text, form): unicodedata.normalize; metin zaten normalse kopyalanmaz.
+- ascii_text(raw): byte dizisinden yalnızca yazdırılabilir ASCII (32-126) ile \t, \n, \r kalır.
+"""
+import re
+import unicodedata
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+class _LazyDeleteTable(dict):
+    """
+    str.translate için code point -> (kendisi | None) tablosu. Bütün Unicode aralığı için önceden
+    kurmak yerine her code point ilk görüldüğünde bir kez hesaplanır; sonraki aramalar C seviyesinde
+    dict erişimidir.
+    """
+
+    def __init__(self, keep):
+        super().__init__()
+        self._keep = keep
+
+    def __missing__(self, code_point):
+        value = code_point if self._keep(chr(code_point)) else None
+        self[code_point] = value
+        return value
+
+def _is_safe(char):
+    return ord(char) < 127 or char.isalnum() or char.isspace()
+
+_SAFE_TABLE = _LazyDeleteTable(_is_safe)
+_PRINTABLE_TABLES = {}
+
+def strip_unsafe(text: str) -> str:
+    if text.isascii():
+        # ASCII'de yalnızca DEL silinir
+        return text.replace('\x7f', '') if '\x7f' in text else text
+    return text.translate(_SAFE_TABLE)
+
+def strip_unprintable(text: str, keep: str = "") -> str:
+    if text.isprintable():
+        return text
+    table = _PRINTABLE_TABLES.get(keep)
+    if table is None:
+        keep_set = frozenset(keep)
+        table = _PRINTABLE_TABLES.setdefault(keep, _LazyDeleteTable(lambda c: c.isprintable() or c in keep_set))
+    return text.translate(table)
+
+def is_printable(text: str) -> bool:
+    return text.isprintable()
+
+def collapse_whitespace(text: str) -> str:
+    return WHITESPACE_RE.sub(' ', text)
+
+_NON_TEXT_BYTES = bytes(b for b in range(256) if not (32 <= b <= 126 or b in (9, 10, 13)))
+
+def ascii_text(raw: bytes) -> str:
+    return raw.translate(None, _NON_TEXT_BYTES).decode('ascii')
+
+def normalize_unicode(text: str, form: str = 'NFKC') -> str:
+    if unicodedata.is_normalized(form, text):
+        return text
+    return unicodedata.normalize(form, text)
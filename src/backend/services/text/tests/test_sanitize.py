@@ -0,0 +1,35 @@
+import random
+import re
+import unicodedata
+from src.backend.services.text.sanitize import (
+    ascii_text, collapse_whitespace, is_printable, normalize_unicode, strip_unprintable, strip_unsafe
+)
+
+# ASCII, kontrol karakterleri, DEL, Türkçe harfler, birleşik işaretler, semboller, emoji, NBSP, satır ayırıcı
+ALPHABET = (
+    [chr(c) for c in range(0, 128)]
+    + list("çğıöşüÇĞİÖŞÜ€£©®°±µ¶·«»–—‘’“”•…‰  ​́̈﻿")
+    + ["😀", "\U0001F4A9", "ﬁ", "２", "Ⅻ", "\ud800"]
+)
+
+def _corpus(n=300, seed=7):
+    rng = random.Random(seed)
+    return [""] + ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 80))) for _ in range(n)]
+
+def test_strip_unsafe_matches_char_loop():
+    for text in _corpus():
+        assert strip_unsafe(text) == ''.join(c for c in text if ord(c) < 127 or c.isalnum() or c.isspace())
+
+def test_strip_unprintable_matches_char_loop():
+    for text in _corpus():
+        assert strip_unprintable(text) == ''.join(c for c in text if c.isprintable())
+        assert strip_unprintable(text, keep='\n\t') == ''.join(c for c in text if c.isprintable() or c in '\n\t')
+        assert is_printable(text) == all(c.isprintable() for c in text)
+
+def test_whitespace_normalization_and_bytes():
+    for text in _corpus():
+        assert collapse_whitespace(text) == re.sub(r'\s+', ' ', text)
+        safe = text.encode('utf-8', errors='replace').decode('utf-8')
+        assert normalize_unicode(safe) == unicodedata.normalize('NFKC', safe)
+    raw = bytes(range(256)) * 3
+    assert ascii_text(raw) == ''.join(chr(b) for b in raw if 32 <= b <= 126 or b in [9, 10, 13])
@@ -0,0 +1,5 @@
+# Shared tokenizer components
+from .config import TokenizerConfig
+from .service import TokenizerService, get_tokenizer
+
+__all__ = ['TokenizerConfig', 'TokenizerService', 'get_tokenizer']
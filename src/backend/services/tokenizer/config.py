@@ -0,0 +1,11 @@
+from pydantic_settings import BaseSettings
+
+class TokenizerConfig(BaseSettings):
+    default_model: str = "gpt-3.5-turbo"
+    memo_size: int = 65536  # Encoder başına ezberlenen metin sayısı
+    memo_max_chars: int = 4096  # Daha uzun metinlerin sayısı ezberlenmez (bellek)
+    batch_threads: int = 4  # tiktoken encode_batch thread sayısı
+
+    class Config:
+        env_file = ".env"
+        env_prefix = "TOKENIZER_"
@@ -0,0 +1,145 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from backend.config.models import DEFAULT_TOKEN_ENCODING, MODEL_TOKEN_ENCODINGS, MODEL_TOKEN_LIMITS
+from .config import TokenizerConfig
+
+def _default_loader(encoding_name: str):
+    import tiktoken
+    return tiktoken.get_encoding(encoding_name)
+
+def estimate_tokens(text: str) -> int:
+    # Fallback: kelime sayısını 1.5 ile çarp
+    return int(len(text.split()) * 1.5)
+
+class Encoder:
+    """
+    Tek bir tiktoken encoding'i üzerinde ezberlenmiş (memoized, LRU) token sayımı.
+    Encoding yüklenemezse (tiktoken yok / çevrimdışı) kelime tabanlı tahmine düşer.
+    """
+
+    def __init__(self, name: str, encoding: Optional[Any], config: TokenizerConfig):
+        self.name = name
+        self.encoding = encoding
+        self.config = config
+        self._memo: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str) -> int:
+        count = self._lookup(text)
+        if count is None:
+            count = len(self.encoding.encode_ordinary(text)) if self.encoding is not None else estimate_tokens(text)
+            self._remember(text, count)
+        return count
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        """Ezberde olmayan metinler tek encode_batch çağrısıyla sayılır."""
+        counts = [self._lookup(text) for text in texts]
+        pending = [idx for idx, count in enumerate(counts) if count is None]
+        if pending:
+            if self.encoding is None:
+                fresh = [estimate_tokens(texts[idx]) for idx in pending]
+            else:
+                fresh = [len(tokens) for tokens in self.encode_batch([texts[idx] for idx in pending])]
+            for idx, count in zip(pending, fresh):
+                counts[idx] = count
+                self._remember(texts[idx], count)
+        return counts
+
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        if self.encoding is None:
+            raise RuntimeError(f"Encoding {self.name} is not available")
+        return self.encoding.encode_ordinary_batch(texts, num_threads=self.config.batch_threads)
+
+    def cache_info(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._memo), "hits": self.hits, "misses": self.misses}
+
+    def _lookup(self, text: str) -> Optional[int]:
+        with self._lock:
+            count = self._memo.get(text)
+            if count is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._memo.move_to_end(text)
+            return count
+
+    def _remember(self, text: str, count: int) -> None:
+        # Uzun metinler ezberlenmez; anahtar olarak tutulmaları belleği şişirir
+        if len(text) > self.config.memo_max_chars:
+            return
+        with self._lock:
+            self._memo[text] = count
+            if len(self._memo) > self.config.memo_size:
+                self._memo.popitem(last=False)
+
+class TokenizerService:
+    """
+    Process başına paylaşılan tokenizer. Encoder'lar model ailesine (MODEL_TOKEN_LIMITS anahtarları)
+    göre çözülür ve encoding başına bir kez yüklenir; aynı encoding'i kullanan aileler aynı Encoder'ı
+    paylaşır. Metin başına token sayıları ezberlenir.
+    """
+
+    def __init__(self, config: Optional[TokenizerConfig] = None, loader: Optional[Callable[[str], Any]] = None):
+        self.config = config or TokenizerConfig()
+        self._loader = loader or _default_loader
+        self._encoders: Dict[str, Encoder] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        # En uzun anahtar önce: "mistral large 2", "mistral"dan önce eşleşmeli
+        self._families = sorted(MODEL_TOKEN_LIMITS, key=len, reverse=True)
+
+    def family(self, model: Optional[str] = None) -> Optional[str]:
+        """Model adına karşılık gelen MODEL_TOKEN_LIMITS anahtarı (yoksa None)."""
+        model_lower = (model or self.config.default_model).lower()
+        for key in self._families:
+            if key in model_lower:
+                return key
+        return None
+
+    def encoder(self, model: Optional[str] = None) -> Encoder:
+        encoding_name = MODEL_TOKEN_ENCODINGS.get(self.family(model), DEFAULT_TOKEN_ENCODING)
+        encoder = self._encoders.get(encoding_name)
+        if encoder is not None:
+            return encoder
+        with self._lock:
+            encoder = self._encoders.get(encoding_name)
+            if encoder is None:
+                try:
+                    encoding = self._loader(encoding_name)
+                except Exception as e:
+                    self.logger.warning(f"[TOKENIZER] Encoding {encoding_name} unavailable, using word estimate: {e}")
+                    encoding = None
+                encoder = Encoder(encoding_name, encoding, self.config)
+                self._encoders[encoding_name] = encoder
+        return encoder
+
+    def count(self, text: str, model: Optional[str] = None) -> int:
+        return self.encoder(model).count(text)
+
+    def count_many(self, texts: List[str], model: Optional[str] = None) -> List[int]:
+        return self.encoder(model).count_many(texts)
+
+    def encode_batch(self, texts: List[str], model: Optional[str] = None) -> List[List[int]]:
+        return self.encoder(model).encode_batch(texts)
+
+    def prefix_sums(self, texts: List[str], model: Optional[str] = None) -> List[int]:
+        """sums[i] = texts[:i] token toplamı; herhangi bir [i, j) aralığının toplamı sums[j] - sums[i]."""
+        sums = [0]
+        for count in self.count_many(texts, model):
+            sums.append(sums[-1] + count)
+        return sums
+
+# Singleton tokenizer instance
+_tokenizer = None
+
+def get_tokenizer() -> TokenizerService:
+    """Get or create the process-wide tokenizer service"""
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = TokenizerService(TokenizerConfig())
+    return _tokenizer
@@ -0,0 +1,36 @@
+from src.backend.services.tokenizer.config import TokenizerConfig
+from src.backend.services.tokenizer.service import TokenizerService
+
+class _WordEncoding:
+    def encode_ordinary(self, text):
+        return text.split()
+
+    def encode_ordinary_batch(self, texts, num_threads=1):
+        return [t.split() for t in texts]
+
+def test_encoders_loaded_once_per_encoding():
+    loads = []
+    service = TokenizerService(TokenizerConfig(), loader=lambda name: loads.append(name) or _WordEncoding())
+    assert service.family("openai/gpt-4o") == "gpt-4"
+    assert service.family("mistralai/Mistral Large 2") == "mistral large 2"
+    # gpt-4 ve gpt-3.5 aynı encoding'i paylaşır
+    assert service.encoder("gpt-4") is service.encoder("gpt-3.5-turbo")
+    assert loads == ["cl100k_base"]
+
+def test_counts_are_memoized_and_batched():
+    service = TokenizerService(TokenizerConfig(memo_max_chars=10), loader=lambda name: _WordEncoding())
+    encoder = service.encoder()
+    assert service.count("bir iki üç") == 3
+    assert service.count_many(["bir iki üç", "dört beş", "uzun bir metin burada"]) == [3, 2, 4]
+    info = encoder.cache_info()
+    assert info["hits"] == 1
+    # memo_max_chars'tan uzun metin ezberlenmez
+    assert info["size"] == 2
+    assert service.prefix_sums(["a b", "c", "d e f"]) == [0, 2, 3, 6]
+
+def test_missing_encoding_falls_back_to_estimate():
+    def failing_loader(name):
+        raise OSError("offline")
+    service = TokenizerService(TokenizerConfig(), loader=failing_loader)
+    assert service.count("bir iki üç dört") == 6
+    assert service.count_many(["bir iki"]) == [3]
@@ -0,0 +1,183 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Union
+import asyncio
+import os
+import threading
+
+BACKENDS = ("milvus", "embedded")
+
+class VectorStoreTimeoutError(asyncio.TimeoutError):
+    """Vektör deposu çağrısı zaman aşımına uğradı (kuyrukta bekleme dahil)."""
+
+class VectorStoreExecutor:
+    """
+    Vektör deposu çağrılarını event loop dışında, ayrılmış thread havuzlarında çalıştırır. Aramalar ve yazmalar
+    (insert/delete/flush) ayrı havuz ve eşzamanlılık sınırına sahiptir; büyük bir ingest'in yazmaları aramaları
+    sıraya sokmaz. Havuz dolunca çağrılar sırada bekler; zaman aşımı bekleme süresini de kapsar ve başlamamış
+    çağrı sıradan çıkarılır.
+    """
+
+    def __init__(self):
+        self.read_concurrency = int(os.getenv('VECTOR_STORE_READ_CONCURRENCY', '8'))
+        self.write_concurrency = int(os.getenv('VECTOR_STORE_WRITE_CONCURRENCY', '2'))
+        self.read_timeout = float(os.getenv('VECTOR_STORE_READ_TIMEOUT_MS', '5000')) / 1000
+        self.write_timeout = float(os.getenv('VECTOR_STORE_WRITE_TIMEOUT_MS', '120000')) / 1000
+        self._pools = {
+            "read": ThreadPoolExecutor(max_workers=self.read_concurrency, thread_name_prefix="vector-read"),
+            "write": ThreadPoolExecutor(max_workers=self.write_concurrency, thread_name_prefix="vector-write"),
+        }
+        self.in_flight = {"read": 0, "write": 0}
+        self.timeouts = {"read": 0, "write": 0}
+
+    async def run(self, kind: str, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        timeout = timeout if timeout is not None else (self.read_timeout if kind == "read" else self.write_timeout)
+        future = asyncio.get_running_loop().run_in_executor(self._pools[kind], lambda: fn(*args, **kwargs))
+        self.in_flight[kind] += 1
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts[kind] += 1
+            raise VectorStoreTimeoutError(f"vector store {kind} {getattr(fn, '__name__', fn)} timed out after {timeout * 1000:.0f} ms")
+        finally:
+            self.in_flight[kind] -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "read_concurrency": self.read_concurrency,
+            "write_concurrency": self.write_concurrency,
+            "in_flight": dict(self.in_flight),
+            "timeouts": dict(self.timeouts),
+        }
+
+    def shutdown(self) -> None:
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+_vector_store_executor = None
+
+def get_vector_store_executor() -> VectorStoreExecutor:
+    global _vector_store_executor
+    if _vector_store_executor is None:
+        _vector_store_executor = VectorStoreExecutor()
+    return _vector_store_executor
+
+class VectorStore(ABC):
+    """
+    Child chunk vektör deposu arayüzü. Kayıtlar milvus_service.to_record alanlarını taşır (tenant_id, file_id,
+    parent_id, chunk_id, chunk_type, chunk_order, JSON metadata); search sonuçları Milvus hit'leri gibi id, distance,
+    similarity ve entity (alan -> değer) taşır ve [[hit, ...]] olarak döner.
+    """
+    metric: str = "COSINE"
+
+    def insert_embedding(self, embedding: List[float], metadata: Union[Dict, str]) -> int:
+        return self.insert_embeddings([embedding], [metadata])[0]
+
+    @abstractmethod
+    def insert_embeddings(self, embeddings, metadata: List, batch_size: Optional[int] = None, async_insert: bool = False, flush: bool = False) -> List[int]:
+        """Vektörleri metadata kayıtlarıyla ekler; giriş sırasıyla primary key'leri döner."""
+
+    @abstractmethod
+    def delete_embeddings(self, ids: List[int], batch_size: Optional[int] = None) -> int:
+        """Primary key'leri verilen vektörleri siler."""
+
+    @abstractmethod
+    def delete_by_file(self, file_ids: Union[str, Sequence[str]]) -> int:
+        """Bir veya birden çok dosyanın tüm vektörlerini siler; silinen sayıyı döner."""
+
+    @abstractmethod
+    def delete_by_chunks(self, chunk_ids: Sequence[int], batch_size: Optional[int] = None) -> int:
+        """
+        chunk_id alanı verilen child chunk id'lerinden biri olan vektörleri siler. Sahipliği devredilmiş içeriğin
+        vektörleri ilk yükleyen dosyanın file_id'sini taşıdığından içerik silinirken dosyadan bağımsız temizlik içindir.
+        """
+
+    @abstractmethod
+    def search(self, query_embedding: List[float], top_k: int = 5, filter_expr: Optional[str] = None, similarity_threshold: float = 0.5, tenant_id: Optional[str] = None):
+        """
+        En benzer top_k vektör. filter_expr Milvus boolean ifadesidir (ör. 'file_id in ["a"] and chunk_id > 3');
+        tenant_id verilirse arama o tenant'la sınırlanır.
+        """
+
+    def search_many(self, query_embeddings, top_k: int = 5, filter_expr: Optional[str] = None, tenant_id: Optional[str] = None) -> List[List]:
+        """
+        Çok sorgulu arama (nq = len(query_embeddings)): sorgu sırasıyla her sorgu için hit listesi döner, yani
+        search(q) == search_many([q]). Varsayılan uygulama sorgu başına search çağırır; backend'ler tek çağrıda yapar.
+        """
+        return [self.search(query, top_k=top_k, filter_expr=filter_expr, tenant_id=tenant_id)[0] for query in query_embeddings]
+
+    def open(self) -> None:
+        """Bağlantıyı kurar ve koleksiyonu yükler; açılışta çağrılır, aksi halde ilk işlemde tembel yapılır."""
+
+    @abstractmethod
+    def health(self) -> Dict:
+        """Hazır olma durumu: en az {"ready": bool, "backend": str}."""
+
+    def check(self) -> Dict:
+        """Aktif sağlık kontrolü (gerekirse yeniden bağlanır); health() sonucunu döner."""
+        try:
+            self.open()
+        except Exception:
+            pass
+        return self.health()
+
+    @abstractmethod
+    def flush(self) -> None:
+        """Eklenen ve silinen vektörleri kalıcı hale getirir."""
+
+    @abstractmethod
+    def drop(self) -> None:
+        """Koleksiyonu tüm vektörleriyle siler (benchmark ve testler için)."""
+
+    # Async karşılıklar: çağrılar VectorStoreExecutor'da, event loop'u bloklamadan ve zaman aşımıyla çalışır.
+    # Async kod (chat, ingestion, cleanup) bu metotları kullanmalıdır.
+
+    async def search_async(self, query_embedding: List[float], top_k: int = 5, filter_expr: Optional[str] = None, tenant_id: Optional[str] = None, timeout: Optional[float] = None):
+        return await get_vector_store_executor().run(
+            "read", self.search, query_embedding, top_k=top_k, filter_expr=filter_expr, tenant_id=tenant_id, timeout=timeout
+        )
+
+    async def search_many_async(self, query_embeddings, top_k: int = 5, filter_expr: Optional[str] = None, tenant_id: Optional[str] = None, timeout: Optional[float] = None) -> List[List]:
+        return await get_vector_store_executor().run(
+            "read", self.search_many, query_embeddings, top_k=top_k, filter_expr=filter_expr, tenant_id=tenant_id, timeout=timeout
+        )
+
+    async def insert_embeddings_async(self, embeddings, metadata: List, batch_size: Optional[int] = None, async_insert: bool = False, flush: bool = False, timeout: Optional[float] = None) -> List[int]:
+        return await get_vector_store_executor().run(
+            "write", self.insert_embeddings, embeddings, metadata, batch_size=batch_size, async_insert=async_insert, flush=flush, timeout=timeout
+        )
+
+    async def delete_embeddings_async(self, ids: List[int], timeout: Optional[float] = None) -> int:
+        return await get_vector_store_executor().run("write", self.delete_embeddings, ids, timeout=timeout)
+
+    async def delete_by_file_async(self, file_ids: Union[str, Sequence[str]], timeout: Optional[float] = None) -> int:
+        return await get_vector_store_executor().run("write", self.delete_by_file, file_ids, timeout=timeout)
+
+    async def delete_by_chunks_async(self, chunk_ids: Sequence[int], timeout: Optional[float] = None) -> int:
+        return await get_vector_store_executor().run("write", self.delete_by_chunks, chunk_ids, timeout=timeout)
+
+    async def flush_async(self, timeout: Optional[float] = None) -> None:
+        return await get_vector_store_executor().run("write", self.flush, timeout=timeout)
+
+# Koleksiyon adı başına paylaşılan depolar
+_vector_stores: Dict[tuple, VectorStore] = {}
+_vector_stores_lock = threading.Lock()
+
+def create_vector_store(backend: Optional[str] = None, collection_name: Optional[str] = None, **kwargs) -> VectorStore:
+    """VECTOR_STORE_BACKEND (milvus | embedded) ile seçilen backend'in yeni bir örneği."""
+    backend = (backend or os.getenv('VECTOR_STORE_BACKEND', 'milvus')).lower()
+    if backend == "milvus":
+        from backend.services.milvus_service import MilvusService
+        return MilvusService(collection_name=collection_name, **kwargs)
+    if backend == "embedded":
+        from backend.services.embedded_vector_store import EmbeddedVectorStore
+        return EmbeddedVectorStore(collection_name=collection_name, **kwargs)
+    raise ValueError(f"Unknown vector store backend {backend}; expected one of {list(BACKENDS)}")
+
+def get_vector_store(collection_name: Optional[str] = None) -> VectorStore:
+    """Process genelinde paylaşılan vektör deposu (embedded backend'de vektörler ve kayıtlar bir kez yüklenir)."""
+    key = (os.getenv('VECTOR_STORE_BACKEND', 'milvus').lower(), collection_name)
+    with _vector_stores_lock:
+        if key not in _vector_stores:
+            _vector_stores[key] = create_vector_store(key[0], collection_name)
+        return _vector_stores[key]
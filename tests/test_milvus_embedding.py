@@ -37,4 +37,25 @@ def test_milvus_embedding_integration():
         if hasattr(hit, 'entity') and hit.entity.get('metadata', '') == metadata:
             found = True
             break
-    assert found, "Eklenen embedding arama ile bulunamadı!" 
\ No newline at end of file
+    assert found, "Eklenen embedding arama ile bulunamadı!" 
+
+def test_milvus_bulk_insert_returns_primary_keys():
+    embedding_service = EmbeddingService()
+    milvus_service = MilvusService(collection_name="test_embeddings_bulk", insert_batch_size=2)
+
+    try:
+        from pymilvus import utility
+        if utility.has_collection("test_embeddings_bulk"):
+            utility.drop_collection("test_embeddings_bulk")
+    except Exception:
+        pass
+
+    texts = [f"Hyperion bulk insert örnek metin {i}" for i in range(5)]
+    embeddings = embedding_service.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    metadata = [{"parent_id": 1, "order": i} for i in range(5)]
+
+    # 5 vektör, batch boyutu 2 -> 3 batch
+    primary_keys = milvus_service.insert_embeddings(embeddings, metadata, async_insert=True, flush=True)
+
+    assert len(primary_keys) == 5
+    assert len(set(primary_keys)) == 5
@@ -0,0 +1,39 @@
+import os
+import time
+import uuid
+from fastapi.testclient import TestClient
+from backend.main import app
+
+def _wait_for_job(client, job_id, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(1)
+    raise TimeoutError(job_id)
+
+def test_replace_reuses_unchanged_chunks():
+    with TestClient(app) as client:
+        with open(os.path.join(os.path.dirname(__file__), "test_document.pdf"), "rb") as f:
+            original = f.read()
+        # Benzersiz içerik: PDF sonuna yorum satırı ekle; chunk metni aynı kalır
+        first = client.post("/upload", files={"file": ("doc.pdf", original + f"\n% {uuid.uuid4()}\n".encode(), "application/pdf")})
+        assert first.status_code == 200, first.text
+        file_id = first.json()["file_id"]
+        assert _wait_for_job(client, first.json()["job_id"])["status"] == "completed"
+
+        revision = original + f"\n% {uuid.uuid4()}\n".encode()
+        replaced = client.post(f"/files/{file_id}/replace", files={"file": ("doc-v2.pdf", revision, "application/pdf")})
+        assert replaced.status_code == 200, replaced.text
+        assert replaced.json()["file_id"] == file_id
+        job = _wait_for_job(client, replaced.json()["job_id"])
+        assert job["status"] == "completed"
+        assert job["mode"] == "replace"
+        assert job["chunks_removed"] == 0
+        assert job["chunks_reused"] == job["chunks_total"]
+        assert job["chunks_embedded"] == 0
+
+        unchanged = client.post(f"/files/{file_id}/replace", files={"file": ("doc-v2.pdf", revision, "application/pdf")})
+        assert unchanged.json()["status"] == "unchanged"
+        assert client.delete(f"/files/{file_id}").status_code == 200
@@ -0,0 +1,30 @@
+import os
+import uuid
+from fastapi.testclient import TestClient
+from backend.main import app
+
+def _upload(client, payload: bytes):
+    return client.post("/upload", files={"file": ("dedup.pdf", payload, "application/pdf")})
+
+def test_duplicate_upload_shares_content():
+    with TestClient(app) as client:
+        with open(os.path.join(os.path.dirname(__file__), "test_document.pdf"), "rb") as f:
+            # Her test çalıştırmasında benzersiz içerik: PDF sonuna yorum satırı ekle
+            payload = f.read() + f"\n% {uuid.uuid4()}\n".encode()
+
+        first = _upload(client, payload)
+        assert first.status_code == 200, first.text
+        assert first.json()["status"] == "queued"
+
+        second = _upload(client, payload)
+        assert second.status_code == 200, second.text
+        body = second.json()
+        assert body["status"] == "duplicate"
+        assert body["job_id"] is None
+        assert body["sha256"] == first.json()["sha256"]
+
+        # İlk kaydı silmek paylaşılan içeriği ikinci kayda devreder
+        assert client.delete(f"/files/{first.json()['file_id']}").status_code == 200
+        files = {f["file_id"]: f for f in client.get("/files").json()}
+        assert body["file_id"] in files
+        assert client.delete(f"/files/{body['file_id']}").status_code == 200